@@ -0,0 +1,34 @@
+"""Add covering (session_id, exercise_type) index for exercise history
+
+Revision ID: 2b9d4f7c1e60
+Revises: 5c7e1a9b3d28
+Create Date: 2026-10-18 15:24:08.417352
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2b9d4f7c1e60'
+down_revision: Union[str, Sequence[str], None] = '5c7e1a9b3d28'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_exercise_session_type',
+        'exercises',
+        ['session_id', 'exercise_type'],
+        unique=False,
+        postgresql_include=['id', 'weight_kg', 'repetitions', 'duration_seconds', 'distance_meters'],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_exercise_session_type', table_name='exercises')
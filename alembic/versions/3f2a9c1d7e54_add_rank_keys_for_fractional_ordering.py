@@ -0,0 +1,38 @@
+"""Add rank keys for fractional ordering
+
+Revision ID: 3f2a9c1d7e54
+Revises: 57123e26b043
+Create Date: 2026-10-18 09:12:44.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f2a9c1d7e54'
+down_revision: Union[str, Sequence[str], None] = '57123e26b043'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('blocks', sa.Column('rank', sa.String(length=64), nullable=True, comment='Sortable rank key in the session timeline (fractional ordering mode)'))
+    op.create_index('ix_block_session_rank', 'blocks', ['session_id', 'rank'], unique=False)
+    op.add_column('exercises', sa.Column('rank', sa.String(length=64), nullable=True, comment='Sortable rank key in the session timeline (fractional ordering mode)'))
+    op.add_column('exercises', sa.Column('rank_in_block', sa.String(length=64), nullable=True, comment='Sortable rank key inside a block (fractional ordering mode)'))
+    op.create_index('ix_exercise_block_rank', 'exercises', ['block_id', 'rank_in_block'], unique=False)
+    op.create_index('ix_exercise_session_rank', 'exercises', ['session_id', 'rank'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_exercise_session_rank', table_name='exercises')
+    op.drop_index('ix_exercise_block_rank', table_name='exercises')
+    op.drop_column('exercises', 'rank_in_block')
+    op.drop_column('exercises', 'rank')
+    op.drop_index('ix_block_session_rank', table_name='blocks')
+    op.drop_column('blocks', 'rank')
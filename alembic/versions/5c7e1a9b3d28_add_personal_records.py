@@ -0,0 +1,45 @@
+"""Add personal records
+
+Revision ID: 5c7e1a9b3d28
+Revises: 8d4e6b2f9a13
+Create Date: 2026-10-18 13:25:09.471822
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c7e1a9b3d28'
+down_revision: Union[str, Sequence[str], None] = '8d4e6b2f9a13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('personal_records',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    # The exercisetype enum already exists (exercises table)
+    sa.Column('exercise_type', postgresql.ENUM(name='exercisetype', create_type=False), nullable=False),
+    sa.Column('metric', sa.Enum('max_weight', 'max_reps', 'best_time', 'longest_distance', name='recordmetric'), nullable=False),
+    sa.Column('qualifier', sa.Float(), nullable=False, comment='Weight (max reps) or distance (best time) the record applies to, 0 otherwise'),
+    sa.Column('value', sa.Float(), nullable=False),
+    sa.Column('exercise_id', sa.Integer(), nullable=True, comment='Exercise holding the record'),
+    sa.ForeignKeyConstraint(['exercise_id'], ['exercises.id'], ondelete='SET NULL'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'exercise_type', 'metric', 'qualifier', name='uix_record_user_type_metric')
+    )
+    op.create_index('ix_record_exercise', 'personal_records', ['exercise_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_record_exercise', table_name='personal_records')
+    op.drop_table('personal_records')
+    sa.Enum(name='recordmetric').drop(op.get_bind(), checkfirst=True)
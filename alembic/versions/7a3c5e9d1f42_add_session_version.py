@@ -0,0 +1,31 @@
+"""Add a version counter to sessions for conditional GETs
+
+Revision ID: 7a3c5e9d1f42
+Revises: 2b9d4f7c1e60
+Create Date: 2026-10-18 17:02:31.584210
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7a3c5e9d1f42'
+down_revision: Union[str, Sequence[str], None] = '2b9d4f7c1e60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'sessions',
+        sa.Column('version', sa.Integer(), server_default='0', nullable=False),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('sessions', 'version')
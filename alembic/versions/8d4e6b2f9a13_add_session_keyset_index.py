@@ -0,0 +1,28 @@
+"""Add (user_id, date, id) index for keyset pagination of sessions
+
+Revision ID: 8d4e6b2f9a13
+Revises: 3f2a9c1d7e54
+Create Date: 2026-10-18 11:02:37.590114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d4e6b2f9a13'
+down_revision: Union[str, Sequence[str], None] = '3f2a9c1d7e54'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_session_user_date_id', 'sessions', ['user_id', 'date', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_session_user_date_id', table_name='sessions')
@@ -0,0 +1,402 @@
+"""
+Synthetic dataset at production scale, for load tests and benchmarks.
+
+Users train at shared locations (boxes and gyms) for up to --years, each
+at their own rate, with a realistic mix of session, block and exercise
+types. Loads get heavier as users progress, and their personal records
+are computed along the way. The same --seed and --scale always give the
+same data, ids included.
+
+Rows are generated as a stream and written in batches with COPY on
+PostgreSQL (multi-row INSERTs on other databases), bypassing the
+services, into the empty tables of a migrated database:
+
+    python -m benchmarks.dataset [--scale 1] [--seed 42] [--years 3]
+        [--database-url URL]
+
+--scale 1 is 250 users and about 1M exercises; --scale 10 is about 10M.
+Without --database-url, the database of the settings is used. Ranks are
+filled in for the fractional ordering mode when it is the one configured.
+"""
+
+import argparse
+import csv
+import enum
+import io
+import random
+import sys
+import time
+from collections.abc import Iterator
+from datetime import date, timedelta
+from functools import cache
+from typing import NamedTuple
+
+from sqlalchemy import Table, create_engine, func, insert, select, text
+from sqlalchemy.orm import Session as DBSession
+from sqlalchemy.orm import sessionmaker
+
+from src.core.settings import settings
+from src.data.models import (
+    Block,
+    BlockType,
+    Exercise,
+    ExerciseType,
+    Location,
+    LocationType,
+    PersonalRecord,
+    Session,
+    SessionType,
+    User,
+)
+from src.services.ordering_service import OrderingService
+from src.services.ranking import evenly_spaced_keys
+from src.services.record_service import METRICS, RecordService
+
+USERS_PER_SCALE = 250
+USERS_PER_LOCATION = 25
+# Last day of the generated history: fixed, so that runs compare
+END_DATE = date(2025, 12, 31)
+# Exercises generated before each write (the other tables follow)
+BATCH_EXERCISES = 100_000
+
+SESSION_TYPES = {
+    SessionType.wod: 45,
+    SessionType.weightlifting: 15,
+    SessionType.gym: 10,
+    SessionType.fbb: 8,
+    SessionType.hyrox: 7,
+    SessionType.open: 6,
+    SessionType.team: 5,
+    SessionType.compet: 4,
+}
+BLOCK_TYPES = {
+    BlockType.metcon: 25,
+    BlockType.for_time: 25,
+    BlockType.amrap: 20,
+    BlockType.emom: 15,
+    BlockType.skill: 15,
+}
+# Movements by how they are measured; any other one is counted in reps.
+# Barbell movements carry their base load (kg) for an average athlete.
+BARBELL = {
+    ExerciseType.back_squat: 100, ExerciseType.bear_complex: 50, ExerciseType.clean: 75,
+    ExerciseType.deadlift: 130, ExerciseType.front_squat: 85, ExerciseType.overhead_squat: 55,
+    ExerciseType.push_jerk: 70, ExerciseType.push_press: 60, ExerciseType.shoulder_press: 45,
+    ExerciseType.snatch: 55, ExerciseType.squat: 90, ExerciseType.sumo_deadlift_high_pull: 45,
+    ExerciseType.thruster: 45,
+}
+LOADED = {
+    ExerciseType.devil_press: 20, ExerciseType.kettlebell_snatch: 20,
+    ExerciseType.kettlebell_swing: 24, ExerciseType.man_maker: 17.5,
+    ExerciseType.medicine_ball_clean: 9, ExerciseType.wall_ball: 9,
+}
+# Tuples, not sets: the order of a set of strings changes between runs
+TIMED = (ExerciseType.plank, ExerciseType.hollow_rock)
+DISTANCE = (ExerciseType.bear_walk, ExerciseType.overhead_walking_lunge)
+BODYWEIGHT = tuple(
+    member for member in ExerciseType
+    if member not in BARBELL and member not in LOADED and member not in TIMED and member not in DISTANCE
+)
+BARBELL_TYPES = tuple(BARBELL)
+LOADED_TYPES = tuple(LOADED)
+
+
+class GeneratedExercise(NamedTuple):
+    # Columns of the exercises table, as RecordService.candidates reads them
+    id: int
+    exercise_type: ExerciseType
+    weight_kg: float | None
+    repetitions: int | None
+    duration_seconds: float | None
+    distance_meters: float | None
+    notes: str | None
+    session_id: int
+    block_id: int | None
+    position: int | None
+    position_in_block: int | None
+    rank: str | None
+    rank_in_block: str | None
+
+
+class Rows:
+    """
+    Rows waiting to be written, per table, and the last id of each table.
+    """
+
+    TABLES = ("users", "locations", "sessions", "blocks", "exercises", "personal_records")
+
+    def __init__(self):
+        self.pending: dict[str, list[tuple]] = {name: [] for name in self.TABLES}
+        self.last_id = dict.fromkeys(self.TABLES, 0)
+        self.written = dict.fromkeys(self.TABLES, 0)
+
+    def next_id(self, table: str) -> int:
+        self.last_id[table] += 1
+        return self.last_id[table]
+
+
+def _pick(rng: random.Random, weights: dict):
+    return rng.choices(list(weights), weights=list(weights.values()))[0]
+
+
+@cache
+def _ranks(count: int) -> tuple[str, ...]:
+    return tuple(evenly_spaced_keys(count))
+
+
+class Generator:
+    def __init__(self, seed: int, scale: float, years: int, ranked: bool):
+        self.rng = random.Random(seed)
+        self.users = max(1, round(USERS_PER_SCALE * scale))
+        self.start = END_DATE - timedelta(days=365 * years)
+        self.ranked = ranked
+        self.rows = Rows()
+        self.location_ids: list[int] = []
+
+    def locations(self) -> None:
+        for _ in range(max(1, self.users // USERS_PER_LOCATION)):
+            location_type = LocationType.crossfit if self.rng.random() < 0.6 else LocationType.gym
+            name = "Box" if location_type == LocationType.crossfit else "Gym"
+            location_id = self.rows.next_id("locations")
+            self.rows.pending["locations"].append((
+                location_id, f"{name} {location_id}", f"{self.rng.randint(1, 400)} Main Street",
+                location_type,
+            ))
+            self.location_ids.append(location_id)
+
+    def user(self) -> None:
+        """
+        Generate a user with their sessions, blocks, exercises and records.
+        """
+        rng = self.rng
+        user_id = self.rows.next_id("users")
+        self.rows.pending["users"].append((user_id, f"athlete{user_id:07d}"))
+        home = rng.choice(self.location_ids)
+        # Sessions a week, most users training 2 to 4 times
+        rate = min(6.0, max(0.25, rng.lognormvariate(1.0, 0.5)))
+        # Relative strength, and when they joined
+        strength = rng.uniform(0.6, 1.4)
+        days = (END_DATE - self.start).days
+        joined = self.start + timedelta(days=int(days * rng.random() ** 2))
+        active = (END_DATE - joined).days + 1
+        dates = sorted(
+            joined + timedelta(days=rng.randrange(active))
+            for _ in range(round(active / 7 * rate))
+        )
+
+        best: dict[tuple, tuple[float, int]] = {}
+        for session_date in dates:
+            progress = 1 + 0.15 * (session_date - self.start).days / 365
+            for exercise in self.session(user_id, home, session_date, strength * progress):
+                for key, value in RecordService.candidates(exercise).items():
+                    held = best.get(key)
+                    # Ties go to the first exercise, as in RecordDAO.best
+                    if held is None or (
+                        value < held[0] if METRICS[key[1]].lowest else value > held[0]
+                    ):
+                        best[key] = (value, exercise.id)
+
+        for (exercise_type, metric, qualifier), (value, exercise_id) in best.items():
+            self.rows.pending["personal_records"].append((
+                self.rows.next_id("personal_records"), user_id, exercise_type, metric,
+                qualifier, value, exercise_id,
+            ))
+
+    def session(
+        self, user_id: int, home: int, session_date: date, strength: float
+    ) -> Iterator[GeneratedExercise]:
+        rng = self.rng
+        session_type = _pick(rng, SESSION_TYPES)
+        draw = rng.random()
+        location_id = home if draw < 0.75 else rng.choice(self.location_ids) if draw < 0.9 else None
+        session_id = self.rows.next_id("sessions")
+        self.rows.pending["sessions"].append((
+            session_id, session_type.value, session_date, session_type, user_id, location_id,
+            None, 0,
+        ))
+
+        # Blocks are most of a WOD, free exercises most of a lifting session
+        items = rng.randint(2, 8)
+        block_share = 0.3 if session_type in (SessionType.weightlifting, SessionType.gym) else 0.7
+        ranks = _ranks(items) if self.ranked else [None] * items
+        for position in range(items):
+            if rng.random() >= block_share:
+                yield self.exercise(
+                    session_id, strength, position=position, rank=ranks[position],
+                    heavy=session_type == SessionType.weightlifting,
+                )
+                continue
+            block_type = _pick(rng, BLOCK_TYPES)
+            block_id = self.rows.next_id("blocks")
+            duration = None if block_type == BlockType.skill else float(rng.randint(6, 30))
+            self.rows.pending["blocks"].append((
+                block_id, block_type, duration, position, ranks[position], session_id, None,
+            ))
+            count = rng.randint(2, 5)
+            block_ranks = _ranks(count) if self.ranked else [None] * count
+            for index in range(count):
+                yield self.exercise(
+                    session_id, strength, block_id=block_id, position_in_block=index,
+                    rank_in_block=block_ranks[index], heavy=block_type == BlockType.skill,
+                )
+
+    def exercise(
+        self,
+        session_id: int,
+        strength: float,
+        *,
+        heavy: bool,
+        block_id: int | None = None,
+        position: int | None = None,
+        position_in_block: int | None = None,
+        rank: str | None = None,
+        rank_in_block: str | None = None,
+    ) -> GeneratedExercise:
+        rng = self.rng
+        weight = repetitions = duration = distance = None
+        draw = rng.random()
+        if heavy or draw < 0.3:
+            exercise_type = rng.choice(BARBELL_TYPES)
+            # Heavy sets: fewer reps, closer to the athlete's best
+            intensity = rng.uniform(0.75, 1.05) if heavy else rng.uniform(0.5, 0.8)
+            weight = max(20.0, round(BARBELL[exercise_type] * strength * intensity / 2.5) * 2.5)
+            repetitions = rng.randint(1, 5) if heavy else rng.randint(5, 15)
+        elif draw < 0.45:
+            exercise_type = rng.choice(LOADED_TYPES)
+            weight = LOADED[exercise_type]
+            repetitions = rng.randint(8, 30)
+        elif draw < 0.5:
+            exercise_type = rng.choice(TIMED)
+            duration = float(rng.randrange(30, 180, 15))
+        elif draw < 0.55:
+            exercise_type = rng.choice(DISTANCE)
+            distance = float(rng.randrange(10, 110, 10))
+            duration = round(distance / rng.uniform(0.5, 1.2), 1)
+        else:
+            exercise_type = rng.choice(BODYWEIGHT)
+            repetitions = rng.randint(5, 50)
+
+        exercise = GeneratedExercise(
+            id=self.rows.next_id("exercises"),
+            exercise_type=exercise_type,
+            weight_kg=weight,
+            repetitions=repetitions,
+            duration_seconds=duration,
+            distance_meters=distance,
+            notes=None,
+            session_id=session_id,
+            block_id=block_id,
+            position=position,
+            position_in_block=position_in_block,
+            rank=rank,
+            rank_in_block=rank_in_block,
+        )
+        self.rows.pending["exercises"].append(exercise)
+        return exercise
+
+
+# Tables in insertion order, with the columns of the generated tuples
+COLUMNS = {
+    "users": (User.__table__, ["id", "username"]),
+    "locations": (Location.__table__, ["id", "name", "address", "location_type"]),
+    "sessions": (
+        Session.__table__,
+        ["id", "name", "date", "session_type", "user_id", "location_id", "notes", "version"],
+    ),
+    "blocks": (
+        Block.__table__,
+        ["id", "block_type", "duration", "position", "rank", "session_id", "notes"],
+    ),
+    "exercises": (Exercise.__table__, list(GeneratedExercise._fields)),
+    "personal_records": (
+        PersonalRecord.__table__,
+        ["id", "user_id", "exercise_type", "metric", "qualifier", "value", "exercise_id"],
+    ),
+}
+
+
+def _csv_value(value):
+    # PostgreSQL enum types hold the member names
+    return value.name if isinstance(value, enum.Enum) else value
+
+
+def write(db: DBSession, rows: Rows) -> None:
+    """
+    Write the pending rows, parents first.
+    """
+    for name, (table, columns) in COLUMNS.items():
+        pending = rows.pending[name]
+        if not pending:
+            continue
+        if db.get_bind().dialect.name == "postgresql":
+            _copy(db, table, columns, pending)
+        else:
+            db.execute(insert(table), [dict(zip(columns, row)) for row in pending])
+        rows.written[name] += len(pending)
+        rows.pending[name] = []
+
+
+def _copy(db: DBSession, table: Table, columns: list[str], pending: list[tuple]) -> None:
+    buffer = io.StringIO()
+    # None is written as an unquoted empty field, read back as NULL
+    csv.writer(buffer).writerows([_csv_value(value) for value in row] for row in pending)
+    buffer.seek(0)
+    with db.connection().connection.cursor() as cursor:
+        cursor.copy_expert(
+            f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer
+        )
+
+
+def finish(db: DBSession) -> None:
+    """
+    Move the id sequences past the generated ids and refresh the planner
+    statistics (PostgreSQL).
+    """
+    if db.get_bind().dialect.name != "postgresql":
+        return
+    for table, _ in COLUMNS.values():
+        db.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), "
+            f"(SELECT coalesce(max(id), 0) + 1 FROM {table.name}), false)"
+        ))
+    db.commit()
+    with db.get_bind().connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("ANALYZE"))
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scale", type=float, default=1.0, help=f"{USERS_PER_SCALE} users per unit")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--database-url")
+    args = parser.parse_args(argv)
+
+    engine = create_engine(args.database_url or settings.database_url)
+    generator = Generator(args.seed, args.scale, args.years, OrderingService.is_enabled())
+    start = time.perf_counter()
+    with sessionmaker(bind=engine)() as db:
+        if db.scalar(select(func.count()).select_from(User)):
+            print("The database already holds users: generate into empty tables", file=sys.stderr)
+            return 1
+        generator.locations()
+        for _ in range(generator.users):
+            generator.user()
+            if len(generator.rows.pending["exercises"]) >= BATCH_EXERCISES:
+                write(db, generator.rows)
+        write(db, generator.rows)
+        db.commit()
+        finish(db)
+    engine.dispose()
+
+    elapsed = time.perf_counter() - start
+    written = generator.rows.written
+    print(
+        ", ".join(f"{count} {name}" for name, count in written.items())
+        + f" in {elapsed:.1f} s ({written['exercises'] / elapsed:.0f} exercises/s)"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
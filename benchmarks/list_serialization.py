@@ -0,0 +1,95 @@
+"""
+Serialization of a 1000-exercise list: the former path (ORM instances,
+per-item ExerciseRead validation with from_attributes, jsonable_encoder and
+the stdlib encoder, as FastAPI does for a response_model) against the Core
+rows + TypeAdapter.dump_json path used by the list endpoints.
+
+Runs on an in-memory SQLite database:
+
+    python -m benchmarks.list_serialization [--items 1000] [--repeat 50]
+"""
+
+import argparse
+import json
+import time
+from datetime import date
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from src.api.routes.exercise import EXERCISE_ROWS
+from src.api.schemas.exercise import ExerciseRead
+from src.data.models import Base, Exercise, ExerciseType, Session, SessionType, User
+from src.services.exercise_service import ExerciseService
+
+EXERCISE_MODELS = TypeAdapter(list[ExerciseRead])
+
+
+def seed(db, items: int) -> int:
+    db.add(User(id=1, username="bench"))
+    session = Session(name="Bench", date=date(2026, 1, 1), session_type=SessionType.wod, user_id=1)
+    db.add(session)
+    db.flush()
+    db.add_all(
+        Exercise(
+            exercise_type=ExerciseType.deadlift, session_id=session.id, position=position,
+            weight_kg=100.0, repetitions=5, notes="Heavy",
+        )
+        for position in range(items)
+    )
+    db.commit()
+    return session.id
+
+
+def orm_models(db, session_id: int) -> bytes:
+    exercises = db.scalars(
+        select(Exercise)
+        .where(Exercise.session_id == session_id)
+        .order_by(Exercise.position_in_block, Exercise.position)
+    ).all()
+    models = EXERCISE_MODELS.validate_python(exercises, from_attributes=True)
+    return json.dumps(jsonable_encoder(models)).encode()
+
+
+def core_rows(db, session_id: int) -> bytes:
+    return EXERCISE_ROWS.dump_json(ExerciseService(db).list_by_session(session_id))
+
+
+def measure(path, factory, session_id: int, repeat: int) -> float:
+    # Fresh session per run so that the ORM path builds its instances each time
+    best = float("inf")
+    for _ in range(repeat):
+        with factory() as db:
+            start = time.perf_counter()
+            path(db, session_id)
+            best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--items", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine)
+    with factory() as db:
+        session_id = seed(db, args.items)
+    with factory() as db:
+        assert json.loads(orm_models(db, session_id)) == json.loads(core_rows(db, session_id))
+
+    results = {
+        name: measure(path, factory, session_id, args.repeat)
+        for name, path in (("orm_models", orm_models), ("core_rows", core_rows))
+    }
+    for name, seconds in results.items():
+        print(f"{name:>10}: {seconds * 1000:7.2f} ms  {args.items / seconds:9.0f} items/s")
+    print(f"   speedup: {results['orm_models'] / results['core_rows']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,305 @@
+"""
+HTTP load test of a running API, modelling the peak hours of the boxes:
+athletes reading session trees (conditionally, as clients holding an
+ETag do), scrolling their history and reordering their sessions, and at
+the end of each class a burst of athletes logging their session exercise
+by exercise.
+
+Run it against the dataset of benchmarks.dataset, on a local server:
+
+    python -m benchmarks.dataset --scale 1
+    uvicorn src.main:app --workers 4
+    python -m benchmarks.load_test [--base-url http://127.0.0.1:8000]
+        [--users 250] [--concurrency 50] [--duration 60] [--warmup 5]
+        [--class-every 20] [--class-size 20] [--seed 42]
+        [--label "pool_size=5 workers=4"] [--output report.json]
+        [--baseline previous.json]
+
+Each virtual athlete draws its actions from its own seeded generator: with
+the same options, runs send the same traffic and their reports (latency
+percentiles and throughput per route, as JSON) compare. Requests started
+during the warmup are not measured. Sessions logged during the run are
+deleted at the end, so that runs leave the dataset as they found it.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import sys
+import time
+from collections import defaultdict
+from datetime import date, datetime, timezone
+
+import httpx
+
+# Actions of the athletes between classes, by weight
+ACTIONS = {"read_tree": 60, "scroll_history": 25, "reorder": 15}
+# Mean pause of an athlete between two actions (seconds)
+THINK_SECONDS = 0.5
+# Movements of the history charts
+HISTORY_TYPES = ["Deadlift", "Snatch", "Clean", "Thruster", "Burpee"]
+
+
+class Recorder:
+    """
+    Latency of the measured requests and count of failed ones, by route
+    template ("GET /sessions/{session_id}/tree").
+    """
+
+    def __init__(self, measure_from: float):
+        self.measure_from = measure_from
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.errors: dict[str, int] = defaultdict(int)
+
+    async def call(
+        self, client: httpx.AsyncClient, method: str, route: str, path: dict | None = None, **kwargs
+    ) -> httpx.Response | None:
+        """
+        Send a request to route (filled in with path), None if it failed
+        before getting a response.
+        """
+        key = f"{method} {route}"
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, route.format(**(path or {})), **kwargs)
+        except httpx.HTTPError:
+            response = None
+        if start >= self.measure_from:
+            self.latencies[key].append(time.perf_counter() - start)
+            if response is None or response.status_code >= 400:
+                self.errors[key] += 1
+        return response
+
+
+class Athlete:
+    """
+    Virtual user acting as one of the users of the dataset.
+    """
+
+    def __init__(self, client: httpx.AsyncClient, recorder: Recorder, rng: random.Random, user_id: int):
+        self.client = client
+        self.recorder = recorder
+        self.rng = rng
+        self.user_id = user_id
+        # Most recent sessions first, and the ETag of the trees read
+        self.session_ids: list[int] = []
+        self.etags: dict[int, str] = {}
+
+    async def call(self, method: str, route: str, path: dict | None = None, **kwargs):
+        return await self.recorder.call(self.client, method, route, path, **kwargs)
+
+    @staticmethod
+    def _json(response: httpx.Response | None) -> dict | None:
+        # Body of a successful response
+        return response.json() if response is not None and response.status_code < 300 else None
+
+    async def run(self, until: float) -> None:
+        await self.scroll_history()
+        while time.perf_counter() < until:
+            action = self.rng.choices(list(ACTIONS), weights=list(ACTIONS.values()))[0]
+            if self.session_ids or action == "scroll_history":
+                await getattr(self, action)()
+            await asyncio.sleep(self.rng.expovariate(1 / THINK_SECONDS))
+
+    async def read_tree(self) -> None:
+        # Mostly the last sessions, already read before
+        session_id = self.rng.choice(self.session_ids[:10])
+        headers = {"If-None-Match": self.etags[session_id]} if session_id in self.etags else {}
+        response = await self.call(
+            "GET", "/sessions/{session_id}/tree", {"session_id": session_id}, headers=headers
+        )
+        if response is not None and "etag" in response.headers:
+            self.etags[session_id] = response.headers["etag"]
+
+    async def scroll_history(self) -> None:
+        cursor = None
+        for page in range(self.rng.randint(1, 4)):
+            params = {"limit": 20} | ({"cursor": cursor} if cursor else {})
+            body = self._json(await self.call(
+                "GET", "/sessions/user/{user_id}", {"user_id": self.user_id}, params=params
+            ))
+            if body is None:
+                return
+            if page == 0:
+                self.session_ids = [session["id"] for session in body["items"]]
+            cursor = body["next_cursor"]
+            if cursor is None:
+                break
+            await asyncio.sleep(self.rng.uniform(0.1, 0.5))
+        await self.call(
+            "GET", "/users/{user_id}/exercises/{exercise_type}/history",
+            {"user_id": self.user_id, "exercise_type": self.rng.choice(HISTORY_TYPES)},
+            params={"max_points": 200},
+        )
+
+    async def reorder(self) -> None:
+        session_id = self.rng.choice(self.session_ids[:5])
+        tree = self._json(
+            await self.call("GET", "/sessions/{session_id}/tree", {"session_id": session_id})
+        )
+        if tree is None or len(tree["timeline"]) < 2:
+            return
+        # Swap two items of the timeline
+        timeline = [{"kind": node["kind"], "id": node["id"]} for node in tree["timeline"]]
+        first, second = self.rng.sample(range(len(timeline)), 2)
+        timeline[first], timeline[second] = timeline[second], timeline[first]
+        await self.call(
+            "PUT", "/sessions/{session_id}/order", {"session_id": session_id},
+            json={"timeline": timeline},
+        )
+
+    async def log_class(self) -> int | None:
+        """
+        Log a session exercise by exercise, then read it back. Returns the id
+        of the session created.
+        """
+        session = self._json(await self.call("POST", "/sessions/", json={
+            "name": "Class", "date": date.today().isoformat(), "session_type": "WOD",
+            "user_id": self.user_id,
+        }))
+        if session is None:
+            return None
+        for _ in range(self.rng.randint(3, 8)):
+            await self.call("POST", "/exercises/", json={
+                "exercise_type": self.rng.choice(HISTORY_TYPES),
+                "session_id": session["id"],
+                "weight_kg": self.rng.randrange(40, 140, 5),
+                "repetitions": self.rng.randint(1, 15),
+            })
+            await asyncio.sleep(self.rng.uniform(0.05, 0.3))
+        await self.call("GET", "/sessions/{session_id}/tree", {"session_id": session["id"]})
+        return session["id"]
+
+
+async def classes(
+    client: httpx.AsyncClient, recorder: Recorder, rng: random.Random, args, until: float
+) -> list[int]:
+    """
+    End a class every class_every seconds: class_size athletes log their
+    session at once. Returns the sessions logged.
+    """
+    logged = []
+    while time.perf_counter() + args.class_every < until:
+        await asyncio.sleep(args.class_every)
+        athletes = [
+            Athlete(client, recorder, random.Random(rng.random()), rng.randint(1, args.users))
+            for _ in range(args.class_size)
+        ]
+        logged += await asyncio.gather(*(athlete.log_class() for athlete in athletes))
+    return [session_id for session_id in logged if session_id is not None]
+
+
+def summary(latencies: list[float], errors: int, seconds: float) -> dict:
+    if len(latencies) > 1:
+        percentiles = statistics.quantiles(latencies, n=100, method="inclusive")
+        p50, p95, p99 = percentiles[49], percentiles[94], percentiles[98]
+    else:
+        p50 = p95 = p99 = latencies[0]
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / seconds, 2),
+        "latency_ms": {
+            name: round(value * 1000, 2)
+            for name, value in (("p50", p50), ("p95", p95), ("p99", p99), ("max", max(latencies)))
+        },
+    }
+
+
+async def run(args) -> dict:
+    rng = random.Random(args.seed)
+    limits = httpx.Limits(max_connections=args.concurrency + args.class_size)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=60) as client:
+        start = time.perf_counter()
+        recorder = Recorder(measure_from=start + args.warmup)
+        until = start + args.warmup + args.duration
+        athletes = [
+            Athlete(client, recorder, random.Random(rng.random()), rng.randint(1, args.users))
+            for _ in range(args.concurrency)
+        ]
+        *_, logged = await asyncio.gather(
+            *(athlete.run(until) for athlete in athletes),
+            classes(client, recorder, random.Random(rng.random()), args, until),
+        )
+        seconds = time.perf_counter() - recorder.measure_from
+        for session_id in logged:
+            await client.delete(f"/sessions/{session_id}")
+
+    every = [latency for latencies in recorder.latencies.values() for latency in latencies]
+    return {
+        "label": args.label,
+        "base_url": args.base_url,
+        "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "options": {
+            name: getattr(args, name)
+            for name in ("users", "concurrency", "duration", "warmup", "class_every", "class_size", "seed")
+        },
+        "seconds": round(seconds, 2),
+        "routes": {
+            route: summary(latencies, recorder.errors[route], seconds)
+            for route, latencies in sorted(recorder.latencies.items())
+        },
+        "total": summary(every, sum(recorder.errors.values()), seconds) if every else None,
+    }
+
+
+def print_report(report: dict, baseline: dict | None) -> None:
+    previous = (baseline or {}).get("routes", {})
+    if baseline is not None and baseline["options"] != report["options"]:
+        print(f"Baseline ran with other options: {baseline['options']}", file=sys.stderr)
+    print(f"{'route':<55} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'errors':>7}")
+    for route, stats in [*report["routes"].items(), ("total", report["total"])]:
+        if stats is None:
+            continue
+        latency = stats["latency_ms"]
+        print(
+            f"{route:<55} {stats['throughput_rps']:>8.1f} {latency['p50']:>8.1f} "
+            f"{latency['p95']:>8.1f} {latency['p99']:>8.1f} {stats['errors']:>7}"
+        )
+        before = (baseline or {}).get("total") if route == "total" else previous.get(route)
+        if before is not None:
+            print(
+                f"{'  vs baseline':<55} {_change(before['throughput_rps'], stats['throughput_rps']):>8} "
+                + " ".join(
+                    f"{_change(before['latency_ms'][name], latency[name]):>8}"
+                    for name in ("p50", "p95", "p99")
+                )
+            )
+
+
+def _change(before: float, after: float) -> str:
+    return f"{(after - before) / before:+.0%}" if before else "-"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--users", type=int, default=250, help="users of the dataset (ids 1 to users)")
+    parser.add_argument("--concurrency", type=int, default=50, help="athletes acting between classes")
+    parser.add_argument("--duration", type=float, default=60, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=5)
+    parser.add_argument("--class-every", type=float, default=20, help="seconds between two class ends")
+    parser.add_argument("--class-size", type=int, default=20, help="athletes logging at a class end")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--label", help="what this run tests, kept in the report")
+    parser.add_argument("--output")
+    parser.add_argument("--baseline", help="report of a previous run to compare with")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    baseline = None
+    if args.baseline is not None:
+        with open(args.baseline) as previous:
+            baseline = json.load(previous)
+    print_report(report, baseline)
+    if args.output is not None:
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2)
+            output.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
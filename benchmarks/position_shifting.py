@@ -0,0 +1,244 @@
+"""
+Position-shifting write paths of the block and exercise services, on
+seeded sessions: creating a block or a free exercise at the front, middle
+and end of the timeline, moving one there (update_block, update_exercise)
+and deleting the one found there. Each operation reports its latency, the
+statements it issued and the rows it wrote, in each ordering mode.
+
+Runs on an in-memory SQLite database, or on a throwaway PostgreSQL (its
+tables are dropped and created for each seed, then dropped):
+
+    python -m benchmarks.position_shifting [--sizes 10 100 1000] [--repeat 5]
+        [--modes dense fractional] [--database-url URL]
+        [--output results.json] [--baseline baseline.json]
+
+Results are written as JSON, to stdout without --output. With --baseline
+(the output of a previous run), operations issuing more statements or
+writing more rows than in the baseline are listed and the run exits with
+1; latencies are only reported, too noisy to compare across machines.
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from datetime import date
+from typing import NamedTuple
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from src.api.schemas.exercise import ExerciseDraft
+from src.api.schemas.session import BlockDraftNode, ExerciseDraftNode
+from src.core.query_stats import collect, instrument
+from src.core.settings import settings
+from src.data.models import Base, BlockType, ExerciseType, SessionType, User
+from src.services.block_service import BlockService
+from src.services.exercise_service import ExerciseService
+from src.services.session_service import SessionService
+
+WHERE = ("front", "middle", "end")
+
+
+class Seed(NamedTuple):
+    session_id: int
+    # Timeline items
+    size: int
+    # Blocks and free exercises, in timeline order
+    block_ids: list[int]
+    free_ids: list[int]
+
+
+def seed(factory, size: int) -> Seed:
+    """
+    A session of size timeline items, blocks of one exercise alternating
+    with free exercises.
+    """
+    timeline = [
+        BlockDraftNode(
+            block_type=BlockType.amrap,
+            exercises=[ExerciseDraft(exercise_type=ExerciseType.deadlift, weight_kg=100, repetitions=5)],
+        )
+        if index % 2 == 0
+        else ExerciseDraftNode(exercise_type=ExerciseType.burpee, repetitions=10)
+        for index in range(size)
+    ]
+    with factory() as db:
+        db.add(User(id=1, username="bench"))
+        db.flush()
+        tree = SessionService(db).create_full_session(
+            name="Bench", date=date(2026, 1, 1), session_type=SessionType.wod, user_id=1,
+            timeline=timeline,
+        )
+        db.commit()
+    return Seed(
+        session_id=tree.id,
+        size=size,
+        block_ids=[node.id for node in tree.timeline if node.kind == "block"],
+        free_ids=[node.id for node in tree.timeline if node.kind == "exercise"],
+    )
+
+
+def _at(ids: list[int], where: str) -> int:
+    # Item found at where
+    return ids[{"front": 0, "middle": len(ids) // 2, "end": -1}[where]]
+
+
+def _insert_at(s: Seed, where: str) -> int:
+    return {"front": 0, "middle": s.size // 2, "end": s.size}[where]
+
+
+def _mover(ids: list[int], where: str) -> int:
+    # Item moved to where: taken from the other end of the timeline
+    return ids[0] if where == "end" else ids[-1]
+
+
+def _move_to(s: Seed, where: str) -> int:
+    return {"front": 0, "middle": s.size // 2, "end": s.size - 1}[where]
+
+
+OPERATIONS = {
+    "create_block": lambda db, s, where: BlockService(db).create_block(
+        block_type=BlockType.emom, session_id=s.session_id, position=_insert_at(s, where)
+    ),
+    "create_exercise": lambda db, s, where: ExerciseService(db).create_exercise(
+        exercise_type=ExerciseType.burpee, session_id=s.session_id,
+        position=_insert_at(s, where), repetitions=20,
+    ),
+    "update_block": lambda db, s, where: BlockService(db).update_block(
+        _mover(s.block_ids, where), position=_move_to(s, where)
+    ),
+    "update_exercise": lambda db, s, where: ExerciseService(db).update_exercise(
+        _mover(s.free_ids, where), position=_move_to(s, where)
+    ),
+    "delete_block": lambda db, s, where: BlockService(db).delete_block(_at(s.block_ids, where)),
+    "delete_exercise": lambda db, s, where: ExerciseService(db).delete_exercise(
+        _at(s.free_ids, where)
+    ),
+}
+
+
+def rows_written(db) -> int:
+    """
+    Rows inserted, updated or deleted so far by the connection (SQLite) or
+    the transaction (PostgreSQL) of db, cascades included.
+    """
+    if db.get_bind().dialect.name == "sqlite":
+        return db.connection().connection.driver_connection.total_changes
+    return db.execute(text(
+        "SELECT coalesce(sum(n_tup_ins + n_tup_upd + n_tup_del), 0) FROM pg_stat_xact_user_tables"
+    )).scalar_one()
+
+
+def measure(factory, operation, s: Seed, where: str, repeat: int) -> dict:
+    # Each run in its own session, rolled back on close: every run starts
+    # from the seeded session
+    latencies = []
+    for _ in range(repeat):
+        with factory() as db:
+            before = rows_written(db)
+            with collect() as stats:
+                start = time.perf_counter()
+                operation(db, s, where)
+                db.flush()
+                latencies.append(time.perf_counter() - start)
+            written = rows_written(db) - before
+    return {
+        "statements": stats.statements,
+        "rows_written": written,
+        "latency_ms": {
+            "min": round(min(latencies) * 1000, 3),
+            "median": round(statistics.median(latencies) * 1000, 3),
+        },
+    }
+
+
+def _key(result: dict) -> tuple:
+    return result["ordering_mode"], result["size"], result["operation"], result["position"]
+
+
+def regressions(results: list[dict], baseline: dict) -> list[str]:
+    """
+    Operations issuing more statements or writing more rows than in the
+    baseline.
+    """
+    previous = {_key(result): result for result in baseline["results"]}
+    found = []
+    for result in results:
+        before = previous.get(_key(result))
+        if before is None:
+            continue
+        for metric in ("statements", "rows_written"):
+            if result[metric] > before[metric]:
+                found.append(
+                    f"{result['operation']} at {result['position']} "
+                    f"({result['size']} items, {result['ordering_mode']}): "
+                    f"{metric} {before[metric]} -> {result[metric]}"
+                )
+    return found
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--modes", nargs="+", choices=["dense", "fractional"], default=["dense", "fractional"])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--database-url")
+    parser.add_argument("--output")
+    parser.add_argument("--baseline")
+    args = parser.parse_args()
+
+    if args.database_url is None:
+        engine = create_engine(
+            "sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False}
+        )
+        # Cascades in the database, as on PostgreSQL
+        event.listen(engine, "connect", lambda conn, _: conn.execute("PRAGMA foreign_keys=ON"))
+    else:
+        engine = create_engine(args.database_url)
+    instrument(engine)
+    factory = sessionmaker(bind=engine, autoflush=False)
+
+    results = []
+    try:
+        for mode in args.modes:
+            settings.ordering_mode = mode
+            for size in args.sizes:
+                Base.metadata.drop_all(engine)
+                Base.metadata.create_all(engine)
+                s = seed(factory, size)
+                for name, operation in OPERATIONS.items():
+                    for where in WHERE:
+                        results.append({
+                            "ordering_mode": mode,
+                            "size": size,
+                            "operation": name,
+                            "position": where,
+                            **measure(factory, operation, s, where, args.repeat),
+                        })
+    finally:
+        Base.metadata.drop_all(engine)
+        engine.dispose()
+
+    report = json.dumps(
+        {"database": engine.dialect.name, "repeat": args.repeat, "results": results}, indent=2
+    )
+    if args.output is None:
+        print(report)
+    else:
+        with open(args.output, "w") as output:
+            output.write(report + "\n")
+
+    if args.baseline is not None:
+        with open(args.baseline) as baseline:
+            found = regressions(results, json.load(baseline))
+        for regression in found:
+            print(f"Regression: {regression}", file=sys.stderr)
+        return 1 if found else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
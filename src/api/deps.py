@@ -1,8 +1,89 @@
-from src.core.database import SessionLocal
+import math
+import time
+from collections.abc import AsyncIterator, Callable, Iterator
+from typing import TYPE_CHECKING, ParamSpec, TypeVar
 
-def get_db():
-    db = SessionLocal()
+from fastapi import Request, Response
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from src.core import profiling
+from src.core.database import async_unit_of_work, has_replica, unit_of_work
+from src.core.settings import settings
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+P = ParamSpec("P")
+T = TypeVar("T")
+
+# Time until which a client reads from the primary, set on its writes
+PRIMARY_UNTIL_COOKIE = "primary_until"
+
+
+class Database:
+    """
+    Database session of a request, for async endpoints.
+
+    Services and DAOs are written against a sync Session. run() calls them
+    without blocking the event loop: in a threadpool thread in the sync
+    database mode, through AsyncSession.run_sync (asyncpg, no thread held
+    while waiting on the database) in the async mode.
+    """
+
+    def __init__(self, session: Session, async_session: "AsyncSession | None" = None):
+        self.session = session
+        self._async_session = async_session
+
+    async def run(self, fn: Callable[P, T], /, *args: P.args, **kwargs: P.kwargs) -> T:
+        # Sampled wherever it runs if the request is profiled
+        fn = profiling.follow(fn)
+        if self._async_session is None:
+            return await run_in_threadpool(fn, *args, **kwargs)
+        return await self._async_session.run_sync(lambda _: fn(*args, **kwargs))
+
+
+def _use_replica(request: Request, response: Response) -> bool:
+    """
+    Whether a request can be served by the read replica: GET and HEAD
+    requests only (their handlers do not write), unless the client wrote
+    less than read_your_writes_seconds ago. Writes set the cookie that
+    keeps their client on the primary meanwhile.
+    """
+    if not has_replica():
+        return False
+    now = time.time()
+    if request.method not in ("GET", "HEAD"):
+        response.set_cookie(
+            PRIMARY_UNTIL_COOKIE,
+            f"{now + settings.read_your_writes_seconds:.3f}",
+            max_age=math.ceil(settings.read_your_writes_seconds),
+            httponly=True,
+        )
+        return False
     try:
-        yield db
-    finally:
-        db.close()
+        primary_until = float(request.cookies.get(PRIMARY_UNTIL_COOKIE, 0))
+    except ValueError:
+        primary_until = 0
+    return now >= primary_until
+
+
+def _sync_database(request: Request, response: Response) -> Iterator[Database]:
+    """
+    One unit of work per request: the transaction is committed once the
+    endpoint returns, or rolled back if it raises.
+    Routes declare it with scope="function" so the commit happens before
+    the response is sent. Being a sync dependency, it commits in the
+    threadpool. Reads go to the replica when possible (see _use_replica).
+    """
+    with unit_of_work(replica=_use_replica(request, response)) as db:
+        yield Database(db)
+
+
+async def _async_database(request: Request, response: Response) -> AsyncIterator[Database]:
+    async with async_unit_of_work(replica=_use_replica(request, response)) as db:
+        yield Database(db.sync_session, db)
+
+
+# The database mode is read at startup
+get_database = _async_database if settings.database_mode == "async" else _sync_database
@@ -0,0 +1,183 @@
+"""
+Timing of every request by route template: wall time, number of SQL
+statements and time spent in them (see src.core.query_stats). Exposed as
+metrics, in a Server-Timing header, and logged with the costliest
+statements for slow requests.
+
+Opt-in profiling of single requests (see src.core.profiling), stored with
+their SQL trace under the id returned in the X-Profile-Id header.
+"""
+
+import logging
+import random
+import secrets
+import time
+from pathlib import Path
+from uuid import uuid4
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.core import metrics, profiling, query_stats
+from src.core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+REQUEST_SECONDS = metrics.histogram(
+    "http_request_duration_seconds",
+    "Time to serve requests, by route template",
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+REQUEST_STATEMENTS = metrics.histogram(
+    "http_request_db_statements",
+    "SQL statements issued per request, by route template",
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 200),
+)
+REQUEST_DB_SECONDS = metrics.histogram(
+    "http_request_db_seconds",
+    "Time spent in SQL statements per request, by route template",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+# Distinct statements listed in the log of a slow request
+SLOW_LOG_STATEMENTS = 10
+
+
+class TimingMiddleware:
+    """
+    Pure ASGI middleware: the endpoint runs in the context that collects its
+    statements, and streamed bodies are timed until their last chunk.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+
+        with query_stats.collect() as stats:
+            async def send_with_timing(message: Message) -> None:
+                if message["type"] == "http.response.start" and settings.server_timing:
+                    MutableHeaders(scope=message).append(
+                        "Server-Timing", server_timing(time.perf_counter() - start, stats)
+                    )
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_timing)
+            finally:
+                _observe(scope, time.perf_counter() - start, stats)
+
+
+def server_timing(seconds: float, stats: query_stats.QueryStats) -> str:
+    """
+    Server-Timing value of a request that took seconds so far.
+    """
+    return (
+        f"total;dur={seconds * 1000:.1f}, "
+        f'db;dur={stats.seconds * 1000:.1f};desc="{stats.statements} statements"'
+    )
+
+
+def _observe(scope: Scope, seconds: float, stats: query_stats.QueryStats) -> None:
+    # The router stores the matched route in the scope; unmatched paths
+    # share one label so that they cannot grow the metrics
+    route = getattr(scope.get("route"), "path", "unmatched")
+    labels = {"route": route, "method": scope["method"]}
+    REQUEST_SECONDS.observe(seconds, **labels)
+    REQUEST_STATEMENTS.observe(stats.statements, **labels)
+    REQUEST_DB_SECONDS.observe(stats.seconds, **labels)
+    if seconds >= settings.slow_request_seconds:
+        logger.warning(
+            "Slow request %s %s: %.0f ms, %d SQL statements in %.0f ms%s",
+            scope["method"],
+            route,
+            seconds * 1000,
+            stats.statements,
+            stats.seconds * 1000,
+            "".join(
+                f"\n  {count}x {total * 1000:.1f} ms: {statement}"
+                for statement, count, total in stats.costliest(SLOW_LOG_STATEMENTS)
+            ),
+        )
+
+
+class ProfilingMiddleware:
+    """
+    Pure ASGI middleware profiling a fraction (profile_sample_rate) of the
+    requests, and those sending the X-Profile header with the
+    profile_token. The profile is written once the response is sent.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not _profiled(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = uuid4().hex
+        status = None
+        start = time.perf_counter()
+
+        async def send_with_id(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                MutableHeaders(scope=message).append("X-Profile-Id", profile_id)
+            await send(message)
+
+        try:
+            with (
+                profiling.profile(settings.profile_interval) as result,
+                query_stats.collect(trace=True) as stats,
+            ):
+                await self.app(scope, receive, send_with_id)
+        finally:
+            # Failed requests are kept too
+            seconds = time.perf_counter() - start
+            await run_in_threadpool(_store, profile_id, scope, status, seconds, result, stats)
+
+
+def _profiled(scope: Scope) -> bool:
+    token = Headers(scope=scope).get("x-profile")
+    if token is not None and settings.profile_token:
+        return secrets.compare_digest(token, settings.profile_token)
+    return random.random() < settings.profile_sample_rate
+
+
+def _store(
+    profile_id: str,
+    scope: Scope,
+    status: int | None,
+    seconds: float,
+    result: profiling.Profile,
+    stats: query_stats.QueryStats,
+) -> None:
+    report = {
+        "id": profile_id,
+        "method": scope["method"],
+        "route": getattr(scope.get("route"), "path", "unmatched"),
+        "path": scope["path"],
+        # None if the request failed before responding
+        "status": status,
+        "duration_ms": round(seconds * 1000, 3),
+        "interval_ms": result.interval * 1000,
+        "samples": result.samples,
+        "sql": [
+            {"statement": statement, "duration_ms": round(duration * 1000, 3)}
+            for statement, duration in stats.trace
+        ],
+    }
+    directory = Path(settings.profile_directory)
+    try:
+        profiling.save(directory, profile_id, result, report)
+        profiling.prune(directory, settings.profile_keep, settings.profile_max_age_days * 86400)
+    except OSError:
+        # The response is already sent: losing the profile must not fail it
+        logger.exception("Could not store profile %s", profile_id)
@@ -0,0 +1,73 @@
+"""
+Response helpers.
+
+Fast JSON responses for read-only lists: list endpoints return plain dicts
+read with SQLAlchemy Core and serialize them with a TypeAdapter over a
+TypedDict. pydantic-core writes the JSON in one compiled pass, without an
+ORM instance, a model validation or a jsonable_encoder round trip per item.
+Only the keys of the TypedDict are written, so rows may hold extra columns.
+
+Conditional GETs: a session and its contents are tagged with the session
+version (see Session.version). A client sending back the current tag in
+If-None-Match gets a 304 after a single primary key lookup.
+
+Streamed responses are gzipped on the fly for clients accepting it.
+"""
+
+import zlib
+from collections.abc import Iterable, Iterator
+from typing import Any
+
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+
+
+def json_rows(adapter: TypeAdapter[Any], rows: Any) -> Response:
+    return Response(adapter.dump_json(rows), media_type="application/json")
+
+
+def session_etag(session_id: int, version: int) -> str:
+    return f'"s{session_id}.v{version}"'
+
+
+def not_modified(request: Request, etag: str) -> Response | None:
+    """
+    A 304 response if the client already holds etag, else None.
+    """
+    header = request.headers.get("if-none-match")
+    if header is None:
+        return None
+    tags = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    if etag in tags or "*" in tags:
+        return Response(status_code=304, headers={"ETag": etag})
+    return None
+
+
+def accepts_gzip(request: Request) -> bool:
+    """
+    Whether Accept-Encoding lists gzip (with a non-zero quality).
+    """
+    for coding in request.headers.get("accept-encoding", "").split(","):
+        name, *params = coding.split(";")
+        if name.strip().lower() != "gzip":
+            continue
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip() == "q":
+                try:
+                    return float(value) > 0
+                except ValueError:
+                    return False
+        return True
+    return False
+
+
+def gzip_chunks(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """
+    Compress a stream of chunks into a single gzip stream.
+    """
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)  # gzip container
+    for chunk in chunks:
+        if compressed := compressor.compress(chunk):
+            yield compressed
+    yield compressor.flush()
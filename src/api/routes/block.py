@@ -1,7 +1,8 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session as DBSession
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, Response
 
-from src.api.deps import get_db
+from src.api.deps import Database, get_database
+from src.api.responses import not_modified, session_etag
+from src.api.tasks import schedule_rebalance
 from src.api.schemas.block import (
     BlockCreate,
     BlockRead,
@@ -13,50 +14,69 @@ router = APIRouter(prefix="/blocks", tags=["blocks"])
 
 
 @router.post("/", response_model=BlockRead)
-def create_block(
+async def create_block(
     payload: BlockCreate,
-    db: DBSession = Depends(get_db),
+    background_tasks: BackgroundTasks,
+    db: Database = Depends(get_database, scope="function"),
 ):
+    service = BlockService(db.session)
     try:
-        return BlockService(db).create_block(**payload.model_dump())
+        block = await db.run(service.create_block, **payload.model_dump())
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
+    schedule_rebalance(background_tasks, service.ordering)
+    return block
 
 
 @router.get("/{block_id}", response_model=BlockRead)
-def get_block(block_id: int, db: DBSession = Depends(get_db)):
-    block = BlockService(db).get_block(block_id)
+async def get_block(block_id: int, db: Database = Depends(get_database, scope="function")):
+    block = await db.run(BlockService(db.session).get_block, block_id)
     if not block:
         raise HTTPException(status_code=404, detail="Block not found")
     return block
 
 
 @router.get("/session/{session_id}", response_model=list[BlockRead])
-def list_blocks_by_session(
+async def list_blocks_by_session(
     session_id: int,
-    db: DBSession = Depends(get_db),
+    request: Request,
+    response: Response,
+    db: Database = Depends(get_database, scope="function"),
 ):
-    return BlockService(db).list_blocks_by_session(session_id)
+    service = BlockService(db.session)
+    version = await db.run(service.session_version, session_id)
+    if version is None:
+        return []
+    etag = session_etag(session_id, version)
+    if cached := not_modified(request, etag):
+        return cached
+    response.headers["ETag"] = etag
+    return await db.run(service.list_blocks_by_session, session_id)
 
 
 @router.patch("/{block_id}", response_model=BlockRead)
-def update_block(
+async def update_block(
     block_id: int,
     payload: BlockUpdate,
-    db: DBSession = Depends(get_db),
+    background_tasks: BackgroundTasks,
+    db: Database = Depends(get_database, scope="function"),
 ):
+    service = BlockService(db.session)
     try:
-        return BlockService(db).update_block(
+        block = await db.run(
+            service.update_block,
             block_id,
             **payload.model_dump(exclude_unset=True),
         )
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
+    schedule_rebalance(background_tasks, service.ordering)
+    return block
 
 
 @router.delete("/{block_id}", status_code=204)
-def delete_block(block_id: int, db: DBSession = Depends(get_db)):
+async def delete_block(block_id: int, db: Database = Depends(get_database, scope="function")):
     try:
-        BlockService(db).delete_block(block_id)
+        await db.run(BlockService(db.session).delete_block, block_id)
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
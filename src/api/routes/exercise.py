@@ -1,62 +1,108 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session as DBSession
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request
+from pydantic import TypeAdapter
 
-from src.api.deps import get_db
-from src.api.schemas.exercise import ExerciseCreate, ExerciseRead, ExerciseUpdate
+from src.api.deps import Database, get_database
+from src.api.responses import json_rows, not_modified, session_etag
+from src.api.tasks import schedule_rebalance
+from src.api.schemas.exercise import (
+    ExerciseCreate,
+    ExerciseMove,
+    ExerciseRead,
+    ExerciseRow,
+    ExerciseUpdate,
+)
 from src.services.exercise_service import ExerciseService
 
 router = APIRouter(prefix="/exercises", tags=["exercises"])
 
+EXERCISE_ROWS = TypeAdapter(list[ExerciseRow])
+
 
 @router.post("/", response_model=ExerciseRead)
-def create_exercise(
+async def create_exercise(
     payload: ExerciseCreate,
-    db: DBSession = Depends(get_db),
+    background_tasks: BackgroundTasks,
+    db: Database = Depends(get_database, scope="function"),
 ):
+    service = ExerciseService(db.session)
     try:
-        exercise = ExerciseService(db).create_exercise(**payload.model_dump())
-        return exercise
+        exercise = await db.run(service.create_exercise, **payload.model_dump())
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    schedule_rebalance(background_tasks, service.ordering)
+    return exercise
 
 
 @router.get("/{exercise_id}", response_model=ExerciseRead)
-def get_exercise(exercise_id: int, db: DBSession = Depends(get_db)):
-    service = ExerciseService(db)
-    exercise = service.get_exercise(exercise_id)
+async def get_exercise(exercise_id: int, db: Database = Depends(get_database, scope="function")):
+    service = ExerciseService(db.session)
+    exercise = await db.run(service.get_exercise, exercise_id)
     if not exercise:
         raise HTTPException(status_code=404, detail="Exercise not found")
     return exercise
 
 
 @router.get("/session/{session_id}", response_model=list[ExerciseRead])
-def list_exercises_by_session(session_id: int, db: DBSession = Depends(get_db)):
-    service = ExerciseService(db)
-    return service.list_by_session(session_id)
+async def list_exercises_by_session(
+    session_id: int,
+    request: Request,
+    db: Database = Depends(get_database, scope="function"),
+):
+    service = ExerciseService(db.session)
+    version = await db.run(service.session_version, session_id)
+    if version is None:
+        return json_rows(EXERCISE_ROWS, [])
+    etag = session_etag(session_id, version)
+    if cached := not_modified(request, etag):
+        return cached
+    response = json_rows(EXERCISE_ROWS, await db.run(service.list_by_session, session_id))
+    response.headers["ETag"] = etag
+    return response
 
 
 @router.get("/block/{block_id}", response_model=list[ExerciseRead])
-def list_exercises_by_block(block_id: int, db: DBSession = Depends(get_db)):
-    service = ExerciseService(db)
-    return service.list_by_block(block_id)
+async def list_exercises_by_block(block_id: int, db: Database = Depends(get_database, scope="function")):
+    service = ExerciseService(db.session)
+    return json_rows(EXERCISE_ROWS, await db.run(service.list_by_block, block_id))
 
 @router.patch("/{exercise_id}", response_model=ExerciseRead)
-def update_block(
+async def update_block(
     exercise_id: int,
     payload: ExerciseUpdate,
-    db: DBSession = Depends(get_db),
+    background_tasks: BackgroundTasks,
+    db: Database = Depends(get_database, scope="function"),
 ):
+    service = ExerciseService(db.session)
     try:
-        return ExerciseService(db).update_exercise(
+        exercise = await db.run(
+            service.update_exercise,
             exercise_id,
             **payload.model_dump(exclude_unset=True),
         )
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
-    
+    schedule_rebalance(background_tasks, service.ordering)
+    return exercise
+
+
+@router.post("/{exercise_id}/move", response_model=ExerciseRead)
+async def move_exercise(
+    exercise_id: int,
+    payload: ExerciseMove,
+    background_tasks: BackgroundTasks,
+    db: Database = Depends(get_database, scope="function"),
+):
+    service = ExerciseService(db.session)
+    try:
+        exercise = await db.run(service.move_exercise, exercise_id, **payload.model_dump())
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    schedule_rebalance(background_tasks, service.ordering)
+    return exercise
+
 @router.delete("/{exercise_id}", status_code=204)
-def delete_exercise(exercise_id: int, db: DBSession = Depends(get_db)):
+async def delete_exercise(exercise_id: int, db: Database = Depends(get_database, scope="function")):
     try:
-        ExerciseService(db).delete_exercise(exercise_id)
+        await db.run(ExerciseService(db.session).delete_exercise, exercise_id)
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
\ No newline at end of file
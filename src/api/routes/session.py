@@ -1,78 +1,178 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session as DBSession
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, Response
+from pydantic import TypeAdapter
 from datetime import date
 
-from src.api.deps import get_db
-from src.api.schemas.session import SessionCreate, SessionRead, SessionUpdate
+from src.api.deps import Database, get_database
+from src.api.responses import json_rows, not_modified, session_etag
+from src.api.tasks import schedule_rebalance
+from src.api.schemas.session import (
+    SessionCreate,
+    SessionFullCreate,
+    SessionOrder,
+    SessionPage,
+    SessionPageRow,
+    SessionRead,
+    SessionTree,
+    SessionUpdate,
+)
 from src.services.session_service import SessionService
 
 router = APIRouter(prefix="/sessions", tags=["sessions"])
 
+SESSION_PAGE = TypeAdapter(SessionPageRow)
+
 
 @router.post("/", response_model=SessionRead)
-def create_session(
+async def create_session(
     payload: SessionCreate,
-    db: DBSession = Depends(get_db),
+    db: Database = Depends(get_database, scope="function"),
+):
+    try:
+        return await db.run(SessionService(db.session).create_session, **payload.model_dump())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/full", response_model=SessionTree)
+async def create_full_session(
+    payload: SessionFullCreate,
+    db: Database = Depends(get_database, scope="function"),
 ):
+    data = payload.model_dump(exclude={"timeline"})
     try:
-        return SessionService(db).create_session(**payload.model_dump())
+        return await db.run(
+            SessionService(db.session).create_full_session, **data, timeline=payload.timeline
+        )
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.get("/{session_id}", response_model=SessionRead)
-def get_session(session_id: int, db: DBSession = Depends(get_db)):
-    session = SessionService(db).get_session(session_id)
+async def get_session(
+    session_id: int,
+    request: Request,
+    response: Response,
+    db: Database = Depends(get_database, scope="function"),
+):
+    service = SessionService(db.session)
+    version = await db.run(service.session_version, session_id)
+    if version is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    etag = session_etag(session_id, version)
+    if cached := not_modified(request, etag):
+        return cached
+    session = await db.run(service.get_session, session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
+    response.headers["ETag"] = etag
     return session
 
 
+@router.get("/{session_id}/tree", response_model=SessionTree)
+async def get_session_tree(
+    session_id: int,
+    request: Request,
+    db: Database = Depends(get_database, scope="function"),
+):
+    service = SessionService(db.session)
+    version = await db.run(service.session_version, session_id)
+    if version is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    etag = session_etag(session_id, version)
+    if cached := not_modified(request, etag):
+        return cached
+    body = await db.run(service.get_session_tree_json, session_id, version)
+    if body is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    return Response(body, media_type="application/json", headers={"ETag": etag})
+
+
 @router.get("/by-date/", response_model=list[SessionRead])
-def get_session_by_date(
+async def get_session_by_date(
     session_date: date = Query(...),
     user_id: int = Query(...),
-    db: DBSession = Depends(get_db),
+    db: Database = Depends(get_database, scope="function"),
 ):
-    service = SessionService(db)
-    return service.get_sessions_by_date(
+    service = SessionService(db.session)
+    return await db.run(
+        service.get_sessions_by_date,
         session_date=session_date,
         user_id=user_id,
     )
 
 @router.get("/by-location/", response_model=list[SessionRead])
-def get_sessions_by_location(
+async def get_sessions_by_location(
     location_id: int = Query(...),
     user_id: int = Query(...),
-    db: DBSession = Depends(get_db)
+    db: Database = Depends(get_database, scope="function")
 ):
-    service = SessionService(db)
-    return service.get_sessions_by_location(location_id=location_id, user_id=user_id)
+    service = SessionService(db.session)
+    return await db.run(
+        service.get_sessions_by_location, location_id=location_id, user_id=user_id
+    )
 
 
-@router.get("/user/{user_id}", response_model=list[SessionRead])
-def list_sessions_by_user(user_id: int, db: DBSession = Depends(get_db)):
-    return SessionService(db).list_sessions_by_user(user_id)
+@router.get("/user/{user_id}", response_model=SessionPage)
+async def list_sessions_by_user(
+    user_id: int,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: str | None = Query(None),
+    date_from: date | None = Query(None, alias="from"),
+    date_to: date | None = Query(None, alias="to"),
+    db: Database = Depends(get_database, scope="function"),
+):
+    try:
+        page = await db.run(
+            SessionService(db.session).list_sessions_by_user,
+            user_id,
+            limit=limit,
+            cursor=cursor,
+            date_from=date_from,
+            date_to=date_to,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return json_rows(SESSION_PAGE, page)
 
 
 @router.patch("/{session_id}", response_model=SessionRead)
-def update_session(
+async def update_session(
     session_id: int,
     payload: SessionUpdate,
-    db: DBSession = Depends(get_db),
+    db: Database = Depends(get_database, scope="function"),
 ):
     try:
-        return SessionService(db).update_session(
-            session_id, **payload.model_dump(exclude_unset=True)
+        return await db.run(
+            SessionService(db.session).update_session,
+            session_id,
+            **payload.model_dump(exclude_unset=True),
         )
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
 
 
+@router.put("/{session_id}/order", response_model=SessionOrder)
+async def reorder_session(
+    session_id: int,
+    payload: SessionOrder,
+    background_tasks: BackgroundTasks,
+    db: Database = Depends(get_database, scope="function"),
+):
+    service = SessionService(db.session)
+    if not await db.run(service.get_session, session_id):
+        raise HTTPException(status_code=404, detail="Session not found")
+    try:
+        layout = await db.run(service.reorder_session, session_id, payload)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    schedule_rebalance(background_tasks, service.ordering)
+    return layout
+
+
 @router.delete("/{session_id}", status_code=204)
-def delete_session(session_id: int, db: DBSession = Depends(get_db)):
+async def delete_session(session_id: int, db: Database = Depends(get_database, scope="function")):
     try:
-        SessionService(db).delete_session(session_id)
+        await db.run(SessionService(db.session).delete_session, session_id)
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
 
@@ -1,26 +1,103 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from collections.abc import Iterator
+from datetime import date
 
-from src.api.deps import get_db
-from src.api.schemas.user import UserCreate, UserRead
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+
+from src.api.deps import Database, get_database
+from src.api.responses import accepts_gzip, gzip_chunks
+from src.api.schemas.exercise import HistoryPoint
+from src.api.schemas.user import PersonalRecordRead, UserCreate, UserRead
+from src.core.database import unit_of_work
+from src.data.models import ExerciseType
+from src.services.exercise_service import ExerciseService
+from src.services.export_service import ExportFormat, ExportService
 from src.services.user_service import UserService
 
 router = APIRouter(prefix="/users", tags=["users"])
 
 @router.post("/", response_model=UserRead)
-def create_user(
+async def create_user(
     payload: UserCreate,
-    db: Session = Depends(get_db),
+    db: Database = Depends(get_database, scope="function"),
 ):
     try:
-        return UserService(db).create_user(payload)
+        return await db.run(UserService(db.session).create_user, payload)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.get("/{user_id}", response_model=UserRead)
-def get_user(user_id: int, db: Session = Depends(get_db)):
-    user = UserService(db).get_user(user_id)
+async def get_user(user_id: int, db: Database = Depends(get_database, scope="function")):
+    user = await db.run(UserService(db.session).get_user, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return user
+
+
+@router.get("/{user_id}/records", response_model=list[PersonalRecordRead])
+async def list_user_records(user_id: int, db: Database = Depends(get_database, scope="function")):
+    service = UserService(db.session)
+    if not await db.run(service.get_user, user_id):
+        raise HTTPException(status_code=404, detail="User not found")
+    return await db.run(service.list_records, user_id)
+
+
+@router.get("/{user_id}/exercises/{exercise_type}/history", response_model=list[HistoryPoint])
+async def get_exercise_history(
+    user_id: int,
+    exercise_type: ExerciseType,
+    date_from: date | None = Query(None, alias="from"),
+    date_to: date | None = Query(None, alias="to"),
+    max_points: int | None = Query(None, ge=1, le=5000),
+    db: Database = Depends(get_database, scope="function"),
+):
+    return await db.run(
+        ExerciseService(db.session).get_history,
+        user_id,
+        exercise_type,
+        date_from=date_from,
+        date_to=date_to,
+        max_points=max_points,
+    )
+
+
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+
+
+def _export_chunks(
+    user_id: int,
+    export_format: ExportFormat,
+    date_from: date | None,
+    date_to: date | None,
+) -> Iterator[bytes]:
+    # The unit of work of the request ends when the endpoint returns, before
+    # the body is sent: the export reads in a transaction of its own, open
+    # while the response streams. Starlette iterates it in the threadpool
+    # (in both database modes, the export always uses the sync engine).
+    with unit_of_work() as db:
+        yield from ExportService(db).export(
+            user_id, export_format, date_from=date_from, date_to=date_to
+        )
+
+
+@router.get("/{user_id}/export")
+async def export_history(
+    user_id: int,
+    request: Request,
+    export_format: ExportFormat = Query("ndjson", alias="format"),
+    date_from: date | None = Query(None, alias="from"),
+    date_to: date | None = Query(None, alias="to"),
+    db: Database = Depends(get_database, scope="function"),
+):
+    if not await db.run(UserService(db.session).get_user, user_id):
+        raise HTTPException(status_code=404, detail="User not found")
+    chunks = _export_chunks(user_id, export_format, date_from, date_to)
+    headers = {
+        "Content-Disposition": f'attachment; filename="history-{user_id}.{export_format}"',
+        "Vary": "Accept-Encoding",
+    }
+    if accepts_gzip(request):
+        chunks = gzip_chunks(chunks)
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(chunks, media_type=EXPORT_MEDIA_TYPES[export_format], headers=headers)
@@ -1,5 +1,6 @@
+from datetime import date as d
 from pydantic import BaseModel
-from typing import Optional
+from typing import Optional, TypedDict
 from src.data.models import ExerciseType
 
 
@@ -16,6 +17,18 @@ class ExerciseCreate(BaseModel):
     notes: Optional[str] = None
 
 
+class ExerciseDraft(BaseModel):
+    """
+    An exercise posted inside a full session: its place is implied by its order.
+    """
+    exercise_type: ExerciseType
+    weight_kg: Optional[float] = None
+    repetitions: Optional[int] = None
+    duration_seconds: Optional[float] = None
+    distance_meters: Optional[float] = None
+    notes: Optional[str] = None
+
+
 class ExerciseUpdate(BaseModel):
     exercise_type: Optional[ExerciseType] = None
     weight_kg: Optional[float] = None
@@ -27,6 +40,13 @@ class ExerciseUpdate(BaseModel):
     notes: Optional[str] = None
 
 
+class ExerciseMove(BaseModel):
+    # Target block, None for the free timeline of the session
+    block_id: Optional[int] = None
+    # position_in_block inside a block, timeline position otherwise; None appends
+    position: Optional[int] = None
+
+
 class ExerciseRead(BaseModel):
     id: int
     exercise_type: ExerciseType
@@ -42,3 +62,32 @@ class ExerciseRead(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class ExerciseRow(TypedDict):
+    """
+    ExerciseRead as a plain dict, for read-only lists serialized without
+    building a model per item (see src.api.responses).
+    """
+    id: int
+    exercise_type: ExerciseType
+    session_id: int
+    weight_kg: Optional[float]
+    repetitions: Optional[int]
+    duration_seconds: Optional[float]
+    distance_meters: Optional[float]
+    block_id: Optional[int]
+    position: Optional[int]
+    position_in_block: Optional[int]
+    notes: Optional[str]
+
+
+class HistoryPoint(BaseModel):
+    date: d
+    weight_kg: Optional[float] = None
+    # Float because downsampled points hold averages
+    repetitions: Optional[float] = None
+    duration_seconds: Optional[float] = None
+    distance_meters: Optional[float] = None
+    # Number of exercises the point stands for
+    count: int = 1
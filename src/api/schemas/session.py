@@ -1,6 +1,9 @@
 from datetime import date as d
+from typing import Annotated, Literal, TypedDict
 from pydantic import BaseModel, Field
-from src.data.models import SessionType
+from src.api.schemas.block import BlockRead
+from src.api.schemas.exercise import ExerciseDraft, ExerciseRead
+from src.data.models import BlockType, SessionType
 
 class SessionCreate(BaseModel):
     name: str
@@ -28,3 +31,80 @@ class SessionRead(BaseModel):
 
     class Config:
         from_attributes = True
+
+class SessionPage(BaseModel):
+    items: list[SessionRead]
+    # Cursor of the next page, None on the last page
+    next_cursor: str | None = None
+
+class SessionRow(TypedDict):
+    """
+    SessionRead as a plain dict, for read-only lists serialized without
+    building a model per item (see src.api.responses).
+    """
+    id: int
+    name: str
+    date: d
+    session_type: SessionType
+    user_id: int
+    notes: str | None
+    location_id: int | None
+
+class SessionPageRow(TypedDict):
+    """
+    SessionPage of SessionRow items.
+    """
+    items: list[SessionRow]
+    next_cursor: str | None
+
+class OrderItem(BaseModel):
+    kind: Literal["block", "exercise"]
+    id: int
+
+class BlockOrder(BaseModel):
+    block_id: int
+    exercise_ids: list[int]
+
+class SessionOrder(BaseModel):
+    """
+    Layout of a session: the timeline of blocks and free exercises, and the
+    exercises of each block, in order. As a request, blocks left out of
+    blocks keep their current order.
+    """
+    timeline: list[OrderItem]
+    blocks: list[BlockOrder] = Field(default_factory=list)
+
+
+class ExerciseNode(ExerciseRead):
+    kind: Literal["exercise"] = "exercise"
+
+class BlockNode(BlockRead):
+    kind: Literal["block"] = "block"
+    exercises: list[ExerciseRead]
+
+class SessionTree(SessionRead):
+    """
+    A session with its timeline: blocks (holding their exercises) and free
+    exercises, in order. Items are told apart by their kind.
+    """
+    timeline: list[Annotated[BlockNode | ExerciseNode, Field(discriminator="kind")]]
+
+
+class ExerciseDraftNode(ExerciseDraft):
+    kind: Literal["exercise"] = "exercise"
+
+class BlockDraftNode(BaseModel):
+    kind: Literal["block"] = "block"
+    block_type: BlockType
+    duration: float | None = None
+    notes: str | None = None
+    exercises: list[ExerciseDraft] = Field(default_factory=list)
+
+class SessionFullCreate(SessionCreate):
+    """
+    A session posted with its whole content: positions of blocks, free
+    exercises and exercises inside blocks are implied by their order.
+    """
+    timeline: list[
+        Annotated[BlockDraftNode | ExerciseDraftNode, Field(discriminator="kind")]
+    ] = Field(default_factory=list)
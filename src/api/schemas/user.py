@@ -1,5 +1,10 @@
+from datetime import date
+from typing import TypedDict
+
 from pydantic import BaseModel
 
+from src.data.models import BlockType, ExerciseType, RecordMetric, SessionType
+
 class UserCreate(BaseModel):
     username: str
 
@@ -9,4 +14,40 @@ class UserRead(BaseModel):
 
     model_config = {
         "from_attributes": True
-    }
\ No newline at end of file
+    }
+
+class PersonalRecordRead(BaseModel):
+    exercise_type: ExerciseType
+    metric: RecordMetric
+    # Weight (max reps) or distance (best time) the record applies to, 0 otherwise
+    qualifier: float
+    value: float
+    exercise_id: int | None
+
+    model_config = {
+        "from_attributes": True
+    }
+
+
+class ExportRow(TypedDict):
+    """
+    One line of a history export: an exercise with its session and block,
+    or an empty block or session (the other columns being None).
+    """
+    session_id: int
+    session_name: str
+    session_date: date
+    session_type: SessionType
+    location_id: int | None
+    session_notes: str | None
+    block_id: int | None
+    block_type: BlockType | None
+    block_duration: float | None
+    block_notes: str | None
+    exercise_id: int | None
+    exercise_type: ExerciseType | None
+    weight_kg: float | None
+    repetitions: int | None
+    duration_seconds: float | None
+    distance_meters: float | None
+    exercise_notes: str | None
@@ -0,0 +1,21 @@
+from fastapi import BackgroundTasks
+
+from src.core.database import unit_of_work
+from src.services.ordering_service import OrderingService
+
+
+def rebalance_session(session_id: int) -> None:
+    """
+    Renumber the rank keys of a session (fractional ordering mode).
+    Runs after the response is sent, with its own database session.
+    """
+    with unit_of_work() as db:
+        OrderingService(db).rebalance_session(session_id)
+
+
+def schedule_rebalance(background_tasks: BackgroundTasks, ordering: OrderingService) -> None:
+    """
+    Queue a renumbering for every session whose keys grew too long during the request.
+    """
+    for session_id in ordering.pending_rebalance:
+        background_tasks.add_task(rebalance_session, session_id)
@@ -0,0 +1,194 @@
+"""
+Cache of serialized session trees (GET /sessions/{id}/tree).
+
+Entries are keyed by session id and tagged with the session version they
+were built from (see Session.version): an entry of an older version is a
+miss, so a tree is never served after a write to its session, whatever the
+backend and the timing. Writes also drop the entry of their session
+(invalidate) so that no memory is held by trees that cannot be served.
+
+Backends store bytes for a number of seconds:
+- MemoryBackend: LRU in each worker process, bounded in total bytes.
+- RedisBackend: shared by all the workers (needs the "redis" extra). Any
+  client with the get, set(px=) and delete methods of redis.Redis will do.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from typing import Protocol
+
+from src.core import metrics
+from src.core.settings import settings
+
+CACHE_HITS = metrics.counter(
+    "session_tree_cache_hits_total",
+    "Session trees served from the cache",
+)
+CACHE_MISSES = metrics.counter(
+    "session_tree_cache_misses_total",
+    "Session trees not cached, or cached for an older version",
+)
+CACHE_INVALIDATIONS = metrics.counter(
+    "session_tree_cache_invalidations_total",
+    "Session trees dropped by a write to their session",
+)
+CACHE_ERRORS = metrics.counter(
+    "session_tree_cache_errors_total",
+    "Calls to the shared backend that failed (served as misses)",
+)
+CACHE_BYTES = metrics.gauge(
+    "session_tree_cache_bytes",
+    "Size of the trees held by the memory backend of this worker",
+)
+
+
+class CacheBackend(Protocol):
+    def get(self, key: str) -> bytes | None: ...
+
+    def set(self, key: str, value: bytes, ttl: float) -> None: ...
+
+    def delete(self, key: str) -> None: ...
+
+
+class MemoryBackend:
+    """
+    LRU of values expiring after their ttl. The least recently used values
+    are evicted once the values take more than max_bytes in total.
+    """
+
+    def __init__(self, max_bytes: int, clock: Callable[[], float] = time.monotonic):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._clock = clock
+        self._entries: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> bytes | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires <= self._clock():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (self._clock() + ttl, value)
+            self.size += len(value)
+            while self.size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def _remove(self, key: str) -> None:
+        _, value = self._entries.pop(key)
+        self.size -= len(value)
+
+
+class RedisBackend:
+    """
+    Values shared by every worker. Failures of the backend (errors) are
+    counted and served as misses: the cache is never required to answer.
+    """
+
+    def __init__(
+        self,
+        client=None,
+        *,
+        prefix: str = "onthefloor:",
+        errors: tuple[type[Exception], ...] = (),
+    ):
+        if client is None:
+            import redis
+
+            client = redis.Redis.from_url(settings.redis_url)
+            errors = (redis.RedisError,)
+        self.client = client
+        self.prefix = prefix
+        self.errors = errors
+
+    def get(self, key: str) -> bytes | None:
+        try:
+            return self.client.get(self.prefix + key)
+        except self.errors:
+            CACHE_ERRORS.inc()
+            return None
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        try:
+            self.client.set(self.prefix + key, value, px=int(ttl * 1000))
+        except self.errors:
+            CACHE_ERRORS.inc()
+
+    def delete(self, key: str) -> None:
+        try:
+            self.client.delete(self.prefix + key)
+        except self.errors:
+            CACHE_ERRORS.inc()
+
+
+class SessionTreeCache:
+    """
+    Serialized session trees by session id, for the current version of the
+    session only. Without a backend, nothing is cached.
+    """
+
+    def __init__(self, backend: CacheBackend | None, ttl: float):
+        self.backend = backend
+        self.ttl = ttl
+
+    @staticmethod
+    def _key(session_id: int) -> str:
+        # Trees differ between ordering modes (positions are derived)
+        return f"session-tree:{settings.ordering_mode}:{session_id}"
+
+    def get(self, session_id: int, version: int) -> bytes | None:
+        if self.backend is None:
+            return None
+        value = self.backend.get(self._key(session_id))
+        if value is not None:
+            tag, _, body = value.partition(b"\n")
+            if tag == str(version).encode():
+                CACHE_HITS.inc()
+                return body
+        CACHE_MISSES.inc()
+        return None
+
+    def put(self, session_id: int, version: int, body: bytes) -> None:
+        if self.backend is not None:
+            self.backend.set(self._key(session_id), b"%d\n%b" % (version, body), self.ttl)
+
+    def invalidate(self, session_id: int) -> None:
+        if self.backend is not None:
+            CACHE_INVALIDATIONS.inc()
+            self.backend.delete(self._key(session_id))
+
+
+def _backend() -> CacheBackend | None:
+    if settings.session_cache_backend == "redis":
+        return RedisBackend()
+    if settings.session_cache_backend == "memory":
+        backend = MemoryBackend(settings.session_cache_max_bytes)
+        CACHE_BYTES.set_function(lambda: backend.size)
+        return backend
+    return None
+
+
+# The backend is chosen at startup
+session_trees = SessionTreeCache(_backend(), settings.session_cache_ttl)
@@ -1,9 +1,119 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+import time
+from collections.abc import AsyncIterator, Iterator
+from contextlib import asynccontextmanager, contextmanager
+from functools import cache
+from typing import TYPE_CHECKING, Any
+from uuid import uuid4
 
+from sqlalchemy import Engine, create_engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, Pool, QueuePool
+
+from src.core import metrics, query_stats
 from src.core.settings import settings
 
-engine = create_engine(settings.database_url, future=True)
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+# -------------------------
+# Connection pool
+# -------------------------
+POOL_CHECKOUT_SECONDS = metrics.histogram(
+    "db_pool_checkout_seconds",
+    "Time spent getting a connection from the pool (waiting and connecting)",
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+POOL_CHECKOUT_TIMEOUTS = metrics.counter(
+    "db_pool_checkout_timeouts_total",
+    "Requests that gave up waiting for a connection (pool_timeout)",
+)
+POOL_CHECKED_OUT = metrics.gauge(
+    "db_pool_checked_out",
+    "Connections currently in use",
+)
+POOL_SATURATION = metrics.gauge(
+    "db_pool_saturation",
+    "Connections in use over pool_size + pool_max_overflow (1 means requests queue)",
+)
+
+
+if TYPE_CHECKING:
+    # Mixed into pool classes (see _metered)
+    _PoolBase = Pool
+else:
+    _PoolBase = object
+
+
+class _MeteredPool(_PoolBase):
+    """
+    Pool mixin timing every checkout, labelled by engine ("sync" or "async").
+    """
+    engine_label = ""
+
+    def _do_get(self) -> Any:
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            POOL_CHECKOUT_TIMEOUTS.inc(engine=self.engine_label)
+            raise
+        finally:
+            POOL_CHECKOUT_SECONDS.observe(time.perf_counter() - start, engine=self.engine_label)
+
+
+_metered_classes: dict[tuple[type[Pool], str], type[Pool]] = {}
+
+
+def _metered(pool_class: type[Pool], engine_label: str) -> type[Pool]:
+    # A class attribute, as the pool is recreated from its class on dispose
+    key = (pool_class, engine_label)
+    if key not in _metered_classes:
+        _metered_classes[key] = type(
+            f"Metered{pool_class.__name__}",
+            (_MeteredPool, pool_class),
+            {"engine_label": engine_label},
+        )
+    return _metered_classes[key]
+
+
+def engine_options(pool_class: type[Pool], engine_label: str) -> dict[str, Any]:
+    """
+    create_engine arguments for the pool settings, pool_class being the
+    queue pool of the driver.
+    """
+    if settings.pgbouncer_mode:
+        return {"poolclass": _metered(NullPool, engine_label)}
+    return {
+        "poolclass": _metered(pool_class, engine_label),
+        "pool_size": settings.pool_size,
+        "max_overflow": settings.pool_max_overflow,
+        "pool_timeout": settings.pool_timeout,
+        "pool_recycle": settings.pool_recycle,
+        "pool_pre_ping": settings.pool_pre_ping,
+    }
+
+
+def watch_pool(engine: Engine, engine_label: str) -> None:
+    """
+    Publish the usage of the pool of an engine as gauges.
+    """
+    if settings.pgbouncer_mode:
+        return  # No pool to watch
+    capacity = settings.pool_size + settings.pool_max_overflow
+    POOL_CHECKED_OUT.set_function(lambda: _checked_out(engine), engine=engine_label)
+    POOL_SATURATION.set_function(lambda: _checked_out(engine) / capacity, engine=engine_label)
+
+
+def _checked_out(engine: Engine) -> int:
+    # engine.pool is read at each collection, it changes on dispose
+    pool = engine.pool
+    return pool.checkedout() if isinstance(pool, QueuePool) else 0
+
+
+engine = create_engine(settings.database_url, future=True, **engine_options(QueuePool, "sync"))
+watch_pool(engine, "sync")
+query_stats.instrument(engine)
 
 SessionLocal = sessionmaker(
     bind=engine,
@@ -11,3 +121,92 @@ SessionLocal = sessionmaker(
     autocommit=False,
     future=True,
 )
+
+# Sessions on the read replica, None without replica
+ReplicaSessionLocal: sessionmaker[Session] | None = None
+if settings.replica_database_url is not None:
+    replica_engine = create_engine(
+        settings.replica_database_url,
+        future=True,
+        **engine_options(QueuePool, "sync_replica"),
+    )
+    watch_pool(replica_engine, "sync_replica")
+    query_stats.instrument(replica_engine)
+    ReplicaSessionLocal = sessionmaker(
+        bind=replica_engine,
+        autoflush=False,
+        autocommit=False,
+        future=True,
+    )
+
+
+def has_replica() -> bool:
+    return ReplicaSessionLocal is not None
+
+
+@contextmanager
+def unit_of_work(*, replica: bool = False) -> Iterator[Session]:
+    """
+    Open a database session holding a single transaction: committed if the
+    block succeeds, rolled back if it raises. DAOs only flush, so everything
+    written inside the block is applied at once or not at all.
+    With replica, the session reads from the read replica if there is one;
+    it must not write.
+    """
+    db = ReplicaSessionLocal() if replica and ReplicaSessionLocal else SessionLocal()
+    try:
+        yield db
+        db.commit()
+    except BaseException:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+@cache
+def async_session_factory(replica: bool = False) -> "async_sessionmaker[AsyncSession]":
+    """
+    Session factory of the asyncpg engine (of the replica with replica),
+    created on first use: the async driver (and greenlet) are only needed
+    when database_mode is "async".
+    """
+    url = settings.async_replica_database_url if replica else settings.async_database_url
+    if url is None:
+        raise ValueError("No read replica configured (postgres_replica_host)")
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    label = "async_replica" if replica else "async"
+    options = engine_options(AsyncAdaptedQueuePool, label)
+    if settings.pgbouncer_mode:
+        # PgBouncer may hand each transaction to another server connection:
+        # disable the prepared statement caches and use unique statement names
+        url += "?prepared_statement_cache_size=0"
+        options["connect_args"] = {
+            "statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+        }
+    async_engine = create_async_engine(url, **options)
+    watch_pool(async_engine.sync_engine, label)
+    query_stats.instrument(async_engine.sync_engine)
+    return async_sessionmaker(
+        bind=async_engine,
+        autoflush=False,
+        autocommit=False,
+    )
+
+
+@asynccontextmanager
+async def async_unit_of_work(*, replica: bool = False) -> AsyncIterator["AsyncSession"]:
+    """
+    Same as unit_of_work, on the async engines.
+    """
+    db = async_session_factory(replica and has_replica())()
+    try:
+        yield db
+        await db.commit()
+    except BaseException:
+        await db.rollback()
+        raise
+    finally:
+        await db.close()
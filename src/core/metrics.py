@@ -0,0 +1,141 @@
+"""
+In-process metrics, exposed in the Prometheus text format by GET /metrics.
+
+Metrics are registered once at import time and may carry labels given as
+keyword arguments when they are updated.
+"""
+
+import threading
+from bisect import bisect_left
+from collections.abc import Callable
+from typing import TypeVar
+
+Labels = tuple[tuple[str, str], ...]
+
+
+def _labels(labels: dict[str, str]) -> Labels:
+    return tuple(sorted(labels.items()))
+
+
+def _format(name: str, labels: Labels, value: float) -> str:
+    if labels:
+        name += "{" + ",".join(f'{key}="{value}"' for key, value in labels) + "}"
+    return f"{name} {value:g}"
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, description: str):
+        self.name = name
+        self.description = description
+        self._values: dict[Labels, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = _labels(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(_labels(labels), 0)
+
+    def lines(self) -> list[str]:
+        with self._lock:
+            return [_format(self.name, key, value) for key, value in self._values.items()]
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, description: str, buckets: tuple[float, ...]):
+        self.name = name
+        self.description = description
+        self.buckets = buckets
+        # Per label set: count of each bucket (not cumulative), then +Inf, sum
+        self._values: dict[Labels, tuple[list[int], list[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = _labels(labels)
+        with self._lock:
+            counts, total = self._values.setdefault(
+                key, ([0] * (len(self.buckets) + 1), [0.0])
+            )
+            counts[bisect_left(self.buckets, value)] += 1
+            total[0] += value
+
+    def count(self, **labels: str) -> int:
+        counts, _ = self._values.get(_labels(labels), ([0], [0.0]))
+        return sum(counts)
+
+    def lines(self) -> list[str]:
+        lines = []
+        with self._lock:
+            for key, (counts, total) in self._values.items():
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float("inf"),), counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                    lines.append(_format(f"{self.name}_bucket", key + (("le", le),), cumulative))
+                lines.append(_format(f"{self.name}_sum", key, total[0]))
+                lines.append(_format(f"{self.name}_count", key, cumulative))
+        return lines
+
+
+class Gauge:
+    """
+    A gauge read from callbacks when the metrics are collected.
+    """
+    kind = "gauge"
+
+    def __init__(self, name: str, description: str):
+        self.name = name
+        self.description = description
+        self._functions: dict[Labels, Callable[[], float]] = {}
+
+    def set_function(self, function: Callable[[], float], **labels: str) -> None:
+        self._functions[_labels(labels)] = function
+
+    def value(self, **labels: str) -> float:
+        return self._functions[_labels(labels)]()
+
+    def lines(self) -> list[str]:
+        return [_format(self.name, key, function()) for key, function in self._functions.items()]
+
+
+Metric = Counter | Histogram | Gauge
+M = TypeVar("M", bound=Metric)
+
+_registry: dict[str, Metric] = {}
+
+
+def _register(metric: M) -> M:
+    if metric.name in _registry:
+        raise ValueError(f"Metric {metric.name} is already registered")
+    _registry[metric.name] = metric
+    return metric
+
+
+def counter(name: str, description: str) -> Counter:
+    return _register(Counter(name, description))
+
+
+def histogram(name: str, description: str, buckets: tuple[float, ...]) -> Histogram:
+    return _register(Histogram(name, description, buckets))
+
+
+def gauge(name: str, description: str) -> Gauge:
+    return _register(Gauge(name, description))
+
+
+def render() -> str:
+    """
+    Every registered metric, in the Prometheus text exposition format.
+    """
+    lines = []
+    for metric in _registry.values():
+        lines.append(f"# HELP {metric.name} {metric.description}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(metric.lines())
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,170 @@
+"""
+Sampling profiler of single requests, for the requests that are slow in
+production only.
+
+While a request is profiled, a thread samples the stacks of the threads
+running its code every interval: the functions given to Database.run,
+followed into the threadpool (sync database mode) or into run_sync on the
+event loop (async mode, where the samples of the loop thread may catch
+concurrent requests while the call waits on the database). Route code
+running on the event loop between those calls is not sampled.
+
+Stacks are counted in the collapsed format of flame graphs ("root;...;leaf
+count" lines), read by flamegraph.pl and speedscope.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from pathlib import Path
+from types import CodeType, FrameType
+from typing import ParamSpec, TypeVar
+
+P = ParamSpec("P")
+T = TypeVar("T")
+
+FOLDED_SUFFIX = ".folded"
+REPORT_SUFFIX = ".json"
+
+
+class Profile:
+    """
+    Stacks sampled from the threads running the code of a request.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.samples = 0
+        self.stacks: Counter[str] = Counter()
+        # Thread ident: number of followed calls it is running
+        self._threads: Counter[int] = Counter()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    @contextmanager
+    def sampling(self, thread_id: int) -> Iterator[None]:
+        """
+        Sample the stack of a thread during the block.
+        """
+        with self._lock:
+            self._threads[thread_id] += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._threads[thread_id] -= 1
+                if not self._threads[thread_id]:
+                    del self._threads[thread_id]
+
+    def sample(self) -> None:
+        frames = sys._current_frames()
+        with self._lock:
+            threads = list(self._threads)
+        for thread_id in threads:
+            frame = frames.get(thread_id)
+            if frame is not None:
+                self.stacks[_stack(frame)] += 1
+                self.samples += 1
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in sorted(self.stacks.items()))
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+
+_current: ContextVar[Profile | None] = ContextVar("profile", default=None)
+
+
+@contextmanager
+def profile(interval: float) -> Iterator[Profile]:
+    """
+    Profile the calls followed (see follow) inside the block.
+    """
+    result = Profile(interval)
+    token = _current.set(result)
+    sampler = threading.Thread(target=result._run, name="profile-sampler", daemon=True)
+    sampler.start()
+    try:
+        yield result
+    finally:
+        result._stop.set()
+        sampler.join()
+        _current.reset(token)
+
+
+def follow(fn: Callable[P, T]) -> Callable[P, T]:
+    """
+    fn, its stack sampled while it runs (in whichever thread) if the
+    current block is profiled.
+    """
+    result = _current.get()
+    if result is None:
+        return fn
+
+    @wraps(fn)
+    def followed(*args: P.args, **kwargs: P.kwargs) -> T:
+        with result.sampling(threading.get_ident()):
+            return fn(*args, **kwargs)
+
+    return followed
+
+
+_names: dict[CodeType, str] = {}
+
+
+def _name(code: CodeType) -> str:
+    # Cached: computed once per function, not per sample
+    name = _names.get(code)
+    if name is None:
+        filename = code.co_filename
+        if filename.startswith(os.getcwd() + os.sep):
+            filename = filename[len(os.getcwd()) + 1:]
+        name = _names[code] = f"{code.co_qualname} ({filename}:{code.co_firstlineno})".replace(";", ":")
+    return name
+
+
+def _stack(frame: FrameType | None) -> str:
+    names = []
+    while frame is not None:
+        names.append(_name(frame.f_code))
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+def save(directory: Path, profile_id: str, result: Profile, report: dict) -> None:
+    """
+    Write the stacks of a profile (PROFILE_ID.folded) and its report
+    (PROFILE_ID.json) to directory.
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    (directory / f"{profile_id}{FOLDED_SUFFIX}").write_text(result.folded())
+    (directory / f"{profile_id}{REPORT_SUFFIX}").write_text(json.dumps(report, indent=2))
+
+
+def prune(directory: Path, keep: int, max_age_seconds: float) -> None:
+    """
+    Remove the profiles older than max_age_seconds, then the oldest ones
+    beyond the keep most recent.
+    """
+    reports = []
+    for report in directory.glob(f"*{REPORT_SUFFIX}"):
+        try:
+            reports.append((report.stat().st_mtime, report))
+        except FileNotFoundError:
+            # Pruned meanwhile by another worker
+            continue
+    reports.sort(reverse=True)
+    oldest = time.time() - max_age_seconds
+    for index, (modified, report) in enumerate(reports):
+        if index >= keep or modified < oldest:
+            report.with_suffix(FOLDED_SUFFIX).unlink(missing_ok=True)
+            report.unlink(missing_ok=True)
@@ -0,0 +1,116 @@
+"""
+SQL statements issued on behalf of the current request (or of any block
+of code wrapped in collect()), counted and timed through the cursor
+events of the instrumented engines.
+
+The statistics of a block live in a context variable: they follow the
+request into the threadpool (sync database mode) and into run_sync
+(async database mode), as both copy the context. Blocks may be nested,
+the statements of the inner block counting in the outer one too.
+
+statement_budget() fails a block issuing more statements than allowed,
+to guard against N+1 queries (see tests/query_budget.py).
+"""
+
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from sqlalchemy import Engine, event
+
+
+class QueryStats:
+    """
+    Number and total time of the statements of a block, with the count and
+    time of each distinct statement.
+    """
+
+    def __init__(self, parent: "QueryStats | None" = None, trace: bool = False):
+        self.parent = parent
+        self.statements = 0
+        self.seconds = 0.0
+        # Per statement text: [count, seconds]
+        self.by_statement: dict[str, list] = {}
+        self.traced = trace
+        # Every (statement, seconds) in order, if traced
+        self.trace: list[tuple[str, float]] = []
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.statements += 1
+        self.seconds += seconds
+        totals = self.by_statement.setdefault(statement, [0, 0.0])
+        totals[0] += 1
+        totals[1] += seconds
+        if self.traced:
+            self.trace.append((statement, seconds))
+        if self.parent is not None:
+            self.parent.record(statement, seconds)
+
+    def costliest(self, limit: int) -> list[tuple[str, int, float]]:
+        """
+        (statement, count, seconds) of the limit statements that took the
+        most time in total, repeated statements adding up.
+        """
+        ranked = sorted(self.by_statement.items(), key=lambda item: item[1][1], reverse=True)
+        return [(statement, count, seconds) for statement, (count, seconds) in ranked[:limit]]
+
+
+_current: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+
+@contextmanager
+def collect(trace: bool = False) -> Iterator[QueryStats]:
+    """
+    Collect the statements issued inside the block (each of them in order
+    if trace).
+    """
+    stats = QueryStats(_current.get(), trace)
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+class StatementBudgetExceeded(AssertionError):
+    pass
+
+
+@contextmanager
+def statement_budget(limit: int, name: str = "Block") -> Iterator[QueryStats]:
+    """
+    Raise StatementBudgetExceeded, listing the statements in the order they
+    were first issued, if the block issues more than limit statements.
+    """
+    with collect() as stats:
+        yield stats
+    if stats.statements > limit:
+        raise StatementBudgetExceeded(
+            f"{name} issued {stats.statements} SQL statements, over its budget of {limit}:"
+            + "".join(
+                f"\n  {count}x {statement}"
+                for statement, (count, _) in stats.by_statement.items()
+            )
+        )
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None and _current.get() is not None:
+        # On the execution context, dropped with it if the statement fails
+        context.query_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    start = getattr(context, "query_start", None)
+    if stats is not None and start is not None:
+        stats.record(statement, time.perf_counter() - start)
+
+
+def instrument(engine: Engine) -> None:
+    """
+    Report the statements of an engine (the sync_engine of an async one).
+    """
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
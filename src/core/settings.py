@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings,SettingsConfigDict
 
 class Settings(BaseSettings):
@@ -6,16 +8,102 @@ class Settings(BaseSettings):
     postgres_db: str = "db"
     postgres_host: str = "host"
     postgres_port: int = 5432
+    # Optional streaming replica serving GET requests (same credentials and
+    # database as the primary; port defaults to postgres_port)
+    postgres_replica_host: str | None = None
+    postgres_replica_port: int | None = None
+    # After a write, a client reads from the primary for this many seconds so
+    # that it sees its own changes despite the replication lag
+    read_your_writes_seconds: float = 5
+
+    # "dense": integer positions, shifted on every insert/move.
+    # "fractional": sortable rank keys, only the moved row is written.
+    # Switching from fractional back to dense requires renumbering sessions first;
+    # rows written in dense mode are merged back by position in fractional mode.
+    ordering_mode: Literal["dense", "fractional"] = "dense"
+    # Rank keys longer than this are renumbered in the background
+    rank_rebalance_length: int = 16
+
+    # "sync": psycopg2, every request holds a threadpool thread while it waits
+    # on the database.
+    # "async": asyncpg, requests wait on the event loop (needs the "async" extra).
+    database_mode: Literal["sync", "async"] = "sync"
+
+    # Connection pool of each engine. Every API worker holds up to
+    # pool_size + pool_max_overflow connections: size workers so that the
+    # total stays under the max_connections of Postgres.
+    pool_size: int = 5
+    pool_max_overflow: int = 10
+    # Seconds to wait for a free connection before failing the request
+    pool_timeout: float = 30
+    # Connections older than this (seconds) are replaced; -1 keeps them
+    pool_recycle: int = 1800
+    # Test connections when they are checked out, to survive database restarts
+    pool_pre_ping: bool = True
+    # Behind PgBouncer in transaction pooling mode: no pool of our own (PgBouncer
+    # is the pool) and no server-side prepared statements (asyncpg)
+    pgbouncer_mode: bool = False
+
+    # Cache of serialized session trees (GET /sessions/{id}/tree).
+    # "memory": an LRU in each worker. "redis": shared by all the workers
+    # (needs the "redis" extra). "none": no cache.
+    session_cache_backend: Literal["none", "memory", "redis"] = "memory"
+    # Seconds a tree stays cached (writes to its session drop it before)
+    session_cache_ttl: float = 300
+    # Total size of the trees cached by each worker (memory backend)
+    session_cache_max_bytes: int = 64 * 1024 * 1024
+    redis_url: str = "redis://localhost:6379/0"
+
+    # Requests slower than this (seconds) are logged with their costliest
+    # SQL statements
+    slow_request_seconds: float = 1.0
+    # Send the request and SQL timings to clients in a Server-Timing header
+    server_timing: bool = True
+
+    # Per-request sampling profiler (see src.core.profiling): this fraction
+    # of the requests is profiled, and any request sent with the header
+    # X-Profile: <profile_token>. Off by default.
+    profile_sample_rate: float = 0.0
+    profile_token: str | None = None
+    # Seconds between two samples of a profiled request
+    profile_interval: float = 0.005
+    # Where profiles are written; the newest profile_keep are kept, none
+    # older than profile_max_age_days
+    profile_directory: str = "profiles"
+    profile_keep: int = 200
+    profile_max_age_days: float = 7
 
     model_config = SettingsConfigDict(
         env_file=".env",
         env_file_encoding="utf-8",
     )
 
+    def _url(self, driver: str, host: str, port: int) -> str:
+        return f"postgresql+{driver}://{self.postgres_user}:{self.postgres_password}@{host}:{port}/{self.postgres_db}"
+
     @property
     def database_url(self) -> str:
-        print(f"URL : postgresql+psycopg2://{self.postgres_user}:{self.postgres_password}@{self.postgres_host}:{self.postgres_port}/{self.postgres_db}")
-        return f"postgresql+psycopg2://{self.postgres_user}:{self.postgres_password}@{self.postgres_host}:{self.postgres_port}/{self.postgres_db}"
+        return self._url("psycopg2", self.postgres_host, self.postgres_port)
+
+    @property
+    def async_database_url(self) -> str:
+        return self._url("asyncpg", self.postgres_host, self.postgres_port)
+
+    @property
+    def replica_database_url(self) -> str | None:
+        if self.postgres_replica_host is None:
+            return None
+        return self._url(
+            "psycopg2",
+            self.postgres_replica_host,
+            self.postgres_replica_port or self.postgres_port,
+        )
+
+    @property
+    def async_replica_database_url(self) -> str | None:
+        if self.replica_database_url is None:
+            return None
+        return self.replica_database_url.replace("+psycopg2://", "+asyncpg://", 1)
 
 settings = Settings()
 
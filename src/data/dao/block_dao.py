@@ -1,5 +1,6 @@
 from sqlalchemy.orm import Session as DBSession
-from sqlalchemy import select, func
+from sqlalchemy import select, func, update, case, insert
+from sqlalchemy.sql.elements import ColumnElement
 
 from src.data.models import Block
 
@@ -10,10 +11,23 @@ class BlockDAO:
 
     def create(self, block: Block) -> Block:
         self.db.add(block)
-        self.db.commit()
-        self.db.refresh(block)
+        self.db.flush()
         return block
 
+    def insert_many(self, rows: list[dict]) -> dict[int, int]:
+        """
+        Insert several blocks of a session with one multi-row INSERT, each dict
+        holding every column. Returns the new ids by position.
+        """
+        if not rows:
+            return {}
+        stmt = (
+            insert(Block)
+            .execution_options(render_nulls=True)
+            .returning(Block.position, Block.id)
+        )
+        return {position: block_id for position, block_id in self.db.execute(stmt, rows)}
+
     def get_by_id(self, block_id: int) -> Block | None:
         return self.db.get(Block, block_id)
 
@@ -26,13 +40,12 @@ class BlockDAO:
         return list(self.db.scalars(stmt))
 
     def update(self, block: Block) -> Block:
-        self.db.commit()
-        self.db.refresh(block)
+        self.db.flush()
         return block
 
     def delete(self, block: Block) -> None:
         self.db.delete(block)
-        self.db.commit()
+        self.db.flush()
     
     def count_by_session(self, session_id: int) -> int:
         return self.db.scalars(
@@ -40,5 +53,92 @@ class BlockDAO:
             .select_from(Block)
             .where(Block.session_id == session_id)
         ).one()
-    
 
+    def list_ranks(self, session_id: int) -> list[tuple[int, str | None, int]]:
+        """
+        Return (id, rank, position) for every block of the session.
+        """
+        stmt = select(Block.id, Block.rank, Block.position).where(
+            Block.session_id == session_id
+        )
+        return [
+            (block_id, rank, position) for block_id, rank, position in self.db.execute(stmt)
+        ]
+
+    def bulk_update(self, values: list[dict]) -> None:
+        """
+        Update several blocks at once, each dict holding the block "id" and
+        the columns to set. Must not be used for position, see set_positions.
+        """
+        if values:
+            self.db.execute(update(Block), values)
+
+    def set_positions(self, session_id: int, positions: dict[int, int]) -> None:
+        """
+        Set the position of several blocks of a session at once
+        (block id -> new position).
+        """
+        if not positions:
+            return
+        self._reposition(
+            session_id,
+            Block.id.in_(positions),
+            case(positions, value=Block.id),
+        )
+
+    def shift_positions(
+        self,
+        session_id: int,
+        *,
+        start: int,
+        end: int | None = None,
+        delta: int,
+    ) -> None:
+        """
+        Shift by delta the position of every block of the session whose
+        position is in [start, end] (no upper bound if end is None).
+        Shifted blocks are written twice (see _reposition).
+        """
+        in_range = Block.position >= start
+        if end is not None:
+            in_range = in_range & (Block.position <= end)
+        self._reposition(session_id, in_range, Block.position + delta)
+
+    def move(self, block: Block, position: int) -> None:
+        """
+        Move a block to a new position, shifting the blocks in between by one.
+        Free exercises of the timeline are not touched.
+        """
+        old_position = block.position
+        low, high = sorted((old_position, position))
+        delta = -1 if position > old_position else 1
+        target = case(
+            (Block.id == block.id, position),
+            else_=Block.position + delta,
+        )
+        self._reposition(
+            block.session_id,
+            Block.position.between(low, high),
+            target,
+        )
+
+    def _reposition(
+        self,
+        session_id: int,
+        condition: ColumnElement[bool],
+        target: ColumnElement[int],
+    ) -> None:
+        # Rows are first parked on negative positions, then restored, so the
+        # uix_session_block_position constraint is never violated while the
+        # UPDATE walks the rows (Postgres and SQLite check it row by row).
+        # Each moved row is thus written twice: 2 statements, 2N row writes.
+        self.db.execute(
+            update(Block)
+            .where(Block.session_id == session_id, condition)
+            .values(position=-target - 1)
+        )
+        self.db.execute(
+            update(Block)
+            .where(Block.session_id == session_id, Block.position < 0)
+            .values(position=-Block.position - 1)
+        )
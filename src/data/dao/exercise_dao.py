@@ -1,7 +1,11 @@
+from collections.abc import Iterator
+from datetime import date
+from typing import cast
+
 from sqlalchemy.orm import Session as DBSession
-from sqlalchemy import select, func
+from sqlalchemy import Row, select, func, update, insert
 
-from src.data.models import Exercise, Block
+from src.data.models import Exercise, Block, ExerciseType, Session
 
 
 class ExerciseDAO:
@@ -10,38 +14,127 @@ class ExerciseDAO:
 
     def create(self, exercise: Exercise) -> Exercise:
         self.db.add(exercise)
-        self.db.commit()
-        self.db.refresh(exercise)
+        self.db.flush()
         return exercise
 
+    def insert_many(self, rows: list[dict]) -> dict[tuple[int | None, int], int]:
+        """
+        Insert several exercises of a session with one multi-row INSERT, each
+        dict holding every column. Returns the new ids by place:
+        (block_id, position_in_block) inside a block, (None, position) for
+        free exercises.
+        """
+        if not rows:
+            return {}
+        stmt = (
+            insert(Exercise)
+            .execution_options(render_nulls=True)
+            .returning(
+                Exercise.block_id,
+                func.coalesce(Exercise.position_in_block, Exercise.position),
+                Exercise.id,
+            )
+        )
+        return {
+            (block_id, position): exercise_id
+            for block_id, position, exercise_id in self.db.execute(stmt, rows)
+        }
+
     def get_by_id(self, exercise_id: int) -> Exercise | None:
         return self.db.get(Exercise, exercise_id)
 
-    def list_by_session(self, session_id: int) -> list[Exercise]:
+    def list_by_session(self, session_id: int) -> list[Row]:
+        """
+        Return the exercises of a session as Core rows of every column, for
+        read-only listings: no ORM instance is built.
+        """
         # Tri par position dans le block si nécessaire, sinon par position globale
         stmt = (
-            select(Exercise)
+            select(*Exercise.__table__.columns)
             .where(Exercise.session_id == session_id)
             .order_by(Exercise.position_in_block, Exercise.position)
         )
-        return list(self.db.scalars(stmt))
+        return list(self.db.execute(stmt))
+
+    def history(
+        self,
+        user_id: int,
+        exercise_type: ExerciseType,
+        *,
+        date_from: date | None = None,
+        date_to: date | None = None,
+    ) -> list[Row]:
+        """
+        Return the (date, weight_kg, repetitions, duration_seconds,
+        distance_meters) rows of a user's exercises of one type, oldest
+        first. Served by ix_session_user_date_id for the sessions and by the
+        covering ix_exercise_session_type for the exercises.
+        """
+        stmt = (
+            select(
+                Session.date,
+                Exercise.weight_kg,
+                Exercise.repetitions,
+                Exercise.duration_seconds,
+                Exercise.distance_meters,
+            )
+            .join(Session, Exercise.session_id == Session.id)
+            .where(Session.user_id == user_id, Exercise.exercise_type == exercise_type)
+        )
+        if date_from is not None:
+            stmt = stmt.where(Session.date >= date_from)
+        if date_to is not None:
+            stmt = stmt.where(Session.date <= date_to)
+        stmt = stmt.order_by(Session.date, Session.id, Exercise.id)
+        return list(self.db.execute(stmt))
+
+    def analytics_rows(self, after_id: int, batch_size: int = 10000) -> Iterator[Row]:
+        """
+        Stream the exercises of id greater than after_id, in id order, with
+        the user, date, type and location of their session. Rows are fetched
+        batch_size at a time through a server-side cursor.
+        """
+        stmt = (
+            select(
+                Exercise.id.label("exercise_id"),
+                Exercise.session_id,
+                Exercise.block_id,
+                Session.user_id,
+                Session.date.label("session_date"),
+                Session.session_type,
+                Session.location_id,
+                Exercise.exercise_type,
+                Exercise.weight_kg,
+                Exercise.repetitions,
+                Exercise.duration_seconds,
+                Exercise.distance_meters,
+            )
+            .join(Session, Exercise.session_id == Session.id)
+            .where(Exercise.id > after_id)
+            .order_by(Exercise.id)
+            .execution_options(yield_per=batch_size)
+        )
+        return iter(self.db.execute(stmt))
 
-    def list_by_block(self, block_id: int) -> list[Exercise]:
+    def list_by_block(self, block_id: int) -> list[Row]:
+        """
+        Same as list_by_session, for the exercises of a block, ordered by
+        position_in_block (rank_in_block in fractional mode).
+        """
         stmt = (
-            select(Exercise)
+            select(*Exercise.__table__.columns)
             .where(Exercise.block_id == block_id)
-            .order_by(Exercise.position)
+            .order_by(Exercise.position_in_block, Exercise.rank_in_block)
         )
-        return list(self.db.scalars(stmt))
+        return list(self.db.execute(stmt))
 
     def update(self, exercise: Exercise) -> Exercise:
-        self.db.commit()
-        self.db.refresh(exercise)
+        self.db.flush()
         return exercise
 
     def delete(self, exercise: Exercise) -> None:
         self.db.delete(exercise)
-        self.db.commit()
+        self.db.flush()
 
     def validate_block_session(self, block_id: int, session_id: int) -> bool:
         block = self.db.get(Block, block_id)
@@ -65,5 +158,98 @@ class ExerciseDAO:
             .where(Exercise.block_id == block_id)
         ).one()
 
+    def list_free_ranks(self, session_id: int) -> list[tuple[int, str | None, int | None]]:
+        """
+        Return (id, rank, position) for every free exercise of the session.
+        """
+        stmt = select(Exercise.id, Exercise.rank, Exercise.position).where(
+            Exercise.session_id == session_id,
+            Exercise.block_id.is_(None),
+        )
+        return [
+            (exercise_id, rank, position) for exercise_id, rank, position in self.db.execute(stmt)
+        ]
+
+    def list_block_ranks(self, block_id: int) -> list[tuple[int, str | None, int | None]]:
+        """
+        Return (id, rank_in_block, position_in_block) for every exercise of the block.
+        """
+        stmt = select(
+            Exercise.id, Exercise.rank_in_block, Exercise.position_in_block
+        ).where(Exercise.block_id == block_id)
+        return [
+            (exercise_id, rank, position) for exercise_id, rank, position in self.db.execute(stmt)
+        ]
 
+    def list_block_ranks_by_session(
+        self, session_id: int
+    ) -> list[tuple[int, int, str | None, int | None]]:
+        """
+        Return (block_id, id, rank_in_block, position_in_block) for every
+        exercise inside a block of the session.
+        """
+        stmt = select(
+            Exercise.block_id,
+            Exercise.id,
+            Exercise.rank_in_block,
+            Exercise.position_in_block,
+        ).where(
+            Exercise.session_id == session_id,
+            Exercise.block_id.is_not(None),
+        )
+        # block_id is not NULL (filtered)
+        return cast(
+            list[tuple[int, int, str | None, int | None]],
+            [tuple(row) for row in self.db.execute(stmt)],
+        )
 
+    def bulk_update(self, values: list[dict]) -> None:
+        """
+        Update several exercises at once, each dict holding the exercise "id"
+        and the columns to set.
+        """
+        if values:
+            self.db.execute(update(Exercise), values)
+
+    def shift_positions(
+        self,
+        session_id: int,
+        *,
+        start: int,
+        end: int | None = None,
+        delta: int,
+    ) -> None:
+        """
+        Shift by delta the timeline position of every free exercise of the
+        session whose position is in [start, end] (no upper bound if end is None).
+        """
+        stmt = update(Exercise).where(
+            Exercise.session_id == session_id,
+            Exercise.block_id.is_(None),
+            Exercise.position >= start,
+        )
+        if end is not None:
+            stmt = stmt.where(Exercise.position <= end)
+        self.db.execute(stmt.values(position=Exercise.position + delta))
+
+    def shift_block_positions(
+        self,
+        block_id: int,
+        *,
+        start: int,
+        end: int | None = None,
+        delta: int,
+    ) -> None:
+        """
+        Shift by delta the position_in_block of every exercise of the block
+        whose position_in_block is in [start, end].
+        """
+        stmt = update(Exercise).where(
+            Exercise.block_id == block_id,
+            Exercise.position_in_block >= start,
+        )
+        if end is not None:
+            stmt = stmt.where(Exercise.position_in_block <= end)
+        self.db.execute(
+            stmt.values(position_in_block=Exercise.position_in_block + delta)
+        )
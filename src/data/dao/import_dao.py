@@ -0,0 +1,176 @@
+"""
+Staging of bulk imports (PostgreSQL only): rows are loaded with COPY into
+temporary tables, dropped at the end of the transaction, then merged into
+sessions, blocks and exercises with a few set-based statements.
+"""
+
+import csv
+import io
+from collections.abc import Iterator
+
+from sqlalchemy import (
+    Column,
+    Date,
+    Float,
+    Integer,
+    MetaData,
+    Row,
+    String,
+    Table,
+    Text,
+    cast,
+    func,
+    insert,
+    literal,
+    select,
+    update,
+)
+from sqlalchemy.orm import Session as DBSession
+from sqlalchemy.schema import CreateTable
+
+from src.data.models import Block, Exercise, Location, Session
+
+staging = MetaData()
+
+
+def _staging_table(name: str, *columns: Column) -> Table:
+    return Table(name, staging, *columns, prefixes=["TEMPORARY"], postgresql_on_commit="DROP")
+
+
+# Rows are identified by keys given by the importer; ids are allocated at
+# merge time. Enum columns hold member names, cast to the enum types on merge.
+import_sessions = _staging_table(
+    "import_sessions",
+    Column("key", Integer, primary_key=True, autoincrement=False),
+    Column("id", Integer),
+    Column("name", String(100), nullable=False),
+    Column("date", Date, nullable=False),
+    Column("session_type", Text, nullable=False),
+    Column("location_id", Integer),
+    Column("notes", Text),
+)
+import_blocks = _staging_table(
+    "import_blocks",
+    Column("key", Integer, primary_key=True, autoincrement=False),
+    Column("id", Integer),
+    Column("session_key", Integer, nullable=False),
+    Column("block_type", Text, nullable=False),
+    Column("position", Integer, nullable=False),
+    Column("duration", Float),
+    Column("notes", Text),
+)
+import_exercises = _staging_table(
+    "import_exercises",
+    Column("session_key", Integer, nullable=False),
+    Column("block_key", Integer),
+    Column("exercise_type", Text, nullable=False),
+    Column("position", Integer),
+    Column("position_in_block", Integer),
+    Column("weight_kg", Float),
+    Column("repetitions", Integer),
+    Column("duration_seconds", Float),
+    Column("distance_meters", Float),
+    Column("notes", Text),
+)
+
+
+def copy_columns(table: Table) -> list[str]:
+    """
+    Columns loaded by COPY into a staging table (all but the allocated id).
+    """
+    return [column.name for column in table.columns if column.name != "id"]
+
+
+class ImportDAO:
+    def __init__(self, db: DBSession):
+        self.db = db
+
+    def location_ids(self) -> set[int]:
+        return set(self.db.scalars(select(Location.id)))
+
+    def create_staging(self) -> None:
+        for table in staging.sorted_tables:
+            self.db.execute(CreateTable(table))
+
+    def copy(self, table: Table, rows: list[dict]) -> None:
+        """
+        Load rows (dicts by copy_columns) into a staging table with COPY.
+        """
+        columns = copy_columns(table)
+        buffer = io.StringIO()
+        # None is written as an unquoted empty field, read back as NULL
+        csv.writer(buffer).writerows([row[column] for column in columns] for row in rows)
+        buffer.seek(0)
+        cursor = self.db.connection().connection.cursor()
+        try:
+            cursor.copy_expert(
+                f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)",
+                buffer,
+            )
+        finally:
+            cursor.close()
+
+    def merge(self, user_id: int) -> None:
+        """
+        Allocate ids to the staged sessions and blocks, then insert the staged
+        rows for a user.
+        """
+        for table, target in ((import_sessions, "sessions"), (import_blocks, "blocks")):
+            self.db.execute(
+                update(table).values(id=func.nextval(func.pg_get_serial_sequence(target, "id")))
+            )
+
+        s, b, e = import_sessions.c, import_blocks.c, import_exercises.c
+        self.db.execute(
+            insert(Session).from_select(
+                ["id", "name", "date", "session_type", "user_id", "location_id", "notes"],
+                select(
+                    s.id, s.name, s.date,
+                    cast(s.session_type, Session.__table__.c.session_type.type),
+                    literal(user_id), s.location_id, s.notes,
+                ),
+            )
+        )
+        self.db.execute(
+            insert(Block).from_select(
+                ["id", "session_id", "block_type", "position", "duration", "notes"],
+                select(
+                    b.id, s.id, cast(b.block_type, Block.__table__.c.block_type.type),
+                    b.position, b.duration, b.notes,
+                ).join(import_sessions, b.session_key == s.key),
+            )
+        )
+        self.db.execute(
+            insert(Exercise).from_select(
+                [
+                    "session_id", "block_id", "exercise_type", "position", "position_in_block",
+                    "weight_kg", "repetitions", "duration_seconds", "distance_meters", "notes",
+                ],
+                select(
+                    s.id, b.id, cast(e.exercise_type, Exercise.__table__.c.exercise_type.type),
+                    e.position, e.position_in_block, e.weight_kg, e.repetitions,
+                    e.duration_seconds, e.distance_meters, e.notes,
+                )
+                .join(import_sessions, e.session_key == s.key)
+                .outerjoin(import_blocks, e.block_key == b.key),
+            )
+        )
+
+    def imported_exercises(self, batch_size: int = 1000) -> Iterator[Row]:
+        """
+        Stream the exercises inserted by merge, with the columns personal
+        records are computed from.
+        """
+        stmt = (
+            select(
+                Exercise.id,
+                Exercise.exercise_type,
+                Exercise.weight_kg,
+                Exercise.repetitions,
+                Exercise.duration_seconds,
+                Exercise.distance_meters,
+            )
+            .join(import_sessions, Exercise.session_id == import_sessions.c.id)
+            .execution_options(yield_per=batch_size)
+        )
+        return iter(self.db.execute(stmt))
@@ -11,8 +11,7 @@ class LocationDAO:
         Persist a new Location in the database.
         """
         self.db.add(location)
-        self.db.commit()
-        self.db.refresh(location)
+        self.db.flush()
         return location
 
     def get_by_id(self, location_id: int) -> Location | None:
@@ -32,4 +31,4 @@ class LocationDAO:
         Delete a Location from the database.
         """
         self.db.delete(location)
-        self.db.commit()
+        self.db.flush()
@@ -0,0 +1,125 @@
+from sqlalchemy import Select, func, literal, select, union_all
+from sqlalchemy.orm import Session as DBSession
+
+from src.data.models import Exercise, ExerciseType, PersonalRecord, Session
+
+
+class RecordDAO:
+    def __init__(self, db: DBSession):
+        self.db = db
+
+    def create(self, record: PersonalRecord) -> PersonalRecord:
+        self.db.add(record)
+        self.db.flush()
+        return record
+
+    def delete(self, record: PersonalRecord) -> None:
+        self.db.delete(record)
+        self.db.flush()
+
+    def delete_all(self, records: list[PersonalRecord]) -> None:
+        # A single flush: one DELETE statement for all the records
+        for record in records:
+            self.db.delete(record)
+        self.db.flush()
+
+    def list_by_user(self, user_id: int) -> list[PersonalRecord]:
+        stmt = (
+            select(PersonalRecord)
+            .where(PersonalRecord.user_id == user_id)
+            .order_by(
+                PersonalRecord.exercise_type,
+                PersonalRecord.metric,
+                PersonalRecord.qualifier,
+            )
+        )
+        return list(self.db.scalars(stmt))
+
+    def list_by_type(self, user_id: int, exercise_type: ExerciseType) -> list[PersonalRecord]:
+        stmt = select(PersonalRecord).where(
+            PersonalRecord.user_id == user_id,
+            PersonalRecord.exercise_type == exercise_type,
+        )
+        return list(self.db.scalars(stmt))
+
+    def list_held(self, **scope: int) -> list[PersonalRecord]:
+        """
+        Return the records held by the exercises matching scope, given as
+        Exercise column values (id, block_id or session_id).
+        """
+        stmt = select(PersonalRecord).join(
+            Exercise, PersonalRecord.exercise_id == Exercise.id
+        )
+        for name, value in scope.items():
+            stmt = stmt.where(getattr(Exercise, name) == value)
+        return list(self.db.scalars(stmt))
+
+    def best(
+        self,
+        user_id: int,
+        exercise_type: ExerciseType,
+        *,
+        value_column: str,
+        qualifier_column: str | None,
+        qualifier: float,
+        lowest: bool,
+        exclude: dict[str, int],
+    ) -> tuple[int, float] | None:
+        """
+        Return (exercise id, value) of the user's best exercise of a type for
+        one metric: the exercise value_column, lowest or highest, among the
+        exercises whose qualifier_column (NULL counting as 0) equals qualifier.
+        Exercises matching exclude (Exercise column values) are left out.
+        """
+        stmt = self._best(
+            user_id,
+            exercise_type,
+            value_column=value_column,
+            qualifier_column=qualifier_column,
+            qualifier=qualifier,
+            lowest=lowest,
+            exclude=exclude,
+        )
+        row = self.db.execute(stmt).first()
+        return (row[0], row[1]) if row else None
+
+    def best_many(self, searches: list[dict]) -> list[tuple[int, float] | None]:
+        """
+        Return best() of each of searches (its arguments, as keywords), in
+        a single query.
+        """
+        if not searches:
+            return []
+        stmt = union_all(*(
+            select(literal(index).label("search"), ranked.c.exercise_id, ranked.c.value)
+            for index, ranked in enumerate(self._best(**search).subquery() for search in searches)
+        ))
+        found = {row.search: (row.exercise_id, row.value) for row in self.db.execute(stmt)}
+        return [found.get(index) for index in range(len(searches))]
+
+    @staticmethod
+    def _best(
+        user_id: int,
+        exercise_type: ExerciseType,
+        *,
+        value_column: str,
+        qualifier_column: str | None,
+        qualifier: float,
+        lowest: bool,
+        exclude: dict[str, int],
+    ) -> Select:
+        value = getattr(Exercise, value_column)
+        stmt = (
+            select(Exercise.id.label("exercise_id"), value.label("value"))
+            .join(Session, Exercise.session_id == Session.id)
+            .where(
+                Session.user_id == user_id,
+                Exercise.exercise_type == exercise_type,
+                value > 0,
+            )
+        )
+        if qualifier_column is not None:
+            stmt = stmt.where(func.coalesce(getattr(Exercise, qualifier_column), 0) == qualifier)
+        for name, excluded in exclude.items():
+            stmt = stmt.where(getattr(Exercise, name).is_distinct_from(excluded))
+        return stmt.order_by(value.asc() if lowest else value.desc(), Exercise.id).limit(1)
@@ -1,8 +1,10 @@
-from sqlalchemy.orm import Session as DBSession
-from sqlalchemy import select
+from sqlalchemy.orm import Session as DBSession, selectinload
+from sqlalchemy import Row, exists, func, null, select, tuple_, union_all, update
+from collections.abc import Iterator
 from datetime import date
 
-from src.data.models import Session
+from src.core.cache import session_trees
+from src.data.models import Block, Exercise, Session
 
 
 class SessionDAO:
@@ -11,12 +13,60 @@ class SessionDAO:
 
     def create(self, session: Session) -> Session:
         self.db.add(session)
-        self.db.commit()
-        self.db.refresh(session)
+        self.db.flush()
         return session
 
     def get_by_id(self, session_id: int) -> Session | None:
         return self.db.get(Session, session_id)
+
+    def get_tree(self, session_id: int) -> Session | None:
+        """
+        Retrieve a session with its blocks, their exercises and its free
+        exercises, in four queries whatever the size of the session.
+        Session.exercises only holds the free exercises on the returned
+        object: it must be used for reading only.
+        """
+        stmt = (
+            select(Session)
+            .where(Session.id == session_id)
+            .options(
+                selectinload(Session.blocks).selectinload(Block.exercises),
+                selectinload(Session.exercises.and_(Exercise.block_id.is_(None))),
+            )
+        )
+        return self.db.scalars(stmt).one_or_none()
+
+    def get_version(self, session_id: int) -> int | None:
+        """
+        Version of a session, read by primary key alone (for conditional
+        GETs). None if there is no such session.
+        """
+        return self.db.execute(
+            select(Session.version).where(Session.id == session_id)
+        ).scalar()
+
+    def bump_version(self, session_id: int) -> None:
+        """
+        Increment the version of a session, in the database so that
+        concurrent writers never lose a bump, and drop its cached tree. Also
+        locks the session row until the end of the transaction.
+        """
+        self.db.execute(
+            update(Session)
+            .where(Session.id == session_id)
+            .values(version=Session.version + 1)
+        )
+        session_trees.invalidate(session_id)
+
+    def lock(self, session_id: int) -> bool:
+        """
+        Lock the session row until the end of the transaction, to serialize
+        writers reordering the same session. Returns False if there is no
+        such session.
+        """
+        return self.db.execute(
+            select(Session.id).where(Session.id == session_id).with_for_update()
+        ).scalar() is not None
     
     def get_by_date_and_user(
         self,
@@ -31,9 +81,114 @@ class SessionDAO:
         )
         return list(self.db.scalars(stmt).all())
 
-    def list_by_user(self, user_id: int) -> list[Session]:
-        stmt = select(Session).where(Session.user_id == user_id)
-        return list(self.db.scalars(stmt))
+    def list_by_user(
+        self,
+        user_id: int,
+        *,
+        limit: int,
+        before: tuple[date, int] | None = None,
+        date_from: date | None = None,
+        date_to: date | None = None,
+    ) -> list[Row]:
+        """
+        Return up to limit sessions of a user, newest first (date, then id),
+        starting after the (date, id) key before if given. Served by the
+        ix_session_user_date_id index, whatever the page.
+        Sessions are Core rows of every column: no ORM instance is built.
+        """
+        stmt = select(*Session.__table__.columns).where(Session.user_id == user_id)
+        if before is not None:
+            stmt = stmt.where(tuple_(Session.date, Session.id) < tuple_(*before))
+        if date_from is not None:
+            stmt = stmt.where(Session.date >= date_from)
+        if date_to is not None:
+            stmt = stmt.where(Session.date <= date_to)
+        stmt = stmt.order_by(Session.date.desc(), Session.id.desc()).limit(limit)
+        return list(self.db.execute(stmt))
+
+    def export_rows(
+        self,
+        user_id: int,
+        *,
+        date_from: date | None = None,
+        date_to: date | None = None,
+        batch_size: int = 1000,
+    ) -> Iterator[Row]:
+        """
+        Stream the whole training history of a user, oldest session first:
+        one row per exercise with its session and block columns, plus one
+        row per empty block and per empty session. The rows of a session
+        come together, with the ordering columns of their block or free
+        exercise (item_rank, item_position) and of the exercise in its block
+        (rank_in_block, position_in_block) to sort them.
+        Rows are fetched batch_size at a time through a server-side cursor,
+        so memory does not grow with the history.
+        """
+        def session_columns():
+            return [
+                Session.id.label("session_id"),
+                Session.name.label("session_name"),
+                Session.date.label("session_date"),
+                Session.session_type,
+                Session.location_id,
+                Session.notes.label("session_notes"),
+            ]
+
+        def in_range(stmt):
+            stmt = stmt.where(Session.user_id == user_id)
+            if date_from is not None:
+                stmt = stmt.where(Session.date >= date_from)
+            if date_to is not None:
+                stmt = stmt.where(Session.date <= date_to)
+            return stmt
+
+        def nulls(count: int) -> list:
+            return [null()] * count
+
+        exercises = in_range(
+            select(
+                *session_columns(),
+                Block.id.label("block_id"),
+                Block.block_type,
+                Block.duration.label("block_duration"),
+                Block.notes.label("block_notes"),
+                Exercise.id.label("exercise_id"),
+                Exercise.exercise_type,
+                Exercise.weight_kg,
+                Exercise.repetitions,
+                Exercise.duration_seconds,
+                Exercise.distance_meters,
+                Exercise.notes.label("exercise_notes"),
+                # Place in the timeline, then in the block
+                func.coalesce(Block.rank, Exercise.rank).label("item_rank"),
+                func.coalesce(Block.position, Exercise.position).label("item_position"),
+                Exercise.rank_in_block,
+                Exercise.position_in_block,
+            )
+            .join(Session, Exercise.session_id == Session.id)
+            .outerjoin(Block, Exercise.block_id == Block.id)
+        )
+        empty_blocks = in_range(
+            select(
+                *session_columns(),
+                Block.id, Block.block_type, Block.duration, Block.notes,
+                *nulls(7), Block.rank, Block.position, *nulls(2),
+            )
+            .join(Session, Block.session_id == Session.id)
+            .where(~exists().where(Exercise.block_id == Block.id))
+        )
+        empty_sessions = in_range(
+            select(*session_columns(), *nulls(4 + 7 + 4))
+            .where(~exists().where(Exercise.session_id == Session.id))
+            .where(~exists().where(Block.session_id == Session.id))
+        )
+        rows = union_all(exercises, empty_blocks, empty_sessions).subquery()
+        stmt = (
+            select(rows)
+            .order_by(rows.c.session_date, rows.c.session_id)
+            .execution_options(yield_per=batch_size)
+        )
+        return iter(self.db.execute(stmt))
 
     def get_by_location_and_user(self, location_id: int, user_id: int) -> list["Session"]:
         """
@@ -46,11 +201,10 @@ class SessionDAO:
         return list(self.db.scalars(stmt).all())
 
     def update(self, session: Session) -> Session:
-        self.db.commit()
-        self.db.refresh(session)
+        self.db.flush()
         return session
 
     def delete(self, session: Session) -> None:
         self.db.delete(session)
-        self.db.commit()
+        self.db.flush()
 
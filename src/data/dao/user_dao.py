@@ -15,8 +15,7 @@ class UserDAO:
     def create(self, username: str) -> User:
         user = User(username=username)
         self.db.add(user)
-        self.db.commit()
-        self.db.refresh(user)
+        self.db.flush()
         return user
 
 
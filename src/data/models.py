@@ -10,6 +10,7 @@ from sqlalchemy import (
     Index,
 )
 from sqlalchemy.orm import relationship, DeclarativeBase, Mapped, mapped_column
+import datetime
 import enum
 
 # -------------------
@@ -98,6 +99,13 @@ class LocationType(str, enum.Enum):
     gym = "Gym"
     none = "None"
 
+
+class RecordMetric(str, enum.Enum):
+    max_weight = "Max Weight"
+    max_reps = "Max Reps"
+    best_time = "Best Time"
+    longest_distance = "Longest Distance"
+
 # -------------------
 # Models
 # -------------------
@@ -132,10 +140,14 @@ class Location(Base):
 
 class Session(Base):
     __tablename__ = "sessions"
+    __table_args__ = (
+        # Keyset pagination of a user's history on (date, id)
+        Index("ix_session_user_date_id", "user_id", "date", "id"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     name: Mapped[str] = mapped_column(String(100), nullable=False)
-    date: Mapped[Date] = mapped_column(Date, nullable=False)
+    date: Mapped[datetime.date] = mapped_column(Date, nullable=False)
     session_type: Mapped[SessionType] = mapped_column(
         Enum(SessionType),
         nullable=False,
@@ -152,6 +164,9 @@ class Session(Base):
         index=True,
     )
     notes: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # Bumped by every write to the session, its blocks or its exercises:
+    # the ETag of the session and of its contents
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
 
     user: Mapped["User"] = relationship(
         "User",
@@ -166,17 +181,20 @@ class Session(Base):
     back_populates="session",
     order_by="Block.position",
     cascade="all, delete-orphan",
+    passive_deletes=True,
     )
     exercises: Mapped[list["Exercise"]] = relationship(
     "Exercise",
     back_populates="session",
     order_by="Exercise.position",
     cascade="all, delete-orphan",
+    passive_deletes=True,
     )
     photos: Mapped[list["Photo"]] = relationship(
         "Photo",
         back_populates="session",
         cascade="all, delete-orphan",
+        passive_deletes=True,
     )
 
 
@@ -189,6 +207,7 @@ class Block(Base):
             name="uix_session_block_position",
         ),
         Index("ix_block_position", "position"),
+        Index("ix_block_session_rank", "session_id", "rank"),
     )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
@@ -198,6 +217,11 @@ class Block(Base):
     )
     duration: Mapped[float | None] = mapped_column(Float, nullable=True)
     position: Mapped[int] = mapped_column(Integer, nullable=False)
+    rank: Mapped[str | None] = mapped_column(
+        String(64),
+        nullable=True,
+        comment="Sortable rank key in the session timeline (fractional ordering mode)",
+    )
     session_id: Mapped[int] = mapped_column(
         Integer,
         ForeignKey("sessions.id", ondelete="CASCADE"),
@@ -212,8 +236,9 @@ class Block(Base):
     exercises: Mapped[list["Exercise"]] = relationship(
         "Exercise",
         back_populates="block",
-        order_by="Exercise.position",
+        order_by="Exercise.position_in_block",
         cascade="all, delete-orphan",
+        passive_deletes=True,
     )
 
 
@@ -225,6 +250,24 @@ class Exercise(Base):
         Index("ix_exercise_block_position", "block_id", "position_in_block"),
         # Index useful for ordering free exercises in a session
         Index("ix_exercise_session_position", "session_id", "position"),
+        # Indexes used by the fractional ordering mode
+        Index("ix_exercise_block_rank", "block_id", "rank_in_block"),
+        Index("ix_exercise_session_rank", "session_id", "rank"),
+        # Covering index for the progress history of a movement: reached
+        # from the sessions of a user (ix_session_user_date_id), it holds
+        # every column the history reads
+        Index(
+            "ix_exercise_session_type",
+            "session_id",
+            "exercise_type",
+            postgresql_include=[
+                "id",
+                "weight_kg",
+                "repetitions",
+                "duration_seconds",
+                "distance_meters",
+            ],
+        ),
     )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
@@ -268,6 +311,18 @@ class Exercise(Base):
         comment="Position inside a block (only if block_id is not null)",
     )
 
+    rank: Mapped[str | None] = mapped_column(
+        String(64),
+        nullable=True,
+        comment="Sortable rank key in the session timeline (fractional ordering mode)",
+    )
+
+    rank_in_block: Mapped[str | None] = mapped_column(
+        String(64),
+        nullable=True,
+        comment="Sortable rank key inside a block (fractional ordering mode)",
+    )
+
     # ORM relations
     session: Mapped["Session"] = relationship(
         "Session",
@@ -310,3 +365,48 @@ class Photo(Base):
         "Session",
         back_populates="photos",
     )
+
+
+class PersonalRecord(Base):
+    __tablename__ = "personal_records"
+    __table_args__ = (
+        # One record per user, exercise type, metric and qualifier; also
+        # serves the listing of a user's records
+        UniqueConstraint(
+            "user_id",
+            "exercise_type",
+            "metric",
+            "qualifier",
+            name="uix_record_user_type_metric",
+        ),
+        # Finding the records held by exercises being changed or deleted
+        Index("ix_record_exercise", "exercise_id"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    user_id: Mapped[int] = mapped_column(
+        Integer,
+        ForeignKey("users.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    exercise_type: Mapped[ExerciseType] = mapped_column(
+        Enum(ExerciseType),
+        nullable=False,
+    )
+    metric: Mapped[RecordMetric] = mapped_column(
+        Enum(RecordMetric),
+        nullable=False,
+    )
+    qualifier: Mapped[float] = mapped_column(
+        Float,
+        nullable=False,
+        default=0,
+        comment="Weight (max reps) or distance (best time) the record applies to, 0 otherwise",
+    )
+    value: Mapped[float] = mapped_column(Float, nullable=False)
+    exercise_id: Mapped[int | None] = mapped_column(
+        Integer,
+        ForeignKey("exercises.id", ondelete="SET NULL"),
+        nullable=True,
+        comment="Exercise holding the record",
+    )
@@ -0,0 +1,41 @@
+"""
+Incremental columnar export of the exercises for analysis (needs the
+"analytics" extra), see src.services.analytics_service:
+
+    python -m src.jobs.export_analytics DIRECTORY [--format parquet|arrow] [--batch-size N]
+
+Run it periodically: each run appends the exercises created since the
+previous one (exercises committed during a run may be missed, see the
+service).
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+from src.core.database import unit_of_work
+from src.services.analytics_service import BATCH_ROWS, AnalyticsService
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("directory", type=Path)
+    parser.add_argument("--format", choices=["parquet", "arrow"], default="parquet")
+    parser.add_argument(
+        "--batch-size", type=int, default=BATCH_ROWS,
+        help="exercises read and written at a time",
+    )
+    args = parser.parse_args(argv)
+
+    # Read-only: the replica serves it if there is one
+    with unit_of_work(replica=True) as db:
+        export = AnalyticsService(db).export(args.directory, args.format, batch_size=args.batch_size)
+    print(
+        f"{export.rows} exercises exported to {len(export.files)} files, "
+        f"watermark at exercise {export.watermark}"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,62 @@
+"""
+Bulk import of a training history into the account of an existing user,
+from a file in the format of GET /users/{id}/export (CSV or NDJSON):
+
+    python -m src.jobs.import_history --user 12 history.csv [--format csv] [--dry-run]
+
+Valid rows are imported in a single transaction; invalid rows are listed
+on stderr and skipped (the exit status is then 1). --dry-run only
+validates the file.
+"""
+
+import argparse
+import sys
+
+from src.core.database import unit_of_work
+from src.services.export_service import ExportFormat
+from src.services.import_service import ImportReport, ImportService
+from src.services.user_service import UserService
+
+
+def _progress(report: ImportReport) -> None:
+    print(
+        f"{report.rows} rows read: {report.sessions} sessions, {report.blocks} blocks, "
+        f"{report.exercises} exercises, {report.rejected} rejected",
+        file=sys.stderr,
+    )
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("file")
+    parser.add_argument("--user", type=int, required=True, help="id of the user to import for")
+    parser.add_argument(
+        "--format", choices=["csv", "ndjson"],
+        help="format of the file (default: from its extension)",
+    )
+    parser.add_argument("--dry-run", action="store_true", help="validate without importing")
+    args = parser.parse_args(argv)
+    import_format: ExportFormat = args.format or ("csv" if args.file.endswith(".csv") else "ndjson")
+
+    with open(args.file, newline="", encoding="utf-8") as lines, unit_of_work() as db:
+        if UserService(db).get_user(args.user) is None:
+            print(f"User {args.user} not found", file=sys.stderr)
+            return 1
+        report = ImportService(db).run(
+            args.user, lines, import_format, dry_run=args.dry_run, progress=_progress
+        )
+
+    for line, message in report.errors:
+        print(f"line {line}: {message}", file=sys.stderr)
+    if report.rejected > len(report.errors):
+        print(f"... and {report.rejected - len(report.errors)} more", file=sys.stderr)
+    verb = "validated" if report.dry_run else "imported"
+    print(
+        f"{report.sessions} sessions, {report.blocks} blocks and {report.exercises} "
+        f"exercises {verb}, {report.rejected} of {report.rows} rows rejected"
+    )
+    return 1 if report.rejected else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
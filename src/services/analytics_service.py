@@ -0,0 +1,181 @@
+"""
+Columnar export of the exercises, for analysis in notebooks (needs the
+"analytics" extra: pyarrow).
+
+Each exercise is written with the user, date, type and location of its
+session, in Parquet or Arrow IPC files partitioned by month of the
+session date (a "month=YYYY-MM" directory per month, as read by
+pyarrow.dataset with hive partitioning). Session and exercise types are
+dictionary-encoded.
+
+Exports are incremental: the directory holds the id of the last exported
+exercise (the watermark, in WATERMARK_FILE) and each run only appends a
+file per month for the exercises created since. Exercises updated or
+deleted after their export are not rewritten: remove the directory to
+export everything again.
+
+The watermark assumes exercises become visible in id order, which
+concurrent writers do not guarantee: ids are taken from the sequence at
+INSERT time, so a transaction still open during a run can commit an id
+below the new watermark. Later runs never read that exercise. Schedule
+runs when the API takes few writes, and start a full export from time to
+time to pick up such exercises.
+"""
+
+import json
+import os
+from itertools import batched, groupby
+from pathlib import Path
+from typing import TYPE_CHECKING, Literal, NamedTuple
+
+from sqlalchemy import Row
+from sqlalchemy.orm import Session as DBSession
+
+from src.data.dao.exercise_dao import ExerciseDAO
+from src.data.models import ExerciseType, SessionType
+
+if TYPE_CHECKING:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+ColumnarFormat = Literal["parquet", "arrow"]
+
+WATERMARK_FILE = "_watermark.json"
+# Exercises read and written at a time: the most held in memory
+BATCH_ROWS = 50000
+FILE_SUFFIXES = {"parquet": ".parquet", "arrow": ".arrow"}
+# Dictionary-encoded columns hold the code of the member in its enum: the
+# dictionaries are the same in every batch and every file
+DICTIONARIES: dict[str, list[SessionType] | list[ExerciseType]] = {
+    "session_type": list(SessionType),
+    "exercise_type": list(ExerciseType),
+}
+
+
+class AnalyticsExport(NamedTuple):
+    rows: int
+    watermark: int
+    files: list[Path]
+
+
+def read_watermark(directory: Path) -> int:
+    """
+    Id of the last exercise exported to directory, 0 if none was.
+    """
+    try:
+        return json.loads((directory / WATERMARK_FILE).read_text())["exercise_id"]
+    except FileNotFoundError:
+        return 0
+
+
+def write_watermark(directory: Path, exercise_id: int) -> None:
+    # Replaced atomically: a crash leaves the previous watermark
+    temporary = directory / f".{WATERMARK_FILE}.tmp"
+    temporary.write_text(json.dumps({"exercise_id": exercise_id}))
+    os.replace(temporary, directory / WATERMARK_FILE)
+
+
+def _month(row: Row) -> str:
+    # Partition of an exercise
+    return f"month={row.session_date:%Y-%m}"
+
+
+def _schema():
+    import pyarrow as pa
+
+    return pa.schema([
+        ("exercise_id", pa.int64()),
+        ("session_id", pa.int64()),
+        ("block_id", pa.int64()),
+        ("user_id", pa.int64()),
+        ("session_date", pa.date32()),
+        ("session_type", pa.dictionary(pa.int8(), pa.string())),
+        ("location_id", pa.int64()),
+        ("exercise_type", pa.dictionary(pa.int16(), pa.string())),
+        ("weight_kg", pa.float64()),
+        ("repetitions", pa.int64()),
+        ("duration_seconds", pa.float64()),
+        ("distance_meters", pa.float64()),
+    ])
+
+
+class AnalyticsService:
+    def __init__(self, db: DBSession):
+        self.exercise_dao = ExerciseDAO(db)
+
+    def export(
+        self,
+        directory: Path,
+        file_format: ColumnarFormat = "parquet",
+        *,
+        batch_size: int = BATCH_ROWS,
+    ) -> AnalyticsExport:
+        """
+        Append the exercises created since the watermark of directory to its
+        monthly partitions, then move the watermark. Rows are read and
+        written batch_size at a time; files only get their final name (and
+        the watermark moves) once every batch is written, so a failed run
+        leaves the export as it was.
+        """
+        schema = _schema()
+        after = read_watermark(directory)
+        watermark, rows = after, 0
+        # Writer and temporary path of the file of each partition
+        writers: dict[str, tuple[pq.ParquetWriter | pa.ipc.RecordBatchFileWriter, Path]] = {}
+        try:
+            for batch in batched(self.exercise_dao.analytics_rows(after, batch_size), batch_size):
+                for month, month_rows in groupby(sorted(batch, key=_month), key=_month):
+                    if month not in writers:
+                        partition = directory / month
+                        partition.mkdir(parents=True, exist_ok=True)
+                        temporary = partition / f".part-{after + 1}.tmp"
+                        writers[month] = (_writer(file_format, temporary, schema), temporary)
+                    writers[month][0].write_table(_table(list(month_rows), schema))
+                watermark = batch[-1].exercise_id
+                rows += len(batch)
+        except BaseException:
+            for writer, temporary in writers.values():
+                writer.close()
+                temporary.unlink()
+            raise
+
+        files = []
+        for writer, temporary in writers.values():
+            writer.close()
+            path = temporary.with_name(f"part-{after + 1}{FILE_SUFFIXES[file_format]}")
+            os.replace(temporary, path)
+            files.append(path)
+        if rows:
+            write_watermark(directory, watermark)
+        return AnalyticsExport(rows, watermark, sorted(files))
+
+
+def _writer(
+    file_format: ColumnarFormat, path: Path, schema: "pa.Schema"
+) -> "pq.ParquetWriter | pa.ipc.RecordBatchFileWriter":
+    if file_format == "parquet":
+        import pyarrow.parquet as pq
+
+        return pq.ParquetWriter(str(path), schema)
+    import pyarrow as pa
+
+    return pa.ipc.new_file(str(path), schema)
+
+
+def _table(rows: list[Row], schema):
+    import pyarrow as pa
+
+    columns = dict(zip(rows[0]._fields, zip(*rows)))
+    arrays = []
+    for field in schema:
+        values = columns[field.name]
+        members = DICTIONARIES.get(field.name)
+        if members is None:
+            arrays.append(pa.array(values, field.type))
+            continue
+        codes = {member: code for code, member in enumerate(members)}
+        arrays.append(pa.DictionaryArray.from_arrays(
+            pa.array([codes[value] for value in values], field.type.index_type),
+            pa.array([member.value for member in members], pa.string()),
+        ))
+    return pa.Table.from_arrays(arrays, schema=schema)
@@ -1,7 +1,10 @@
 from sqlalchemy.orm import Session as DBSession
 
+from src.api.schemas.block import BlockRead
 from src.data.dao.block_dao import BlockDAO
-from src.data.models import Block, BlockType, Exercise
+from src.data.models import Block, BlockType
+from src.services.ordering_service import OrderingService
+from src.services.record_service import RecordService
 from src.services.session_service import SessionService
 from src.data.dao.exercise_dao import ExerciseDAO
 
@@ -14,38 +17,50 @@ class BlockService:
         self.block_dao = BlockDAO(db)
         self.session_service = SessionService(db)
         self.exercise_dao = ExerciseDAO(db)
+        self.ordering = OrderingService(db)
+        self.records = RecordService(db)
 
     # -------------------------
     # List / Get
     # -------------------------
-    def get_block(self, block_id: int) -> Block | None:
+    def get_block(self, block_id: int) -> Block | BlockRead | None:
         """
         Retrieve a block by its ID.
         Returns None if not found.
         """
-        return self.block_dao.get_by_id(block_id)
+        block = self.block_dao.get_by_id(block_id)
+        if block is not None and self.ordering.is_enabled():
+            timeline = self.ordering.timeline(block.session_id)
+            return self._read(block, self.ordering.position_of(timeline, "block", block.id))
+        return block
 
-    def list_blocks_by_session(self, session_id: int) -> list[Block]:
+    def list_blocks_by_session(self, session_id: int) -> list[Block] | list[BlockRead]:
         """
         List all blocks for a session, ordered by their position.
         """
-        return self.block_dao.list_by_session(session_id)
+        blocks = self.block_dao.list_by_session(session_id)
+        if not self.ordering.is_enabled():
+            return blocks
+        timeline = self.ordering.timeline(session_id)
+        by_id = {block.id: block for block in blocks}
+        return [
+            self._read(by_id[item.id], position)
+            for position, item in enumerate(timeline)
+            if item.kind == "block" and item.id in by_id
+        ]
 
-    # -------------------------
-    # Helper: shift positions
-    # -------------------------
-    def _shift_positions(self, items, removed_pos: int):
+    def session_version(self, session_id: int) -> int | None:
         """
-        Shift the positions of all items whose position is greater than removed_pos.
-        Works for both Block and Exercise objects.
+        Version of a session, the ETag of its block list.
         """
-        for item in sorted(items, key=lambda e: e.position or 0):
-            if (item.position or 0) > removed_pos:
-                item.position = (item.position or 0) - 1
-                if isinstance(item, Block):
-                    self.block_dao.update(item)
-                elif isinstance(item, Exercise):
-                    self.exercise_dao.update(item)
+        return self.session_service.session_version(session_id)
+
+    @staticmethod
+    def _read(block: Block, position: int) -> BlockRead:
+        """
+        Fractional ordering mode: expose the position derived from the rank order.
+        """
+        return BlockRead.model_validate(block).model_copy(update={"position": position})
 
     # -------------------------
     # Create
@@ -58,7 +73,7 @@ class BlockService:
         position: int | None = None,
         duration: float | None = None,
         notes: str | None = None,
-    ) -> Block:
+    ) -> Block | BlockRead:
         """
         Create a new block in a session.
         If position is not provided, it will be appended at the end.
@@ -67,6 +82,23 @@ class BlockService:
         session = self.session_service.get_session(session_id)
         if not session:
             raise ValueError("Session not found")
+        self.session_service.bump_version(session_id)
+
+        if self.ordering.is_enabled():
+            timeline = self.ordering.ranked_timeline(session_id)
+            if position is None:
+                position = len(timeline)
+            elif position < 0 or position > len(timeline):
+                raise ValueError("Invalid block position")
+            block = self.block_dao.create(Block(
+                block_type=block_type,
+                position=self.ordering.spare_position(timeline),
+                rank=self.ordering.rank_at(session_id, timeline, position),
+                session_id=session_id,
+                duration=duration,
+                notes=notes,
+            ))
+            return self._read(block, position)
 
         total_items = (
             self.block_dao.count_by_session(session_id)
@@ -79,18 +111,8 @@ class BlockService:
             if position < 0 or position > total_items:
                 raise ValueError("Invalid block position")
             # Shift existing blocks and free exercises to make room
-            items_to_shift = [
-                b for b in self.block_dao.list_by_session(session_id)
-            ] + [
-                e for e in self.exercise_dao.list_by_session(session_id) if e.block_id is None
-            ]
-            for item in sorted(items_to_shift, key=lambda e: e.position or 0, reverse=True):
-                if (item.position or 0) >= position:
-                    item.position = (item.position or 0) + 1
-                    if isinstance(item, Block):
-                        self.block_dao.update(item)
-                    else:
-                        self.exercise_dao.update(item)
+            self.block_dao.shift_positions(session_id, start=position, delta=1)
+            self.exercise_dao.shift_positions(session_id, start=position, delta=1)
 
         block = Block(
             block_type=block_type,
@@ -112,7 +134,7 @@ class BlockService:
         position: int | None = None,
         duration: float | None = None,
         notes: str | None = None,
-    ) -> Block:
+    ) -> Block | BlockRead:
         """
         Update the properties of a block.
         Adjusts positions of other blocks and free exercises if the position changes.
@@ -123,8 +145,20 @@ class BlockService:
 
         session_id = block.session_id
         old_position = block.position
-
-        if position is not None and position != old_position:
+        self.session_service.bump_version(session_id)
+
+        if self.ordering.is_enabled():
+            timeline = self.ordering.ranked_timeline(session_id)
+            old_position = self.ordering.position_of(timeline, "block", block.id)
+            if position is not None and position != old_position:
+                others = [
+                    item for item in timeline
+                    if not (item.kind == "block" and item.id == block.id)
+                ]
+                if position < 0 or position > len(others):
+                    raise ValueError("Invalid block position")
+                block.rank = self.ordering.rank_at(session_id, others, position)
+        elif position is not None and position != old_position:
             total_items = (
                 self.block_dao.count_by_session(session_id)
                 + self.exercise_dao.count_free_by_session(session_id)
@@ -133,21 +167,18 @@ class BlockService:
 
             if position < 0 or position > total_items:
                 raise ValueError("Invalid block position")
-            items_to_shift = [
-                ex for ex in self.exercise_dao.list_by_session(session_id) if ex.position is not None
-            ] + self.block_dao.list_by_session(session_id)
-            for item in sorted(items_to_shift, key=lambda e: e.position or 0, reverse=old_position > position):
-                pos = item.position or 0
-                if old_position < position and old_position < pos <= position:
-                    item.position = pos - 1
-                elif old_position > position and position <= pos < old_position:
-                    item.position = pos + 1
-                if isinstance(item, Exercise):
-                    self.exercise_dao.update(item)
-                elif isinstance(item, Block):
-                    self.block_dao.update(item)
-    
+            low, high = sorted((old_position, position))
+            self.block_dao.move(block, position)
+            self.exercise_dao.shift_positions(
+                session_id,
+                start=low,
+                end=high,
+                delta=-1 if position > old_position else 1,
+            )
             block.position = position
+            # A stale rank would put the block back at its old place in
+            # fractional mode, see OrderingService.ordered
+            block.rank = None
 
         if block_type is not None:
             block.block_type = block_type
@@ -156,6 +187,10 @@ class BlockService:
         if notes is not None:
             block.notes = notes
 
+        if self.ordering.is_enabled():
+            return self._read(
+                self.block_dao.update(block), old_position if position is None else position
+            )
         return self.block_dao.update(block)
 
     # -------------------------
@@ -171,16 +206,15 @@ class BlockService:
 
         session_id = block.session_id
         pos_to_remove = block.position
+        self.session_service.bump_version(session_id)
 
-        # Delete the block
+        # Delete the block, and its exercises with it
+        self.records.forget(block_id=block.id)
         self.block_dao.delete(block)
+        if self.ordering.is_enabled():
+            # Rank keys leave no gap to close
+            return
 
         # Shift other blocks and free exercises to fill the gap
-        items_to_shift = [
-            b for b in self.block_dao.list_by_session(session_id)
-        ] + [
-            e for e in self.exercise_dao.list_by_session(session_id) if e.block_id is None
-        ]
-        self._shift_positions(items_to_shift, pos_to_remove)
-
-
+        self.block_dao.shift_positions(session_id, start=pos_to_remove + 1, delta=-1)
+        self.exercise_dao.shift_positions(session_id, start=pos_to_remove + 1, delta=-1)
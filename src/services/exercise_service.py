@@ -1,39 +1,178 @@
+from datetime import date
+from statistics import fmean
+from typing import cast
+
+from sqlalchemy import Row
 from sqlalchemy.orm import Session as DBSession
 
+from src.api.schemas.exercise import ExerciseRead, ExerciseRow, HistoryPoint
 from src.data.dao.exercise_dao import ExerciseDAO
 from src.data.dao.block_dao import BlockDAO
-from src.data.models import Exercise, ExerciseType, Block
+from src.data.dao.session_dao import SessionDAO
+from src.data.models import Exercise, ExerciseType
+from src.services.ordering_service import OrderedItem, OrderingService
+from src.services.record_service import RecordService
+
+
+def _shift_range(old_position: int, new_position: int) -> tuple[int, int, int]:
+    """
+    Return (start, end, delta) describing how the items between old_position
+    and new_position must shift when an item moves from one to the other.
+    The moved item itself is outside the range.
+    """
+    if new_position > old_position:
+        return old_position + 1, new_position, -1
+    return new_position, old_position - 1, 1
+
+
+HISTORY_METRICS = ("weight_kg", "repetitions", "duration_seconds", "distance_meters")
+
+
+def _downsample(rows: list[Row], max_points: int) -> list[HistoryPoint]:
+    """
+    Split the time range of rows (sorted by date) into max_points buckets of
+    equal length and average the rows of each bucket into one point, dated
+    by its first row. Empty buckets give no point.
+    """
+    first, last = rows[0].date, rows[-1].date
+    span = (last - first).days + 1
+    buckets: dict[int, list[Row]] = {}
+    for row in rows:
+        buckets.setdefault((row.date - first).days * max_points // span, []).append(row)
+
+    points = []
+    for bucket in buckets.values():
+        values = {}
+        for name in HISTORY_METRICS:
+            known = [getattr(row, name) for row in bucket if getattr(row, name) is not None]
+            values[name] = fmean(known) if known else None
+        points.append(HistoryPoint(date=bucket[0].date, count=len(bucket), **values))
+    return points
+
+
+def _exercise_row(row: Row, **derived: int) -> ExerciseRow:
+    """
+    Listing row of an exercise (every column of the table), with the
+    positions derived in fractional mode.
+    """
+    return cast(ExerciseRow, {**row._asdict(), **derived})
 
 
 class ExerciseService:
     def __init__(self, db: DBSession):
         """
-        Initialize the ExerciseService with DAOs for exercises and blocks.
+        Initialize the ExerciseService with DAOs for exercises, blocks and sessions.
         """
         self.dao = ExerciseDAO(db)
         self.block_dao = BlockDAO(db)
+        self.session_dao = SessionDAO(db)
+        self.ordering = OrderingService(db)
+        self.records = RecordService(db)
 
     # -------------------------
     # List / Get
     # -------------------------
-    def list_by_session(self, session_id: int) -> list[Exercise]:
+    def list_by_session(self, session_id: int) -> list[ExerciseRow]:
         """
         List all exercises in a session, ordered by their global position.
+        Read-only: exercises are plain dicts, read without ORM instances.
         """
-        return self.dao.list_by_session(session_id)
+        rows = self.dao.list_by_session(session_id)
+        if not self.ordering.is_enabled():
+            return [_exercise_row(row) for row in rows]
+
+        in_blocks: dict[int, list[Row]] = {}
+        for row in rows:
+            if row.block_id is not None:
+                in_blocks.setdefault(row.block_id, []).append(row)
+        free = {row.id: row for row in rows if row.block_id is None}
 
-    def list_by_block(self, block_id: int) -> list[Exercise]:
+        # Timeline order, exercises of a block taking the place of the block
+        result: list[ExerciseRow] = []
+        for position, item in enumerate(self.ordering.timeline(session_id)):
+            if item.kind == "exercise" and item.id in free:
+                result.append(_exercise_row(free[item.id], position=position))
+            elif item.kind == "block":
+                result.extend(self._block_rows(in_blocks.get(item.id, [])))
+        return result
+
+    def list_by_block(self, block_id: int) -> list[ExerciseRow]:
         """
         List all exercises in a specific block, ordered by position_in_block.
+        Read-only, as list_by_session.
         """
-        return self.dao.list_by_block(block_id)
+        rows = self.dao.list_by_block(block_id)
+        if not self.ordering.is_enabled():
+            return [_exercise_row(row) for row in rows]
+        return self._block_rows(rows)
 
-    def get_exercise(self, exercise_id: int) -> Exercise | None:
+    def get_exercise(self, exercise_id: int) -> Exercise | ExerciseRead | None:
         """
         Retrieve a single exercise by ID.
         Returns None if not found.
         """
-        return self.dao.get_by_id(exercise_id)
+        exercise = self.dao.get_by_id(exercise_id)
+        if exercise is None or not self.ordering.is_enabled():
+            return exercise
+        if exercise.block_id is not None:
+            items = self.ordering.block_items(exercise.block_id)
+            return self._read(
+                exercise,
+                position_in_block=self.ordering.position_of(items, "exercise", exercise.id),
+            )
+        items = self.ordering.timeline(exercise.session_id)
+        return self._read(
+            exercise,
+            position=self.ordering.position_of(items, "exercise", exercise.id),
+        )
+
+    def session_version(self, session_id: int) -> int | None:
+        """
+        Version of a session, the ETag of its exercise list.
+        """
+        return self.session_dao.get_version(session_id)
+
+    def get_history(
+        self,
+        user_id: int,
+        exercise_type: ExerciseType,
+        *,
+        date_from: date | None = None,
+        date_to: date | None = None,
+        max_points: int | None = None,
+    ) -> list[HistoryPoint]:
+        """
+        Progress history of a movement for a user, one point per exercise,
+        oldest first. With max_points, longer histories are downsampled to
+        at most max_points averaged points for charts.
+        """
+        rows = self.dao.history(user_id, exercise_type, date_from=date_from, date_to=date_to)
+        if max_points is not None and len(rows) > max_points:
+            return _downsample(rows, max_points)
+        return [HistoryPoint(**row._mapping) for row in rows]
+
+    @staticmethod
+    def _read(exercise: Exercise, **positions: int) -> ExerciseRead:
+        """
+        Fractional ordering mode: expose the positions derived from the rank order.
+        """
+        return ExerciseRead.model_validate(exercise).model_copy(update=positions)
+
+    @staticmethod
+    def _block_rows(rows: list[Row]) -> list[ExerciseRow]:
+        """
+        Fractional ordering mode: rows of a block in rank order, with the
+        derived position_in_block.
+        """
+        by_id = {row.id: row for row in rows}
+        items = OrderingService.ordered([
+            OrderedItem("exercise", row.id, row.rank_in_block, row.position_in_block)
+            for row in rows
+        ])
+        return [
+            _exercise_row(by_id[item.id], position_in_block=position)
+            for position, item in enumerate(items)
+        ]
 
     # -------------------------
     # Create
@@ -51,7 +190,7 @@ class ExerciseService:
         duration_seconds: float | None = None,
         distance_meters: float | None = None,
         notes: str | None = None,
-    ) -> Exercise:
+    ) -> Exercise | ExerciseRead:
         """
         Create a new exercise either in a block or as a free exercise in the session.
         Handles automatic position assignment and shifts existing exercises/blocks if needed.
@@ -65,6 +204,25 @@ class ExerciseService:
 
         if block_id is not None and position is not None:
             raise ValueError("Cannot specify global position for an exercise inside a block")
+        self.session_dao.bump_version(session_id)
+
+        if self.ordering.is_enabled():
+            columns, derived = self._rank_new_exercise(
+                session_id, block_id, position, position_in_block
+            )
+            exercise = self.dao.create(Exercise(
+                exercise_type=exercise_type,
+                session_id=session_id,
+                block_id=block_id,
+                weight_kg=weight_kg,
+                repetitions=repetitions,
+                duration_seconds=duration_seconds,
+                distance_meters=distance_meters,
+                notes=notes,
+                **columns,
+            ))
+            self.records.exercise_saved(exercise, new=True)
+            return self._read(exercise, **derived)
 
         # -------------------------
         # Handle positions
@@ -78,15 +236,7 @@ class ExerciseService:
                 if position_in_block < 0 or position_in_block > total:
                     raise ValueError("Invalid position_in_block")
                 # Shift existing exercises in the block to make room
-                for ex in sorted(
-                    self.dao.list_by_block(block_id),
-                    key=lambda e: e.position_in_block or 0,
-                    reverse=True
-                ):
-                    pos = ex.position_in_block or 0
-                    if pos >= position_in_block:
-                        ex.position_in_block = pos + 1
-                        self.dao.update(ex)
+                self.dao.shift_block_positions(block_id, start=position_in_block, delta=1)
         else:
             total_items = (
                         self.block_dao.count_by_session(session_id)
@@ -98,17 +248,8 @@ class ExerciseService:
             else : 
                 if position < 0 or position > total_items:
                     raise ValueError("Invalid exercise position")
-                items_to_shift = [
-                    ex for ex in self.dao.list_by_session(session_id) if ex.position is not None
-                ] + self.block_dao.list_by_session(session_id)
-                for item in sorted(items_to_shift, key=lambda e: e.position or 0, reverse=True):
-                    pos = item.position or 0
-                    if pos >= position:
-                        item.position = pos + 1
-                        if isinstance(item, Exercise):
-                            self.dao.update(item)
-                        elif isinstance(item, Block):
-                            self.block_dao.update(item)
+                self.dao.shift_positions(session_id, start=position, delta=1)
+                self.block_dao.shift_positions(session_id, start=position, delta=1)
 
         # Create the exercise
         exercise = Exercise(
@@ -123,7 +264,43 @@ class ExerciseService:
             distance_meters=distance_meters,
             notes=notes,
         )
-        return self.dao.create(exercise)
+        exercise = self.dao.create(exercise)
+        self.records.exercise_saved(exercise, new=True)
+        return exercise
+
+    def _rank_new_exercise(
+        self,
+        session_id: int,
+        block_id: int | None,
+        position: int | None,
+        position_in_block: int | None,
+    ) -> tuple[dict, dict]:
+        """
+        Fractional ordering mode: return the ordering columns of a new exercise
+        and the positions to expose for it.
+        """
+        if block_id is not None:
+            items = self.ordering.ranked_block_items(session_id, block_id)
+            if position_in_block is None:
+                position_in_block = len(items)
+            elif position_in_block < 0 or position_in_block > len(items):
+                raise ValueError("Invalid position_in_block")
+            columns = {
+                "position_in_block": self.ordering.spare_position(items),
+                "rank_in_block": self.ordering.rank_at(session_id, items, position_in_block),
+            }
+            return columns, {"position_in_block": position_in_block}
+
+        items = self.ordering.ranked_timeline(session_id)
+        if position is None:
+            position = len(items)
+        elif position < 0 or position > len(items):
+            raise ValueError("Invalid exercise position")
+        columns = {
+            "position": self.ordering.spare_position(items),
+            "rank": self.ordering.rank_at(session_id, items, position),
+        }
+        return columns, {"position": position}
 
     # -------------------------
     # Update
@@ -140,11 +317,11 @@ class ExerciseService:
         duration_seconds: float | None = None,
         distance_meters: float | None = None,
         notes: str | None = None,
-    ) -> Exercise:
+    ) -> Exercise | ExerciseRead:
         """
         Update an exercise's properties.
         Position changes within a block or global session are handled properly by shifting others.
-        Note: block_id cannot be changed; to move to another block, delete and recreate the exercise.
+        Note: block_id cannot be changed here; use move_exercise to move to another block.
         """
         exercise = self.dao.get_by_id(exercise_id)
         if not exercise:
@@ -156,7 +333,13 @@ class ExerciseService:
         old_pos = exercise.position or 0
 
         if block_id is not None and position is not None:
-            raise ValueError("Cannot move an exercise out of its block. Delete and create a new one.")
+            raise ValueError("Cannot move an exercise out of its block. Use the move operation.")
+        self.session_dao.bump_version(session_id)
+
+        derived = None
+        if self.ordering.is_enabled():
+            derived = self._rank_moved_exercise(exercise, position, position_in_block)
+            position = position_in_block = None
 
         # -------------------------
         # Update position_in_block
@@ -165,19 +348,11 @@ class ExerciseService:
             total = self.dao.count_by_block(block_id or 0) - 1
             if position_in_block < 0 or position_in_block > total:
                 raise ValueError("Invalid position_in_block")
-            for ex in sorted(
-                (ex for ex in self.dao.list_by_session(session_id)
-                 if ex.id != exercise.id and ex.block_id == block_id),
-                key=lambda e: e.position_in_block or 0,
-                reverse=old_pos_in_block > position_in_block
-            ):
-                pos = ex.position_in_block or 0
-                if old_pos_in_block < position_in_block and old_pos_in_block < pos <= position_in_block:
-                    ex.position_in_block = pos - 1
-                elif old_pos_in_block > position_in_block and position_in_block <= pos < old_pos_in_block:
-                    ex.position_in_block = pos + 1
-                self.dao.update(ex)
+            start, end, delta = _shift_range(old_pos_in_block, position_in_block)
+            self.dao.shift_block_positions(block_id or 0, start=start, end=end, delta=delta)
             exercise.position_in_block = position_in_block
+            # See OrderingService.ordered
+            exercise.rank_in_block = None
 
         # -------------------------
         # Update global position for free exercise
@@ -190,20 +365,11 @@ class ExerciseService:
             )
             if position < 0 or position > total_items:
                 raise ValueError("Invalid exercise position")
-            items_to_shift = [
-                ex for ex in self.dao.list_by_session(session_id) if ex.position is not None
-            ] + self.block_dao.list_by_session(session_id)
-            for item in sorted(items_to_shift, key=lambda e: e.position or 0, reverse=old_pos > position):
-                pos = item.position or 0
-                if old_pos < position and old_pos < pos <= position:
-                    item.position = pos - 1
-                elif old_pos > position and position <= pos < old_pos:
-                    item.position = pos + 1
-                if isinstance(item, Exercise):
-                    self.dao.update(item)
-                elif isinstance(item, Block):
-                    self.block_dao.update(item)
+            start, end, delta = _shift_range(old_pos, position)
+            self.dao.shift_positions(session_id, start=start, end=end, delta=delta)
+            self.block_dao.shift_positions(session_id, start=start, end=end, delta=delta)
             exercise.position = position
+            exercise.rank = None
 
         # -------------------------
         # Update other fields
@@ -221,8 +387,145 @@ class ExerciseService:
         if notes is not None:
             exercise.notes = notes
 
+        exercise = self.dao.update(exercise)
+        metrics = (exercise_type, weight_kg, repetitions, duration_seconds, distance_meters)
+        if any(value is not None for value in metrics):
+            self.records.exercise_saved(exercise)
+        if derived is not None:
+            return self._read(exercise, **derived)
+        return exercise
+
+    def _rank_moved_exercise(
+        self,
+        exercise: Exercise,
+        position: int | None,
+        position_in_block: int | None,
+    ) -> dict:
+        """
+        Fractional ordering mode: give the exercise the rank key of its new
+        place, if it moves, and return the positions to expose for it.
+        """
+        if exercise.block_id is not None:
+            items = self.ordering.ranked_block_items(exercise.session_id, exercise.block_id)
+            current = self.ordering.position_of(items, "exercise", exercise.id)
+            if position_in_block is None or position_in_block == current:
+                return {"position_in_block": current}
+            others = [item for item in items if item.id != exercise.id]
+            if position_in_block < 0 or position_in_block > len(others):
+                raise ValueError("Invalid position_in_block")
+            exercise.rank_in_block = self.ordering.rank_at(
+                exercise.session_id, others, position_in_block
+            )
+            return {"position_in_block": position_in_block}
+
+        items = self.ordering.ranked_timeline(exercise.session_id)
+        current = self.ordering.position_of(items, "exercise", exercise.id)
+        if position is None or position == current:
+            return {"position": current}
+        others = [
+            item for item in items
+            if not (item.kind == "exercise" and item.id == exercise.id)
+        ]
+        if position < 0 or position > len(others):
+            raise ValueError("Invalid exercise position")
+        exercise.rank = self.ordering.rank_at(exercise.session_id, others, position)
+        return {"position": position}
+
+    # -------------------------
+    # Move
+    # -------------------------
+    def move_exercise(
+        self,
+        exercise_id: int,
+        *,
+        block_id: int | None = None,
+        position: int | None = None,
+    ) -> Exercise | ExerciseRead:
+        """
+        Move an exercise into a block of its session, or out to the free
+        timeline if block_id is None, at position (position_in_block inside a
+        block). Appends at the end if position is None.
+        The exercise keeps its id and metrics; the gap at the source is closed
+        and the gap at the destination opened with set-based shifts.
+        """
+        exercise = self.dao.get_by_id(exercise_id)
+        if not exercise:
+            raise ValueError("Exercise not found")
+
+        session_id = exercise.session_id
+        if block_id is not None and not self.dao.validate_block_session(block_id, session_id):
+            raise ValueError("Block does not belong to the same session")
+
+        if block_id == exercise.block_id:
+            # Same block (or still free): a plain reorder
+            if block_id is not None:
+                if position is None:
+                    position = self.dao.count_by_block(block_id) - 1
+                return self.update_exercise(exercise_id, position_in_block=position)
+            if position is None:
+                position = (
+                    self.block_dao.count_by_session(session_id)
+                    + self.dao.count_free_by_session(session_id)
+                    - 1
+                )
+            return self.update_exercise(exercise_id, position=position)
+        self.session_dao.bump_version(session_id)
+
+        if self.ordering.is_enabled():
+            if block_id is not None:
+                columns, derived = self._rank_new_exercise(session_id, block_id, None, position)
+            else:
+                columns, derived = self._rank_new_exercise(session_id, None, position, None)
+            self._place(exercise, block_id, **columns)
+            return self._read(self.dao.update(exercise), **derived)
+
+        # Validate the destination before shifting anything
+        if block_id is not None:
+            total = self.dao.count_by_block(block_id)
+            if position is None:
+                position = total
+            elif position < 0 or position > total:
+                raise ValueError("Invalid position_in_block")
+        else:
+            total = (
+                self.block_dao.count_by_session(session_id)
+                + self.dao.count_free_by_session(session_id)
+            )
+            if position is None:
+                position = total
+            elif position < 0 or position > total:
+                raise ValueError("Invalid exercise position")
+
+        # Close the gap at the source
+        if exercise.block_id is not None:
+            old_pos = exercise.position_in_block or 0
+            self.dao.shift_block_positions(exercise.block_id, start=old_pos + 1, delta=-1)
+        else:
+            old_pos = exercise.position or 0
+            self.dao.shift_positions(session_id, start=old_pos + 1, delta=-1)
+            self.block_dao.shift_positions(session_id, start=old_pos + 1, delta=-1)
+
+        # Open the gap at the destination
+        if block_id is not None:
+            self.dao.shift_block_positions(block_id, start=position, delta=1)
+            self._place(exercise, block_id, position_in_block=position)
+        else:
+            self.dao.shift_positions(session_id, start=position, delta=1)
+            self.block_dao.shift_positions(session_id, start=position, delta=1)
+            self._place(exercise, None, position=position)
         return self.dao.update(exercise)
 
+    @staticmethod
+    def _place(exercise: Exercise, block_id: int | None, **columns) -> None:
+        # Reset the ordering columns of the other container: a free exercise
+        # has no place in a block and the reverse. Rank keys not given are
+        # cleared too, they are rebuilt when the fractional mode needs them.
+        exercise.block_id = block_id
+        exercise.position = exercise.position_in_block = None
+        exercise.rank = exercise.rank_in_block = None
+        for name, value in columns.items():
+            setattr(exercise, name, value)
+
     # -------------------------
     # Delete
     # -------------------------
@@ -237,30 +540,17 @@ class ExerciseService:
 
         session_id = exercise.session_id
         block_id = exercise.block_id
+        self.session_dao.bump_version(session_id)
+        self.records.forget(id=exercise.id)
         self.dao.delete(exercise)
+        if self.ordering.is_enabled():
+            # Rank keys leave no gap to close
+            return
 
         if block_id is not None:
             deleted_pos = exercise.position_in_block or 0
-            for ex in sorted(
-                (ex for ex in self.dao.list_by_session(session_id)
-                 if ex.id != exercise.id and ex.block_id == block_id),
-                key=lambda ex: ex.position_in_block or 0
-            ):
-                pos = ex.position_in_block or 0
-                if pos > deleted_pos:
-                    ex.position_in_block = pos - 1
-                    self.dao.update(ex)
+            self.dao.shift_block_positions(block_id, start=deleted_pos + 1, delta=-1)
         else:
             deleted_pos = exercise.position or 0
-            items_to_shift = [
-                ex for ex in self.dao.list_by_session(session_id) if ex.position is not None
-            ] + self.block_dao.list_by_session(session_id)
-            for item in sorted(items_to_shift, key=lambda item: item.position or 0):
-                pos = item.position or 0
-                if pos > deleted_pos:
-                    item.position = pos - 1
-                    if isinstance(item, Exercise):
-                        self.dao.update(item)
-                    elif isinstance(item, Block):
-                        self.block_dao.update(item)
-
+            self.dao.shift_positions(session_id, start=deleted_pos + 1, delta=-1)
+            self.block_dao.shift_positions(session_id, start=deleted_pos + 1, delta=-1)
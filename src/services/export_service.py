@@ -0,0 +1,103 @@
+import csv
+import io
+from collections.abc import Iterator
+from datetime import date
+from itertools import batched, chain, groupby
+from operator import attrgetter
+from typing import Literal
+
+from pydantic import TypeAdapter
+from sqlalchemy import Row
+from sqlalchemy.orm import Session as DBSession
+
+from src.api.schemas.user import ExportRow
+from src.data.dao.session_dao import SessionDAO
+from src.services.ordering_service import OrderingService
+
+ExportFormat = Literal["ndjson", "csv"]
+
+EXPORT_ROW = TypeAdapter(ExportRow)
+EXPORT_ROWS = TypeAdapter(list[ExportRow])
+EXPORT_COLUMNS = list(ExportRow.__annotations__)
+# Rows encoded per chunk of the response
+CHUNK_ROWS = 500
+
+
+class ExportService:
+    def __init__(self, db: DBSession):
+        self.session_dao = SessionDAO(db)
+
+    def export(
+        self,
+        user_id: int,
+        export_format: ExportFormat,
+        *,
+        date_from: date | None = None,
+        date_to: date | None = None,
+    ) -> Iterator[bytes]:
+        """
+        Encode the whole training history of a user (see ExportRow) as NDJSON
+        or CSV, in chunks of CHUNK_ROWS rows read from a server-side cursor:
+        memory stays flat however long the history (only the rows of one
+        session are held, to put them in timeline order).
+        """
+        rows = chain.from_iterable(
+            sorted(session_rows, key=_timeline_key())
+            for _, session_rows in groupby(
+                self.session_dao.export_rows(user_id, date_from=date_from, date_to=date_to),
+                key=attrgetter("session_id"),
+            )
+        )
+        if export_format == "csv":
+            yield _csv_lines([dict(zip(EXPORT_COLUMNS, EXPORT_COLUMNS))])
+            for batch in batched(rows, CHUNK_ROWS):
+                yield _csv_lines(EXPORT_ROWS.dump_python(
+                    [_export_row(row) for row in batch], mode="json"
+                ))
+            return
+        for batch in batched(rows, CHUNK_ROWS):
+            yield b"".join(EXPORT_ROW.dump_json(_export_row(row)) + b"\n" for row in batch)
+
+
+def _export_row(row: Row) -> ExportRow:
+    # The ordering columns of the row are left out
+    return ExportRow(
+        session_id=row.session_id,
+        session_name=row.session_name,
+        session_date=row.session_date,
+        session_type=row.session_type,
+        location_id=row.location_id,
+        session_notes=row.session_notes,
+        block_id=row.block_id,
+        block_type=row.block_type,
+        block_duration=row.block_duration,
+        block_notes=row.block_notes,
+        exercise_id=row.exercise_id,
+        exercise_type=row.exercise_type,
+        weight_kg=row.weight_kg,
+        repetitions=row.repetitions,
+        duration_seconds=row.duration_seconds,
+        distance_meters=row.distance_meters,
+        exercise_notes=row.exercise_notes,
+    )
+
+
+def _timeline_key():
+    # Same order as OrderingService.in_order: by rank keys in fractional
+    # mode (rows written in dense mode keep their position order), by
+    # positions in dense mode. Exercises of a block follow the block.
+    if OrderingService.is_enabled():
+        return lambda row: (
+            row.item_rank or "", row.item_position or 0, row.block_id or 0,
+            row.rank_in_block or "", row.position_in_block or 0, row.exercise_id or 0,
+        )
+    return lambda row: (
+        row.item_position or 0, row.block_id or 0,
+        row.position_in_block or 0, row.exercise_id or 0,
+    )
+
+
+def _csv_lines(rows: list[dict]) -> bytes:
+    buffer = io.StringIO()
+    csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS).writerows(rows)
+    return buffer.getvalue().encode()
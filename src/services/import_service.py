@@ -0,0 +1,226 @@
+import csv
+import json
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass, field
+from typing import cast
+
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy import String, Table
+from sqlalchemy.orm import Session as DBSession
+
+from src.api.schemas.user import ExportRow
+from src.data.dao.import_dao import ImportDAO, import_blocks, import_exercises, import_sessions
+from src.data.models import Session
+from src.services.export_service import EXPORT_COLUMNS, ExportFormat
+from src.services.record_service import RecordService
+
+IMPORT_ROW = TypeAdapter(ExportRow)
+# Staged rows loaded per COPY
+COPY_ROWS = 5000
+# Rows read between two progress reports
+PROGRESS_ROWS = 10000
+# Row errors kept in the report (all of them are counted)
+MAX_ERRORS = 1000
+
+SESSION_NAME_LENGTH = cast(String, Session.__table__.c.name.type).length or 0
+
+
+@dataclass
+class ImportReport:
+    dry_run: bool
+    rows: int = 0
+    sessions: int = 0
+    blocks: int = 0
+    exercises: int = 0
+    rejected: int = 0
+    # (line, message) of the first MAX_ERRORS rejected rows
+    errors: list[tuple[int, str]] = field(default_factory=list)
+
+    def reject(self, line: int, message: str) -> None:
+        self.rejected += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append((line, message))
+
+
+class _StagedItem:
+    """
+    Staging key of an imported session or block, and next position in it.
+    """
+
+    def __init__(self, key: int):
+        self.key = key
+        self.next_position = 0
+        # Of a session: staged blocks by block_id of the file
+        self.blocks: dict[int, _StagedItem] = {}
+
+    def take_position(self) -> int:
+        self.next_position += 1
+        return self.next_position - 1
+
+
+class ImportService:
+    def __init__(self, db: DBSession):
+        self.dao = ImportDAO(db)
+        self.record_service = RecordService(db)
+
+    def run(
+        self,
+        user_id: int,
+        lines: Iterable[str],
+        import_format: ExportFormat,
+        *,
+        dry_run: bool = False,
+        progress: Callable[[ImportReport], None] | None = None,
+    ) -> ImportReport:
+        """
+        Import a training history in the export format (see ExportRow) for a
+        user, reading lines as a stream. session_id and block_id only group
+        the rows of the file: sessions and blocks get new ids, exercise_id is
+        ignored. The rows of a session must be contiguous; blocks and
+        exercises are positioned in the order of the file.
+
+        Invalid rows are reported and skipped. Valid rows are loaded by COPY
+        into staging tables, then merged and the personal records of the
+        user updated, in the caller's transaction. A dry run only validates.
+        progress is called every PROGRESS_ROWS rows and at the end.
+        """
+        report = ImportReport(dry_run=dry_run)
+        locations = self.dao.location_ids()
+        staged: dict[Table, list[dict]] = {
+            import_sessions: [], import_blocks: [], import_exercises: [],
+        }
+
+        def stage(table: Table, row: dict) -> None:
+            staged[table].append(row)
+            if len(staged[table]) >= COPY_ROWS:
+                load(table)
+
+        def load(table: Table) -> None:
+            if not dry_run and staged[table]:
+                self.dao.copy(table, staged[table])
+            staged[table] = []
+
+        if not dry_run:
+            self.dao.create_staging()
+        done: set[int] = set()  # session_id of the sessions already read
+        session: _StagedItem | None = None
+        session_id = None
+        for line, raw in _read(lines, import_format):
+            report.rows += 1
+            if progress is not None and report.rows % PROGRESS_ROWS == 0:
+                progress(report)
+            try:
+                row = _validate(raw, locations)
+            except (ValueError, TypeError) as exc:
+                report.reject(line, _message(exc))
+                continue
+
+            if session is None or row["session_id"] != session_id:
+                if row["session_id"] in done:
+                    report.reject(
+                        line,
+                        f"session_id: rows of session {row['session_id']} must be contiguous",
+                    )
+                    continue
+                session_id = row["session_id"]
+                done.add(session_id)
+                session = _StagedItem(report.sessions)
+                report.sessions += 1
+                stage(import_sessions, {
+                    "key": session.key,
+                    "name": row["session_name"],
+                    "date": row["session_date"],
+                    "session_type": row["session_type"].name,
+                    "location_id": row["location_id"],
+                    "notes": row["session_notes"],
+                })
+
+            block = None
+            block_id, block_type = row["block_id"], row["block_type"]
+            # Both or neither (see _validate)
+            if block_id is not None and block_type is not None:
+                block = session.blocks.get(block_id)
+                if block is None:
+                    block = session.blocks[block_id] = _StagedItem(report.blocks)
+                    report.blocks += 1
+                    stage(import_blocks, {
+                        "key": block.key,
+                        "session_key": session.key,
+                        "block_type": block_type.name,
+                        "position": session.take_position(),
+                        "duration": row["block_duration"],
+                        "notes": row["block_notes"],
+                    })
+
+            if row["exercise_type"] is not None:
+                report.exercises += 1
+                stage(import_exercises, {
+                    "session_key": session.key,
+                    "block_key": block.key if block else None,
+                    "exercise_type": row["exercise_type"].name,
+                    "position": None if block else session.take_position(),
+                    "position_in_block": block.take_position() if block else None,
+                    "weight_kg": row["weight_kg"],
+                    "repetitions": row["repetitions"],
+                    "duration_seconds": row["duration_seconds"],
+                    "distance_meters": row["distance_meters"],
+                    "notes": row["exercise_notes"],
+                })
+
+        for table in staged:
+            load(table)
+        if not dry_run:
+            self.dao.merge(user_id)
+            self.record_service.exercises_created(user_id, self.dao.imported_exercises())
+        if progress is not None:
+            progress(report)
+        return report
+
+
+def _read(lines: Iterable[str], import_format: ExportFormat) -> Iterator[tuple[int, dict | str]]:
+    # (line number, row) of each row: dicts of strings for CSV, text for NDJSON
+    if import_format == "csv":
+        reader = csv.DictReader(lines)
+        for raw in reader:
+            yield reader.line_num, raw
+        return
+    for line, text in enumerate(lines, 1):
+        if text.strip():
+            yield line, text
+
+
+def _validate(raw: dict | str, locations: set[int]) -> ExportRow:
+    """
+    Validate a row of the file, raising ValueError (TypeError for a JSON
+    value that is not an object). Missing columns and empty CSV fields are
+    None.
+    """
+    if isinstance(raw, str):
+        raw = json.loads(raw)
+        if not isinstance(raw, dict):
+            raise TypeError("not a JSON object")
+    row = IMPORT_ROW.validate_python({
+        column: None if raw.get(column) == "" else raw.get(column)
+        for column in EXPORT_COLUMNS
+    })
+    if len(row["session_name"]) > SESSION_NAME_LENGTH:
+        raise ValueError(f"session_name: longer than {SESSION_NAME_LENGTH} characters")
+    if row["location_id"] is not None and row["location_id"] not in locations:
+        raise ValueError(f"location_id: unknown location {row['location_id']}")
+    if (row["block_id"] is None) != (row["block_type"] is None):
+        raise ValueError("block_id and block_type: both or neither must be given")
+    exercise_values = (
+        row["weight_kg"], row["repetitions"], row["duration_seconds"], row["distance_meters"],
+        row["exercise_notes"],
+    )
+    if row["exercise_type"] is None and any(value is not None for value in exercise_values):
+        raise ValueError("exercise_type: required with exercise columns")
+    return row
+
+
+def _message(exc: ValueError | TypeError) -> str:
+    if isinstance(exc, ValidationError):
+        return "; ".join(
+            f"{'.'.join(map(str, error['loc']))}: {error['msg']}" for error in exc.errors()
+        )
+    return str(exc)
@@ -0,0 +1,385 @@
+from bisect import bisect_left
+from collections.abc import Callable
+from itertools import islice
+from typing import Literal, NamedTuple
+
+from sqlalchemy.orm import Session as DBSession
+
+from src.api.schemas.session import BlockOrder, OrderItem, SessionOrder
+from src.core.settings import settings
+from src.data.dao.block_dao import BlockDAO
+from src.data.dao.exercise_dao import ExerciseDAO
+from src.data.dao.session_dao import SessionDAO
+from src.services.ranking import (
+    MAX_RANK_LENGTH,
+    evenly_spaced_keys,
+    key_between,
+    keys_between,
+)
+
+
+Kind = Literal["block", "exercise"]
+
+
+class OrderedItem(NamedTuple):
+    """
+    A block or exercise seen only through its ordering columns.
+    """
+    kind: Kind
+    id: int
+    rank: str | None
+    position: int | None
+
+
+ColumnValues = Callable[["list[OrderedItem]"], tuple[list[dict], list[dict]]]
+
+
+class OrderingService:
+    """
+    Ordering of session timelines and blocks in the fractional ordering mode.
+
+    Every block and free exercise holds a rank key (and every exercise inside
+    a block a rank_in_block key). Inserting or moving an item only writes the
+    item itself; integer positions are derived from the rank order on read.
+
+    Bulk reordering of a session (reorder_session) works in both modes.
+    """
+
+    def __init__(self, db: DBSession):
+        self.block_dao = BlockDAO(db)
+        self.exercise_dao = ExerciseDAO(db)
+        self.session_dao = SessionDAO(db)
+        # Sessions whose keys grew too long, to renumber in the background
+        self.pending_rebalance: set[int] = set()
+
+    @staticmethod
+    def is_enabled() -> bool:
+        return settings.ordering_mode == "fractional"
+
+    # -------------------------
+    # Read
+    # -------------------------
+    def timeline(self, session_id: int) -> list[OrderedItem]:
+        """
+        Blocks and free exercises of a session, in timeline order.
+        """
+        return self.ordered(self._timeline_items(session_id))
+
+    def block_items(self, block_id: int) -> list[OrderedItem]:
+        """
+        Exercises of a block, in order.
+        """
+        return self.ordered([
+            OrderedItem("exercise", *row)
+            for row in self.exercise_dao.list_block_ranks(block_id)
+        ])
+
+    @staticmethod
+    def ordered(items: list[OrderedItem]) -> list[OrderedItem]:
+        """
+        Sort items by rank. Rows written in dense mode have no rank (moving a
+        row in dense mode clears it): they are merged in at their position,
+        the ranked rows filling the other places in rank order. Dense writes
+        only shift the other rows, which keeps their ranks in position order.
+        """
+        ranked = iter(sorted(
+            (item for item in items if item.rank is not None),
+            key=lambda item: (_rank(item), item.position or 0),
+        ))
+        merged: list[OrderedItem] = []
+        for item in sorted(
+            (item for item in items if item.rank is None),
+            key=lambda item: item.position or 0,
+        ):
+            merged += islice(ranked, max((item.position or 0) - len(merged), 0))
+            merged.append(item)
+        return merged + list(ranked)
+
+    def in_order(self, items: list[OrderedItem]) -> list[OrderedItem]:
+        """
+        Sort items in the current ordering mode: by rank in fractional mode,
+        by position in dense mode (ranks may be stale there).
+        """
+        if self.is_enabled():
+            return self.ordered(items)
+        return sorted(items, key=lambda item: item.position or 0)
+
+    @staticmethod
+    def position_of(items: list[OrderedItem], kind: str, item_id: int) -> int:
+        """
+        Derived integer position of an item in an ordered list.
+        """
+        for position, item in enumerate(items):
+            if item.kind == kind and item.id == item_id:
+                return position
+        raise ValueError(f"{kind.capitalize()} {item_id} is not in this timeline")
+
+    # -------------------------
+    # Write
+    # -------------------------
+    def ranked_timeline(self, session_id: int) -> list[OrderedItem]:
+        """
+        Same as timeline, for writers: locks the session so that no concurrent
+        renumbering changes the keys, and gives rank keys to rows written in
+        dense mode first.
+        """
+        self.session_dao.lock(session_id)
+        return self._with_ranks(self.timeline(session_id), self._timeline_columns)
+
+    def ranked_block_items(self, session_id: int, block_id: int) -> list[OrderedItem]:
+        """
+        Same as block_items, for writers (see ranked_timeline).
+        """
+        self.session_dao.lock(session_id)
+        return self._with_ranks(self.block_items(block_id), self._block_columns)
+
+    def rank_at(self, session_id: int, items: list[OrderedItem], position: int) -> str:
+        """
+        Rank key for an item inserted at position in items, the item itself
+        being excluded from items. Schedules a renumbering of the session if
+        the key is getting long.
+        """
+        low = items[position - 1].rank if position > 0 else None
+        high = items[position].rank if position < len(items) else None
+        rank = key_between(low, high)
+        if len(rank) > MAX_RANK_LENGTH:
+            raise ValueError("Too many moves at the same place, retry in a moment")
+        if len(rank) > settings.rank_rebalance_length:
+            self.pending_rebalance.add(session_id)
+        return rank
+
+    @staticmethod
+    def spare_position(items: list[OrderedItem]) -> int:
+        """
+        An integer position not used by any item, to fill the position column
+        of new rows (it is not meaningful in fractional mode).
+        """
+        return max((item.position or 0 for item in items), default=-1) + 1
+
+    def rebalance_session(self, session_id: int) -> None:
+        """
+        Give fresh, short, evenly spaced keys to the timeline of a session and
+        to every block of it. Dense positions are rewritten too, so the session
+        stays valid if the ordering mode is switched back to dense.
+        """
+        self.session_dao.lock(session_id)
+        self.session_dao.bump_version(session_id)
+        timeline = self._renumber(self.timeline(session_id), self._timeline_columns)
+        self.block_dao.set_positions(
+            session_id,
+            {item.id: position for position, item in enumerate(timeline) if item.kind == "block"},
+        )
+        self.exercise_dao.bulk_update([
+            {"id": item.id, "position": position}
+            for position, item in enumerate(timeline)
+            if item.kind == "exercise"
+        ])
+        for item in timeline:
+            if item.kind == "block":
+                block_items = self._renumber(self.block_items(item.id), self._block_columns)
+                self.exercise_dao.bulk_update([
+                    {"id": exercise.id, "position_in_block": position}
+                    for position, exercise in enumerate(block_items)
+                ])
+
+    # -------------------------
+    # Reorder
+    # -------------------------
+    def reorder_session(
+        self,
+        session_id: int,
+        timeline: list[tuple[Kind, int]],
+        blocks: dict[int, list[int]],
+    ) -> SessionOrder:
+        """
+        Apply a full ordering to a session. timeline lists every block and
+        free exercise as (kind, id); blocks maps block ids to the ids of all
+        their exercises, in order (blocks left out keep their order).
+        Works in both ordering modes, in the caller's transaction, and only
+        writes the rows whose order changes (and the session version).
+        Returns the new layout.
+        """
+        if not self.session_dao.lock(session_id):
+            raise ValueError("Session not found")
+        self.session_dao.bump_version(session_id)
+
+        new_timeline = self._arrange(
+            self._current(self._timeline_items(session_id), self._timeline_columns),
+            timeline,
+            "timeline",
+        )
+        block_ids = [item.id for item in new_timeline if item.kind == "block"]
+        unknown = blocks.keys() - set(block_ids)
+        if unknown:
+            raise ValueError(f"Block {min(unknown)} is not in this session")
+
+        contents: dict[int, list[OrderedItem]] = {block_id: [] for block_id in block_ids}
+        for block_id, exercise_id, rank, position in self.exercise_dao.list_block_ranks_by_session(
+            session_id
+        ):
+            contents[block_id].append(OrderedItem("exercise", exercise_id, rank, position))
+        layout = {}
+        for block_id in block_ids:
+            items = self._current(contents[block_id], self._block_columns)
+            if block_id in blocks:
+                items = self._arrange(
+                    items,
+                    [("exercise", exercise_id) for exercise_id in blocks[block_id]],
+                    f"block {block_id}",
+                )
+            layout[block_id] = items
+
+        # Everything is validated: write the changes
+        if self.is_enabled():
+            self._rerank(session_id, new_timeline, self._timeline_columns)
+            for block_id in blocks:
+                self._rerank(session_id, layout[block_id], self._block_columns)
+        else:
+            # Moved rows lose their rank, see ordered
+            moved = [
+                (position, item) for position, item in enumerate(new_timeline)
+                if item.position != position
+            ]
+            self.block_dao.set_positions(
+                session_id,
+                {item.id: position for position, item in moved if item.kind == "block"},
+            )
+            self.block_dao.bulk_update([
+                {"id": item.id, "rank": None}
+                for _, item in moved
+                if item.kind == "block" and item.rank is not None
+            ])
+            self.exercise_dao.bulk_update([
+                {"id": item.id, "position": position, "rank": None}
+                for position, item in moved
+                if item.kind == "exercise"
+            ])
+            for block_id in blocks:
+                self.exercise_dao.bulk_update([
+                    {"id": item.id, "position_in_block": position, "rank_in_block": None}
+                    for position, item in enumerate(layout[block_id])
+                    if item.position != position
+                ])
+
+        return SessionOrder(
+            timeline=[OrderItem(kind=item.kind, id=item.id) for item in new_timeline],
+            blocks=[
+                BlockOrder(block_id=block_id, exercise_ids=[item.id for item in items])
+                for block_id, items in layout.items()
+            ],
+        )
+
+    def _current(self, items: list[OrderedItem], columns: ColumnValues) -> list[OrderedItem]:
+        # Current order of items, with ranks in fractional mode
+        items = self.in_order(items)
+        if self.is_enabled():
+            return self._with_ranks(items, columns)
+        return items
+
+    @staticmethod
+    def _arrange(
+        items: list[OrderedItem],
+        order: list[tuple[Kind, int]],
+        name: str,
+    ) -> list[OrderedItem]:
+        # Items in the requested order, which must list each of them exactly once
+        by_key = {(item.kind, item.id): item for item in items}
+        if len(set(order)) != len(order):
+            raise ValueError(f"Duplicate item in the {name} ordering")
+        unknown = set(order) - by_key.keys()
+        if unknown:
+            kind, item_id = min(unknown)
+            raise ValueError(f"{kind.capitalize()} {item_id} is not in this {name}")
+        missing = by_key.keys() - set(order)
+        if missing:
+            kind, item_id = min(missing)
+            raise ValueError(f"{kind.capitalize()} {item_id} is missing from the {name} ordering")
+        return [by_key[key] for key in order]
+
+    def _rerank(self, session_id: int, items: list[OrderedItem], columns: ColumnValues) -> None:
+        # The longest run of items already in rank order keeps its keys, the
+        # others get new keys between their kept neighbours.
+        kept = _longest_increasing([_rank(item) for item in items])
+        changed: list[OrderedItem] = []
+        run: list[OrderedItem] = []
+        low = None
+        for index, item in enumerate(items + [None]):
+            if item is not None and index not in kept:
+                run.append(item)
+                continue
+            high = item.rank if item is not None else None
+            keys = keys_between(low, high, len(run))
+            changed += [moved._replace(rank=key) for moved, key in zip(run, keys)]
+            low, run = high, []
+
+        longest = max((len(_rank(item)) for item in changed), default=0)
+        if longest > MAX_RANK_LENGTH:
+            self._renumber(items, columns)
+            return
+        if longest > settings.rank_rebalance_length:
+            self.pending_rebalance.add(session_id)
+        block_values, exercise_values = columns(changed)
+        self.block_dao.bulk_update(block_values)
+        self.exercise_dao.bulk_update(exercise_values)
+
+    def _timeline_items(self, session_id: int) -> list[OrderedItem]:
+        return [
+            OrderedItem("block", *row) for row in self.block_dao.list_ranks(session_id)
+        ] + [
+            OrderedItem("exercise", *row)
+            for row in self.exercise_dao.list_free_ranks(session_id)
+        ]
+
+    def _with_ranks(self, items: list[OrderedItem], columns: ColumnValues) -> list[OrderedItem]:
+        # Give rank keys to rows written in dense mode
+        if any(item.rank is None for item in items):
+            return self._renumber(items, columns)
+        return items
+
+    def _renumber(self, items: list[OrderedItem], columns: ColumnValues) -> list[OrderedItem]:
+        keys = evenly_spaced_keys(len(items))
+        items = [item._replace(rank=key) for item, key in zip(items, keys)]
+        block_values, exercise_values = columns(items)
+        self.block_dao.bulk_update(block_values)
+        self.exercise_dao.bulk_update(exercise_values)
+        return items
+
+    @staticmethod
+    def _timeline_columns(items: list[OrderedItem]) -> tuple[list[dict], list[dict]]:
+        return (
+            [{"id": item.id, "rank": item.rank} for item in items if item.kind == "block"],
+            [{"id": item.id, "rank": item.rank} for item in items if item.kind == "exercise"],
+        )
+
+    @staticmethod
+    def _block_columns(items: list[OrderedItem]) -> tuple[list[dict], list[dict]]:
+        return [], [{"id": item.id, "rank_in_block": item.rank} for item in items]
+
+
+def _rank(item: OrderedItem) -> str:
+    # Set on every item in fractional mode (see _with_ranks)
+    assert item.rank is not None, f"{item.kind} {item.id} has no rank"
+    return item.rank
+
+
+def _longest_increasing(values: list[str]) -> set[int]:
+    """
+    Indexes of a longest strictly increasing subsequence of values.
+    """
+    tails: list[int] = []  # tails[n]: index of the smallest end of a run of n + 1
+    previous = [-1] * len(values)
+    for index, value in enumerate(values):
+        length = bisect_left(tails, value, key=lambda i: values[i])
+        if length:
+            previous[index] = tails[length - 1]
+        if length == len(tails):
+            tails.append(index)
+        else:
+            tails[length] = index
+
+    kept = set()
+    index = tails[-1] if tails else -1
+    while index != -1:
+        kept.add(index)
+        index = previous[index]
+    return kept
@@ -0,0 +1,110 @@
+"""
+Rank keys for the fractional ordering mode.
+
+A rank key is a base-62 string read as the fractional part of a number
+(0.key). Keys compare with plain string comparison and never end with the
+smallest digit, so there is always room for a new key between two others.
+"""
+
+import string
+
+DIGITS = string.digits + string.ascii_uppercase + string.ascii_lowercase
+MAX_RANK_LENGTH = 64
+
+
+def key_between(low: str | None, high: str | None) -> str:
+    """
+    Return a rank key strictly between low and high.
+    None means "no bound" (start or end of the list).
+    """
+    if low is not None and high is not None and low >= high:
+        raise ValueError(f"Invalid rank bounds: {low!r} >= {high!r}")
+    if high is None:
+        return _after(low) if low else DIGITS[len(DIGITS) // 2]
+    if low is None:
+        return _before(high)
+    return _midpoint(low, high)
+
+
+def evenly_spaced_keys(count: int) -> list[str]:
+    """
+    Return count increasing keys, evenly spread and as short as possible.
+    Used when (re)numbering a whole list.
+    """
+    base = len(DIGITS)
+    width = 1
+    while base**width <= count:
+        width += 1
+    step = base**width // (count + 1)
+
+    keys = []
+    for index in range(1, count + 1):
+        value = index * step
+        digits = []
+        for _ in range(width):
+            value, digit = divmod(value, base)
+            digits.append(DIGITS[digit])
+        keys.append("".join(reversed(digits)).rstrip(DIGITS[0]))
+    return keys
+
+
+def _after(key: str) -> str:
+    # Appending is the most common case: bump the first digit when possible
+    # so keys only grow by one character every ~60 appends.
+    digit = DIGITS.index(key[0])
+    if digit < len(DIGITS) - 1:
+        return DIGITS[digit + 1]
+    return key[0] + (_after(key[1:]) if len(key) > 1 else DIGITS[len(DIGITS) // 2])
+
+
+def _before(key: str) -> str:
+    # Mirror of _after for prepends
+    digit = DIGITS.index(key[0])
+    if digit > 1:
+        return DIGITS[digit - 1]
+    if digit == 1:
+        return DIGITS[1] if len(key) > 1 else DIGITS[0] + DIGITS[-1]
+    return DIGITS[0] + _before(key[1:])
+
+
+def _midpoint(low: str, high: str) -> str:
+    # Skip the common prefix (low is padded with the smallest digit)
+    prefix = 0
+    while prefix < len(high) and (low[prefix] if prefix < len(low) else DIGITS[0]) == high[prefix]:
+        prefix += 1
+    if prefix:
+        return high[:prefix] + _midpoint(low[prefix:], high[prefix:])
+
+    low_digit = DIGITS.index(low[0]) if low else 0
+    high_digit = DIGITS.index(high[0])
+    if high_digit - low_digit > 1:
+        return DIGITS[(low_digit + high_digit) // 2]
+    # Consecutive digits: keep the low digit and go one level deeper
+    if len(high) > 1:
+        return high[0]
+    return DIGITS[low_digit] + key_between(low[1:] or None, None)
+
+
+def keys_between(low: str | None, high: str | None, count: int) -> list[str]:
+    """
+    Return count increasing keys strictly between low and high (None means
+    "no bound"). Open ends are filled like repeated appends or prepends,
+    bounded gaps are split in halves so that the keys stay short.
+    """
+    if count <= 0:
+        return []
+    if high is None:
+        keys = []
+        for _ in range(count):
+            low = key_between(low, None)
+            keys.append(low)
+        return keys
+    if low is None:
+        keys = []
+        for _ in range(count):
+            high = key_between(None, high)
+            keys.append(high)
+        return keys[::-1]
+    middle = count // 2
+    key = key_between(low, high)
+    return keys_between(low, key, middle) + [key] + keys_between(key, high, count - middle - 1)
@@ -0,0 +1,178 @@
+from collections.abc import Iterable
+from typing import NamedTuple, Protocol
+
+from sqlalchemy.orm import Session as DBSession
+
+from src.data.dao.record_dao import RecordDAO
+from src.data.dao.session_dao import SessionDAO
+from src.data.models import Exercise, ExerciseType, PersonalRecord, RecordMetric
+
+
+class MetricSpec(NamedTuple):
+    """
+    Exercise attribute holding the value of a metric, attribute the record
+    is qualified by (None if not qualified) and whether lower is better.
+    """
+    value: str
+    qualifier: str | None
+    lowest: bool
+
+
+METRICS = {
+    RecordMetric.max_weight: MetricSpec("weight_kg", None, False),
+    RecordMetric.max_reps: MetricSpec("repetitions", "weight_kg", False),
+    RecordMetric.best_time: MetricSpec("duration_seconds", "distance_meters", True),
+    RecordMetric.longest_distance: MetricSpec("distance_meters", None, False),
+}
+
+RecordKey = tuple[ExerciseType, RecordMetric, float]
+
+
+class RecordedExercise(Protocol):
+    """
+    What records read of an exercise: an Exercise, an ExerciseRead or a row
+    of the exercises table.
+    """
+    @property
+    def id(self) -> int: ...
+    @property
+    def exercise_type(self) -> ExerciseType: ...
+    @property
+    def weight_kg(self) -> float | None: ...
+    @property
+    def repetitions(self) -> int | None: ...
+    @property
+    def duration_seconds(self) -> float | None: ...
+    @property
+    def distance_meters(self) -> float | None: ...
+
+
+class RecordService:
+    """
+    Personal records of users, per exercise type and metric, maintained
+    incrementally in the transaction of the exercise writes. Only deleting
+    (or worsening) the exercise holding a record triggers a recompute.
+    """
+
+    def __init__(self, db: DBSession):
+        self.dao = RecordDAO(db)
+        self.session_dao = SessionDAO(db)
+
+    def list_records(self, user_id: int) -> list[PersonalRecord]:
+        return self.dao.list_by_user(user_id)
+
+    @staticmethod
+    def candidates(exercise: RecordedExercise) -> dict[RecordKey, float]:
+        """
+        Record values an exercise would set, by record key.
+        """
+        result = {}
+        for metric, spec in METRICS.items():
+            value = getattr(exercise, spec.value)
+            if value is None or value <= 0:
+                continue
+            qualifier = (getattr(exercise, spec.qualifier) or 0) if spec.qualifier else 0
+            result[(exercise.exercise_type, metric, float(qualifier))] = value
+        return result
+
+    def exercise_saved(self, exercise: Exercise, *, new: bool = False) -> None:
+        """
+        Update the records of the user after an exercise was created (new)
+        or its metrics updated. The exercise must be flushed.
+        """
+        candidates = self.candidates(exercise)
+        if not new:
+            for record in self.dao.list_held(id=exercise.id):
+                value = candidates.get(_key(record))
+                if value is not None and not _better(record.metric, record.value, value):
+                    # Still at least as good as the previous best
+                    record.value = value
+                else:
+                    self._recompute(record, exclude={})
+
+        session = self.session_dao.get_by_id(exercise.session_id)
+        if session is None:
+            raise ValueError("Session not found")
+        user_id = session.user_id
+        records = {
+            _key(record): record
+            for record in self.dao.list_by_type(user_id, exercise.exercise_type)
+        }
+        self._apply(user_id, exercise, candidates, records)
+
+    def exercises_created(self, user_id: int, exercises: Iterable[RecordedExercise]) -> None:
+        """
+        Update the records of a user with several new exercises at once.
+        exercises is iterated once, it may be a stream of rows.
+        """
+        records = {_key(record): record for record in self.dao.list_by_user(user_id)}
+        for exercise in exercises:
+            self._apply(user_id, exercise, self.candidates(exercise), records)
+
+    def forget(self, **scope: int) -> None:
+        """
+        Recompute the records held by exercises about to be deleted, matching
+        scope: id=..., block_id=... or session_id=... Must be called before
+        the deletion.
+        """
+        records = self.dao.list_held(**scope)
+        bests = self.dao.best_many([_search(record, scope) for record in records])
+        for record, best in zip(records, bests):
+            if best is not None:
+                record.exercise_id, record.value = best
+        self.dao.delete_all([record for record, best in zip(records, bests) if best is None])
+
+    def _apply(
+        self,
+        user_id: int,
+        exercise: RecordedExercise,
+        candidates: dict[RecordKey, float],
+        records: dict[RecordKey, PersonalRecord],
+    ) -> None:
+        for key, value in candidates.items():
+            record = records.get(key)
+            if record is None:
+                exercise_type, metric, qualifier = key
+                records[key] = self.dao.create(PersonalRecord(
+                    user_id=user_id,
+                    exercise_type=exercise_type,
+                    metric=metric,
+                    qualifier=qualifier,
+                    value=value,
+                    exercise_id=exercise.id,
+                ))
+            elif _better(record.metric, value, record.value):
+                record.value = value
+                record.exercise_id = exercise.id
+
+    def _recompute(self, record: PersonalRecord, exclude: dict[str, int]) -> None:
+        best = self.dao.best(**_search(record, exclude))
+        if best is None:
+            self.dao.delete(record)
+        else:
+            record.exercise_id, record.value = best
+
+
+def _search(record: PersonalRecord, exclude: dict[str, int]) -> dict:
+    # Arguments of RecordDAO.best() finding the next holder of a record
+    spec = METRICS[record.metric]
+    return {
+        "user_id": record.user_id,
+        "exercise_type": record.exercise_type,
+        "value_column": spec.value,
+        "qualifier_column": spec.qualifier,
+        "qualifier": record.qualifier,
+        "lowest": spec.lowest,
+        "exclude": exclude,
+    }
+
+
+def _key(record: PersonalRecord) -> RecordKey:
+    return record.exercise_type, record.metric, float(record.qualifier)
+
+
+def _better(metric: RecordMetric, value: float, than: float) -> bool:
+    """
+    Whether value strictly beats than for a metric.
+    """
+    return value < than if METRICS[metric].lowest else value > than
@@ -1,15 +1,62 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections.abc import Sequence
 from datetime import date as d
+from typing import cast
+from pydantic import TypeAdapter
 from sqlalchemy.orm import Session as DBSession
 
+from src.api.schemas.block import BlockRead
+from src.api.schemas.exercise import ExerciseRead
+from src.api.schemas.session import (
+    BlockDraftNode,
+    BlockNode,
+    ExerciseDraftNode,
+    ExerciseNode,
+    SessionOrder,
+    SessionPageRow,
+    SessionRow,
+    SessionRead,
+    SessionTree,
+)
+from src.core.cache import session_trees
+from src.data.dao.block_dao import BlockDAO
+from src.data.dao.exercise_dao import ExerciseDAO
 from src.data.dao.session_dao import SessionDAO
 from src.data.models import Session, SessionType
 from src.services.location_service import LocationService
+from src.services.ordering_service import OrderedItem, OrderingService
+from src.services.ranking import evenly_spaced_keys
+from src.services.record_service import RecordService
+
+
+SESSION_TREE = TypeAdapter(SessionTree)
+
+
+def _encode_cursor(session_date: d, session_id: int) -> str:
+    """
+    Opaque cursor pointing just after a session in the (date, id) order.
+    """
+    key = f"{session_date.isoformat()}|{session_id}"
+    return urlsafe_b64encode(key.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> tuple[d, int]:
+    try:
+        key = urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        session_date, session_id = key.split("|")
+        return d.fromisoformat(session_date), int(session_id)
+    except ValueError:  # also raised by b64decode and decode
+        raise ValueError("Invalid cursor") from None
 
 
 class SessionService:
     def __init__(self, db: DBSession):
         self.dao = SessionDAO(db)
         self.location_service = LocationService(db)
+        self.ordering = OrderingService(db)
+        self.block_dao = BlockDAO(db)
+        self.exercise_dao = ExerciseDAO(db)
+        self.records = RecordService(db)
 
     def create_session(
         self,
@@ -37,9 +84,194 @@ class SessionService:
         )
         return self.dao.create(session)
 
+    def create_full_session(
+        self,
+        *,
+        name: str,
+        date: d,
+        session_type: SessionType,
+        user_id: int,
+        notes: str | None = None,
+        location_id: int | None = None,
+        timeline: list[BlockDraftNode | ExerciseDraftNode],
+    ) -> SessionTree:
+        """
+        Create a session with its blocks and exercises, their positions being
+        implied by their order. Blocks and exercises are inserted with one
+        multi-row INSERT each, so the statement count does not depend on the
+        size of the session.
+        """
+        session = self.create_session(
+            name=name,
+            date=date,
+            session_type=session_type,
+            user_id=user_id,
+            notes=notes,
+            location_id=location_id,
+        )
+        timeline_ranks = self._initial_ranks(len(timeline))
+        blocks = {position: item for position, item in enumerate(timeline) if item.kind == "block"}
+        block_rows = {
+            position: {
+                "block_type": block.block_type,
+                "position": position,
+                "rank": timeline_ranks[position],
+                "session_id": session.id,
+                "duration": block.duration,
+                "notes": block.notes,
+            }
+            for position, block in blocks.items()
+        }
+        block_ids = self.block_dao.insert_many(list(block_rows.values()))
+
+        exercise_rows = []
+        for position, item in enumerate(timeline):
+            if item.kind == "exercise":
+                exercise_rows.append({
+                    **item.model_dump(exclude={"kind"}),
+                    "session_id": session.id,
+                    "block_id": None,
+                    "position": position,
+                    "position_in_block": None,
+                    "rank": timeline_ranks[position],
+                    "rank_in_block": None,
+                })
+                continue
+            for index, (exercise, rank) in enumerate(
+                zip(item.exercises, self._initial_ranks(len(item.exercises)))
+            ):
+                exercise_rows.append({
+                    **exercise.model_dump(),
+                    "session_id": session.id,
+                    "block_id": block_ids[position],
+                    "position": None,
+                    "position_in_block": index,
+                    "rank": None,
+                    "rank_in_block": rank,
+                })
+        exercise_ids = self.exercise_dao.insert_many(exercise_rows)
+
+        # Build the response from the inserted values, without reading them back
+        free: dict[int, ExerciseNode] = {}
+        in_blocks: dict[int, list[ExerciseRead]] = {}
+        for row in exercise_rows:
+            block_id = row["block_id"]
+            if block_id is None:
+                free[row["position"]] = ExerciseNode.model_validate(
+                    {"id": exercise_ids[(None, row["position"])], **row}
+                )
+            else:
+                in_blocks.setdefault(block_id, []).append(ExerciseRead.model_validate(
+                    {"id": exercise_ids[(block_id, row["position_in_block"])], **row}
+                ))
+        nodes: list[BlockNode | ExerciseNode] = [
+            free[position] if position in free else BlockNode(
+                id=block_ids[position],
+                block_type=blocks[position].block_type,
+                position=position,
+                session_id=session.id,
+                duration=blocks[position].duration,
+                notes=blocks[position].notes,
+                exercises=in_blocks.get(block_ids[position], []),
+            )
+            for position in range(len(timeline))
+        ]
+        self.records.exercises_created(
+            user_id,
+            list(free.values()) + [e for exercises in in_blocks.values() for e in exercises],
+        )
+
+        return SessionTree(
+            **SessionRead.model_validate(session).model_dump(),
+            timeline=nodes,
+        )
+
+    def _initial_ranks(self, count: int) -> Sequence[str | None]:
+        # Rank keys of new items in fractional mode, none in dense mode
+        if self.ordering.is_enabled():
+            return evenly_spaced_keys(count)
+        return [None] * count
+
     def get_session(self, session_id: int) -> Session | None:
         return self.dao.get_by_id(session_id)
 
+    def session_version(self, session_id: int) -> int | None:
+        """
+        Version of a session, bumped by every write to it or its contents.
+        None if there is no such session.
+        """
+        return self.dao.get_version(session_id)
+
+    def bump_version(self, session_id: int) -> None:
+        """
+        Mark a session as changed, to be called by every write to it or to
+        its blocks and exercises.
+        """
+        self.dao.bump_version(session_id)
+
+    def get_session_tree_json(self, session_id: int, version: int) -> bytes | None:
+        """
+        The session tree as JSON, from the session tree cache when it holds
+        this version of the session (built and cached otherwise).
+        Returns None if not found.
+        """
+        body = session_trees.get(session_id, version)
+        if body is None:
+            tree = self.get_session_tree(session_id)
+            if tree is None:
+                return None
+            body = SESSION_TREE.dump_json(tree)
+            session_trees.put(session_id, version, body)
+        return body
+
+    def get_session_tree(self, session_id: int) -> SessionTree | None:
+        """
+        Return the session with its blocks, their exercises and its free
+        exercises merged in timeline order, loaded with a fixed number of queries.
+        Returns None if not found.
+        """
+        session = self.dao.get_tree(session_id)
+        if session is None:
+            return None
+
+        blocks = {block.id: block for block in session.blocks}
+        free = {exercise.id: exercise for exercise in session.exercises}
+        timeline = self.ordering.in_order(
+            [OrderedItem("block", b.id, b.rank, b.position) for b in blocks.values()]
+            + [OrderedItem("exercise", e.id, e.rank, e.position) for e in free.values()]
+        )
+
+        nodes: list[BlockNode | ExerciseNode] = []
+        for position, item in enumerate(timeline):
+            if item.kind == "exercise":
+                nodes.append(
+                    ExerciseNode.model_validate(free[item.id]).model_copy(
+                        update={"position": position}
+                    )
+                )
+                continue
+            block = blocks[item.id]
+            exercises = {exercise.id: exercise for exercise in block.exercises}
+            in_block = self.ordering.in_order([
+                OrderedItem("exercise", e.id, e.rank_in_block, e.position_in_block)
+                for e in exercises.values()
+            ])
+            nodes.append(BlockNode(
+                **BlockRead.model_validate(block).model_dump(exclude={"position"}),
+                position=position,
+                exercises=[
+                    ExerciseRead.model_validate(exercises[exercise.id]).model_copy(
+                        update={"position_in_block": index}
+                    )
+                    for index, exercise in enumerate(in_block)
+                ],
+            ))
+
+        return SessionTree(
+            **SessionRead.model_validate(session).model_dump(),
+            timeline=nodes,
+        )
+
     def get_sessions_by_date(
         self,
         *,
@@ -51,8 +283,35 @@ class SessionService:
             user_id=user_id,
         )
 
-    def list_sessions_by_user(self, user_id: int) -> list[Session]:
-        return self.dao.list_by_user(user_id)
+    def list_sessions_by_user(
+        self,
+        user_id: int,
+        *,
+        limit: int = 50,
+        cursor: str | None = None,
+        date_from: d | None = None,
+        date_to: d | None = None,
+    ) -> SessionPageRow:
+        """
+        Return a page of a user's sessions, newest first, and the cursor of
+        the next page (keyset pagination on (date, id)).
+        Read-only: sessions are plain dicts, read without ORM instances.
+        """
+        sessions = self.dao.list_by_user(
+            user_id,
+            limit=limit + 1,
+            before=_decode_cursor(cursor) if cursor else None,
+            date_from=date_from,
+            date_to=date_to,
+        )
+        next_cursor = None
+        if len(sessions) > limit:
+            sessions = sessions[:limit]
+            next_cursor = _encode_cursor(sessions[-1].date, sessions[-1].id)
+        return {
+            "items": [cast(SessionRow, session._asdict()) for session in sessions],
+            "next_cursor": next_cursor,
+        }
     
     def get_sessions_by_location(self, location_id: int, user_id: int) -> list["Session"]:
         """
@@ -73,6 +332,7 @@ class SessionService:
         session = self.dao.get_by_id(session_id)
         if not session:
             raise ValueError("Session not found")
+        self.bump_version(session_id)
 
         if session_type is not None:
             session.session_type = session_type
@@ -97,6 +357,17 @@ class SessionService:
         if not session:
             raise ValueError("Session not found")
 
+        self.records.forget(session_id=session.id)
         self.dao.delete(session)
+        session_trees.invalidate(session_id)
 
-
+    def reorder_session(self, session_id: int, order: SessionOrder) -> SessionOrder:
+        """
+        Apply the full ordering of a session's timeline and blocks at once.
+        Raises ValueError if the ordering does not match the session content.
+        """
+        return self.ordering.reorder_session(
+            session_id,
+            [(item.kind, item.id) for item in order.timeline],
+            {block.block_id: block.exercise_ids for block in order.blocks},
+        )
@@ -1,11 +1,13 @@
 from sqlalchemy.orm import Session
 from src.data.dao.user_dao import UserDAO
-from src.data.models import User
+from src.data.models import PersonalRecord, User
 from src.api.schemas.user import UserCreate
+from src.services.record_service import RecordService
 
 class UserService:
     def __init__(self, db: Session):
         self.dao = UserDAO(db)
+        self.records = RecordService(db)
 
     def create_user(self, dto: UserCreate):
         existing = self.dao.get_by_username(dto.username)
@@ -17,3 +19,10 @@ class UserService:
    
     def get_user(self,user_id: int) -> User | None:
         return self.dao.get_by_id(user_id)
+
+    def list_records(self, user_id: int) -> list[PersonalRecord]:
+        """
+        Personal records of a user, read from the records table (one row per
+        exercise type, metric and qualifier) rather than from the exercises.
+        """
+        return self.records.list_records(user_id)
@@ -88,12 +88,35 @@ def test_list_blocks_by_session(client):
             "notes": "Heavy"
         }
     ]
+    mocks["block"].session_version.return_value = 0
     mocks["block"].list_blocks_by_session.return_value = mock_blocks
 
     response = client_app.get("/blocks/session/1")
 
     assert response.status_code == 200
     assert response.json() == mock_blocks
+    assert response.headers["etag"] == '"s1.v0"'
+
+
+def test_list_blocks_by_session_not_modified(client):
+    client_app, mocks = client
+    mocks["block"].session_version.return_value = 5
+
+    response = client_app.get("/blocks/session/1", headers={"If-None-Match": '"s1.v5"'})
+
+    assert response.status_code == 304
+    mocks["block"].list_blocks_by_session.assert_not_called()
+
+
+def test_list_blocks_by_unknown_session(client):
+    client_app, mocks = client
+    mocks["block"].session_version.return_value = None
+
+    response = client_app.get("/blocks/session/9", headers={"If-None-Match": "*"})
+
+    assert response.status_code == 200
+    assert response.json() == []
+    assert "etag" not in response.headers
 
 
 def test_update_block_success(client):
@@ -148,3 +171,23 @@ def test_delete_block_not_found(client):
 
     assert response.status_code == 404
     assert response.json()["detail"] == "Block not found"
+
+
+def test_create_block_schedules_rebalance(client, monkeypatch):
+    client_app, mocks = client
+    rebalanced = []
+    monkeypatch.setattr("src.api.tasks.rebalance_session", rebalanced.append)
+    mocks["block"].ordering.pending_rebalance = {1}
+    mocks["block"].create_block.return_value = {
+        "id": 1,
+        "block_type": "AMRAP",
+        "position": 0,
+        "session_id": 1,
+        "duration": None,
+        "notes": None
+    }
+
+    response = client_app.post("/blocks/", json={"block_type": "AMRAP", "session_id": 1})
+
+    assert response.status_code == 200
+    assert rebalanced == [1]
@@ -1,3 +1,4 @@
+from src.data.models import ExerciseType
 
 
 def test_create_exercise(client):
@@ -82,13 +83,12 @@ def test_get_exercise_not_found(client):
     assert response.json()["detail"] == "Exercise not found"
 
 
-def test_list_exercises_by_session(client):
-    client_app, mocks = client
-
-    mock_exercises = [
+def _exercise_rows():
+    # Rows as returned by the service: plain dicts of column values
+    return [
         {
             "id": 1,
-            "exercise_type": "Deadlift",
+            "exercise_type": ExerciseType.deadlift,
             "session_id": 1,
             "block_id": None,
             "position": 0,
@@ -97,11 +97,13 @@ def test_list_exercises_by_session(client):
             "repetitions": 10,
             "duration_seconds": None,
             "distance_meters": None,
-            "notes": None
+            "notes": None,
+            "rank": "V",
+            "rank_in_block": None,
         },
         {
             "id": 2,
-            "exercise_type": "Deadlift",
+            "exercise_type": ExerciseType.deadlift,
             "session_id": 1,
             "block_id": 1,
             "position": None,
@@ -110,16 +112,66 @@ def test_list_exercises_by_session(client):
             "repetitions": 15,
             "duration_seconds": 12,
             "distance_meters": None,
-            "notes": "Heavy"
-        }
+            "notes": "Heavy",
+            "rank": None,
+            "rank_in_block": "V",
+        },
     ]
 
-    mocks["exercise"].list_by_session.return_value = mock_exercises
+
+def _exercise_json(row):
+    return {
+        **{key: value for key, value in row.items() if not key.startswith("rank")},
+        "exercise_type": row["exercise_type"].value,
+    }
+
+
+def test_list_exercises_by_session(client):
+    client_app, mocks = client
+    rows = _exercise_rows()
+    mocks["exercise"].session_version.return_value = 2
+    mocks["exercise"].list_by_session.return_value = rows
 
     response = client_app.get("/exercises/session/1")
 
     assert response.status_code == 200
-    assert response.json() == mock_exercises
+    assert response.headers["content-type"] == "application/json"
+    assert response.headers["etag"] == '"s1.v2"'
+    assert response.json() == [_exercise_json(row) for row in rows]
+
+
+def test_list_exercises_by_session_not_modified(client):
+    client_app, mocks = client
+    mocks["exercise"].session_version.return_value = 2
+
+    response = client_app.get("/exercises/session/1", headers={"If-None-Match": "*"})
+
+    assert response.status_code == 304
+    assert response.headers["etag"] == '"s1.v2"'
+    mocks["exercise"].list_by_session.assert_not_called()
+
+
+def test_list_exercises_by_unknown_session(client):
+    client_app, mocks = client
+    mocks["exercise"].session_version.return_value = None
+
+    response = client_app.get("/exercises/session/9")
+
+    assert response.status_code == 200
+    assert response.json() == []
+    mocks["exercise"].list_by_session.assert_not_called()
+
+
+def test_list_exercises_by_block(client):
+    client_app, mocks = client
+    rows = _exercise_rows()[1:]
+    mocks["exercise"].list_by_block.return_value = rows
+
+    response = client_app.get("/exercises/block/1")
+
+    assert response.status_code == 200
+    assert response.json() == [_exercise_json(row) for row in rows]
+    mocks["exercise"].list_by_block.assert_called_once_with(1)
 
 
 def test_update_exercise_success(client):
@@ -162,6 +214,40 @@ def test_update_exercise_not_found(client):
     assert response.json()["detail"] == "Exercise not found"
 
 
+def test_move_exercise_success(client):
+    client_app, mocks = client
+    mock_moved = {
+        "id": 1,
+        "exercise_type": "Deadlift",
+        "session_id": 1,
+        "block_id": 3,
+        "position": None,
+        "position_in_block": 0,
+        "weight_kg": 50.0,
+        "repetitions": 10,
+        "duration_seconds": None,
+        "distance_meters": None,
+        "notes": None
+    }
+    mocks["exercise"].move_exercise.return_value = mock_moved
+
+    response = client_app.post("/exercises/1/move", json={"block_id": 3, "position": 0})
+
+    assert response.status_code == 200
+    assert response.json() == mock_moved
+    mocks["exercise"].move_exercise.assert_called_once_with(1, block_id=3, position=0)
+
+
+def test_move_exercise_not_found(client):
+    client_app, mocks = client
+    mocks["exercise"].move_exercise.side_effect = ValueError("Exercise not found")
+
+    response = client_app.post("/exercises/999/move", json={})
+
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Exercise not found"
+
+
 def test_delete_exercise_success(client):
     client_app, mocks = client
 
@@ -179,3 +265,9 @@ def test_delete_exercise_not_found(client):
 
     assert response.status_code == 404
     assert response.json()["detail"] == "Exercise not found"
+
+
+def test_exercise_rows_match_exercise_read():
+    from src.api.schemas.exercise import ExerciseRead, ExerciseRow
+
+    assert ExerciseRow.__annotations__.keys() == ExerciseRead.model_fields.keys()
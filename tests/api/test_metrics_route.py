@@ -0,0 +1,9 @@
+def test_get_metrics(client):
+    client_app, _ = client
+
+    response = client_app.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert "# TYPE db_pool_checkout_seconds histogram" in response.text
+    assert 'db_pool_saturation{engine="sync"} 0' in response.text
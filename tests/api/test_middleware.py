@@ -0,0 +1,211 @@
+import json
+import logging
+import time
+
+import pytest
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import StaticPool
+
+from src.api.middleware import (
+    REQUEST_DB_SECONDS,
+    REQUEST_SECONDS,
+    REQUEST_STATEMENTS,
+    ProfilingMiddleware,
+    TimingMiddleware,
+)
+from src.api.deps import Database
+from src.core.query_stats import instrument
+from src.core.settings import settings
+
+
+@pytest.fixture
+def timed_client():
+    """
+    Application dont la route émet du SQL sur un moteur instrumenté.
+    """
+    engine = create_engine(
+        "sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False}
+    )
+    instrument(engine)
+    app = FastAPI()
+    app.add_middleware(TimingMiddleware)
+
+    @app.get("/items/{item_id}")
+    def get_item(item_id: int):
+        with engine.connect() as conn:
+            for _ in range(item_id):
+                conn.execute(text("SELECT 1"))
+        return {"id": item_id}
+
+    yield TestClient(app)
+    engine.dispose()
+
+
+def test_server_timing_and_metrics(timed_client):
+    client = timed_client
+    labels = {"route": "/items/{item_id}", "method": "GET"}
+    before = REQUEST_SECONDS.count(**labels)
+
+    response = client.get("/items/3")
+
+    assert response.status_code == 200
+    total, db = response.headers["server-timing"].split(", ")
+    assert total.startswith("total;dur=")
+    assert db.startswith("db;dur=") and db.endswith(';desc="3 statements"')
+    assert REQUEST_SECONDS.count(**labels) == before + 1
+    assert REQUEST_STATEMENTS.count(**labels) == before + 1
+    assert REQUEST_DB_SECONDS.count(**labels) == before + 1
+    assert 'http_request_db_statements_bucket{method="GET",route="/items/{item_id}",le="5"}' in "\n".join(
+        REQUEST_STATEMENTS.lines()
+    )
+
+
+def test_unmatched_paths_share_a_label(timed_client):
+    client = timed_client
+    before = REQUEST_SECONDS.count(route="unmatched", method="GET")
+
+    client.get("/nothing/1")
+    client.get("/nothing/2")
+
+    assert REQUEST_SECONDS.count(route="unmatched", method="GET") == before + 2
+
+
+def test_server_timing_can_be_disabled(timed_client, monkeypatch):
+    monkeypatch.setattr(settings, "server_timing", False)
+
+    response = timed_client.get("/items/1")
+
+    assert "server-timing" not in response.headers
+
+
+def test_slow_request_is_logged_with_its_sql(timed_client, monkeypatch, caplog):
+    monkeypatch.setattr(settings, "slow_request_seconds", 0)
+
+    with caplog.at_level(logging.WARNING, logger="src.api.middleware"):
+        timed_client.get("/items/2")
+
+    message = caplog.records[-1].getMessage()
+    assert message.startswith("Slow request GET /items/{item_id}: ")
+    assert "2 SQL statements" in message
+    assert "\n  2x " in message and message.endswith(" ms: SELECT 1")
+
+
+def test_fast_request_is_not_logged(timed_client, caplog):
+    with caplog.at_level(logging.WARNING, logger="src.api.middleware"):
+        timed_client.get("/items/1")
+
+    assert caplog.records == []
+
+
+def test_app_is_timed(client):
+    client_app, _ = client
+
+    response = client_app.get("/metrics")
+
+    assert response.headers["server-timing"].startswith("total;dur=")
+    assert "# TYPE http_request_duration_seconds histogram" in response.text
+
+
+@pytest.fixture
+def profiled_client(tmp_path, monkeypatch):
+    """
+    Application profilée dont la route émet du SQL via Database.run, les
+    profils écrits dans un répertoire temporaire.
+    """
+    monkeypatch.setattr(settings, "profile_directory", str(tmp_path))
+    monkeypatch.setattr(settings, "profile_token", "secret")
+    monkeypatch.setattr(settings, "profile_sample_rate", 0.0)
+    monkeypatch.setattr(settings, "profile_interval", 0.001)
+    engine = create_engine(
+        "sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False}
+    )
+    instrument(engine)
+    app = FastAPI()
+    app.add_middleware(ProfilingMiddleware)
+
+    def work(item_id: int):
+        with engine.connect() as conn:
+            for _ in range(item_id):
+                conn.execute(text("SELECT 1"))
+        end = time.perf_counter() + 0.02
+        while time.perf_counter() < end:
+            pass
+
+    @app.get("/items/{item_id}")
+    async def get_item(item_id: int):
+        await Database(None).run(work, item_id)
+        return {"id": item_id}
+
+    @app.get("/fail")
+    async def fail():
+        raise RuntimeError("boom")
+
+    yield TestClient(app, raise_server_exceptions=False), tmp_path
+    engine.dispose()
+
+
+def test_request_profiled_with_token(profiled_client):
+    client, directory = profiled_client
+
+    response = client.get("/items/2", headers={"X-Profile": "secret"})
+
+    profile_id = response.headers["x-profile-id"]
+    report = json.loads((directory / f"{profile_id}.json").read_text())
+    assert report["route"] == "/items/{item_id}"
+    assert report["status"] == 200
+    assert report["samples"] > 0
+    assert [query["statement"] for query in report["sql"]] == ["SELECT 1", "SELECT 1"]
+    assert "work (tests/api/test_middleware.py:" in (directory / f"{profile_id}.folded").read_text()
+
+
+@pytest.mark.parametrize("headers", [{}, {"X-Profile": "wrong"}])
+def test_request_not_profiled(profiled_client, headers):
+    client, directory = profiled_client
+
+    response = client.get("/items/1", headers=headers)
+
+    assert "x-profile-id" not in response.headers
+    assert list(directory.iterdir()) == []
+
+
+def test_request_profiled_by_sample_rate(profiled_client, monkeypatch):
+    client, directory = profiled_client
+    monkeypatch.setattr(settings, "profile_sample_rate", 1.0)
+
+    response = client.get("/items/1")
+
+    assert (directory / f"{response.headers['x-profile-id']}.folded").exists()
+
+
+def test_failed_request_is_profiled(profiled_client):
+    client, directory = profiled_client
+
+    response = client.get("/fail", headers={"X-Profile": "secret"})
+
+    assert response.status_code == 500
+    [report] = directory.glob("*.json")
+    assert json.loads(report.read_text())["status"] is None
+
+
+def test_profile_kept_within_limit(profiled_client, monkeypatch):
+    client, directory = profiled_client
+    monkeypatch.setattr(settings, "profile_keep", 2)
+
+    for _ in range(3):
+        client.get("/items/0", headers={"X-Profile": "secret"})
+
+    assert len(list(directory.glob("*.json"))) == 2
+    assert len(list(directory.glob("*.folded"))) == 2
+
+
+def test_app_is_profiled(client, tmp_path, monkeypatch):
+    client_app, _ = client
+    monkeypatch.setattr(settings, "profile_directory", str(tmp_path))
+    monkeypatch.setattr(settings, "profile_token", "secret")
+
+    response = client_app.get("/metrics", headers={"X-Profile": "secret"})
+
+    assert (tmp_path / f"{response.headers['x-profile-id']}.json").exists()
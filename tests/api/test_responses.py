@@ -0,0 +1,35 @@
+import gzip
+
+import pytest
+from starlette.requests import Request
+
+from src.api.responses import accepts_gzip, gzip_chunks
+
+
+def _request(accept_encoding):
+    headers = [] if accept_encoding is None else [(b"accept-encoding", accept_encoding.encode())]
+    return Request({"type": "http", "headers": headers})
+
+
+@pytest.mark.parametrize("accept_encoding, expected", [
+    ("gzip", True),
+    ("deflate, GZIP;q=0.5", True),
+    ("br, gzip ; q=1.0", True),
+    ("gzip;q=0", False),
+    ("gzip;q=0.000", False),
+    ("gzip;q=oops", False),
+    ("identity", False),
+    ("", False),
+    (None, False),
+])
+def test_accepts_gzip(accept_encoding, expected):
+    assert accepts_gzip(_request(accept_encoding)) is expected
+
+
+def test_gzip_chunks_is_one_gzip_stream():
+    chunks = [b"line %d\n" % index for index in range(1000)]
+
+    compressed = list(gzip_chunks(iter(chunks)))
+
+    assert gzip.decompress(b"".join(compressed)) == b"".join(chunks)
+    assert len(b"".join(compressed)) < len(b"".join(chunks))
@@ -1,3 +1,10 @@
+import json
+from datetime import date
+
+import pytest
+
+from src.data.models import SessionType
+
 def test_create_session(client):
     client_app, mocks = client
 
@@ -54,20 +61,61 @@ def test_get_session_found(client):
         "notes": "Fun!",
         "location_id": None
     }
+    mocks["session"].session_version.return_value = 3
     mocks["session"].get_session.return_value = mock_session
 
     response = client_app.get("/sessions/1")
     assert response.status_code == 200
     assert response.json() == mock_session
+    assert response.headers["etag"] == '"s1.v3"'
+
+
+def test_get_session_not_modified(client):
+    client_app, mocks = client
+    mocks["session"].session_version.return_value = 3
+
+    response = client_app.get("/sessions/1", headers={"If-None-Match": 'W/"s1.v2", "s1.v3"'})
+    assert response.status_code == 304
+    assert response.headers["etag"] == '"s1.v3"'
+    mocks["session"].session_version.assert_called_once_with(1)
+    mocks["session"].get_session.assert_not_called()
+
+
+def test_get_session_modified_since_the_client_tag(client):
+    client_app, mocks = client
+    mocks["session"].session_version.return_value = 4
+    mocks["session"].get_session.return_value = {
+        "id": 1,
+        "name": "Morning WOD",
+        "date": '2026-01-01',
+        "session_type": "WOD",
+        "user_id": 1,
+        "notes": None,
+        "location_id": None
+    }
+
+    response = client_app.get("/sessions/1", headers={"If-None-Match": '"s1.v3"'})
+    assert response.status_code == 200
+    assert response.headers["etag"] == '"s1.v4"'
 
 
 def test_get_session_not_found(client):
     client_app, mocks = client
-    mocks["session"].get_session.return_value = None
+    mocks["session"].session_version.return_value = None
 
     response = client_app.get("/sessions/999")
     assert response.status_code == 404
     assert response.json()["detail"] == "Session not found"
+    mocks["session"].get_session.assert_not_called()
+
+
+def test_get_session_deleted_after_version_lookup(client):
+    client_app, mocks = client
+    mocks["session"].session_version.return_value = 1
+    mocks["session"].get_session.return_value = None
+
+    response = client_app.get("/sessions/999")
+    assert response.status_code == 404
 
 
 def test_get_session_by_date_found(client):
@@ -89,20 +137,50 @@ def test_get_session_by_date_found(client):
 
 def test_list_sessions_by_user(client):
     client_app, mocks = client
-    mock_list = [{
+    row = {
         "id": 1,
         "name": "Morning WOD",
-        "date": '2026-01-01',
-        "session_type": "WOD",
+        "date": date(2026, 1, 1),
+        "session_type": SessionType.wod,
         "user_id": 1,
         "notes": "Fun!",
         "location_id": None
-    }]
-    mocks["session"].list_sessions_by_user.return_value = mock_list
+    }
+    mocks["session"].list_sessions_by_user.return_value = {
+        "items": [row],
+        "next_cursor": "abc",
+    }
+    mock_list = [{**row, "date": "2026-01-01", "session_type": "WOD"}]
 
-    response = client_app.get("/sessions/user/1")
+    response = client_app.get(
+        "/sessions/user/1",
+        params={"limit": 20, "cursor": "xyz", "from": "2026-01-01", "to": "2026-01-31"},
+    )
     assert response.status_code == 200
-    assert response.json() == mock_list
+    assert response.json() == {"items": mock_list, "next_cursor": "abc"}
+    mocks["session"].list_sessions_by_user.assert_called_once_with(
+        1,
+        limit=20,
+        cursor="xyz",
+        date_from=date(2026, 1, 1),
+        date_to=date(2026, 1, 31),
+    )
+
+
+def test_list_sessions_by_user_invalid_cursor(client):
+    client_app, mocks = client
+    mocks["session"].list_sessions_by_user.side_effect = ValueError("Invalid cursor")
+
+    response = client_app.get("/sessions/user/1", params={"cursor": "xyz"})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
+
+
+def test_list_sessions_by_user_limit_is_bounded(client):
+    client_app, _ = client
+
+    response = client_app.get("/sessions/user/1", params={"limit": 1000})
+    assert response.status_code == 422
 
 def test_get_sessions_by_location(client):
     client_app, mocks = client
@@ -165,3 +243,174 @@ def test_delete_session_not_found(client):
     assert response.status_code == 404
     assert response.json()["detail"] == "Session not found"
 
+
+
+def test_reorder_session_success(client):
+    client_app, mocks = client
+    payload = {
+        "timeline": [{"kind": "exercise", "id": 7}, {"kind": "block", "id": 1}],
+        "blocks": [{"block_id": 1, "exercise_ids": [5, 4]}],
+    }
+    mocks["session"].reorder_session.return_value = payload
+
+    response = client_app.put("/sessions/1/order", json=payload)
+
+    assert response.status_code == 200
+    assert response.json() == payload
+    session_id, order = mocks["session"].reorder_session.call_args.args
+    assert session_id == 1
+    assert order.model_dump() == payload
+
+
+def test_reorder_session_not_found(client):
+    client_app, mocks = client
+    mocks["session"].get_session.return_value = None
+
+    response = client_app.put("/sessions/999/order", json={"timeline": []})
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Session not found"
+
+
+def test_reorder_session_invalid_ordering(client):
+    client_app, mocks = client
+    mocks["session"].reorder_session.side_effect = ValueError(
+        "Exercise 7 is missing from the timeline ordering"
+    )
+
+    response = client_app.put("/sessions/1/order", json={"timeline": []})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Exercise 7 is missing from the timeline ordering"
+
+
+def test_reorder_session_rejects_unknown_kind(client):
+    client_app, _ = client
+
+    response = client_app.put(
+        "/sessions/1/order", json={"timeline": [{"kind": "session", "id": 1}]}
+    )
+    assert response.status_code == 422
+
+
+def test_get_session_tree(client):
+    client_app, mocks = client
+    exercise = {
+        "id": 7,
+        "exercise_type": "Burpee",
+        "session_id": 1,
+        "weight_kg": None,
+        "repetitions": 10,
+        "duration_seconds": None,
+        "distance_meters": None,
+        "block_id": None,
+        "position": 0,
+        "position_in_block": None,
+        "notes": None,
+    }
+    tree = {
+        "id": 1,
+        "name": "Morning WOD",
+        "date": "2026-01-01",
+        "session_type": "WOD",
+        "user_id": 1,
+        "notes": None,
+        "location_id": None,
+        "timeline": [
+            {**exercise, "kind": "exercise"},
+            {
+                "kind": "block",
+                "id": 2,
+                "block_type": "AMRAP",
+                "position": 1,
+                "session_id": 1,
+                "duration": 12.0,
+                "notes": None,
+                "exercises": [{**exercise, "id": 8, "block_id": 2, "position": None, "position_in_block": 0}],
+            },
+        ],
+    }
+    mocks["session"].session_version.return_value = 3
+    mocks["session"].get_session_tree_json.return_value = json.dumps(tree).encode()
+
+    response = client_app.get("/sessions/1/tree")
+
+    assert response.status_code == 200
+    assert response.json() == tree
+    assert response.headers["etag"] == '"s1.v3"'
+    mocks["session"].get_session_tree_json.assert_called_once_with(1, 3)
+
+
+def test_get_session_tree_not_modified(client):
+    client_app, mocks = client
+    mocks["session"].session_version.return_value = 3
+
+    response = client_app.get("/sessions/1/tree", headers={"If-None-Match": '"s1.v3"'})
+
+    assert response.status_code == 304
+    mocks["session"].get_session_tree_json.assert_not_called()
+
+
+@pytest.mark.parametrize("version", [None, 1])
+def test_get_session_tree_not_found(client, version):
+    client_app, mocks = client
+    mocks["session"].session_version.return_value = version
+    mocks["session"].get_session_tree_json.return_value = None
+
+    response = client_app.get("/sessions/999/tree")
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Session not found"
+
+
+def test_create_full_session(client):
+    client_app, mocks = client
+    payload = {
+        "name": "Morning WOD",
+        "date": "2026-01-01",
+        "session_type": "WOD",
+        "user_id": 1,
+        "timeline": [
+            {
+                "kind": "block",
+                "block_type": "AMRAP",
+                "exercises": [{"exercise_type": "Burpee", "repetitions": 10}],
+            },
+            {"kind": "exercise", "exercise_type": "Deadlift", "weight_kg": 100},
+        ],
+    }
+    tree = {
+        "id": 1,
+        "name": "Morning WOD",
+        "date": "2026-01-01",
+        "session_type": "WOD",
+        "user_id": 1,
+        "notes": None,
+        "location_id": None,
+        "timeline": [],
+    }
+    mocks["session"].create_full_session.return_value = tree
+
+    response = client_app.post("/sessions/full", json=payload)
+
+    assert response.status_code == 200
+    assert response.json() == tree
+    kwargs = mocks["session"].create_full_session.call_args.kwargs
+    assert kwargs["name"] == "Morning WOD"
+    assert [item.kind for item in kwargs["timeline"]] == ["block", "exercise"]
+    assert kwargs["timeline"][0].exercises[0].repetitions == 10
+
+
+def test_create_full_session_invalid_location(client):
+    client_app, mocks = client
+    mocks["session"].create_full_session.side_effect = ValueError("Location with id 99 not found")
+
+    response = client_app.post("/sessions/full", json={
+        "name": "WOD", "date": "2026-01-01", "session_type": "WOD", "user_id": 1, "location_id": 99,
+    })
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Location with id 99 not found"
+
+
+def test_session_rows_match_session_read():
+    from src.api.schemas.session import SessionPage, SessionPageRow, SessionRead, SessionRow
+
+    assert SessionRow.__annotations__.keys() == SessionRead.model_fields.keys()
+    assert SessionPageRow.__annotations__.keys() == SessionPage.model_fields.keys()
@@ -0,0 +1,28 @@
+from unittest.mock import MagicMock
+
+from src.api.tasks import rebalance_session, schedule_rebalance
+
+
+def test_rebalance_session_uses_its_own_session(monkeypatch):
+    db = MagicMock()
+    ordering = MagicMock()
+    monkeypatch.setattr("src.core.database.SessionLocal", lambda: db)
+    monkeypatch.setattr("src.api.tasks.OrderingService", lambda db=None: ordering)
+
+    rebalance_session(4)
+
+    ordering.rebalance_session.assert_called_once_with(4)
+    db.commit.assert_called_once()
+    db.close.assert_called_once()
+
+
+def test_schedule_rebalance():
+    background_tasks = MagicMock()
+    ordering = MagicMock(pending_rebalance={1, 2})
+
+    schedule_rebalance(background_tasks, ordering)
+
+    assert sorted(c.args for c in background_tasks.add_task.call_args_list) == [
+        (rebalance_session, 1),
+        (rebalance_session, 2),
+    ]
@@ -1,3 +1,8 @@
+from datetime import date
+
+from src.data.models import ExerciseType
+
+
 def test_create_user_success(client):
     client_app, mocks = client
     payload = {"username": "john"}
@@ -46,3 +51,128 @@ def test_get_user_not_found(client):
     mocks["user"].get_user.assert_called_once_with(999)
 
 
+def test_list_user_records(client):
+    client_app, mocks = client
+    mocks["user"].get_user.return_value = {"id": 1, "username": "alice"}
+    mocks["user"].list_records.return_value = [{
+        "exercise_type": "Deadlift",
+        "metric": "Max Reps",
+        "qualifier": 100,
+        "value": 5,
+        "exercise_id": 7,
+    }]
+
+    response = client_app.get("/users/1/records")
+
+    assert response.status_code == 200
+    assert response.json() == [{
+        "exercise_type": "Deadlift",
+        "metric": "Max Reps",
+        "qualifier": 100.0,
+        "value": 5.0,
+        "exercise_id": 7,
+    }]
+    mocks["user"].list_records.assert_called_once_with(1)
+
+
+def test_list_user_records_user_not_found(client):
+    client_app, mocks = client
+    mocks["user"].get_user.return_value = None
+
+    response = client_app.get("/users/999/records")
+
+    assert response.status_code == 404
+    mocks["user"].list_records.assert_not_called()
+
+
+def test_get_exercise_history(client):
+    client_app, mocks = client
+    mocks["user_exercise"].get_history.return_value = [
+        {"date": "2026-01-01", "weight_kg": 60, "repetitions": 5, "count": 1},
+    ]
+
+    response = client_app.get(
+        "/users/1/exercises/Back Squat/history",
+        params={"from": "2026-01-01", "to": "2026-12-31", "max_points": 100},
+    )
+
+    assert response.status_code == 200
+    assert response.json() == [{
+        "date": "2026-01-01",
+        "weight_kg": 60.0,
+        "repetitions": 5.0,
+        "duration_seconds": None,
+        "distance_meters": None,
+        "count": 1,
+    }]
+    mocks["user_exercise"].get_history.assert_called_once_with(
+        1,
+        ExerciseType.back_squat,
+        date_from=date(2026, 1, 1),
+        date_to=date(2026, 12, 31),
+        max_points=100,
+    )
+
+
+def test_get_exercise_history_unknown_type(client):
+    client_app, mocks = client
+
+    response = client_app.get("/users/1/exercises/Unknown/history")
+
+    assert response.status_code == 422
+    mocks["user_exercise"].get_history.assert_not_called()
+
+
+def test_export_history_streams_ndjson(client):
+    client_app, mocks = client
+    mocks["user"].get_user.return_value = {"id": 1, "username": "test"}
+    mocks["user_export"].export.return_value = iter([b'{"session_id":1}\n', b'{"session_id":2}\n'])
+
+    response = client_app.get(
+        "/users/1/export",
+        params={"from": "2026-01-01", "to": "2026-01-31"},
+        headers={"Accept-Encoding": "identity"},
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert response.headers["content-disposition"] == 'attachment; filename="history-1.ndjson"'
+    assert "content-encoding" not in response.headers
+    assert response.text == '{"session_id":1}\n{"session_id":2}\n'
+    mocks["user_export"].export.assert_called_once_with(
+        1, "ndjson", date_from=date(2026, 1, 1), date_to=date(2026, 1, 31)
+    )
+
+
+def test_export_history_gzip_csv(client):
+    client_app, mocks = client
+    mocks["user"].get_user.return_value = {"id": 1, "username": "test"}
+    mocks["user_export"].export.return_value = iter([b"session_id\r\n", b"1\r\n"])
+
+    response = client_app.get(
+        "/users/1/export", params={"format": "csv"}, headers={"Accept-Encoding": "gzip"}
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "text/csv; charset=utf-8"
+    assert response.headers["content-encoding"] == "gzip"
+    # Decompressed by the client
+    assert response.text == "session_id\r\n1\r\n"
+
+
+def test_export_history_user_not_found(client):
+    client_app, mocks = client
+    mocks["user"].get_user.return_value = None
+
+    response = client_app.get("/users/999/export")
+
+    assert response.status_code == 404
+    mocks["user_export"].export.assert_not_called()
+
+
+def test_export_history_invalid_format(client):
+    client_app, _ = client
+
+    response = client_app.get("/users/1/export", params={"format": "xml"})
+
+    assert response.status_code == 422
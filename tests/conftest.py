@@ -2,6 +2,8 @@ import pytest
 from fastapi.testclient import TestClient
 
 from src.main import app
+from src.core.cache import MemoryBackend, session_trees
+from src.core.settings import settings
 
 from unittest.mock import MagicMock
 
@@ -10,11 +12,19 @@ from src.services.session_service import SessionService
 from src.services.location_service import LocationService
 from src.services.block_service import BlockService
 from src.services.exercise_service import ExerciseService
+from src.services.export_service import ExportService
+from src.services.import_service import ImportService
+from src.services.ordering_service import OrderingService
+from src.services.record_service import RecordService
 from src.data.dao.session_dao import SessionDAO
 from src.data.dao.user_dao import UserDAO
 from src.data.dao.location_dao import LocationDAO
 from src.data.dao.block_dao import BlockDAO
 from src.data.dao.exercise_dao import ExerciseDAO
+from src.data.dao.record_dao import RecordDAO
+from src.data.dao.import_dao import ImportDAO
+
+pytest_plugins = ["tests.query_budget"]
 
 @pytest.fixture
 def client(monkeypatch):
@@ -31,6 +41,20 @@ def client(monkeypatch):
     )
     mock_service_instances['user'] = user_mock
 
+    user_exercise_mock = MagicMock()
+    monkeypatch.setattr(
+        "src.api.routes.user.ExerciseService",
+        lambda db=None: user_exercise_mock
+    )
+    mock_service_instances['user_exercise'] = user_exercise_mock
+
+    user_export_mock = MagicMock()
+    monkeypatch.setattr(
+        "src.api.routes.user.ExportService",
+        lambda db=None: user_export_mock
+    )
+    mock_service_instances['user_export'] = user_export_mock
+
     # Mock SessionService
     session_mock = MagicMock()
     monkeypatch.setattr(
@@ -79,6 +103,13 @@ def mock_services_dao(monkeypatch):
     )
     mocks['user'] = user_mock
 
+    user_records_mock = MagicMock()
+    monkeypatch.setattr(
+        "src.services.user_service.RecordService",
+        lambda db=None: user_records_mock
+    )
+    mocks['user_records'] = user_records_mock
+
     # SessionService
     session_mock = MagicMock()
     monkeypatch.setattr(
@@ -94,6 +125,27 @@ def mock_services_dao(monkeypatch):
     )
     mocks['session_location'] = session_location_mock
 
+    session_block_mock = MagicMock()
+    monkeypatch.setattr(
+        "src.services.session_service.BlockDAO",
+        lambda db=None: session_block_mock
+    )
+    mocks['session_block'] = session_block_mock
+
+    session_exercise_mock = MagicMock()
+    monkeypatch.setattr(
+        "src.services.session_service.ExerciseDAO",
+        lambda db=None: session_exercise_mock
+    )
+    mocks['session_exercise'] = session_exercise_mock
+
+    session_records_mock = MagicMock()
+    monkeypatch.setattr(
+        "src.services.session_service.RecordService",
+        lambda db=None: session_records_mock
+    )
+    mocks['session_records'] = session_records_mock
+
     # LocationService
     location_mock = MagicMock()
     monkeypatch.setattr(
@@ -124,6 +176,13 @@ def mock_services_dao(monkeypatch):
     )
     mocks['block_exercise'] = block_exercise_mock
 
+    block_records_mock = MagicMock()
+    monkeypatch.setattr(
+        "src.services.block_service.RecordService",
+        lambda db=None: block_records_mock
+    )
+    mocks['block_records'] = block_records_mock
+
     # ExerciseService
     exercise_mock = MagicMock()
     monkeypatch.setattr(
@@ -139,9 +198,96 @@ def mock_services_dao(monkeypatch):
     )
     mocks['exercise_block'] = exercise_block_mock
 
+    exercise_session_mock = MagicMock()
+    monkeypatch.setattr(
+        "src.services.exercise_service.SessionDAO",
+        lambda db=None: exercise_session_mock
+    )
+    mocks['exercise_session'] = exercise_session_mock
+
+    exercise_records_mock = MagicMock()
+    monkeypatch.setattr(
+        "src.services.exercise_service.RecordService",
+        lambda db=None: exercise_records_mock
+    )
+    mocks['exercise_records'] = exercise_records_mock
+
+    # RecordService
+    record_mock = MagicMock()
+    monkeypatch.setattr(
+        "src.services.record_service.RecordDAO",
+        lambda db=None: record_mock
+    )
+    mocks['record'] = record_mock
+
+    record_session_mock = MagicMock()
+    monkeypatch.setattr(
+        "src.services.record_service.SessionDAO",
+        lambda db=None: record_session_mock
+    )
+    mocks['record_session'] = record_session_mock
+
+    # ExportService
+    export_session_mock = MagicMock()
+    monkeypatch.setattr(
+        "src.services.export_service.SessionDAO",
+        lambda db=None: export_session_mock
+    )
+    mocks['export_session'] = export_session_mock
+
+    # ImportService
+    import_mock = MagicMock()
+    monkeypatch.setattr(
+        "src.services.import_service.ImportDAO",
+        lambda db=None: import_mock
+    )
+    mocks['import'] = import_mock
+
+    import_records_mock = MagicMock()
+    monkeypatch.setattr(
+        "src.services.import_service.RecordService",
+        lambda db=None: import_records_mock
+    )
+    mocks['import_records'] = import_records_mock
+
+    # OrderingService (used by BlockService and ExerciseService)
+    ordering_block_mock = MagicMock()
+    monkeypatch.setattr(
+        "src.services.ordering_service.BlockDAO",
+        lambda db=None: ordering_block_mock
+    )
+    mocks['ordering_block'] = ordering_block_mock
+
+    ordering_exercise_mock = MagicMock()
+    monkeypatch.setattr(
+        "src.services.ordering_service.ExerciseDAO",
+        lambda db=None: ordering_exercise_mock
+    )
+    mocks['ordering_exercise'] = ordering_exercise_mock
+
+    ordering_session_mock = MagicMock()
+    monkeypatch.setattr(
+        "src.services.ordering_service.SessionDAO",
+        lambda db=None: ordering_session_mock
+    )
+    mocks['ordering_session'] = ordering_session_mock
+
     return mocks
 
 
+@pytest.fixture
+def fractional_ordering(monkeypatch):
+    """Switch the services to the fractional ordering mode."""
+    monkeypatch.setattr(settings, "ordering_mode", "fractional")
+
+
+@pytest.fixture
+def session_tree_cache(monkeypatch):
+    """Empty in-memory session tree cache."""
+    monkeypatch.setattr(session_trees, "backend", MemoryBackend(1024 * 1024))
+    return session_trees
+
+
 @pytest.fixture
 def user_service(mock_services_dao):
     """UserService avec DAO mocké."""
@@ -169,6 +315,26 @@ def exercise_service(mock_services_dao):
     """ExerciseService avec DAO mocké."""
     return ExerciseService(db=mock_services_dao['exercise'])
 
+@pytest.fixture
+def record_service(mock_services_dao):
+    """RecordService avec DAO mocké."""
+    return RecordService(db=mock_services_dao['record'])
+
+@pytest.fixture
+def export_service(mock_services_dao):
+    """ExportService avec DAO mocké."""
+    return ExportService(db=mock_services_dao['export_session'])
+
+@pytest.fixture
+def import_service(mock_services_dao):
+    """ImportService avec DAO mocké."""
+    return ImportService(db=mock_services_dao['import'])
+
+@pytest.fixture
+def ordering_service(mock_services_dao):
+    """OrderingService avec DAO mocké."""
+    return OrderingService(db=mock_services_dao['ordering_block'])
+
 @pytest.fixture
 def mock_dbs():
     """
@@ -180,6 +346,8 @@ def mock_dbs():
         "location": MagicMock(),
         "block": MagicMock(),
         "exercise": MagicMock(),
+        "record": MagicMock(),
+        "import": MagicMock(),
     }
 
 @pytest.fixture
@@ -205,4 +373,14 @@ def block_dao(mock_dbs):
 @pytest.fixture
 def exercise_dao(mock_dbs):
     """ExerciseDAO avec DB mockée."""
-    return ExerciseDAO(mock_dbs["exercise"])
\ No newline at end of file
+    return ExerciseDAO(mock_dbs["exercise"])
+
+@pytest.fixture
+def record_dao(mock_dbs):
+    """RecordDAO avec DB mockée."""
+    return RecordDAO(mock_dbs["record"])
+
+@pytest.fixture
+def import_dao(mock_dbs):
+    """ImportDAO avec DB mockée."""
+    return ImportDAO(mock_dbs["import"])
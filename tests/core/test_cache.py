@@ -0,0 +1,150 @@
+from src.core.cache import (
+    CACHE_ERRORS,
+    CACHE_HITS,
+    CACHE_MISSES,
+    MemoryBackend,
+    RedisBackend,
+    SessionTreeCache,
+)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class LocalRedis:
+    """Stand-in for redis.Redis: get, set(px=) and delete on a dict."""
+
+    def __init__(self):
+        self.values = {}
+        self.down = False
+
+    def _check(self):
+        if self.down:
+            raise ConnectionError("redis is down")
+
+    def get(self, key):
+        self._check()
+        return self.values.get(key)
+
+    def set(self, key, value, px):
+        self._check()
+        self.values[key] = value
+
+    def delete(self, key):
+        self._check()
+        self.values.pop(key, None)
+
+
+def test_memory_backend_expires_values():
+    clock = Clock()
+    backend = MemoryBackend(100, clock=clock)
+    backend.set("a", b"1", ttl=10)
+
+    clock.now = 9
+    assert backend.get("a") == b"1"
+    clock.now = 10
+    assert backend.get("a") is None
+    assert len(backend) == 0
+    assert backend.size == 0
+
+
+def test_memory_backend_evicts_least_recently_used():
+    backend = MemoryBackend(10)
+    backend.set("a", b"aaaa", ttl=60)
+    backend.set("b", b"bbbb", ttl=60)
+    assert backend.get("a") == b"aaaa"
+
+    backend.set("c", b"cccc", ttl=60)
+
+    assert backend.get("b") is None
+    assert backend.get("a") == b"aaaa"
+    assert backend.get("c") == b"cccc"
+    assert backend.size == 8
+
+
+def test_memory_backend_replaces_and_deletes():
+    backend = MemoryBackend(10)
+    backend.set("a", b"aaaa", ttl=60)
+    backend.set("a", b"aa", ttl=60)
+    assert (backend.get("a"), backend.size) == (b"aa", 2)
+
+    backend.delete("a")
+    backend.delete("missing")
+    assert (backend.get("a"), backend.size) == (None, 0)
+
+
+def test_memory_backend_skips_values_larger_than_the_cache():
+    backend = MemoryBackend(3)
+    backend.set("a", b"aaaa", ttl=60)
+
+    assert len(backend) == 0
+
+
+def test_session_tree_cache_serves_the_current_version_only():
+    cache = SessionTreeCache(MemoryBackend(1000), ttl=60)
+    hits, misses = CACHE_HITS.value(), CACHE_MISSES.value()
+
+    assert cache.get(1, 0) is None
+    cache.put(1, 0, b'{"id":1}')
+    assert cache.get(1, 0) == b'{"id":1}'
+    assert cache.get(1, 1) is None
+
+    assert CACHE_HITS.value() - hits == 1
+    assert CACHE_MISSES.value() - misses == 2
+
+
+def test_session_tree_cache_invalidate():
+    cache = SessionTreeCache(MemoryBackend(1000), ttl=60)
+    cache.put(1, 0, b"{}")
+    cache.put(2, 0, b"{}")
+
+    cache.invalidate(1)
+
+    assert cache.get(1, 0) is None
+    assert cache.get(2, 0) == b"{}"
+
+
+def test_session_tree_cache_keys_depend_on_the_ordering_mode(fractional_ordering):
+    backend = MemoryBackend(1000)
+    SessionTreeCache(backend, ttl=60).put(1, 0, b"{}")
+
+    assert backend.get("session-tree:fractional:1") == b"0\n{}"
+
+
+def test_session_tree_cache_without_backend():
+    cache = SessionTreeCache(None, ttl=60)
+    cache.put(1, 0, b"{}")
+    cache.invalidate(1)
+
+    assert cache.get(1, 0) is None
+
+
+def test_session_tree_cache_on_a_shared_backend():
+    redis = LocalRedis()
+    writer = SessionTreeCache(RedisBackend(redis, errors=(ConnectionError,)), ttl=60)
+    reader = SessionTreeCache(RedisBackend(redis, errors=(ConnectionError,)), ttl=60)
+
+    writer.put(1, 4, b"{}")
+    assert redis.values == {"onthefloor:session-tree:dense:1": b"4\n{}"}
+    assert reader.get(1, 4) == b"{}"
+
+    reader.invalidate(1)
+    assert writer.get(1, 4) is None
+
+
+def test_shared_backend_failures_are_misses():
+    redis = LocalRedis()
+    cache = SessionTreeCache(RedisBackend(redis, errors=(ConnectionError,)), ttl=60)
+    redis.down = True
+    errors = CACHE_ERRORS.value()
+
+    cache.put(1, 0, b"{}")
+    assert cache.get(1, 0) is None
+    cache.invalidate(1)
+
+    assert CACHE_ERRORS.value() - errors == 3
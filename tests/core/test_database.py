@@ -0,0 +1,209 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from sqlalchemy import create_engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import NullPool, QueuePool
+
+from src.api.deps import PRIMARY_UNTIL_COOKIE, Database, _async_database, _sync_database
+from src.core.database import (
+    POOL_CHECKED_OUT,
+    POOL_CHECKOUT_SECONDS,
+    POOL_CHECKOUT_TIMEOUTS,
+    POOL_SATURATION,
+    async_session_factory,
+    async_unit_of_work,
+    engine_options,
+    unit_of_work,
+    watch_pool,
+)
+from src.core.settings import settings
+
+
+@pytest.fixture
+def db(monkeypatch):
+    db = MagicMock()
+    monkeypatch.setattr("src.core.database.SessionLocal", lambda: db)
+    return db
+
+
+@pytest.fixture
+def replica_db(monkeypatch):
+    replica_db = MagicMock()
+    monkeypatch.setattr("src.core.database.ReplicaSessionLocal", lambda: replica_db)
+    return replica_db
+
+
+def _session_of(method, cookies=None, response=None):
+    request = MagicMock(method=method, cookies=cookies or {})
+    return next(_sync_database(request, response or MagicMock())).session
+
+
+def test_unit_of_work_commits_once_on_success(db):
+    with unit_of_work() as session:
+        assert session is db
+
+    db.commit.assert_called_once()
+    db.rollback.assert_not_called()
+    db.close.assert_called_once()
+
+
+def test_unit_of_work_rolls_back_on_error(db):
+    with pytest.raises(ValueError), unit_of_work():
+        raise ValueError("boom")
+
+    db.commit.assert_not_called()
+    db.rollback.assert_called_once()
+    db.close.assert_called_once()
+
+
+def test_database_commits_at_the_end_of_the_request(db):
+    dependency = _sync_database(MagicMock(method="POST"), MagicMock())
+    assert next(dependency).session is db
+    db.commit.assert_not_called()
+
+    with pytest.raises(StopIteration):
+        next(dependency)
+    db.commit.assert_called_once()
+    db.close.assert_called_once()
+
+
+def test_database_rolls_back_when_the_endpoint_fails(db):
+    dependency = _sync_database(MagicMock(method="POST"), MagicMock())
+    next(dependency)
+
+    with pytest.raises(ValueError):
+        dependency.throw(ValueError("boom"))
+    db.commit.assert_not_called()
+    db.rollback.assert_called_once()
+
+
+@pytest.fixture
+def async_db(monkeypatch):
+    db = MagicMock(commit=AsyncMock(), rollback=AsyncMock(), close=AsyncMock())
+    db.run_sync = AsyncMock(side_effect=lambda fn: fn(db.sync_session))
+    monkeypatch.setattr("src.core.database.async_session_factory", lambda replica=False: lambda: db)
+    return db
+
+
+def test_reads_go_to_the_replica(db, replica_db):
+    assert _session_of("GET") is replica_db
+    assert _session_of("HEAD", {PRIMARY_UNTIL_COOKIE: "not a time"}) is replica_db
+
+
+def test_writes_go_to_the_primary_and_stick_their_client_to_it(db, replica_db, monkeypatch):
+    monkeypatch.setattr("src.api.deps.time.time", lambda: 1000.0)
+    response = MagicMock()
+
+    assert _session_of("PATCH", response=response) is db
+    response.set_cookie.assert_called_once_with(
+        PRIMARY_UNTIL_COOKIE, "1005.000", max_age=5, httponly=True
+    )
+    # Reads of the same client within the window, then after it
+    assert _session_of("GET", {PRIMARY_UNTIL_COOKIE: "1005.000"}) is db
+    monkeypatch.setattr("src.api.deps.time.time", lambda: 1005.0)
+    assert _session_of("GET", {PRIMARY_UNTIL_COOKIE: "1005.000"}) is replica_db
+
+
+def test_without_replica_everything_goes_to_the_primary(db):
+    response = MagicMock()
+
+    assert _session_of("GET") is db
+    assert _session_of("POST", response=response) is db
+    response.set_cookie.assert_not_called()
+
+
+def test_async_unit_of_work_commits_once_on_success(async_db):
+    async def work():
+        async with async_unit_of_work() as session:
+            assert session is async_db
+
+    asyncio.run(work())
+    async_db.commit.assert_awaited_once()
+    async_db.rollback.assert_not_awaited()
+    async_db.close.assert_awaited_once()
+
+
+def test_async_unit_of_work_rolls_back_on_error(async_db):
+    async def work():
+        async with async_unit_of_work():
+            raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        asyncio.run(work())
+    async_db.commit.assert_not_awaited()
+    async_db.rollback.assert_awaited_once()
+
+
+def test_async_database_runs_services_through_run_sync(async_db):
+    async def request():
+        dependency = _async_database(MagicMock(method="GET"), MagicMock())
+        database = await anext(dependency)
+        assert database.session is async_db.sync_session
+        result = await database.run(lambda x, *, y: (x, y), 1, y=2)
+        async_db.commit.assert_not_awaited()
+        with pytest.raises(StopAsyncIteration):
+            await anext(dependency)
+        return result
+
+    assert asyncio.run(request()) == (1, 2)
+    async_db.run_sync.assert_awaited_once()
+    async_db.commit.assert_awaited_once()
+
+
+def test_sync_database_runs_services_in_the_threadpool(db):
+    result = asyncio.run(Database(db).run(lambda x, *, y: (x, y), 1, y=2))
+
+    assert result == (1, 2)
+
+
+def test_engine_options_from_settings(monkeypatch):
+    monkeypatch.setattr(settings, "pool_size", 20)
+    monkeypatch.setattr(settings, "pool_pre_ping", False)
+
+    options = engine_options(QueuePool, "sync")
+
+    assert issubclass(options.pop("poolclass"), QueuePool)
+    assert options == {
+        "pool_size": 20,
+        "max_overflow": 10,
+        "pool_timeout": 30,
+        "pool_recycle": 1800,
+        "pool_pre_ping": False,
+    }
+
+
+def test_engine_options_pgbouncer_mode_has_no_pool(monkeypatch):
+    monkeypatch.setattr(settings, "pgbouncer_mode", True)
+
+    options = engine_options(QueuePool, "sync")
+
+    assert list(options) == ["poolclass"]
+    assert issubclass(options["poolclass"], NullPool)
+
+
+def test_pool_checkouts_are_metered(monkeypatch):
+    monkeypatch.setattr(settings, "pool_size", 1)
+    monkeypatch.setattr(settings, "pool_max_overflow", 0)
+    monkeypatch.setattr(settings, "pool_timeout", 0.01)
+    engine = create_engine("sqlite://", **engine_options(QueuePool, "test"))
+    watch_pool(engine, "test")
+
+    with engine.connect():
+        assert POOL_CHECKED_OUT.value(engine="test") == 1
+        assert POOL_SATURATION.value(engine="test") == 1
+        with pytest.raises(PoolTimeoutError):
+            engine.connect()
+
+    assert POOL_CHECKOUT_SECONDS.count(engine="test") == 2
+    assert POOL_CHECKOUT_TIMEOUTS.value(engine="test") == 1
+    assert POOL_SATURATION.value(engine="test") == 0
+
+
+def test_async_replica_factory_needs_a_replica(monkeypatch):
+    monkeypatch.setattr(settings, "postgres_replica_host", None)
+
+    with pytest.raises(ValueError, match="No read replica configured"):
+        async_session_factory(replica=True)
@@ -0,0 +1,54 @@
+import pytest
+
+from src.core.metrics import Counter, Gauge, Histogram, counter, render
+
+
+def test_counter_by_labels():
+    requests = Counter("requests_total", "Requests")
+    requests.inc(engine="sync")
+    requests.inc(2, engine="sync")
+    requests.inc(engine="async")
+
+    assert requests.value(engine="sync") == 3
+    assert requests.value(engine="other") == 0
+    assert requests.lines() == [
+        'requests_total{engine="sync"} 3',
+        'requests_total{engine="async"} 1',
+    ]
+
+
+def test_histogram_buckets_are_cumulative():
+    latency = Histogram("latency_seconds", "Latency", buckets=(0.1, 1))
+    for value in (0.05, 0.1, 0.5, 3):
+        latency.observe(value)
+
+    assert latency.count() == 4
+    assert latency.lines() == [
+        'latency_seconds_bucket{le="0.1"} 2',
+        'latency_seconds_bucket{le="1"} 3',
+        'latency_seconds_bucket{le="+Inf"} 4',
+        "latency_seconds_sum 3.65",
+        "latency_seconds_count 4",
+    ]
+
+
+def test_gauge_reads_its_function_at_collection():
+    values = [1]
+    in_use = Gauge("in_use", "In use")
+    in_use.set_function(lambda: values[-1], engine="sync")
+    values.append(4)
+
+    assert in_use.value(engine="sync") == 4
+    assert in_use.lines() == ['in_use{engine="sync"} 4']
+
+
+def test_render_registered_metrics():
+    registered = counter("test_render_total", "Rendered in the test")
+    registered.inc()
+
+    text = render()
+
+    assert "# HELP test_render_total Rendered in the test\n" in text
+    assert "# TYPE test_render_total counter\ntest_render_total 1\n" in text
+    with pytest.raises(ValueError):
+        counter("test_render_total", "Twice")
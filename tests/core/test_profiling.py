@@ -0,0 +1,75 @@
+import json
+import os
+import threading
+import time
+
+from src.core.profiling import Profile, follow, profile, prune, save
+
+
+def _busy(seconds=0.05):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def test_followed_call_is_sampled():
+    with profile(0.001) as result:
+        follow(_busy)()
+
+    assert result.samples > 0
+    assert sum(result.stacks.values()) == result.samples
+    leaf = f"_busy (tests/core/test_profiling.py:{_busy.__code__.co_firstlineno})"
+    assert all(stack.endswith(leaf) for stack in result.stacks)
+
+
+def test_followed_call_is_sampled_in_another_thread():
+    with profile(0.001) as result:
+        thread = threading.Thread(target=follow(_busy))
+        thread.start()
+        thread.join()
+
+    assert result.samples > 0
+
+
+def test_other_calls_are_not_sampled():
+    with profile(0.001) as result:
+        _busy()
+
+    assert result.samples == 0
+
+
+def test_follow_outside_a_profile():
+    assert follow(_busy) is _busy
+
+
+def test_folded_stacks():
+    result = Profile(0.01)
+    result.stacks.update({"main;work": 3, "main": 1})
+
+    assert result.folded() == "main 1\nmain;work 3\n"
+
+
+def test_save(tmp_path):
+    result = Profile(0.01)
+    result.stacks["main;work"] = 2
+
+    save(tmp_path / "profiles", "abc", result, {"id": "abc"})
+
+    assert (tmp_path / "profiles" / "abc.folded").read_text() == "main;work 2\n"
+    assert json.loads((tmp_path / "profiles" / "abc.json").read_text()) == {"id": "abc"}
+
+
+def test_prune_keeps_the_newest_within_age(tmp_path):
+    now = time.time()
+    for index, age in enumerate([10, 20, 30, 3600]):
+        save(tmp_path, f"p{index}", Profile(0.01), {})
+        for suffix in (".json", ".folded"):
+            os.utime(tmp_path / f"p{index}{suffix}", (now - age, now - age))
+
+    prune(tmp_path, keep=2, max_age_seconds=60)
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        "p0.folded", "p0.json", "p1.folded", "p1.json",
+    ]
+    prune(tmp_path, keep=2, max_age_seconds=15)
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["p0.folded", "p0.json"]
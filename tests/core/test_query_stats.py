@@ -0,0 +1,105 @@
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from src.core.query_stats import (
+    QueryStats,
+    StatementBudgetExceeded,
+    collect,
+    instrument,
+    statement_budget,
+)
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://")
+    instrument(engine)
+    yield engine
+    engine.dispose()
+
+
+def test_collect_counts_statements(engine):
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+        with collect() as stats:
+            conn.execute(text("SELECT 1"))
+            conn.execute(text("SELECT 1"))
+            conn.execute(text("SELECT 2"))
+        conn.execute(text("SELECT 1"))
+
+    assert stats.statements == 3
+    assert stats.seconds > 0
+    assert {statement: count for statement, (count, _) in stats.by_statement.items()} == {
+        "SELECT 1": 2, "SELECT 2": 1,
+    }
+
+
+def test_collect_traces_statements_in_order(engine):
+    with engine.connect() as conn, collect() as outer, collect(trace=True) as stats:
+        conn.execute(text("SELECT 2"))
+        conn.execute(text("SELECT 1"))
+        conn.execute(text("SELECT 2"))
+
+    assert [statement for statement, _ in stats.trace] == ["SELECT 2", "SELECT 1", "SELECT 2"]
+    assert all(seconds > 0 for _, seconds in stats.trace)
+    assert outer.trace == []
+
+
+def test_failed_statement_is_not_counted(engine):
+    with engine.connect() as conn, collect() as stats:
+        with pytest.raises(OperationalError):
+            conn.execute(text("SELECT * FROM missing"))
+        conn.execute(text("SELECT 1"))
+
+    assert stats.statements == 1
+
+
+def test_costliest_adds_up_repeated_statements():
+    stats = QueryStats()
+    for _ in range(3):
+        stats.record("SELECT exercise", 0.01)
+    stats.record("SELECT session", 0.02)
+    stats.record("UPDATE session", 0.001)
+
+    assert stats.costliest(2) == [
+        ("SELECT exercise", 3, pytest.approx(0.03)),
+        ("SELECT session", 1, 0.02),
+    ]
+
+
+def test_nested_blocks_count_in_outer_block(engine):
+    with engine.connect() as conn, collect() as outer:
+        conn.execute(text("SELECT 1"))
+        with collect() as inner:
+            conn.execute(text("SELECT 2"))
+
+    assert (outer.statements, inner.statements) == (2, 1)
+
+
+def test_statement_budget_within(engine):
+    with engine.connect() as conn, statement_budget(2) as stats:
+        conn.execute(text("SELECT 1"))
+        conn.execute(text("SELECT 1"))
+
+    assert stats.statements == 2
+
+
+def test_statement_budget_exceeded_lists_statements(engine):
+    with (
+        engine.connect() as conn,
+        pytest.raises(StatementBudgetExceeded) as error,
+        statement_budget(2, "List"),
+    ):
+        conn.execute(text("SELECT 2"))
+        conn.execute(text("SELECT 1"))
+        conn.execute(text("SELECT 1"))
+
+    assert str(error.value) == (
+        "List issued 3 SQL statements, over its budget of 2:\n  1x SELECT 2\n  2x SELECT 1"
+    )
+
+
+@pytest.mark.query_budget(1)
+def test_query_budget_marker(query_db):
+    query_db.execute(text("SELECT 1"))
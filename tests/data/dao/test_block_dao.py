@@ -1,5 +1,11 @@
+from datetime import date
 from unittest.mock import MagicMock
-from src.data.models import Block, BlockType
+
+import pytest
+from sqlalchemy import select
+
+from src.data.dao.block_dao import BlockDAO
+from src.data.models import Block, BlockType, Session, SessionType, User
 
 
 def test_create(block_dao, mock_dbs):
@@ -16,8 +22,8 @@ def test_create(block_dao, mock_dbs):
     result = block_dao.create(block)
 
     mock_db.add.assert_called_once_with(block)
-    mock_db.commit.assert_called_once()
-    mock_db.refresh.assert_called_once_with(block)
+    mock_db.flush.assert_called_once()
+    mock_db.refresh.assert_not_called()
     assert result == block
 
 
@@ -47,8 +53,8 @@ def test_update(block_dao, mock_dbs):
 
     result = block_dao.update(block)
 
-    mock_db.commit.assert_called_once()
-    mock_db.refresh.assert_called_once_with(block)
+    mock_db.flush.assert_called_once()
+    mock_db.refresh.assert_not_called()
     assert result == block
 
 
@@ -59,7 +65,7 @@ def test_delete(block_dao, mock_dbs):
     block_dao.delete(block)
 
     mock_db.delete.assert_called_once_with(block)
-    mock_db.commit.assert_called_once()
+    mock_db.flush.assert_called_once()
 
 def test_count_by_session(block_dao, mock_dbs):
     mock_db = mock_dbs["block"]
@@ -70,3 +76,156 @@ def test_count_by_session(block_dao, mock_dbs):
 
     result = block_dao.count_by_session(session_id=1)
     assert result == 2
+
+def test_shift_positions_parks_then_restores(block_dao, mock_dbs):
+    mock_db = mock_dbs["block"]
+
+    block_dao.shift_positions(1, start=2, delta=1)
+
+    assert mock_db.execute.call_count == 2
+    park, restore = (str(c.args[0]) for c in mock_db.execute.call_args_list)
+    assert park.startswith("UPDATE blocks SET position=")
+    assert "blocks.position >=" in park
+    assert "blocks.position <=" not in park
+    assert "blocks.position <" in restore
+    mock_db.commit.assert_not_called()
+
+
+def test_shift_positions_with_upper_bound(block_dao, mock_dbs):
+    mock_db = mock_dbs["block"]
+
+    block_dao.shift_positions(1, start=2, end=5, delta=-1)
+
+    park = str(mock_db.execute.call_args_list[0].args[0])
+    assert "blocks.position <=" in park
+
+
+def test_move(block_dao, mock_dbs):
+    mock_db = mock_dbs["block"]
+    block = MagicMock(id=3, session_id=1, position=4)
+
+    block_dao.move(block, 1)
+
+    assert mock_db.execute.call_count == 2
+    park = str(mock_db.execute.call_args_list[0].args[0])
+    assert "CASE WHEN (blocks.id =" in park
+    mock_db.commit.assert_not_called()
+
+
+def test_list_ranks(block_dao, mock_dbs):
+    mock_db = mock_dbs["block"]
+    mock_db.execute.return_value = [(1, "V", 0)]
+
+    assert block_dao.list_ranks(1) == [(1, "V", 0)]
+
+
+def test_bulk_update(block_dao, mock_dbs):
+    mock_db = mock_dbs["block"]
+
+    block_dao.bulk_update([])
+    mock_db.execute.assert_not_called()
+
+    block_dao.bulk_update([{"id": 1, "rank": "V"}])
+    mock_db.execute.assert_called_once()
+    assert mock_db.execute.call_args.args[1] == [{"id": 1, "rank": "V"}]
+
+
+def test_set_positions(block_dao, mock_dbs):
+    mock_db = mock_dbs["block"]
+
+    block_dao.set_positions(1, {})
+    mock_db.execute.assert_not_called()
+
+    block_dao.set_positions(1, {4: 0, 5: 1})
+    assert mock_db.execute.call_count == 2
+    park = str(mock_db.execute.call_args_list[0].args[0])
+    assert "blocks.id IN" in park
+    assert "CASE blocks.id" in park
+
+
+def test_insert_many(block_dao, mock_dbs):
+    mock_db = mock_dbs["block"]
+    mock_db.execute.return_value = [(0, 11), (2, 12)]
+    rows = [{"position": 0}, {"position": 2}]
+
+    assert block_dao.insert_many(rows) == {0: 11, 2: 12}
+
+    stmt, params = mock_db.execute.call_args.args
+    assert str(stmt).startswith("INSERT INTO blocks")
+    assert "RETURNING" in str(stmt)
+    assert params == rows
+
+
+def test_insert_many_nothing(block_dao, mock_dbs):
+    assert block_dao.insert_many([]) == {}
+    mock_dbs["block"].execute.assert_not_called()
+
+
+# Real database (tests/query_budget.py): the park / restore of _reposition
+# against uix_session_block_position
+
+def _seed_blocks(db, count=5):
+    db.add(User(id=1, username="athlete"))
+    session = Session(name="Seed", date=date(2026, 1, 5), session_type=SessionType.wod, user_id=1)
+    db.add(session)
+    db.flush()
+    blocks = [
+        Block(block_type=BlockType.amrap, position=position, session_id=session.id)
+        for position in range(count)
+    ]
+    db.add_all(blocks)
+    db.flush()
+    return session.id, [block.id for block in blocks]
+
+
+def _block_ids(db, session_id):
+    rows = db.execute(
+        select(Block.position, Block.id)
+        .where(Block.session_id == session_id)
+        .order_by(Block.position)
+    ).all()
+    assert [position for position, _ in rows] == list(range(len(rows)))
+    return [block_id for _, block_id in rows]
+
+
+@pytest.mark.parametrize("position", [0, 2, 5])
+def test_shift_positions_insert_real_db(query_db, position):
+    session_id, ids = _seed_blocks(query_db)
+    dao = BlockDAO(query_db)
+
+    dao.shift_positions(session_id, start=position, delta=1)
+    block = dao.create(Block(block_type=BlockType.emom, position=position, session_id=session_id))
+
+    assert _block_ids(query_db, session_id) == ids[:position] + [block.id] + ids[position:]
+
+
+@pytest.mark.parametrize("position", [0, 2, 4])
+def test_shift_positions_delete_real_db(query_db, position):
+    session_id, ids = _seed_blocks(query_db)
+    dao = BlockDAO(query_db)
+
+    dao.delete(dao.get_by_id(ids[position]))
+    dao.shift_positions(session_id, start=position + 1, delta=-1)
+
+    assert _block_ids(query_db, session_id) == ids[:position] + ids[position + 1:]
+
+
+@pytest.mark.parametrize(("old", "new"), [(0, 4), (4, 0), (1, 3), (3, 1), (2, 2)])
+def test_move_real_db(query_db, old, new):
+    session_id, ids = _seed_blocks(query_db)
+    dao = BlockDAO(query_db)
+
+    dao.move(dao.get_by_id(ids[old]), new)
+
+    expected = ids.copy()
+    expected.insert(new, expected.pop(old))
+    assert _block_ids(query_db, session_id) == expected
+
+
+def test_set_positions_real_db(query_db):
+    session_id, ids = _seed_blocks(query_db, 3)
+    dao = BlockDAO(query_db)
+
+    dao.set_positions(session_id, {ids[0]: 2, ids[1]: 0, ids[2]: 1})
+
+    assert _block_ids(query_db, session_id) == [ids[1], ids[2], ids[0]]
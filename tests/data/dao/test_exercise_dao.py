@@ -1,5 +1,11 @@
+from datetime import date
 from unittest.mock import MagicMock
-from src.data.models import Exercise, ExerciseType, Block
+
+import pytest
+from sqlalchemy import func, select
+
+from src.data.dao.exercise_dao import ExerciseDAO
+from src.data.models import Block, BlockType, Exercise, ExerciseType, Session, SessionType, User
 
 def test_create(exercise_dao, mock_dbs):
     mock_db = mock_dbs['exercise']
@@ -17,8 +23,8 @@ def test_create(exercise_dao, mock_dbs):
     )
     result = exercise_dao.create(exercise)
     mock_db.add.assert_called_once_with(exercise)
-    mock_db.commit.assert_called_once()
-    mock_db.refresh.assert_called_once_with(exercise)
+    mock_db.flush.assert_called_once()
+    mock_db.refresh.assert_not_called()
     assert result == exercise
 
 def test_get_by_id(exercise_dao, mock_dbs):
@@ -30,28 +36,29 @@ def test_get_by_id(exercise_dao, mock_dbs):
 
 def test_list_by_session(exercise_dao, mock_dbs):
     mock_db = mock_dbs['exercise']
-    mock_scalars = MagicMock()
-    mock_scalars.__iter__.return_value = iter(["e1", "e2"])  # <-- ici
-    mock_db.scalars.return_value = mock_scalars
+    mock_db.execute.return_value = iter(["e1", "e2"])
     result = exercise_dao.list_by_session(1)
-    mock_db.scalars.assert_called_once()
+    mock_db.execute.assert_called_once()
     assert result == ["e1", "e2"]
+    sql = str(mock_db.execute.call_args.args[0])
+    assert "FROM exercises" in sql
 
 def test_list_by_block(exercise_dao, mock_dbs):
     mock_db = mock_dbs['exercise']
-    mock_scalars = MagicMock()
-    mock_scalars.__iter__.return_value = iter(["e1", "e2"])  # <-- ici
-    mock_db.scalars.return_value = mock_scalars
+    mock_db.execute.return_value = iter(["e1", "e2"])
     result = exercise_dao.list_by_block(2)
-    mock_db.scalars.assert_called_once()
+    mock_db.execute.assert_called_once()
     assert result == ["e1", "e2"]
+    sql = str(mock_db.execute.call_args.args[0])
+    assert "FROM exercises" in sql
+    assert "ORDER BY exercises.position_in_block, exercises.rank_in_block" in sql
 
 def test_update(exercise_dao, mock_dbs):
     mock_db = mock_dbs['exercise']
     exercise = MagicMock()
     result = exercise_dao.update(exercise)
-    mock_db.commit.assert_called_once()
-    mock_db.refresh.assert_called_once_with(exercise)
+    mock_db.flush.assert_called_once()
+    mock_db.refresh.assert_not_called()
     assert result == exercise
 
 def test_delete(exercise_dao, mock_dbs):
@@ -59,7 +66,7 @@ def test_delete(exercise_dao, mock_dbs):
     exercise = MagicMock()
     exercise_dao.delete(exercise)
     mock_db.delete.assert_called_once_with(exercise)
-    mock_db.commit.assert_called_once()
+    mock_db.flush.assert_called_once()
 
 def test_validate_block_session_true(exercise_dao, mock_dbs):
     mock_db = mock_dbs['exercise']
@@ -100,3 +107,212 @@ def test_count_by_block(exercise_dao, mock_dbs):
 
 
 
+
+def test_shift_positions(exercise_dao, mock_dbs):
+    mock_db = mock_dbs["exercise"]
+
+    exercise_dao.shift_positions(1, start=3, end=6, delta=-1)
+
+    mock_db.execute.assert_called_once()
+    stmt = str(mock_db.execute.call_args.args[0])
+    assert stmt.startswith("UPDATE exercises SET position=")
+    assert "exercises.block_id IS NULL" in stmt
+    assert "exercises.position <=" in stmt
+    mock_db.commit.assert_not_called()
+
+
+def test_shift_block_positions(exercise_dao, mock_dbs):
+    mock_db = mock_dbs["exercise"]
+
+    exercise_dao.shift_block_positions(2, start=0, delta=1)
+
+    mock_db.execute.assert_called_once()
+    stmt = str(mock_db.execute.call_args.args[0])
+    assert stmt.startswith("UPDATE exercises SET position_in_block=")
+    assert "exercises.position_in_block <=" not in stmt
+
+
+def test_list_free_ranks(exercise_dao, mock_dbs):
+    mock_db = mock_dbs["exercise"]
+    mock_db.execute.return_value = [(1, "V", 0)]
+
+    assert exercise_dao.list_free_ranks(1) == [(1, "V", 0)]
+    assert "exercises.block_id IS NULL" in str(mock_db.execute.call_args.args[0])
+
+
+def test_list_block_ranks(exercise_dao, mock_dbs):
+    mock_db = mock_dbs["exercise"]
+    mock_db.execute.return_value = [(1, "V", 0)]
+
+    assert exercise_dao.list_block_ranks(2) == [(1, "V", 0)]
+    assert "exercises.rank_in_block" in str(mock_db.execute.call_args.args[0])
+
+
+def test_list_block_ranks_by_session(exercise_dao, mock_dbs):
+    mock_db = mock_dbs["exercise"]
+    mock_db.execute.return_value = [(4, 1, "V", 0)]
+
+    assert exercise_dao.list_block_ranks_by_session(2) == [(4, 1, "V", 0)]
+    assert "exercises.block_id IS NOT NULL" in str(mock_db.execute.call_args.args[0])
+
+
+def test_bulk_update(exercise_dao, mock_dbs):
+    mock_db = mock_dbs["exercise"]
+
+    exercise_dao.bulk_update([])
+    mock_db.execute.assert_not_called()
+
+    exercise_dao.bulk_update([{"id": 1, "position": 3}])
+    assert mock_db.execute.call_args.args[1] == [{"id": 1, "position": 3}]
+
+
+def test_insert_many(exercise_dao, mock_dbs):
+    mock_db = mock_dbs["exercise"]
+    mock_db.execute.return_value = [(None, 0, 21), (4, 0, 22)]
+
+    assert exercise_dao.insert_many([{}, {}]) == {(None, 0): 21, (4, 0): 22}
+
+    stmt = mock_db.execute.call_args.args[0]
+    assert str(stmt).startswith("INSERT INTO exercises")
+    assert "coalesce(exercises.position_in_block, exercises.position)" in str(stmt)
+
+
+def test_insert_many_nothing(exercise_dao, mock_dbs):
+    assert exercise_dao.insert_many([]) == {}
+    mock_dbs["exercise"].execute.assert_not_called()
+
+
+def test_analytics_rows(exercise_dao, mock_dbs):
+    mock_db = mock_dbs['exercise']
+    mock_db.execute.return_value = ["row"]
+
+    assert list(exercise_dao.analytics_rows(41, batch_size=100)) == ["row"]
+    stmt = mock_db.execute.call_args.args[0]
+    sql = str(stmt)
+    assert "sessions.user_id" in sql and "sessions.date AS session_date" in sql
+    assert "JOIN sessions ON exercises.session_id = sessions.id" in sql
+    assert "exercises.id > " in sql
+    assert "ORDER BY exercises.id" in sql
+    assert stmt.get_execution_options()["yield_per"] == 100
+
+def test_history(exercise_dao, mock_dbs):
+    mock_db = mock_dbs['exercise']
+    mock_db.execute.return_value = ["row"]
+
+    result = exercise_dao.history(
+        1, ExerciseType.deadlift, date_from=date(2026, 1, 1), date_to=date(2026, 6, 30)
+    )
+
+    assert result == ["row"]
+    sql = str(mock_db.execute.call_args.args[0])
+    assert "JOIN sessions ON exercises.session_id = sessions.id" in sql
+    assert "sessions.user_id = " in sql
+    assert "exercises.exercise_type = " in sql
+    assert "sessions.date >= " in sql and "sessions.date <= " in sql
+    assert "ORDER BY sessions.date, sessions.id, exercises.id" in sql
+
+
+# Real database (tests/query_budget.py)
+
+def _seed_exercises(db, count=5):
+    db.add(User(id=1, username="athlete"))
+    session = Session(name="Seed", date=date(2026, 1, 5), session_type=SessionType.wod, user_id=1)
+    db.add(session)
+    db.flush()
+    block = Block(block_type=BlockType.amrap, position=count, session_id=session.id)
+    db.add(block)
+    db.flush()
+    free = [
+        Exercise(exercise_type=ExerciseType.burpee, session_id=session.id, position=position)
+        for position in range(count)
+    ]
+    in_block = [
+        Exercise(
+            exercise_type=ExerciseType.deadlift,
+            session_id=session.id,
+            block_id=block.id,
+            position_in_block=position,
+        )
+        for position in range(count)
+    ]
+    db.add_all(free + in_block)
+    db.flush()
+    return session.id, block.id, [e.id for e in free], [e.id for e in in_block]
+
+
+def _exercise_ids(db, column, condition):
+    rows = db.execute(select(column, Exercise.id).where(condition).order_by(column)).all()
+    assert [position for position, _ in rows] == list(range(len(rows)))
+    return [exercise_id for _, exercise_id in rows]
+
+
+@pytest.mark.parametrize("position", [0, 2, 5])
+def test_shift_positions_insert_real_db(query_db, position):
+    session_id, _, free_ids, in_block_ids = _seed_exercises(query_db)
+    dao = ExerciseDAO(query_db)
+
+    dao.shift_positions(session_id, start=position, delta=1)
+    exercise = dao.create(
+        Exercise(exercise_type=ExerciseType.box_jump, session_id=session_id, position=position)
+    )
+
+    free = (Exercise.session_id == session_id) & Exercise.block_id.is_(None)
+    assert _exercise_ids(query_db, Exercise.position, free) == (
+        free_ids[:position] + [exercise.id] + free_ids[position:]
+    )
+    # Exercises of the block keep their timeline position (NULL)
+    assert query_db.scalar(
+        select(func.count()).where(Exercise.block_id.is_not(None), Exercise.position.is_not(None))
+    ) == 0
+
+
+@pytest.mark.parametrize("position", [0, 2, 4])
+def test_shift_positions_delete_real_db(query_db, position):
+    session_id, _, free_ids, _ = _seed_exercises(query_db)
+    dao = ExerciseDAO(query_db)
+
+    dao.delete(dao.get_by_id(free_ids[position]))
+    dao.shift_positions(session_id, start=position + 1, delta=-1)
+
+    free = (Exercise.session_id == session_id) & Exercise.block_id.is_(None)
+    assert _exercise_ids(query_db, Exercise.position, free) == (
+        free_ids[:position] + free_ids[position + 1:]
+    )
+
+
+@pytest.mark.parametrize("position", [0, 2, 5])
+def test_shift_block_positions_insert_real_db(query_db, position):
+    session_id, block_id, _, in_block_ids = _seed_exercises(query_db)
+    dao = ExerciseDAO(query_db)
+
+    dao.shift_block_positions(block_id, start=position, delta=1)
+    exercise = dao.create(Exercise(
+        exercise_type=ExerciseType.box_jump,
+        session_id=session_id,
+        block_id=block_id,
+        position_in_block=position,
+    ))
+
+    assert _exercise_ids(query_db, Exercise.position_in_block, Exercise.block_id == block_id) == (
+        in_block_ids[:position] + [exercise.id] + in_block_ids[position:]
+    )
+
+
+@pytest.mark.parametrize(("old", "new"), [(0, 4), (4, 0), (1, 3), (3, 1)])
+def test_shift_block_positions_move_real_db(query_db, old, new):
+    # Move as ExerciseService does: shift the exercises in between, then
+    # place the moved one
+    _, block_id, _, in_block_ids = _seed_exercises(query_db)
+    dao = ExerciseDAO(query_db)
+    exercise = dao.get_by_id(in_block_ids[old])
+
+    if new > old:
+        dao.shift_block_positions(block_id, start=old + 1, end=new, delta=-1)
+    else:
+        dao.shift_block_positions(block_id, start=new, end=old - 1, delta=1)
+    exercise.position_in_block = new
+    dao.update(exercise)
+
+    expected = in_block_ids.copy()
+    expected.insert(new, expected.pop(old))
+    assert _exercise_ids(query_db, Exercise.position_in_block, Exercise.block_id == block_id) == expected
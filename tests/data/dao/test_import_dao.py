@@ -0,0 +1,75 @@
+from datetime import date
+
+from sqlalchemy.dialects import postgresql
+
+from src.data.dao.import_dao import import_sessions
+
+
+def _sql(call):
+    return str(call.args[0].compile(dialect=postgresql.dialect()))
+
+
+def test_location_ids(import_dao,mock_dbs):
+    mock_db = mock_dbs['import']
+    mock_db.scalars.return_value = [1, 4]
+
+    assert import_dao.location_ids() == {1, 4}
+    assert "FROM locations" in str(mock_db.scalars.call_args.args[0])
+
+def test_create_staging(import_dao,mock_dbs):
+    mock_db = mock_dbs['import']
+
+    import_dao.create_staging()
+
+    sql = [_sql(call) for call in mock_db.execute.call_args_list]
+    assert len(sql) == 3
+    assert all("CREATE TEMPORARY TABLE import_" in stmt for stmt in sql)
+    assert all("ON COMMIT DROP" in stmt for stmt in sql)
+    assert not any("SERIAL" in stmt for stmt in sql)
+
+def test_copy(import_dao,mock_dbs):
+    mock_db = mock_dbs['import']
+    cursor = mock_db.connection.return_value.connection.cursor.return_value
+    loaded = []
+    cursor.copy_expert.side_effect = lambda sql, buffer: loaded.append(buffer.read())
+
+    import_dao.copy(import_sessions, [
+        {"key": 0, "name": 'Heavy, "day"', "date": date(2024, 1, 2),
+         "session_type": "wod", "location_id": None, "notes": "Line\nbreak"},
+    ])
+
+    sql = cursor.copy_expert.call_args.args[0]
+    assert sql == (
+        "COPY import_sessions (key, name, date, session_type, location_id, notes) "
+        "FROM STDIN WITH (FORMAT csv)"
+    )
+    assert loaded == ['0,"Heavy, ""day""",2024-01-02,wod,,"Line\nbreak"\r\n']
+    cursor.close.assert_called_once()
+    mock_db.commit.assert_not_called()
+
+def test_merge(import_dao,mock_dbs):
+    mock_db = mock_dbs['import']
+
+    import_dao.merge(3)
+
+    sessions_ids, blocks_ids, sessions, blocks, exercises = [
+        _sql(call) for call in mock_db.execute.call_args_list
+    ]
+    assert sessions_ids.startswith("UPDATE import_sessions SET id=nextval(pg_get_serial_sequence(")
+    assert blocks_ids.startswith("UPDATE import_blocks SET id=nextval(pg_get_serial_sequence(")
+    assert sessions.startswith("INSERT INTO sessions (id, name, date, session_type, user_id")
+    assert "CAST(import_sessions.session_type AS sessiontype)" in sessions
+    assert "CAST(import_blocks.block_type AS blocktype)" in blocks
+    assert "JOIN import_sessions ON import_blocks.session_key = import_sessions.key" in blocks
+    assert "CAST(import_exercises.exercise_type AS exercisetype)" in exercises
+    assert "LEFT OUTER JOIN import_blocks ON import_exercises.block_key = import_blocks.key" in exercises
+    mock_db.commit.assert_not_called()
+
+def test_imported_exercises(import_dao,mock_dbs):
+    mock_db = mock_dbs['import']
+    mock_db.execute.return_value = ["e1", "e2"]
+
+    assert list(import_dao.imported_exercises(batch_size=50)) == ["e1", "e2"]
+    stmt = mock_db.execute.call_args.args[0]
+    assert "JOIN import_sessions ON exercises.session_id = import_sessions.id" in str(stmt)
+    assert stmt.get_execution_options()["yield_per"] == 50
@@ -6,8 +6,8 @@ def test_create(location_dao,mock_dbs):
     location = Location(name="Box A", address="123 Street", location_type=LocationType.crossfit)
     result = location_dao.create(location)
     mock_db.add.assert_called_once_with(location)
-    mock_db.commit.assert_called_once()
-    mock_db.refresh.assert_called_once_with(location)
+    mock_db.flush.assert_called_once()
+    mock_db.refresh.assert_not_called()
     assert result == location
 
 
@@ -32,5 +32,5 @@ def test_delete(location_dao,mock_dbs):
     location = MagicMock()
     location_dao.delete(location)
     mock_db.delete.assert_called_once_with(location)
-    mock_db.commit.assert_called_once()
+    mock_db.flush.assert_called_once()
 
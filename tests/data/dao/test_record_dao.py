@@ -0,0 +1,131 @@
+from unittest.mock import MagicMock
+
+from src.data.models import ExerciseType, PersonalRecord, RecordMetric
+
+def test_create(record_dao,mock_dbs):
+    mock_db = mock_dbs['record']
+    record = PersonalRecord(user_id=1, exercise_type=ExerciseType.deadlift,
+                            metric=RecordMetric.max_weight, qualifier=0, value=100)
+
+    result = record_dao.create(record)
+
+    mock_db.add.assert_called_once_with(record)
+    mock_db.flush.assert_called_once()
+    mock_db.commit.assert_not_called()
+    assert result is record
+
+def test_delete(record_dao,mock_dbs):
+    mock_db = mock_dbs['record']
+    record = PersonalRecord(user_id=1)
+
+    record_dao.delete(record)
+
+    mock_db.delete.assert_called_once_with(record)
+    mock_db.flush.assert_called_once()
+
+def test_delete_all_flushes_once(record_dao,mock_dbs):
+    mock_db = mock_dbs['record']
+    records = [PersonalRecord(user_id=1), PersonalRecord(user_id=1)]
+
+    record_dao.delete_all(records)
+
+    assert [call.args[0] for call in mock_db.delete.call_args_list] == records
+    mock_db.flush.assert_called_once()
+
+def test_list_by_user(record_dao,mock_dbs):
+    mock_db = mock_dbs['record']
+    mock_db.scalars.return_value = ["r1", "r2"]
+
+    result = record_dao.list_by_user(1)
+
+    assert result == ["r1", "r2"]
+    sql = str(mock_db.scalars.call_args.args[0])
+    assert "personal_records.user_id = " in sql
+    assert "ORDER BY personal_records.exercise_type" in sql
+
+def test_list_by_type(record_dao,mock_dbs):
+    mock_db = mock_dbs['record']
+    mock_db.scalars.return_value = ["r1"]
+
+    assert record_dao.list_by_type(1, ExerciseType.deadlift) == ["r1"]
+    sql = str(mock_db.scalars.call_args.args[0])
+    assert "personal_records.exercise_type = " in sql
+
+def test_list_held_by_block(record_dao,mock_dbs):
+    mock_db = mock_dbs['record']
+    mock_db.scalars.return_value = []
+
+    assert record_dao.list_held(block_id=3) == []
+    sql = str(mock_db.scalars.call_args.args[0])
+    assert "JOIN exercises ON personal_records.exercise_id = exercises.id" in sql
+    assert "exercises.block_id = " in sql
+
+def test_best_lowest_qualified_and_excluding(record_dao,mock_dbs):
+    mock_db = mock_dbs['record']
+    mock_db.execute.return_value.first.return_value = (7, 95.0)
+
+    result = record_dao.best(
+        1,
+        ExerciseType.plank,
+        value_column="duration_seconds",
+        qualifier_column="distance_meters",
+        qualifier=0,
+        lowest=True,
+        exclude={"block_id": 3},
+    )
+
+    assert result == (7, 95.0)
+    sql = str(mock_db.execute.call_args.args[0])
+    assert "sessions.user_id = " in sql
+    assert "coalesce(exercises.distance_meters, " in sql
+    # Exercises outside any block must not be excluded along with the block
+    assert "exercises.block_id IS DISTINCT FROM " in sql
+    assert "ORDER BY exercises.duration_seconds ASC, exercises.id" in sql
+    assert "LIMIT" in sql
+
+def test_best_none(record_dao,mock_dbs):
+    mock_db = mock_dbs['record']
+    mock_db.execute.return_value.first.return_value = None
+
+    result = record_dao.best(
+        1,
+        ExerciseType.deadlift,
+        value_column="weight_kg",
+        qualifier_column=None,
+        qualifier=0,
+        lowest=False,
+        exclude={},
+    )
+
+    assert result is None
+    sql = str(mock_db.execute.call_args.args[0])
+    assert "coalesce" not in sql
+    assert "ORDER BY exercises.weight_kg DESC" in sql
+
+def test_best_many_in_one_query(record_dao,mock_dbs):
+    mock_db = mock_dbs['record']
+    mock_db.execute.return_value = [MagicMock(search=1, exercise_id=7, value=95.0)]
+    search = {
+        "user_id": 1,
+        "exercise_type": ExerciseType.deadlift,
+        "qualifier_column": None,
+        "qualifier": 0,
+        "lowest": False,
+        "exclude": {"session_id": 4},
+    }
+
+    result = record_dao.best_many([
+        {**search, "value_column": "weight_kg"},
+        {**search, "value_column": "repetitions"},
+    ])
+
+    assert result == [None, (7, 95.0)]
+    mock_db.execute.assert_called_once()
+    sql = str(mock_db.execute.call_args.args[0])
+    assert sql.count("UNION ALL") == 1
+    assert "ORDER BY exercises.weight_kg DESC" in sql
+    assert "ORDER BY exercises.repetitions DESC" in sql
+
+def test_best_many_nothing(record_dao,mock_dbs):
+    assert record_dao.best_many([]) == []
+    mock_dbs['record'].execute.assert_not_called()
@@ -14,8 +14,8 @@ def test_create(session_dao,mock_dbs):
     )
     result = session_dao.create(session)
     mock_db.add.assert_called_once_with(session)
-    mock_db.commit.assert_called_once()
-    mock_db.refresh.assert_called_once_with(session)
+    mock_db.flush.assert_called_once()
+    mock_db.refresh.assert_not_called()
     assert result == session
 
 def test_get_by_id(session_dao,mock_dbs):
@@ -36,10 +36,27 @@ def test_get_by_date_and_user(session_dao,mock_dbs):
 
 def test_list_by_user(session_dao,mock_dbs):
     mock_db = mock_dbs['session']
-    mock_db.scalars.return_value = ["s1", "s2"]
-    result = session_dao.list_by_user(user_id=1)
-    mock_db.scalars.assert_called_once()
+    mock_db.execute.return_value = ["s1", "s2"]
+    result = session_dao.list_by_user(user_id=1, limit=10)
+    mock_db.execute.assert_called_once()
     assert result == ["s1", "s2"]
+    sql = str(mock_db.execute.call_args.args[0])
+    assert "ORDER BY sessions.date DESC, sessions.id DESC" in sql
+    assert "LIMIT" in sql
+
+def test_list_by_user_after_cursor_and_in_range(session_dao,mock_dbs):
+    mock_db = mock_dbs['session']
+    session_dao.list_by_user(
+        1,
+        limit=10,
+        before=(date(2026, 1, 5), 7),
+        date_from=date(2026, 1, 1),
+        date_to=date(2026, 1, 31),
+    )
+    sql = str(mock_db.execute.call_args.args[0])
+    assert "(sessions.date, sessions.id) < (" in sql
+    assert "sessions.date >= " in sql
+    assert "sessions.date <= " in sql
 
 def test_get_by_location_and_user(session_dao,mock_dbs):
     mock_db = mock_dbs['session']
@@ -55,11 +72,9 @@ def test_get_by_location_and_user(session_dao,mock_dbs):
 def test_update(session_dao,mock_dbs):
     mock_db = mock_dbs['session']
     session = MagicMock()
-    mock_db.commit.return_value = None
-    mock_db.refresh.return_value = None
     result = session_dao.update(session)
-    mock_db.commit.assert_called_once()
-    mock_db.refresh.assert_called_once_with(session)
+    mock_db.flush.assert_called_once()
+    mock_db.refresh.assert_not_called()
     assert result == session
 
 def test_delete(session_dao,mock_dbs):
@@ -67,5 +82,83 @@ def test_delete(session_dao,mock_dbs):
     session = MagicMock()
     session_dao.delete(session)
     mock_db.delete.assert_called_once_with(session)
-    mock_db.commit.assert_called_once()
+    mock_db.flush.assert_called_once()
+
+
+
+def test_get_tree(session_dao, mock_dbs):
+    mock_db = mock_dbs["session"]
+    mock_db.scalars.return_value.one_or_none.return_value = "found"
+
+    assert session_dao.get_tree(3) == "found"
+
+    stmt = mock_db.scalars.call_args.args[0]
+    loaded = {str(option.path) for option in stmt._with_options}
+    assert len(stmt._with_options) == 2
+    assert any("Session.blocks" in path for path in loaded)
+    assert any("Session.exercises" in path for path in loaded)
+
+
+def test_lock(session_dao, mock_dbs):
+    mock_db = mock_dbs["session"]
+
+    mock_db.execute.return_value.scalar.return_value = 3
+
+    assert session_dao.lock(3) is True
+
+    stmt = mock_db.execute.call_args.args[0]
+    assert stmt._for_update_arg is not None
+
+
+def test_get_version(session_dao, mock_dbs):
+    mock_db = mock_dbs["session"]
+    mock_db.execute.return_value.scalar.return_value = 4
+
+    assert session_dao.get_version(3) == 4
+    sql = str(mock_db.execute.call_args.args[0])
+    assert sql.startswith("SELECT sessions.version")
+    assert "WHERE sessions.id = " in sql
+
+
+def test_bump_version(session_dao, mock_dbs):
+    mock_db = mock_dbs["session"]
+
+    session_dao.bump_version(3)
+
+    sql = str(mock_db.execute.call_args.args[0])
+    assert "SET version=(sessions.version + " in sql
+    assert "WHERE sessions.id = " in sql
+
+
+def test_bump_version_drops_the_cached_tree(session_dao, session_tree_cache):
+    session_tree_cache.put(3, 0, b"{}")
+    session_tree_cache.put(4, 0, b"{}")
+
+    session_dao.bump_version(3)
+
+    assert session_tree_cache.get(3, 0) is None
+    assert session_tree_cache.get(4, 0) == b"{}"
+
+
+def test_lock_missing_session(session_dao, mock_dbs):
+    mock_dbs["session"].execute.return_value.scalar.return_value = None
+
+    assert session_dao.lock(3) is False
+
+
+def test_export_rows(session_dao, mock_dbs):
+    mock_db = mock_dbs["session"]
+    mock_db.execute.return_value = ["r1", "r2"]
+
+    rows = session_dao.export_rows(
+        1, date_from=date(2026, 1, 1), date_to=date(2026, 1, 31), batch_size=50,
+    )
 
+    assert list(rows) == ["r1", "r2"]
+    stmt = mock_db.execute.call_args.args[0]
+    assert stmt.get_execution_options()["yield_per"] == 50
+    sql = str(stmt)
+    assert sql.count("UNION ALL") == 2
+    assert sql.count("sessions.date >= ") == 3
+    assert sql.count("sessions.date <= ") == 3
+    assert sql.endswith("ORDER BY anon_1.session_date, anon_1.session_id")
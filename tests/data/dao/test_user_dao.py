@@ -7,15 +7,13 @@ def test_create_user(user_dao,mock_dbs):
 
     # Mock les méthodes SQLAlchemy
     mock_db.add.return_value = None
-    mock_db.commit.return_value = None
-    mock_db.refresh.return_value = None
 
     # Appel de la méthode DAO
     result = user_dao.create(username=username)
 
     mock_db.add.assert_called_once()
-    mock_db.commit.assert_called_once()
-    mock_db.refresh.assert_called_once()
+    mock_db.flush.assert_called_once()
+    mock_db.refresh.assert_not_called()
     assert result.username == username
     assert isinstance(result, User)
 
@@ -0,0 +1,26 @@
+from contextlib import contextmanager
+from pathlib import Path
+from unittest.mock import MagicMock
+
+from src.jobs import export_analytics
+from src.services.analytics_service import AnalyticsExport
+
+
+def test_export_analytics(monkeypatch, capsys):
+    service = MagicMock()
+    service.export.return_value = AnalyticsExport(12, 40, [Path("a"), Path("b")])
+    replicas = []
+
+    @contextmanager
+    def unit_of_work(*, replica=False):
+        replicas.append(replica)
+        yield MagicMock()
+
+    monkeypatch.setattr(export_analytics, "unit_of_work", unit_of_work)
+    monkeypatch.setattr(export_analytics, "AnalyticsService", lambda db=None: service)
+
+    assert export_analytics.main(["out", "--format", "arrow", "--batch-size", "10"]) == 0
+
+    service.export.assert_called_once_with(Path("out"), "arrow", batch_size=10)
+    assert replicas == [True]
+    assert capsys.readouterr().out == "12 exercises exported to 2 files, watermark at exercise 40\n"
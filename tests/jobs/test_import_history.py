@@ -0,0 +1,69 @@
+from contextlib import contextmanager
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.jobs import import_history
+from src.services.import_service import ImportReport
+
+
+@pytest.fixture
+def job(monkeypatch):
+    """
+    Services du job mockés, dans une transaction factice.
+    """
+    mocks = {"db": MagicMock(), "user": MagicMock(), "import": MagicMock()}
+
+    @contextmanager
+    def unit_of_work():
+        yield mocks["db"]
+
+    monkeypatch.setattr(import_history, "unit_of_work", unit_of_work)
+    monkeypatch.setattr(import_history, "UserService", lambda db=None: mocks["user"])
+    monkeypatch.setattr(import_history, "ImportService", lambda db=None: mocks["import"])
+    return mocks
+
+
+def test_import_history(job, tmp_path, capsys):
+    history = tmp_path / "history.csv"
+    history.write_text("session_id\n")
+
+    def run(user_id, lines, import_format, *, dry_run, progress):
+        report = ImportReport(dry_run=dry_run, rows=3, sessions=1, exercises=2)
+        progress(report)
+        return report
+    job["import"].run.side_effect = run
+
+    assert import_history.main(["--user", "3", str(history)]) == 0
+
+    args = job["import"].run.call_args
+    assert args.args[0] == 3 and args.args[2] == "csv"
+    assert args.kwargs["dry_run"] is False
+    out, err = capsys.readouterr()
+    assert out == "1 sessions, 0 blocks and 2 exercises imported, 0 of 3 rows rejected\n"
+    assert err == "3 rows read: 1 sessions, 0 blocks, 2 exercises, 0 rejected\n"
+
+
+def test_import_history_lists_errors(job, tmp_path, capsys, monkeypatch):
+    history = tmp_path / "history.txt"
+    history.write_text("{}\n")
+    report = ImportReport(dry_run=True, rows=5, rejected=3, errors=[(1, "bad"), (4, "worse")])
+    job["import"].run.return_value = report
+
+    assert import_history.main(["--user", "3", "--dry-run", str(history)]) == 1
+
+    assert job["import"].run.call_args.args[2] == "ndjson"
+    out, err = capsys.readouterr()
+    assert "validated, 3 of 5 rows rejected" in out
+    assert err == "line 1: bad\nline 4: worse\n... and 1 more\n"
+
+
+def test_import_history_unknown_user(job, tmp_path, capsys):
+    history = tmp_path / "history.csv"
+    history.write_text("")
+    job["user"].get_user.return_value = None
+
+    assert import_history.main(["--user", "9", str(history)]) == 1
+
+    job["import"].run.assert_not_called()
+    assert capsys.readouterr().err == "User 9 not found\n"
@@ -0,0 +1,80 @@
+"""
+Pytest plugin guarding the number of SQL statements issued by a block of
+code, against a real database (not the mocked DAOs of conftest.py):
+
+    def test_list(query_db, query_budget):
+        with query_budget(2):
+            ExerciseService(query_db).list_by_session(1)
+
+    @pytest.mark.query_budget(2)
+    def test_list(query_db): ...   # the whole test (not its fixtures)
+
+query_db is a session on an in-memory SQLite database holding the schema
+of the models. Set QUERY_BUDGET_DATABASE_URL to run on a throwaway
+PostgreSQL instead: its tables are created and dropped by each test.
+"""
+
+import os
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from src.core.query_stats import instrument, statement_budget
+from src.data.models import Base
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers", "query_budget(limit): fail if the test issues more than limit SQL statements"
+    )
+
+
+@pytest.hookimpl(wrapper=True)
+def pytest_runtest_call(item):
+    marker = item.get_closest_marker("query_budget")
+    if marker is None:
+        return (yield)
+    with statement_budget(marker.args[0], item.name):
+        return (yield)
+
+
+@pytest.fixture
+def query_engine():
+    """
+    Moteur instrumenté sur une base réelle, schéma créé.
+    """
+    url = os.environ.get("QUERY_BUDGET_DATABASE_URL")
+    if url is None:
+        engine = create_engine(
+            "sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False}
+        )
+        event.listen(
+            engine, "connect", lambda conn, _: conn.execute("PRAGMA foreign_keys=ON")
+        )
+    else:
+        engine = create_engine(url)
+    instrument(engine)
+    Base.metadata.create_all(engine)
+    yield engine
+    if url is not None:
+        Base.metadata.drop_all(engine)
+    engine.dispose()
+
+
+@pytest.fixture
+def query_db(query_engine):
+    """
+    Session sur la base réelle, configurée comme SessionLocal.
+    """
+    with sessionmaker(bind=query_engine, autoflush=False)() as db:
+        yield db
+
+
+@pytest.fixture
+def query_budget():
+    """
+    Context manager: statement_budget(limit, name).
+    """
+    return statement_budget
@@ -0,0 +1,103 @@
+from collections import namedtuple
+from datetime import date
+
+import pytest
+
+from src.data.models import ExerciseType, SessionType
+from src.services import analytics_service as analytics_module
+from src.services.analytics_service import AnalyticsService, read_watermark, write_watermark
+
+AnalyticsRow = namedtuple("AnalyticsRow", [
+    "exercise_id", "session_id", "block_id", "user_id", "session_date", "session_type",
+    "location_id", "exercise_type", "weight_kg", "repetitions", "duration_seconds",
+    "distance_meters",
+])
+
+
+def _row(exercise_id, day, exercise_type=ExerciseType.deadlift, **values):
+    return AnalyticsRow(**{
+        **dict.fromkeys(AnalyticsRow._fields),
+        "exercise_id": exercise_id,
+        "session_id": 1,
+        "user_id": 3,
+        "session_date": day,
+        "session_type": SessionType.wod,
+        "exercise_type": exercise_type,
+        **values,
+    })
+
+
+@pytest.fixture
+def analytics_service(mock_services_dao, monkeypatch):
+    """AnalyticsService avec DAO mocké."""
+    mock_dao = mock_services_dao['exercise']
+    monkeypatch.setattr(analytics_module, "ExerciseDAO", lambda db=None: mock_dao)
+    return AnalyticsService(db=mock_dao)
+
+
+def test_watermark(tmp_path):
+    assert read_watermark(tmp_path) == 0
+
+    write_watermark(tmp_path, 42)
+
+    assert read_watermark(tmp_path) == 42
+    assert [path.name for path in tmp_path.iterdir()] == ["_watermark.json"]
+
+
+@pytest.mark.parametrize("file_format", ["parquet", "arrow"])
+def test_export_partitions_by_month(analytics_service, mock_services_dao, tmp_path, file_format):
+    pa = pytest.importorskip("pyarrow")
+    import pyarrow.dataset as ds
+
+    mock_dao = mock_services_dao['exercise']
+    mock_dao.analytics_rows.return_value = iter([
+        _row(5, date(2024, 2, 1), weight_kg=100.0, repetitions=5),
+        _row(6, date(2024, 1, 31), ExerciseType.burpee, block_id=2),
+        _row(7, date(2024, 2, 3), ExerciseType.pull_up, location_id=4),
+    ])
+    write_watermark(tmp_path, 4)
+
+    export = analytics_service.export(tmp_path, file_format, batch_size=2)
+
+    mock_dao.analytics_rows.assert_called_once_with(4, 2)
+    assert export.rows == 3 and export.watermark == 7
+    assert [path.relative_to(tmp_path).as_posix() for path in export.files] == [
+        f"month=2024-01/part-5.{file_format}",
+        f"month=2024-02/part-5.{file_format}",
+    ]
+    assert read_watermark(tmp_path) == 7
+    table = ds.dataset(
+        tmp_path, format="parquet" if file_format == "parquet" else "ipc", partitioning="hive"
+    ).to_table().sort_by("exercise_id")
+    assert table.column("exercise_id").to_pylist() == [5, 6, 7]
+    assert table.column("month").to_pylist() == ["2024-02", "2024-01", "2024-02"]
+    assert pa.types.is_dictionary(table.schema.field("exercise_type").type)
+    assert table.column("exercise_type").to_pylist() == ["Deadlift", "Burpee", "Pull Up"]
+    assert table.column("session_type").to_pylist() == ["WOD"] * 3
+    assert table.column("block_id").to_pylist() == [None, 2, None]
+    assert table.column("session_date").to_pylist()[0] == date(2024, 2, 1)
+
+
+def test_export_nothing_new(analytics_service, mock_services_dao, tmp_path):
+    pytest.importorskip("pyarrow")
+    mock_services_dao['exercise'].analytics_rows.return_value = iter([])
+
+    export = analytics_service.export(tmp_path)
+
+    assert export == (0, 0, [])
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_failed_export_leaves_no_file(analytics_service, mock_services_dao, tmp_path):
+    pytest.importorskip("pyarrow")
+
+    def rows(after_id, batch_size):
+        yield _row(1, date(2024, 1, 1))
+        raise RuntimeError("connection lost")
+    mock_services_dao['exercise'].analytics_rows.side_effect = rows
+
+    with pytest.raises(RuntimeError):
+        analytics_service.export(tmp_path, batch_size=1)
+
+    assert [path for path in tmp_path.rglob("*") if path.is_file()] == []
+    assert read_watermark(tmp_path) == 0
@@ -1,6 +1,6 @@
 import pytest
 from unittest.mock import MagicMock
-from src.data.models import BlockType
+from src.data.models import Block, BlockType
 
 
 # -------------------------
@@ -14,18 +14,10 @@ def test_create_block_with_position(block_service, mock_services_dao):
 
     session_service.get_session.return_value = MagicMock(id=1)
 
-    existing_block = MagicMock(id=1, position=0)
-    free_exercise = MagicMock(id=2, position=1, block_id=None)
-
-    block_dao.list_by_session.return_value = [existing_block]
-    exercise_dao.list_by_session.return_value = [free_exercise]
-
     # ⬇️ AJOUTS
     block_dao.count_by_session.return_value = 1
     exercise_dao.count_free_by_session.return_value = 1
 
-    block_dao.update.side_effect = lambda b: b
-    exercise_dao.update.side_effect = lambda e: e
     block_dao.create.side_effect = lambda b: b
 
     result = block_service.create_block(
@@ -34,14 +26,45 @@ def test_create_block_with_position(block_service, mock_services_dao):
         position=1,
     )
 
-    assert free_exercise.position == 2
-    exercise_dao.update.assert_called_once_with(free_exercise)
+    block_dao.shift_positions.assert_called_once_with(1, start=1, delta=1)
+    exercise_dao.shift_positions.assert_called_once_with(1, start=1, delta=1)
+    session_service.bump_version.assert_called_once_with(1)
+    block_dao.update.assert_not_called()
+    exercise_dao.update.assert_not_called()
 
     assert result.position == 1
     assert result.session_id == 1
     assert result.block_type == BlockType.amrap
 
 
+def test_create_block_at_end_does_not_shift(block_service, mock_services_dao):
+    block_dao = mock_services_dao["block"]
+    exercise_dao = mock_services_dao["block_exercise"]
+    session_service = mock_services_dao["block_session"]
+
+    session_service.get_session.return_value = MagicMock(id=1)
+    block_dao.count_by_session.return_value = 2
+    exercise_dao.count_free_by_session.return_value = 1
+    block_dao.create.side_effect = lambda b: b
+
+    result = block_service.create_block(block_type=BlockType.emom, session_id=1)
+
+    block_dao.shift_positions.assert_not_called()
+    exercise_dao.shift_positions.assert_not_called()
+    assert result.position == 3
+
+
+def test_create_block_invalid_position(block_service, mock_services_dao):
+    block_dao = mock_services_dao["block"]
+    exercise_dao = mock_services_dao["block_exercise"]
+    mock_services_dao["block_session"].get_session.return_value = MagicMock(id=1)
+    block_dao.count_by_session.return_value = 0
+    exercise_dao.count_free_by_session.return_value = 0
+
+    with pytest.raises(ValueError, match="Invalid block position"):
+        block_service.create_block(block_type=BlockType.emom, session_id=1, position=3)
+
+
 def test_create_block_invalid_session(block_service, mock_services_dao):
     session_service = mock_services_dao["block_session"]
     session_service.get_session.return_value = None
@@ -65,29 +88,53 @@ def test_update_block_position_with_shifts(block_service, mock_services_dao):
     block_dao.get_by_id.return_value = block
     block_dao.update.side_effect = lambda b: b
 
-    other_block = MagicMock(id=2, position=1)
-    free_exercise = MagicMock(id=3, position=2, block_id=None)
-
-    block_dao.list_by_session.return_value = [block, other_block]
-    exercise_dao.list_by_session.return_value = [free_exercise]
-
     # ⬇️ AJOUTS
     block_dao.count_by_session.return_value = 2
     exercise_dao.count_free_by_session.return_value = 1
 
-    exercise_dao.update.side_effect = lambda e: e
-
     result = block_service.update_block(
         block_id=1,
         position=1,
     )
 
+    block_dao.move.assert_called_once_with(block, 1)
+    exercise_dao.shift_positions.assert_called_once_with(1, start=0, end=1, delta=-1)
     assert block.position == 1
-    assert other_block.position == 0
-    assert free_exercise.position == 2
 
     assert result == block
 
+
+def test_update_block_position_backward(block_service, mock_services_dao):
+    block_dao = mock_services_dao["block"]
+    exercise_dao = mock_services_dao["block_exercise"]
+
+    block = MagicMock(id=1, session_id=1, position=2)
+    block_dao.get_by_id.return_value = block
+    block_dao.update.side_effect = lambda b: b
+    block_dao.count_by_session.return_value = 2
+    exercise_dao.count_free_by_session.return_value = 1
+
+    block_service.update_block(1, position=0, notes="First", duration=10, block_type=BlockType.emom)
+
+    block_dao.move.assert_called_once_with(block, 0)
+    exercise_dao.shift_positions.assert_called_once_with(1, start=0, end=2, delta=1)
+    assert block.notes == "First"
+    assert block.duration == 10
+    assert block.block_type == BlockType.emom
+
+
+def test_update_block_invalid_position(block_service, mock_services_dao):
+    block_dao = mock_services_dao["block"]
+    exercise_dao = mock_services_dao["block_exercise"]
+
+    block_dao.get_by_id.return_value = MagicMock(id=1, session_id=1, position=0)
+    block_dao.count_by_session.return_value = 1
+    exercise_dao.count_free_by_session.return_value = 0
+
+    with pytest.raises(ValueError, match="Invalid block position"):
+        block_service.update_block(1, position=4)
+    block_dao.move.assert_not_called()
+
 def test_update_block_not_found(block_service, mock_services_dao):
     block_dao = mock_services_dao["block"]
     block_dao.get_by_id.return_value = None
@@ -133,15 +180,13 @@ def test_delete_block_with_shifts(block_service, mock_services_dao):
     block = MagicMock(id=1, session_id=1, position=1)
     block_dao.get_by_id.return_value = block
 
-    remaining_block = MagicMock(position=2)
-    free_exercise = MagicMock(position=3, block_id=None)
-
-    block_dao.list_by_session.return_value = [remaining_block]
-    exercise_dao.list_by_session.return_value = [free_exercise]
-
     block_service.delete_block(1)
-    assert remaining_block.position == 1
-    assert free_exercise.position == 2
+
+    mock_services_dao["block_records"].forget.assert_called_once_with(block_id=1)
+    block_dao.delete.assert_called_once_with(block)
+    block_dao.shift_positions.assert_called_once_with(1, start=2, delta=-1)
+    exercise_dao.shift_positions.assert_called_once_with(1, start=2, delta=-1)
+    mock_services_dao["block_session"].bump_version.assert_called_once_with(1)
 
 
 
@@ -151,4 +196,143 @@ def test_delete_block_not_found(block_service, mock_services_dao):
 
     with pytest.raises(ValueError, match="Block not found"):
         block_service.delete_block(99)
+    mock_services_dao["block_session"].bump_version.assert_not_called()
+
+
+def test_session_version(block_service, mock_services_dao):
+    mock_services_dao["block_session"].session_version.return_value = 4
+
+    assert block_service.session_version(1) == 4
+    mock_services_dao["block_session"].session_version.assert_called_once_with(1)
+
+
+
+# -------------------------
+# Fractional ordering mode
+# -------------------------
+
+def _saved(block_id):
+    def create(block):
+        block.id = block_id
+        return block
+    return create
+
+
+def test_create_block_fractional_writes_only_the_new_block(
+    block_service, mock_services_dao, fractional_ordering
+):
+    block_dao = mock_services_dao["block"]
+    mock_services_dao["block_session"].get_session.return_value = MagicMock(id=1)
+    mock_services_dao["ordering_block"].list_ranks.return_value = [(1, "A", 0)]
+    mock_services_dao["ordering_exercise"].list_free_ranks.return_value = [(2, "C", 1)]
+    block_dao.create.side_effect = _saved(3)
+
+    result = block_service.create_block(
+        block_type=BlockType.amrap,
+        session_id=1,
+        position=1,
+    )
+
+    created = block_dao.create.call_args.args[0]
+    assert created.rank == "B"
+    assert created.position == 2
+    block_dao.shift_positions.assert_not_called()
+    mock_services_dao["block_exercise"].shift_positions.assert_not_called()
+    assert result.id == 3
+    assert result.position == 1
+
+
+def test_create_block_fractional_appends_by_default(
+    block_service, mock_services_dao, fractional_ordering
+):
+    mock_services_dao["block_session"].get_session.return_value = MagicMock(id=1)
+    mock_services_dao["ordering_block"].list_ranks.return_value = []
+    mock_services_dao["ordering_exercise"].list_free_ranks.return_value = []
+    mock_services_dao["block"].create.side_effect = _saved(3)
+
+    result = block_service.create_block(block_type=BlockType.emom, session_id=1)
+
+    assert result.position == 0
+
+
+def test_create_block_fractional_invalid_position(
+    block_service, mock_services_dao, fractional_ordering
+):
+    mock_services_dao["block_session"].get_session.return_value = MagicMock(id=1)
+    mock_services_dao["ordering_block"].list_ranks.return_value = []
+    mock_services_dao["ordering_exercise"].list_free_ranks.return_value = []
+
+    with pytest.raises(ValueError, match="Invalid block position"):
+        block_service.create_block(block_type=BlockType.emom, session_id=1, position=2)
+
+
+def test_update_block_fractional_move(block_service, mock_services_dao, fractional_ordering):
+    block_dao = mock_services_dao["block"]
+    block = Block(id=1, block_type=BlockType.amrap, position=0, rank="A", session_id=1)
+    block_dao.get_by_id.return_value = block
+    block_dao.update.side_effect = lambda b: b
+    mock_services_dao["ordering_block"].list_ranks.return_value = [(1, "A", 0), (2, "C", 1)]
+    mock_services_dao["ordering_exercise"].list_free_ranks.return_value = [(5, "E", 2)]
+
+    result = block_service.update_block(1, position=1)
+
+    assert "C" < block.rank < "E"
+    assert block.position == 0
+    block_dao.move.assert_not_called()
+    assert result.position == 1
+
+
+def test_update_block_fractional_without_move(block_service, mock_services_dao, fractional_ordering):
+    block_dao = mock_services_dao["block"]
+    block = Block(id=2, block_type=BlockType.amrap, position=1, rank="C", session_id=1)
+    block_dao.get_by_id.return_value = block
+    block_dao.update.side_effect = lambda b: b
+    mock_services_dao["ordering_block"].list_ranks.return_value = [(1, "A", 0), (2, "C", 1)]
+    mock_services_dao["ordering_exercise"].list_free_ranks.return_value = []
+
+    result = block_service.update_block(2, notes="Heavy")
+
+    assert block.rank == "C"
+    assert result.position == 1
+    assert result.notes == "Heavy"
+
+
+def test_update_block_fractional_invalid_position(block_service, mock_services_dao, fractional_ordering):
+    block_dao = mock_services_dao["block"]
+    block_dao.get_by_id.return_value = Block(
+        id=1, block_type=BlockType.amrap, position=0, rank="A", session_id=1
+    )
+    mock_services_dao["ordering_block"].list_ranks.return_value = [(1, "A", 0)]
+    mock_services_dao["ordering_exercise"].list_free_ranks.return_value = []
+
+    with pytest.raises(ValueError, match="Invalid block position"):
+        block_service.update_block(1, position=3)
+
+
+def test_get_and_list_blocks_fractional_derive_positions(
+    block_service, mock_services_dao, fractional_ordering
+):
+    block_dao = mock_services_dao["block"]
+    first = Block(id=1, block_type=BlockType.amrap, position=7, rank="M", session_id=1)
+    second = Block(id=2, block_type=BlockType.emom, position=3, rank="B", session_id=1)
+    block_dao.get_by_id.return_value = first
+    block_dao.list_by_session.return_value = [first, second]
+    mock_services_dao["ordering_block"].list_ranks.return_value = [(1, "M", 7), (2, "B", 3)]
+    mock_services_dao["ordering_exercise"].list_free_ranks.return_value = [(9, "D", 0)]
+
+    assert block_service.get_block(1).position == 2
+    listed = block_service.list_blocks_by_session(1)
+    assert [(b.id, b.position) for b in listed] == [(2, 0), (1, 2)]
+
+
+def test_delete_block_fractional_leaves_others_untouched(
+    block_service, mock_services_dao, fractional_ordering
+):
+    block_dao = mock_services_dao["block"]
+    block = MagicMock(id=1, session_id=1, position=1)
+    block_dao.get_by_id.return_value = block
+
+    block_service.delete_block(1)
 
+    block_dao.delete.assert_called_once_with(block)
+    block_dao.shift_positions.assert_not_called()
@@ -1,6 +1,58 @@
+import pytest
+from collections import namedtuple
+from datetime import date
 from unittest.mock import MagicMock
 from src.data.models import Exercise, ExerciseType
 
+# -------------------------
+# HISTORY
+# -------------------------
+def _history_row(day, weight_kg=None, repetitions=None):
+    return MagicMock(
+        date=date(2026, 1, day),
+        weight_kg=weight_kg,
+        repetitions=repetitions,
+        duration_seconds=None,
+        distance_meters=None,
+        _mapping={
+            "date": date(2026, 1, day),
+            "weight_kg": weight_kg,
+            "repetitions": repetitions,
+            "duration_seconds": None,
+            "distance_meters": None,
+        },
+    )
+
+def test_get_history(exercise_service, mock_services_dao):
+    mock_dao = mock_services_dao['exercise']
+    mock_dao.history.return_value = [_history_row(1, 60, 5), _history_row(3, 70, 3)]
+
+    points = exercise_service.get_history(1, ExerciseType.deadlift, max_points=2)
+
+    mock_dao.history.assert_called_once_with(
+        1, ExerciseType.deadlift, date_from=None, date_to=None
+    )
+    assert [(p.date.day, p.weight_kg, p.repetitions, p.count) for p in points] == [
+        (1, 60, 5, 1), (3, 70, 3, 1),
+    ]
+
+def test_get_history_downsampled(exercise_service, mock_services_dao):
+    mock_dao = mock_services_dao['exercise']
+    mock_dao.history.return_value = [
+        _history_row(1, 60, 5),
+        _history_row(2, 80),
+        _history_row(9, 100, 1),
+        _history_row(10, 90, 2),
+    ]
+
+    points = exercise_service.get_history(1, ExerciseType.deadlift, max_points=3)
+
+    # Three buckets of 10 / 3 days, the middle one being empty
+    assert [(p.date.day, p.weight_kg, p.repetitions, p.count) for p in points] == [
+        (1, 70, 5, 2), (9, 95, 1.5, 2),
+    ]
+
+
 # -------------------------
 # CREATE
 # -------------------------
@@ -31,6 +83,10 @@ def test_create_exercise_free(exercise_service, mock_services_dao):
 
     mock_dao.create.assert_called_once()
     assert result == result_exercise
+    mock_services_dao['exercise_records'].exercise_saved.assert_called_once_with(
+        result_exercise, new=True
+    )
+    mock_services_dao['exercise_session'].bump_version.assert_called_once_with(1)
 
 
 def test_create_exercise_in_block(exercise_service, mock_services_dao):
@@ -58,6 +114,59 @@ def test_create_exercise_in_block(exercise_service, mock_services_dao):
     assert result.block_id == block_id
     assert result.position_in_block == 0
 
+
+def test_create_exercise_free_in_the_middle_shifts(exercise_service, mock_services_dao):
+    mock_dao = mock_services_dao['exercise']
+    mock_block_dao = mock_services_dao['exercise_block']
+
+    mock_block_dao.count_by_session.return_value = 2
+    mock_dao.count_free_by_session.return_value = 2
+    mock_dao.create.side_effect = lambda ex: ex
+
+    result = exercise_service.create_exercise(
+        exercise_type=ExerciseType.burpee,
+        session_id=1,
+        position=1,
+    )
+
+    mock_dao.shift_positions.assert_called_once_with(1, start=1, delta=1)
+    mock_block_dao.shift_positions.assert_called_once_with(1, start=1, delta=1)
+    mock_dao.update.assert_not_called()
+    assert result.position == 1
+
+
+def test_create_exercise_in_block_at_position_shifts(exercise_service, mock_services_dao):
+    mock_dao = mock_services_dao['exercise']
+
+    mock_dao.validate_block_session.return_value = True
+    mock_dao.count_by_block.return_value = 3
+    mock_dao.create.side_effect = lambda ex: ex
+
+    result = exercise_service.create_exercise(
+        exercise_type=ExerciseType.pull_up,
+        session_id=1,
+        block_id=4,
+        position_in_block=0,
+    )
+
+    mock_dao.shift_block_positions.assert_called_once_with(4, start=0, delta=1)
+    assert result.position_in_block == 0
+
+
+def test_create_exercise_invalid_position(exercise_service, mock_services_dao):
+    mock_dao = mock_services_dao['exercise']
+    mock_block_dao = mock_services_dao['exercise_block']
+    mock_block_dao.count_by_session.return_value = 0
+    mock_dao.count_free_by_session.return_value = 0
+
+    with pytest.raises(ValueError, match="Invalid exercise position"):
+        exercise_service.create_exercise(
+            exercise_type=ExerciseType.burpee,
+            session_id=1,
+            position=5,
+        )
+    mock_dao.shift_positions.assert_not_called()
+
 # -------------------------
 # UPDATE
 # -------------------------
@@ -70,26 +179,23 @@ def test_update_exercise_free_position(exercise_service, mock_services_dao):
     )
     mock_dao.get_by_id.return_value = exercise
 
-    other_ex = MagicMock(id=2, block_id=None, position=1)
-    block = MagicMock(id=3, position=2)
-
-    mock_dao.list_by_session.return_value = [exercise, other_ex]
-    mock_block_dao.list_by_session.return_value = [block]
-
     # ⬇️ important
     mock_block_dao.count_by_session.return_value = 1
     mock_dao.count_free_by_session.return_value = 2
 
     mock_dao.update.side_effect = lambda ex: ex
-    mock_block_dao.update.side_effect = lambda b: b
 
     result = exercise_service.update_exercise(
         exercise_id=1,
         position=2
     )
 
+    mock_dao.shift_positions.assert_called_once_with(1, start=1, end=2, delta=-1)
+    mock_block_dao.shift_positions.assert_called_once_with(1, start=1, end=2, delta=-1)
     assert exercise.position == 2
     assert result == exercise
+    # Moving an exercise does not change its records
+    mock_services_dao['exercise_records'].exercise_saved.assert_not_called()
 
 
 
@@ -100,10 +206,8 @@ def test_update_exercise_in_block_position(exercise_service, mock_services_dao):
     exercise = MagicMock(
         id=1, session_id=1, block_id=block_id, position_in_block=0, position=None
     )
-    ex_in_block = MagicMock(id=2, block_id=block_id, position_in_block=1)
 
     mock_dao.get_by_id.return_value = exercise
-    mock_dao.list_by_block.return_value = [exercise, ex_in_block]
 
     # ⬇️ important
     mock_dao.count_by_block.return_value = 2
@@ -115,10 +219,27 @@ def test_update_exercise_in_block_position(exercise_service, mock_services_dao):
         position_in_block=1
     )
 
+    mock_dao.shift_block_positions.assert_called_once_with(block_id, start=1, end=1, delta=-1)
     assert exercise.position_in_block == 1
     assert result.id == 1
 
 
+def test_update_exercise_in_block_moves_backward(exercise_service, mock_services_dao):
+    mock_dao = mock_services_dao['exercise']
+
+    exercise = MagicMock(
+        id=1, session_id=1, block_id=7, position_in_block=3, position=None
+    )
+    mock_dao.get_by_id.return_value = exercise
+    mock_dao.count_by_block.return_value = 4
+    mock_dao.update.side_effect = lambda ex: ex
+
+    exercise_service.update_exercise(exercise_id=1, position_in_block=0)
+
+    mock_dao.shift_block_positions.assert_called_once_with(7, start=0, end=2, delta=1)
+    assert exercise.position_in_block == 0
+
+
 # -------------------------
 # DELETE
 # -------------------------
@@ -131,16 +252,14 @@ def test_delete_exercise_free(exercise_service, mock_services_dao):
 
     exercise = MagicMock(id=1, session_id=1, block_id=None, position=1)
     mock_dao.get_by_id.return_value = exercise
-    # Other free exercise and block
-    other_ex = MagicMock(id=2, block_id=None, position=2)
-    block = MagicMock(id=3, position=3)
-    mock_dao.list_by_session.return_value = [exercise, other_ex]
-    mock_block_dao.list_by_session.return_value = [block]
 
     exercise_service.delete_exercise(exercise_id=1)
     mock_dao.delete.assert_called_once_with(exercise)
-    # Check that other_ex.position is decremented
-    assert other_ex.position == 1
+    mock_services_dao['exercise_records'].forget.assert_called_once_with(id=1)
+    mock_services_dao['exercise_session'].bump_version.assert_called_once_with(1)
+    # Items after the deleted one are shifted down by set-based updates
+    mock_dao.shift_positions.assert_called_once_with(1, start=2, delta=-1)
+    mock_block_dao.shift_positions.assert_called_once_with(1, start=2, delta=-1)
 
 def test_delete_exercise_in_block(exercise_service, mock_services_dao):
     """
@@ -150,18 +269,366 @@ def test_delete_exercise_in_block(exercise_service, mock_services_dao):
 
     block_id = 1
     exercise = MagicMock(id=1, session_id=1, block_id=block_id, position_in_block=0)
-    ex_in_block = MagicMock(id=2, session_id=1, block_id=block_id, position_in_block=1)
-    ex_other_block = MagicMock(id=3, session_id=1, block_id=2, position_in_block=0)
-    ex_free = MagicMock(id=4, session_id=1, block_id=None, position=0)
 
     mock_dao.get_by_id.return_value = exercise
-    mock_dao.list_by_session.return_value = [exercise, ex_in_block, ex_other_block, ex_free]
 
     exercise_service.delete_exercise(exercise_id=1)
     mock_dao.delete.assert_called_once_with(exercise)
-    # Only ex_in_block should be decremented
-    assert ex_in_block.position_in_block == 0
-    # Free exercises or exercises in other blocks should remain unchanged
-    assert ex_free.position == 0
-    assert ex_other_block.position_in_block == 0
+    # Only the exercises of the same block are shifted
+    mock_dao.shift_block_positions.assert_called_once_with(block_id, start=1, delta=-1)
+    mock_dao.shift_positions.assert_not_called()
+
+
+def test_update_exercise_metrics_updates_records(exercise_service, mock_services_dao):
+    mock_dao = mock_services_dao['exercise']
+    exercise = MagicMock(id=1, session_id=1, block_id=None, position=0, weight_kg=60)
+    mock_dao.get_by_id.return_value = exercise
+    mock_dao.update.side_effect = lambda ex: ex
+
+    exercise_service.update_exercise(exercise_id=1, weight_kg=80)
+
+    assert exercise.weight_kg == 80
+    mock_services_dao['exercise_records'].exercise_saved.assert_called_once_with(exercise)
+
+
+# -------------------------
+# MOVE
+# -------------------------
+def test_move_free_exercise_into_block(exercise_service, mock_services_dao):
+    """
+    Close the gap in the timeline, open one in the target block, keep the exercise
+    """
+    mock_dao = mock_services_dao['exercise']
+    mock_block_dao = mock_services_dao['exercise_block']
+    exercise = Exercise(
+        id=1, exercise_type=ExerciseType.burpee, session_id=1, position=2,
+        repetitions=15, rank="B",
+    )
+    mock_dao.get_by_id.return_value = exercise
+    mock_dao.validate_block_session.return_value = True
+    mock_dao.count_by_block.return_value = 3
+    mock_dao.update.side_effect = lambda ex: ex
+
+    result = exercise_service.move_exercise(1, block_id=4, position=1)
+
+    mock_dao.shift_positions.assert_called_once_with(1, start=3, delta=-1)
+    mock_block_dao.shift_positions.assert_called_once_with(1, start=3, delta=-1)
+    mock_dao.shift_block_positions.assert_called_once_with(4, start=1, delta=1)
+    mock_dao.delete.assert_not_called()
+    mock_dao.create.assert_not_called()
+    mock_services_dao['exercise_session'].bump_version.assert_called_once_with(1)
+    assert result is exercise
+    assert (result.id, result.repetitions) == (1, 15)
+    assert (result.block_id, result.position, result.position_in_block) == (4, None, 1)
+    assert result.rank is None
+
+
+def test_move_exercise_out_of_block_appends_to_timeline(exercise_service, mock_services_dao):
+    mock_dao = mock_services_dao['exercise']
+    mock_block_dao = mock_services_dao['exercise_block']
+    exercise = Exercise(
+        id=1, exercise_type=ExerciseType.burpee, session_id=1, block_id=4, position_in_block=0,
+    )
+    mock_dao.get_by_id.return_value = exercise
+    mock_block_dao.count_by_session.return_value = 2
+    mock_dao.count_free_by_session.return_value = 1
+    mock_dao.update.side_effect = lambda ex: ex
+
+    result = exercise_service.move_exercise(1, block_id=None)
+
+    mock_dao.shift_block_positions.assert_called_once_with(4, start=1, delta=-1)
+    mock_dao.shift_positions.assert_called_once_with(1, start=3, delta=1)
+    mock_block_dao.shift_positions.assert_called_once_with(1, start=3, delta=1)
+    assert (result.block_id, result.position, result.position_in_block) == (None, 3, None)
+
+
+def test_move_exercise_within_its_block_is_a_reorder(exercise_service, mock_services_dao):
+    mock_dao = mock_services_dao['exercise']
+    exercise = Exercise(
+        id=1, exercise_type=ExerciseType.burpee, session_id=1, block_id=4, position_in_block=0,
+    )
+    mock_dao.get_by_id.return_value = exercise
+    mock_dao.validate_block_session.return_value = True
+    mock_dao.count_by_block.return_value = 3
+    mock_dao.update.side_effect = lambda ex: ex
+
+    result = exercise_service.move_exercise(1, block_id=4)
 
+    mock_dao.shift_block_positions.assert_called_once_with(4, start=1, end=2, delta=-1)
+    assert result.position_in_block == 2
+    # Bumped once, by the update
+    mock_services_dao['exercise_session'].bump_version.assert_called_once_with(1)
+
+
+@pytest.mark.parametrize(
+    "block_id, message",
+    [
+        (4, "Invalid position_in_block"),
+        (None, "Invalid exercise position"),
+    ],
+)
+def test_move_exercise_invalid_position(exercise_service, mock_services_dao, block_id, message):
+    mock_dao = mock_services_dao['exercise']
+    mock_dao.get_by_id.return_value = Exercise(
+        id=1, exercise_type=ExerciseType.burpee, session_id=1, block_id=2, position_in_block=0,
+    )
+    mock_dao.validate_block_session.return_value = True
+    mock_dao.count_by_block.return_value = 1
+    mock_services_dao['exercise_block'].count_by_session.return_value = 1
+    mock_dao.count_free_by_session.return_value = 0
+
+    with pytest.raises(ValueError, match=message):
+        exercise_service.move_exercise(1, block_id=block_id, position=5)
+
+    mock_dao.shift_block_positions.assert_not_called()
+    mock_dao.shift_positions.assert_not_called()
+
+
+def test_move_exercise_to_block_of_another_session(exercise_service, mock_services_dao):
+    mock_dao = mock_services_dao['exercise']
+    mock_dao.get_by_id.return_value = MagicMock(id=1, session_id=1, block_id=None)
+    mock_dao.validate_block_session.return_value = False
+
+    with pytest.raises(ValueError, match="Block does not belong to the same session"):
+        exercise_service.move_exercise(1, block_id=9)
+
+
+def test_move_exercise_not_found(exercise_service, mock_services_dao):
+    mock_services_dao['exercise'].get_by_id.return_value = None
+
+    with pytest.raises(ValueError, match="Exercise not found"):
+        exercise_service.move_exercise(1, block_id=None)
+
+
+# -------------------------
+# Fractional ordering mode
+# -------------------------
+def _saved(exercise_id):
+    def create(exercise):
+        exercise.id = exercise_id
+        return exercise
+    return create
+
+
+def test_create_free_exercise_fractional(exercise_service, mock_services_dao, fractional_ordering):
+    mock_dao = mock_services_dao['exercise']
+    mock_services_dao['ordering_block'].list_ranks.return_value = [(1, "A", 0)]
+    mock_services_dao['ordering_exercise'].list_free_ranks.return_value = [(2, "C", 1)]
+    mock_dao.create.side_effect = _saved(3)
+
+    result = exercise_service.create_exercise(
+        exercise_type=ExerciseType.burpee,
+        session_id=1,
+        position=1,
+    )
+
+    created = mock_dao.create.call_args.args[0]
+    assert created.rank == "B"
+    assert created.position == 2
+    mock_dao.shift_positions.assert_not_called()
+    assert result.position == 1
+
+
+def test_create_exercise_in_block_fractional(exercise_service, mock_services_dao, fractional_ordering):
+    mock_dao = mock_services_dao['exercise']
+    mock_dao.validate_block_session.return_value = True
+    mock_services_dao['ordering_exercise'].list_block_ranks.return_value = [(4, "V", 0)]
+    mock_dao.create.side_effect = _saved(5)
+
+    result = exercise_service.create_exercise(
+        exercise_type=ExerciseType.pull_up,
+        session_id=1,
+        block_id=2,
+    )
+
+    created = mock_dao.create.call_args.args[0]
+    assert created.rank_in_block > "V"
+    assert created.position_in_block == 1
+    mock_dao.shift_block_positions.assert_not_called()
+    assert result.position_in_block == 1
+
+
+@pytest.mark.parametrize(
+    "kwargs, message",
+    [
+        ({"position": 3}, "Invalid exercise position"),
+        ({"block_id": 2, "position_in_block": 3}, "Invalid position_in_block"),
+    ],
+)
+def test_create_exercise_fractional_invalid_position(
+    exercise_service, mock_services_dao, fractional_ordering, kwargs, message
+):
+    mock_services_dao['exercise'].validate_block_session.return_value = True
+    mock_services_dao['ordering_block'].list_ranks.return_value = []
+    mock_services_dao['ordering_exercise'].list_free_ranks.return_value = []
+    mock_services_dao['ordering_exercise'].list_block_ranks.return_value = []
+
+    with pytest.raises(ValueError, match=message):
+        exercise_service.create_exercise(
+            exercise_type=ExerciseType.burpee, session_id=1, **kwargs
+        )
+
+
+def test_update_free_exercise_fractional_move(exercise_service, mock_services_dao, fractional_ordering):
+    mock_dao = mock_services_dao['exercise']
+    exercise = Exercise(id=1, exercise_type=ExerciseType.burpee, session_id=1, position=0, rank="A")
+    mock_dao.get_by_id.return_value = exercise
+    mock_dao.update.side_effect = lambda ex: ex
+    mock_services_dao['ordering_block'].list_ranks.return_value = [(1, "C", 1)]
+    mock_services_dao['ordering_exercise'].list_free_ranks.return_value = [(1, "A", 0)]
+
+    result = exercise_service.update_exercise(1, position=1, repetitions=12)
+
+    assert exercise.rank > "C"
+    assert exercise.position == 0
+    mock_dao.shift_positions.assert_not_called()
+    assert result.position == 1
+    assert result.repetitions == 12
+
+
+def test_update_exercise_in_block_fractional_move(exercise_service, mock_services_dao, fractional_ordering):
+    mock_dao = mock_services_dao['exercise']
+    exercise = Exercise(
+        id=1, exercise_type=ExerciseType.burpee, session_id=1, block_id=2,
+        position_in_block=0, rank_in_block="A",
+    )
+    mock_dao.get_by_id.return_value = exercise
+    mock_dao.update.side_effect = lambda ex: ex
+    mock_services_dao['ordering_exercise'].list_block_ranks.return_value = [
+        (1, "A", 0), (4, "C", 1), (5, "E", 2),
+    ]
+
+    result = exercise_service.update_exercise(1, position_in_block=1)
+
+    assert "C" < exercise.rank_in_block < "E"
+    assert result.position_in_block == 1
+
+
+def test_update_exercise_fractional_without_move(exercise_service, mock_services_dao, fractional_ordering):
+    mock_dao = mock_services_dao['exercise']
+    exercise = Exercise(
+        id=1, exercise_type=ExerciseType.burpee, session_id=1, block_id=2,
+        position_in_block=0, rank_in_block="C",
+    )
+    mock_dao.get_by_id.return_value = exercise
+    mock_dao.update.side_effect = lambda ex: ex
+    mock_services_dao['ordering_exercise'].list_block_ranks.return_value = [(4, "A", 0), (1, "C", 1)]
+
+    result = exercise_service.update_exercise(1, notes="Strict")
+
+    assert exercise.rank_in_block == "C"
+    assert result.position_in_block == 1
+
+
+@pytest.mark.parametrize(
+    "block_id, kwargs, message",
+    [
+        (None, {"position": 5}, "Invalid exercise position"),
+        (2, {"position_in_block": 5}, "Invalid position_in_block"),
+    ],
+)
+def test_update_exercise_fractional_invalid_position(
+    exercise_service, mock_services_dao, fractional_ordering, block_id, kwargs, message
+):
+    mock_dao = mock_services_dao['exercise']
+    mock_dao.get_by_id.return_value = Exercise(
+        id=1, exercise_type=ExerciseType.burpee, session_id=1, block_id=block_id,
+    )
+    mock_services_dao['ordering_block'].list_ranks.return_value = []
+    mock_services_dao['ordering_exercise'].list_free_ranks.return_value = [(1, "A", 0)]
+    mock_services_dao['ordering_exercise'].list_block_ranks.return_value = [(1, "A", 0)]
+
+    with pytest.raises(ValueError, match=message):
+        exercise_service.update_exercise(1, **kwargs)
+
+
+ExerciseRow = namedtuple("ExerciseRow", Exercise.__table__.columns.keys())
+
+
+def _row(exercise):
+    # Core row of an exercise, as returned by the ExerciseDAO list queries
+    return ExerciseRow(*(getattr(exercise, key) for key in ExerciseRow._fields))
+
+
+def test_session_version(exercise_service, mock_services_dao):
+    mock_services_dao['exercise_session'].get_version.return_value = 7
+
+    assert exercise_service.session_version(1) == 7
+    mock_services_dao['exercise_session'].get_version.assert_called_once_with(1)
+
+
+def test_list_by_session_returns_rows_as_dicts(exercise_service, mock_services_dao):
+    mock_dao = mock_services_dao['exercise']
+    exercise = Exercise(id=1, exercise_type=ExerciseType.burpee, session_id=1, position=0)
+    mock_dao.list_by_session.return_value = [_row(exercise)]
+    mock_dao.list_by_block.return_value = [_row(exercise)]
+
+    assert exercise_service.list_by_session(1) == [_row(exercise)._asdict()]
+    assert exercise_service.list_by_block(2) == [_row(exercise)._asdict()]
+
+
+def test_read_exercises_fractional_derive_positions(
+    exercise_service, mock_services_dao, fractional_ordering
+):
+    mock_dao = mock_services_dao['exercise']
+    free = Exercise(id=1, exercise_type=ExerciseType.burpee, session_id=1, position=9, rank="M")
+    second = Exercise(
+        id=2, exercise_type=ExerciseType.pull_up, session_id=1, block_id=3,
+        position_in_block=4, rank_in_block="Q",
+    )
+    first = Exercise(
+        id=4, exercise_type=ExerciseType.pull_up, session_id=1, block_id=3,
+        position_in_block=8, rank_in_block="B",
+    )
+    mock_dao.list_by_session.return_value = [_row(free), _row(second), _row(first)]
+    mock_dao.list_by_block.return_value = [_row(second), _row(first)]
+    mock_services_dao['ordering_block'].list_ranks.return_value = [(3, "C", 2)]
+    mock_services_dao['ordering_exercise'].list_free_ranks.return_value = [(1, "M", 9)]
+    mock_services_dao['ordering_exercise'].list_block_ranks.return_value = [(2, "Q", 4), (4, "B", 8)]
+
+    listed = exercise_service.list_by_session(1)
+    assert [(e["id"], e["position"], e["position_in_block"]) for e in listed] == [
+        (4, None, 0), (2, None, 1), (1, 1, None),
+    ]
+    assert [e["id"] for e in exercise_service.list_by_block(3)] == [4, 2]
+
+    mock_dao.get_by_id.return_value = free
+    assert exercise_service.get_exercise(1).position == 1
+    mock_dao.get_by_id.return_value = second
+    assert exercise_service.get_exercise(2).position_in_block == 1
+
+
+def test_delete_exercise_fractional_leaves_others_untouched(
+    exercise_service, mock_services_dao, fractional_ordering
+):
+    mock_dao = mock_services_dao['exercise']
+    exercise = MagicMock(id=1, session_id=1, block_id=None, position=1)
+    mock_dao.get_by_id.return_value = exercise
+
+    exercise_service.delete_exercise(1)
+
+    mock_dao.delete.assert_called_once_with(exercise)
+    mock_dao.shift_positions.assert_not_called()
+
+
+def test_move_exercise_fractional_only_writes_the_exercise(
+    exercise_service, mock_services_dao, fractional_ordering
+):
+    mock_dao = mock_services_dao['exercise']
+    exercise = Exercise(
+        id=1, exercise_type=ExerciseType.burpee, session_id=1, block_id=2,
+        position_in_block=0, rank_in_block="A",
+    )
+    mock_dao.get_by_id.return_value = exercise
+    mock_dao.update.side_effect = lambda ex: ex
+    mock_services_dao['ordering_block'].list_ranks.return_value = [(2, "C", 0)]
+    mock_services_dao['ordering_exercise'].list_free_ranks.return_value = [(7, "E", 1)]
+
+    result = exercise_service.move_exercise(1, block_id=None, position=1)
+
+    assert "C" < exercise.rank < "E"
+    assert exercise.rank_in_block is None
+    assert exercise.position == 2
+    mock_dao.shift_positions.assert_not_called()
+    mock_dao.shift_block_positions.assert_not_called()
+    assert (result.block_id, result.position) == (None, 1)
@@ -0,0 +1,91 @@
+import csv
+import io
+import json
+from collections import namedtuple
+from datetime import date
+
+from src.data.models import BlockType, ExerciseType, SessionType
+from src.services import export_service as export_module
+
+ExportRow = namedtuple("ExportRow", [
+    *export_module.EXPORT_COLUMNS,
+    "item_rank", "item_position", "rank_in_block", "position_in_block",
+])
+
+
+def _row(session_id, **values):
+    # A row of SessionDAO.export_rows: None for the columns not given
+    return ExportRow(**{
+        **dict.fromkeys(ExportRow._fields),
+        "session_id": session_id,
+        "session_name": f"Session {session_id}",
+        "session_date": date(2026, 1, session_id),
+        "session_type": SessionType.wod,
+        **values,
+    })
+
+
+def _history():
+    """
+    Session 1: free exercise 7, then block 2 holding exercises 8 and 9
+    (rank keys give the opposite order). Session 2 is empty.
+    """
+    return [
+        _row(1, block_id=2, block_type=BlockType.amrap, exercise_id=9,
+             exercise_type=ExerciseType.burpee, item_rank="B", item_position=1,
+             rank_in_block="A", position_in_block=1),
+        _row(1, exercise_id=7, exercise_type=ExerciseType.deadlift, weight_kg=100.0,
+             item_rank="C", item_position=0),
+        _row(1, block_id=2, block_type=BlockType.amrap, exercise_id=8,
+             exercise_type=ExerciseType.pull_up, exercise_notes='Strict, "slow"',
+             item_rank="B", item_position=1, rank_in_block="B", position_in_block=0),
+        _row(2),
+    ]
+
+
+def test_export_ndjson_in_timeline_order(export_service, mock_services_dao):
+    mock_dao = mock_services_dao['export_session']
+    mock_dao.export_rows.return_value = iter(_history())
+
+    chunks = list(export_service.export(1, "ndjson", date_from=date(2026, 1, 1)))
+
+    mock_dao.export_rows.assert_called_once_with(1, date_from=date(2026, 1, 1), date_to=None)
+    lines = [json.loads(line) for line in b"".join(chunks).splitlines()]
+    assert [(line["session_id"], line["exercise_id"]) for line in lines] == [
+        (1, 7), (1, 8), (1, 9), (2, None),
+    ]
+    assert lines[0]["exercise_type"] == "Deadlift"
+    assert lines[0]["session_date"] == "2026-01-01"
+    assert list(lines[0]) == export_module.EXPORT_COLUMNS
+
+
+def test_export_fractional_order(export_service, mock_services_dao, fractional_ordering):
+    mock_services_dao['export_session'].export_rows.return_value = iter(_history())
+
+    lines = [json.loads(line) for line in b"".join(export_service.export(1, "ndjson")).splitlines()]
+
+    assert [line["exercise_id"] for line in lines] == [9, 8, 7, None]
+
+
+def test_export_csv(export_service, mock_services_dao):
+    mock_services_dao['export_session'].export_rows.return_value = iter(_history())
+
+    text = b"".join(export_service.export(1, "csv")).decode()
+
+    rows = list(csv.DictReader(io.StringIO(text)))
+    assert list(rows[0]) == export_module.EXPORT_COLUMNS
+    assert [row["exercise_id"] for row in rows] == ["7", "8", "9", ""]
+    assert rows[1]["exercise_notes"] == 'Strict, "slow"'
+    assert rows[1]["block_type"] == "AMRAP"
+    assert rows[3]["block_id"] == ""
+
+
+def test_export_is_chunked(export_service, mock_services_dao, monkeypatch):
+    monkeypatch.setattr(export_module, "CHUNK_ROWS", 2)
+    mock_services_dao['export_session'].export_rows.return_value = iter(_history())
+
+    assert len(list(export_service.export(1, "ndjson"))) == 2
+    mock_services_dao['export_session'].export_rows.return_value = iter([])
+    assert list(export_service.export(1, "csv")) == [
+        (",".join(export_module.EXPORT_COLUMNS) + "\r\n").encode()
+    ]
@@ -0,0 +1,150 @@
+import json
+from datetime import date
+
+from src.data.dao.import_dao import import_blocks, import_exercises, import_sessions
+from src.services import import_service as import_module
+
+HEADER = ",".join(import_module.EXPORT_COLUMNS) + "\n"
+
+
+def _csv(*rows):
+    # CSV lines of the export format, rows giving the columns that are set
+    lines = [HEADER]
+    for row in rows:
+        lines.append(",".join(str(row.get(column, "")) for column in import_module.EXPORT_COLUMNS) + "\n")
+    return lines
+
+
+def _session(session_id, **values):
+    return {
+        "session_id": session_id,
+        "session_name": f"Session {session_id}",
+        "session_date": f"2024-01-0{session_id}",
+        "session_type": "WOD",
+        **values,
+    }
+
+
+def _staged(mock_dao, table):
+    # Rows loaded by COPY into a staging table, in order
+    return [
+        row
+        for call in mock_dao.copy.call_args_list if call.args[0] is table
+        for row in call.args[1]
+    ]
+
+
+def test_import_csv_assigns_positions(import_service, mock_services_dao):
+    mock_dao = mock_services_dao['import']
+    mock_records = mock_services_dao['import_records']
+    mock_dao.location_ids.return_value = {4}
+    imported = iter(["e1", "e2"])
+    mock_dao.imported_exercises.return_value = imported
+    lines = _csv(
+        _session(1, location_id=4, exercise_id=99, exercise_type="Deadlift", weight_kg=100),
+        _session(1, block_id=7, block_type="AMRAP", block_duration=12, exercise_type="Burpee"),
+        _session(1, block_id=7, block_type="AMRAP", exercise_type="Pull Up", repetitions=10),
+        _session(1, exercise_type="Plank", duration_seconds=60, exercise_notes="Hold"),
+        _session(1, block_id=8, block_type="EMOM"),
+        _session(2, session_notes="Rest day"),
+    )
+
+    report = import_service.run(3, lines, "csv")
+
+    assert (report.rows, report.sessions, report.blocks, report.exercises) == (6, 2, 2, 4)
+    assert report.rejected == 0 and report.errors == []
+    mock_dao.create_staging.assert_called_once()
+    assert _staged(mock_dao, import_sessions) == [
+        {"key": 0, "name": "Session 1", "date": date(2024, 1, 1),
+         "session_type": "wod", "location_id": 4, "notes": None},
+        {"key": 1, "name": "Session 2", "date": date(2024, 1, 2),
+         "session_type": "wod", "location_id": None, "notes": "Rest day"},
+    ]
+    blocks = _staged(mock_dao, import_blocks)
+    assert [(b["key"], b["session_key"], b["block_type"], b["position"], b["duration"]) for b in blocks] == [
+        (0, 0, "amrap", 1, 12.0),
+        (1, 0, "emom", 3, None),
+    ]
+    exercises = _staged(mock_dao, import_exercises)
+    assert [
+        (e["exercise_type"], e["block_key"], e["position"], e["position_in_block"])
+        for e in exercises
+    ] == [
+        ("deadlift", None, 0, None),
+        ("burpee", 0, None, 0),
+        ("pull_up", 0, None, 1),
+        ("plank", None, 2, None),
+    ]
+    assert exercises[2]["repetitions"] == 10
+    assert exercises[3]["notes"] == "Hold"
+    mock_dao.merge.assert_called_once_with(3)
+    # Streamed, not loaded in a list first
+    mock_records.exercises_created.assert_called_once_with(3, imported)
+
+
+def test_import_ndjson_reports_row_errors(import_service, mock_services_dao):
+    mock_dao = mock_services_dao['import']
+    mock_dao.location_ids.return_value = {4}
+    lines = [
+        json.dumps(_session(1, exercise_type="Deadlift")) + "\n",
+        json.dumps(_session(1, exercise_type="Moonwalk")) + "\n",
+        "{not json\n",
+        "\n",
+        "[1, 2]\n",
+        json.dumps(_session(2, location_id=5)) + "\n",
+        json.dumps(_session(2, block_id=3)) + "\n",
+        json.dumps(_session(2, weight_kg=80)) + "\n",
+        json.dumps(_session(2, session_name="x" * 101)) + "\n",
+        json.dumps({"session_id": 2}) + "\n",
+        json.dumps(_session(2)) + "\n",
+        json.dumps(_session(1, exercise_type="Burpee")) + "\n",
+    ]
+
+    report = import_service.run(3, lines, "ndjson")
+
+    assert (report.rows, report.sessions, report.exercises, report.rejected) == (11, 2, 1, 9)
+    messages = dict(report.errors)
+    assert messages[2].startswith("exercise_type: Input should be")
+    assert messages[3].startswith("Expecting property name")
+    assert messages[5] == "not a JSON object"
+    assert messages[6] == "location_id: unknown location 5"
+    assert messages[7] == "block_id and block_type: both or neither must be given"
+    assert messages[8] == "exercise_type: required with exercise columns"
+    assert messages[9] == "session_name: longer than 100 characters"
+    assert "session_name: Input should be a valid string" in messages[10]
+    assert messages[12] == "session_id: rows of session 1 must be contiguous"
+    assert len(_staged(mock_dao, import_exercises)) == 1
+
+
+def test_import_dry_run_only_validates(import_service, mock_services_dao):
+    mock_dao = mock_services_dao['import']
+    mock_dao.location_ids.return_value = set()
+
+    report = import_service.run(3, _csv(_session(1, exercise_type="Deadlift")), "csv", dry_run=True)
+
+    assert report.dry_run and (report.sessions, report.exercises) == (1, 1)
+    mock_dao.create_staging.assert_not_called()
+    mock_dao.copy.assert_not_called()
+    mock_dao.merge.assert_not_called()
+    mock_services_dao['import_records'].exercises_created.assert_not_called()
+
+
+def test_import_copies_in_batches_and_reports_progress(import_service, mock_services_dao, monkeypatch):
+    monkeypatch.setattr(import_module, "COPY_ROWS", 2)
+    monkeypatch.setattr(import_module, "PROGRESS_ROWS", 2)
+    monkeypatch.setattr(import_module, "MAX_ERRORS", 1)
+    mock_dao = mock_services_dao['import']
+    mock_dao.location_ids.return_value = set()
+    lines = _csv(
+        *[_session(1, exercise_type="Deadlift") for _ in range(5)],
+        _session(1, session_type="Yoga"),
+        _session(1, session_type="Yoga"),
+    )
+    seen = []
+
+    report = import_service.run(3, lines, "csv", progress=lambda r: seen.append(r.rows))
+
+    assert [len(call.args[1]) for call in mock_dao.copy.call_args_list if call.args[0] is import_exercises] == [2, 2, 1]
+    assert seen == [2, 4, 6, 7]
+    assert report.rejected == 2
+    assert [line for line, _ in report.errors] == [7]
@@ -0,0 +1,381 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import select
+
+from src.core.settings import settings
+from src.data.models import Block, BlockType, Exercise, ExerciseType, Session, SessionType, User
+from src.services.block_service import BlockService
+from src.services.exercise_service import ExerciseService
+from src.services.ordering_service import OrderedItem, OrderingService
+
+
+def test_is_enabled(fractional_ordering):
+    assert OrderingService.is_enabled() is True
+
+
+def test_is_disabled_by_default():
+    assert OrderingService.is_enabled() is False
+
+
+# -------------------------
+# Read
+# -------------------------
+
+def test_timeline_merges_blocks_and_free_exercises(ordering_service, mock_services_dao):
+    mock_services_dao['ordering_block'].list_ranks.return_value = [(1, "V", 5), (2, "B", 6)]
+    mock_services_dao['ordering_exercise'].list_free_ranks.return_value = [(7, "K", 0)]
+
+    timeline = ordering_service.timeline(1)
+
+    assert [(item.kind, item.id) for item in timeline] == [
+        ("block", 2),
+        ("exercise", 7),
+        ("block", 1),
+    ]
+
+
+def test_timeline_without_ranks_uses_positions(ordering_service, mock_services_dao):
+    mock_services_dao['ordering_block'].list_ranks.return_value = [(1, None, 2), (2, None, 0)]
+    mock_services_dao['ordering_exercise'].list_free_ranks.return_value = [(7, None, 1)]
+
+    timeline = ordering_service.timeline(1)
+
+    assert [item.id for item in timeline] == [2, 7, 1]
+
+
+def test_ordered_merges_unranked_rows_by_position():
+    items = [
+        OrderedItem("block", 1, "V", 7),
+        OrderedItem("exercise", 2, None, 0),
+        OrderedItem("block", 3, "B", 9),
+        OrderedItem("block", 4, None, 3),
+        OrderedItem("exercise", 5, "K", 8),
+    ]
+
+    assert [item.id for item in OrderingService.ordered(items)] == [2, 3, 5, 4, 1]
+
+
+def test_ordered_appends_unranked_rows_past_the_end():
+    items = [OrderedItem("block", 1, None, 5), OrderedItem("block", 2, "V", 0)]
+
+    assert [item.id for item in OrderingService.ordered(items)] == [2, 1]
+
+
+def test_position_of(ordering_service):
+    items = [OrderedItem("block", 1, "A", 0), OrderedItem("exercise", 1, "B", 1)]
+
+    assert ordering_service.position_of(items, "exercise", 1) == 1
+    with pytest.raises(ValueError, match="Block 3 is not in this timeline"):
+        ordering_service.position_of(items, "block", 3)
+
+
+# -------------------------
+# Write
+# -------------------------
+
+def test_ranked_timeline_backfills_missing_ranks(ordering_service, mock_services_dao):
+    block_dao = mock_services_dao['ordering_block']
+    exercise_dao = mock_services_dao['ordering_exercise']
+    block_dao.list_ranks.return_value = [(1, None, 0)]
+    exercise_dao.list_free_ranks.return_value = [(7, None, 1)]
+
+    timeline = ordering_service.ranked_timeline(3)
+
+    mock_services_dao['ordering_session'].lock.assert_called_once_with(3)
+    first, second = (item.rank for item in timeline)
+    assert first < second
+    block_dao.bulk_update.assert_called_once_with([{"id": 1, "rank": first}])
+    exercise_dao.bulk_update.assert_called_once_with([{"id": 7, "rank": second}])
+
+
+def test_ranked_timeline_keeps_existing_ranks(ordering_service, mock_services_dao):
+    mock_services_dao['ordering_block'].list_ranks.return_value = [(1, "V", 0)]
+    mock_services_dao['ordering_exercise'].list_free_ranks.return_value = []
+
+    timeline = ordering_service.ranked_timeline(3)
+
+    assert timeline == [OrderedItem("block", 1, "V", 0)]
+    mock_services_dao['ordering_block'].bulk_update.assert_not_called()
+
+
+def test_ranked_block_items_backfills_missing_ranks(ordering_service, mock_services_dao):
+    exercise_dao = mock_services_dao['ordering_exercise']
+    exercise_dao.list_block_ranks.return_value = [(4, None, 1), (5, None, 0)]
+
+    items = ordering_service.ranked_block_items(3, 9)
+
+    exercise_dao.list_block_ranks.assert_called_once_with(9)
+    assert [item.id for item in items] == [5, 4]
+    exercise_dao.bulk_update.assert_called_once_with([
+        {"id": 5, "rank_in_block": items[0].rank},
+        {"id": 4, "rank_in_block": items[1].rank},
+    ])
+
+
+def test_rank_at(ordering_service):
+    items = [OrderedItem("block", 1, "A", 0), OrderedItem("block", 2, "C", 1)]
+
+    assert ordering_service.rank_at(1, items, 1) == "B"
+    assert ordering_service.rank_at(1, items, 0) < "A"
+    assert ordering_service.rank_at(1, items, 2) > "C"
+    assert ordering_service.pending_rebalance == set()
+
+
+def test_rank_at_schedules_rebalance_of_long_keys(ordering_service):
+    items = [OrderedItem("block", 1, "A" * 20, 0), OrderedItem("block", 2, "A" * 20 + "1", 1)]
+
+    ordering_service.rank_at(4, items, 1)
+
+    assert ordering_service.pending_rebalance == {4}
+
+
+def test_rank_at_refuses_too_long_keys(ordering_service):
+    items = [OrderedItem("block", 1, "A" * 64, 0), OrderedItem("block", 2, "A" * 64 + "1", 1)]
+
+    with pytest.raises(ValueError, match="Too many moves"):
+        ordering_service.rank_at(4, items, 1)
+
+
+def test_spare_position(ordering_service):
+    assert ordering_service.spare_position([]) == 0
+    assert ordering_service.spare_position([
+        OrderedItem("block", 1, "A", 3),
+        OrderedItem("exercise", 2, "B", None),
+    ]) == 4
+
+
+def test_rebalance_session(ordering_service, mock_services_dao):
+    block_dao = mock_services_dao['ordering_block']
+    exercise_dao = mock_services_dao['ordering_exercise']
+    block_dao.list_ranks.return_value = [(1, "VVVVVVVVVVVVVVVVVVV", 8)]
+    exercise_dao.list_free_ranks.return_value = [(7, "A", 3)]
+    exercise_dao.list_block_ranks.return_value = [(4, "x", 12)]
+
+    ordering_service.rebalance_session(2)
+
+    mock_services_dao['ordering_session'].lock.assert_called_once_with(2)
+    mock_services_dao['ordering_session'].bump_version.assert_called_once_with(2)
+    block_dao.set_positions.assert_called_once_with(2, {1: 1})
+    exercise_dao.list_block_ranks.assert_called_once_with(1)
+    updates = [call.args[0] for call in exercise_dao.bulk_update.call_args_list]
+    assert {"id": 7, "position": 0} in updates[1]
+    assert updates[-1] == [{"id": 4, "position_in_block": 0}]
+    new_block_rank = block_dao.bulk_update.call_args_list[0].args[0][0]["rank"]
+    assert len(new_block_rank) == 1
+
+
+# -------------------------
+# Reorder
+# -------------------------
+
+@pytest.fixture
+def session_layout(mock_services_dao):
+    """Session 3: block 1, free exercise 7, block 2; block 1 holds exercises 4 and 5."""
+    mock_services_dao['ordering_block'].list_ranks.return_value = [(1, "A", 0), (2, "C", 2)]
+    mock_services_dao['ordering_exercise'].list_free_ranks.return_value = [(7, "B", 1)]
+    mock_services_dao['ordering_exercise'].list_block_ranks_by_session.return_value = [
+        (1, 4, "A", 0),
+        (1, 5, "B", 1),
+    ]
+    return mock_services_dao
+
+
+def test_reorder_session_dense_writes_only_moved_rows(ordering_service, session_layout):
+    block_dao = session_layout['ordering_block']
+    exercise_dao = session_layout['ordering_exercise']
+
+    layout = ordering_service.reorder_session(
+        3,
+        [("exercise", 7), ("block", 1), ("block", 2)],
+        {1: [5, 4]},
+    )
+
+    session_layout['ordering_session'].lock.assert_called_once_with(3)
+    block_dao.set_positions.assert_called_once_with(3, {1: 1})
+    # Moved rows lose their rank (see ordered)
+    block_dao.bulk_update.assert_called_once_with([{"id": 1, "rank": None}])
+    assert [call.args[0] for call in exercise_dao.bulk_update.call_args_list] == [
+        [{"id": 7, "position": 0, "rank": None}],
+        [
+            {"id": 5, "position_in_block": 0, "rank_in_block": None},
+            {"id": 4, "position_in_block": 1, "rank_in_block": None},
+        ],
+    ]
+    assert layout.model_dump() == {
+        "timeline": [
+            {"kind": "exercise", "id": 7},
+            {"kind": "block", "id": 1},
+            {"kind": "block", "id": 2},
+        ],
+        "blocks": [
+            {"block_id": 1, "exercise_ids": [5, 4]},
+            {"block_id": 2, "exercise_ids": []},
+        ],
+    }
+
+
+def test_reorder_session_fractional_rekeys_only_moved_rows(
+    ordering_service, session_layout, fractional_ordering
+):
+    block_dao = session_layout['ordering_block']
+    exercise_dao = session_layout['ordering_exercise']
+
+    layout = ordering_service.reorder_session(
+        3,
+        [("exercise", 7), ("block", 2), ("block", 1)],
+        {},
+    )
+
+    block_dao.set_positions.assert_not_called()
+    [new_rank] = [value["rank"] for value in block_dao.bulk_update.call_args.args[0]]
+    assert block_dao.bulk_update.call_args.args[0] == [{"id": 1, "rank": new_rank}]
+    assert new_rank > "C"
+    exercise_dao.bulk_update.assert_called_once_with([])
+    assert [item.id for item in layout.timeline] == [7, 2, 1]
+    session_layout['ordering_session'].bump_version.assert_called_once_with(3)
+    assert ordering_service.pending_rebalance == set()
+
+
+def test_reorder_session_fractional_renumbers_when_keys_get_too_long(
+    ordering_service, mock_services_dao, fractional_ordering
+):
+    block_dao = mock_services_dao['ordering_block']
+    block_dao.list_ranks.return_value = [
+        (1, "A" * 64, 0),
+        (2, "A" * 64 + "1", 1),
+        (3, "A" * 64 + "2", 2),
+    ]
+    mock_services_dao['ordering_exercise'].list_free_ranks.return_value = []
+    mock_services_dao['ordering_exercise'].list_block_ranks_by_session.return_value = []
+
+    ordering_service.reorder_session(3, [("block", 1), ("block", 3), ("block", 2)], {})
+
+    values = block_dao.bulk_update.call_args.args[0]
+    assert [value["id"] for value in values] == [1, 3, 2]
+    assert all(len(value["rank"]) == 1 for value in values)
+
+
+def test_reorder_session_missing_session(ordering_service, mock_services_dao):
+    mock_services_dao['ordering_session'].lock.return_value = False
+
+    with pytest.raises(ValueError, match="Session not found"):
+        ordering_service.reorder_session(3, [], {})
+    mock_services_dao['ordering_session'].bump_version.assert_not_called()
+
+
+@pytest.mark.parametrize("timeline, blocks, message", [
+    (
+        [("block", 1), ("block", 1), ("exercise", 7), ("block", 2)],
+        {},
+        "Duplicate item in the timeline ordering",
+    ),
+    (
+        [("block", 1), ("exercise", 7), ("block", 2), ("exercise", 4)],
+        {},
+        "Exercise 4 is not in this timeline",
+    ),
+    (
+        [("block", 1), ("block", 2)],
+        {},
+        "Exercise 7 is missing from the timeline ordering",
+    ),
+    (
+        [("block", 1), ("exercise", 7), ("block", 2)],
+        {9: []},
+        "Block 9 is not in this session",
+    ),
+    (
+        [("block", 1), ("exercise", 7), ("block", 2)],
+        {1: [4]},
+        "Exercise 5 is missing from the block 1 ordering",
+    ),
+])
+def test_reorder_session_rejects_invalid_orderings(
+    ordering_service, session_layout, timeline, blocks, message
+):
+    with pytest.raises(ValueError, match=message):
+        ordering_service.reorder_session(3, timeline, blocks)
+
+    session_layout['ordering_block'].set_positions.assert_not_called()
+    session_layout['ordering_exercise'].bulk_update.assert_not_called()
+
+
+# -------------------------
+# Switching modes (real database)
+# -------------------------
+
+def _timeline_ids(db, session_id):
+    return [(item.kind, item.id) for item in OrderingService(db).timeline(session_id)]
+
+
+def _seed_session(db):
+    db.add(User(id=1, username="athlete"))
+    session = Session(name="Seed", date=date(2026, 1, 5), session_type=SessionType.wod, user_id=1)
+    db.add(session)
+    db.flush()
+    return session.id
+
+
+def test_rows_written_in_dense_mode_keep_their_place_in_fractional_mode(
+    query_db, monkeypatch, session_tree_cache
+):
+    session_id = _seed_session(query_db)
+    blocks, exercises = BlockService(query_db), ExerciseService(query_db)
+
+    monkeypatch.setattr(settings, "ordering_mode", "fractional")
+    block1 = blocks.create_block(block_type=BlockType.amrap, session_id=session_id)
+    exercise1 = exercises.create_exercise(exercise_type=ExerciseType.burpee, session_id=session_id)
+
+    monkeypatch.setattr(settings, "ordering_mode", "dense")
+    block2 = blocks.create_block(block_type=BlockType.emom, session_id=session_id)
+    exercise2 = exercises.create_exercise(exercise_type=ExerciseType.burpee, session_id=session_id)
+    # Moved in dense mode: its rank is stale
+    blocks.update_block(block2.id, position=1)
+
+    monkeypatch.setattr(settings, "ordering_mode", "fractional")
+    assert _timeline_ids(query_db, session_id) == [
+        ("block", block1.id),
+        ("block", block2.id),
+        ("exercise", exercise1.id),
+        ("exercise", exercise2.id),
+    ]
+    # Writers rank the timeline in that order
+    blocks.update_block(block1.id, position=3)
+    assert _timeline_ids(query_db, session_id) == [
+        ("block", block2.id),
+        ("exercise", exercise1.id),
+        ("exercise", exercise2.id),
+        ("block", block1.id),
+    ]
+
+
+def test_rows_written_in_fractional_mode_keep_their_place_in_dense_mode(
+    query_db, monkeypatch, session_tree_cache
+):
+    session_id = _seed_session(query_db)
+    blocks, exercises = BlockService(query_db), ExerciseService(query_db)
+
+    block1 = blocks.create_block(block_type=BlockType.amrap, session_id=session_id)
+    exercise1 = exercises.create_exercise(exercise_type=ExerciseType.burpee, session_id=session_id)
+
+    monkeypatch.setattr(settings, "ordering_mode", "fractional")
+    block2 = blocks.create_block(block_type=BlockType.emom, session_id=session_id, position=0)
+    exercises.update_exercise(exercise1.id, position=1)
+    # Renumbered before switching back (see settings.ordering_mode)
+    OrderingService(query_db).rebalance_session(session_id)
+
+    monkeypatch.setattr(settings, "ordering_mode", "dense")
+    block3 = blocks.create_block(block_type=BlockType.for_time, session_id=session_id, position=1)
+    expected = [
+        ("block", block2.id),
+        ("block", block3.id),
+        ("exercise", exercise1.id),
+        ("block", block1.id),
+    ]
+    assert _timeline_ids(query_db, session_id) == expected
+    positions = sorted(
+        [(block.position, "block", block.id) for block in query_db.scalars(select(Block))]
+        + [(exercise.position, "exercise", exercise.id) for exercise in query_db.scalars(select(Exercise))]
+    )
+    assert positions == [(position, *item) for position, item in enumerate(expected)]
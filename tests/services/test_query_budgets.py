@@ -0,0 +1,219 @@
+"""
+Statement budgets of the service methods, checked on a real database (see
+tests/query_budget.py). Each method runs on sessions of two sizes and in
+both ordering modes under the same budget: a statement issued per block
+or exercise (N+1) cannot stay within it.
+"""
+
+import inspect
+from datetime import date
+from typing import NamedTuple
+
+import pytest
+
+from src.api.schemas.session import (
+    BlockDraftNode,
+    BlockOrder,
+    ExerciseDraftNode,
+    OrderItem,
+    SessionOrder,
+)
+from src.api.schemas.exercise import ExerciseDraft
+from src.core.settings import settings
+from src.data.models import BlockType, ExerciseType, Location, LocationType, SessionType, User
+from src.services.block_service import BlockService
+from src.services.exercise_service import ExerciseService
+from src.services.session_service import SessionService
+
+
+class Seed(NamedTuple):
+    session_id: int
+    # (kind, id) of the timeline items, in order
+    timeline: list[tuple[str, int]]
+    block_ids: list[int]
+    free_ids: list[int]
+    # Exercises of the first block
+    block_exercise_ids: list[int]
+
+
+def _timeline(size: int) -> list:
+    # size blocks of size exercises, alternating with size free exercises
+    timeline = []
+    for index in range(size):
+        timeline.append(BlockDraftNode(
+            block_type=BlockType.amrap,
+            exercises=[
+                ExerciseDraft(exercise_type=ExerciseType.deadlift, weight_kg=100 + index, repetitions=5)
+                for _ in range(size)
+            ],
+        ))
+        timeline.append(ExerciseDraftNode(exercise_type=ExerciseType.burpee, repetitions=10 + index))
+    return timeline
+
+
+def _seed(db, size: int) -> Seed:
+    db.add(User(id=1, username="athlete"))
+    db.add(Location(id=1, name="Box", location_type=LocationType.crossfit))
+    db.flush()
+    tree = SessionService(db).create_full_session(
+        name="Seed",
+        date=date(2026, 1, 5),
+        session_type=SessionType.wod,
+        user_id=1,
+        location_id=1,
+        timeline=_timeline(size),
+    )
+    blocks = [node for node in tree.timeline if node.kind == "block"]
+    return Seed(
+        session_id=tree.id,
+        timeline=[(node.kind, node.id) for node in tree.timeline],
+        block_ids=[block.id for block in blocks],
+        free_ids=[node.id for node in tree.timeline if node.kind == "exercise"],
+        block_exercise_ids=[exercise.id for exercise in blocks[0].exercises],
+    )
+
+
+def _reversed_order(s: Seed) -> SessionOrder:
+    return SessionOrder(
+        timeline=[OrderItem(kind=kind, id=item_id) for kind, item_id in reversed(s.timeline)],
+        blocks=[BlockOrder(block_id=s.block_ids[0], exercise_ids=s.block_exercise_ids[::-1])],
+    )
+
+
+# Method: (most statements it may issue, call on the seeded database)
+BUDGETS = {
+    "BlockService.get_block": (
+        3, lambda db, s: BlockService(db).get_block(s.block_ids[0]),
+    ),
+    "BlockService.list_blocks_by_session": (
+        3, lambda db, s: BlockService(db).list_blocks_by_session(s.session_id),
+    ),
+    "BlockService.session_version": (
+        1, lambda db, s: BlockService(db).session_version(s.session_id),
+    ),
+    "BlockService.create_block": (
+        8, lambda db, s: BlockService(db).create_block(
+            block_type=BlockType.emom, session_id=s.session_id, position=0
+        ),
+    ),
+    "BlockService.update_block": (
+        8, lambda db, s: BlockService(db).update_block(
+            s.block_ids[0], position=2 * len(s.block_ids) - 1, notes="Moved"
+        ),
+    ),
+    "BlockService.delete_block": (
+        9, lambda db, s: BlockService(db).delete_block(s.block_ids[0]),
+    ),
+    "ExerciseService.list_by_session": (
+        3, lambda db, s: ExerciseService(db).list_by_session(s.session_id),
+    ),
+    "ExerciseService.list_by_block": (
+        1, lambda db, s: ExerciseService(db).list_by_block(s.block_ids[0]),
+    ),
+    "ExerciseService.get_exercise": (
+        2, lambda db, s: ExerciseService(db).get_exercise(s.block_exercise_ids[-1]),
+    ),
+    "ExerciseService.session_version": (
+        1, lambda db, s: ExerciseService(db).session_version(s.session_id),
+    ),
+    "ExerciseService.get_history": (
+        1, lambda db, s: ExerciseService(db).get_history(1, ExerciseType.deadlift, max_points=3),
+    ),
+    "ExerciseService.create_exercise": (
+        11, lambda db, s: ExerciseService(db).create_exercise(
+            exercise_type=ExerciseType.deadlift, session_id=s.session_id, position=0,
+            weight_kg=200, repetitions=1,
+        ),
+    ),
+    "ExerciseService.update_exercise": (
+        12, lambda db, s: ExerciseService(db).update_exercise(
+            s.free_ids[0], position=2 * len(s.free_ids) - 1, repetitions=50
+        ),
+    ),
+    "ExerciseService.move_exercise": (
+        9, lambda db, s: ExerciseService(db).move_exercise(
+            s.free_ids[0], block_id=s.block_ids[-1], position=0
+        ),
+    ),
+    "ExerciseService.delete_exercise": (
+        7, lambda db, s: ExerciseService(db).delete_exercise(s.block_exercise_ids[0]),
+    ),
+    "SessionService.create_session": (
+        2, lambda db, s: SessionService(db).create_session(
+            name="New", date=date(2026, 1, 6), session_type=SessionType.gym, user_id=1,
+            location_id=1,
+        ),
+    ),
+    "SessionService.create_full_session": (
+        4, lambda db, s: SessionService(db).create_full_session(
+            name="Copy", date=date(2026, 1, 6), session_type=SessionType.wod, user_id=1,
+            timeline=_timeline(len(s.block_ids)),
+        ),
+    ),
+    "SessionService.get_session": (
+        1, lambda db, s: SessionService(db).get_session(s.session_id),
+    ),
+    "SessionService.session_version": (
+        1, lambda db, s: SessionService(db).session_version(s.session_id),
+    ),
+    "SessionService.bump_version": (
+        1, lambda db, s: SessionService(db).bump_version(s.session_id),
+    ),
+    "SessionService.get_session_tree_json": (
+        4, lambda db, s: SessionService(db).get_session_tree_json(s.session_id, 0),
+    ),
+    "SessionService.get_session_tree": (
+        4, lambda db, s: SessionService(db).get_session_tree(s.session_id),
+    ),
+    "SessionService.get_sessions_by_date": (
+        1, lambda db, s: SessionService(db).get_sessions_by_date(
+            session_date=date(2026, 1, 5), user_id=1
+        ),
+    ),
+    "SessionService.list_sessions_by_user": (
+        1, lambda db, s: SessionService(db).list_sessions_by_user(1, limit=10),
+    ),
+    "SessionService.get_sessions_by_location": (
+        1, lambda db, s: SessionService(db).get_sessions_by_location(1, 1),
+    ),
+    "SessionService.update_session": (
+        4, lambda db, s: SessionService(db).update_session(
+            s.session_id, name="Renamed", location_id=1
+        ),
+    ),
+    "SessionService.delete_session": (
+        5, lambda db, s: SessionService(db).delete_session(s.session_id),
+    ),
+    "SessionService.reorder_session": (
+        9, lambda db, s: SessionService(db).reorder_session(s.session_id, _reversed_order(s)),
+    ),
+}
+
+
+@pytest.mark.parametrize("size", [2, 8])
+@pytest.mark.parametrize("ordering_mode", ["dense", "fractional"])
+@pytest.mark.parametrize("method", BUDGETS)
+def test_statement_budget(
+    method, ordering_mode, size, query_db, query_budget, monkeypatch, session_tree_cache
+):
+    monkeypatch.setattr(settings, "ordering_mode", ordering_mode)
+    seed = _seed(query_db, size)
+    # As in a new request: nothing loaded in the session
+    query_db.commit()
+    query_db.expunge_all()
+    limit, call = BUDGETS[method]
+
+    with query_budget(limit, method):
+        call(query_db, seed)
+        query_db.flush()
+
+
+@pytest.mark.parametrize("service", [BlockService, ExerciseService, SessionService])
+def test_every_service_method_has_a_budget(service):
+    methods = {
+        f"{service.__name__}.{name}"
+        for name, member in vars(service).items()
+        if inspect.isfunction(member) and not name.startswith("_")
+    }
+
+    assert methods <= BUDGETS.keys()
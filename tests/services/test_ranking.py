@@ -0,0 +1,71 @@
+import random
+
+import pytest
+
+from src.services.ranking import DIGITS, evenly_spaced_keys, key_between, keys_between
+
+
+def test_key_between_empty_list():
+    assert key_between(None, None) == "V"
+
+
+def test_key_between_bounds():
+    assert "A" < key_between("A", "C") < "C"
+    assert "A" < key_between("A", "B") < "B"
+    assert key_between("A", None) > "A"
+    assert key_between(None, "A") < "A"
+
+
+def test_key_between_invalid_bounds():
+    with pytest.raises(ValueError, match="Invalid rank bounds"):
+        key_between("B", "A")
+
+
+def test_appends_and_prepends_keep_keys_short():
+    keys = ["V"]
+    for _ in range(1000):
+        keys.append(key_between(keys[-1], None))
+        keys.insert(0, key_between(None, keys[0]))
+
+    assert keys == sorted(keys)
+    assert max(len(key) for key in keys) <= 40
+
+
+def test_random_inserts_stay_sorted_and_unique():
+    rnd = random.Random(42)
+    keys: list[str] = []
+    for _ in range(500):
+        index = rnd.randint(0, len(keys))
+        low = keys[index - 1] if index > 0 else None
+        high = keys[index] if index < len(keys) else None
+        key = key_between(low, high)
+        assert not key.endswith(DIGITS[0])
+        keys.insert(index, key)
+
+    assert keys == sorted(keys)
+    assert len(set(keys)) == len(keys)
+
+
+@pytest.mark.parametrize("count", [0, 1, 10, 61, 62, 1000])
+def test_evenly_spaced_keys(count):
+    keys = evenly_spaced_keys(count)
+
+    assert len(keys) == count
+    assert keys == sorted(keys)
+    assert len(set(keys)) == count
+    assert all(key and not key.endswith(DIGITS[0]) for key in keys)
+
+
+@pytest.mark.parametrize("low, high", [(None, None), ("A", None), (None, "A"), ("A", "B"), ("A", "A1")])
+def test_keys_between(low, high):
+    keys = keys_between(low, high, 100)
+
+    assert len(keys) == 100
+    assert keys == sorted(set(keys))
+    assert low is None or low < keys[0]
+    assert high is None or keys[-1] < high
+    assert max(len(key) for key in keys) <= 9
+
+
+def test_keys_between_nothing():
+    assert keys_between("A", "B", 0) == []
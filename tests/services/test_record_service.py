@@ -0,0 +1,152 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.data.models import Exercise, ExerciseType, PersonalRecord, RecordMetric
+
+
+def make_exercise(**values):
+    exercise = Exercise(exercise_type=values.pop("exercise_type", ExerciseType.deadlift), session_id=1)
+    exercise.id = values.pop("id", 5)
+    for name, value in values.items():
+        setattr(exercise, name, value)
+    return exercise
+
+
+def make_record(metric, value, qualifier=0.0, exercise_id=5, exercise_type=ExerciseType.deadlift):
+    return PersonalRecord(
+        user_id=1,
+        exercise_type=exercise_type,
+        metric=metric,
+        qualifier=qualifier,
+        value=value,
+        exercise_id=exercise_id,
+    )
+
+
+def test_candidates(record_service):
+    exercise = make_exercise(weight_kg=60, repetitions=5, duration_seconds=0, distance_meters=None)
+
+    assert record_service.candidates(exercise) == {
+        (ExerciseType.deadlift, RecordMetric.max_weight, 0.0): 60,
+        (ExerciseType.deadlift, RecordMetric.max_reps, 60.0): 5,
+    }
+
+
+def test_list_records(record_service, mock_services_dao):
+    mock_services_dao['record'].list_by_user.return_value = ["r1"]
+
+    assert record_service.list_records(1) == ["r1"]
+    mock_services_dao['record'].list_by_user.assert_called_once_with(1)
+
+
+def test_new_exercise_creates_and_improves_records(record_service, mock_services_dao):
+    mock_dao = mock_services_dao['record']
+    mock_services_dao['record_session'].get_by_id.return_value = MagicMock(user_id=1)
+    max_weight = make_record(RecordMetric.max_weight, 50, exercise_id=2)
+    mock_dao.list_by_type.return_value = [max_weight]
+
+    record_service.exercise_saved(make_exercise(weight_kg=60, repetitions=5), new=True)
+
+    mock_dao.list_held.assert_not_called()
+    mock_dao.list_by_type.assert_called_once_with(1, ExerciseType.deadlift)
+    assert (max_weight.value, max_weight.exercise_id) == (60, 5)
+    created = mock_dao.create.call_args.args[0]
+    assert (created.metric, created.qualifier, created.value, created.exercise_id) == (
+        RecordMetric.max_reps, 60.0, 5, 5
+    )
+
+
+def test_exercise_of_missing_session(record_service, mock_services_dao):
+    mock_services_dao['record_session'].get_by_id.return_value = None
+
+    with pytest.raises(ValueError, match="Session not found"):
+        record_service.exercise_saved(make_exercise(weight_kg=60), new=True)
+
+    mock_services_dao['record'].create.assert_not_called()
+
+
+def test_worse_exercise_keeps_records(record_service, mock_services_dao):
+    mock_dao = mock_services_dao['record']
+    mock_services_dao['record_session'].get_by_id.return_value = MagicMock(user_id=1)
+    max_weight = make_record(RecordMetric.max_weight, 100, exercise_id=2)
+    mock_dao.list_by_type.return_value = [max_weight]
+
+    record_service.exercise_saved(make_exercise(weight_kg=60), new=True)
+
+    assert (max_weight.value, max_weight.exercise_id) == (100, 2)
+    mock_dao.create.assert_not_called()
+
+
+def test_update_holder_improving_needs_no_recompute(record_service, mock_services_dao):
+    mock_dao = mock_services_dao['record']
+    mock_services_dao['record_session'].get_by_id.return_value = MagicMock(user_id=1)
+    max_weight = make_record(RecordMetric.max_weight, 60)
+    mock_dao.list_held.return_value = [max_weight]
+    mock_dao.list_by_type.return_value = [max_weight]
+
+    record_service.exercise_saved(make_exercise(weight_kg=70))
+
+    mock_dao.list_held.assert_called_once_with(id=5)
+    mock_dao.best.assert_not_called()
+    assert max_weight.value == 70
+
+
+def test_update_holder_getting_worse_recomputes(record_service, mock_services_dao):
+    mock_dao = mock_services_dao['record']
+    mock_services_dao['record_session'].get_by_id.return_value = MagicMock(user_id=1)
+    best_time = make_record(RecordMetric.best_time, 90, qualifier=400.0)
+    mock_dao.list_held.return_value = [best_time]
+    mock_dao.list_by_type.return_value = [best_time]
+    mock_dao.best.return_value = (8, 95)
+
+    record_service.exercise_saved(make_exercise(duration_seconds=120, distance_meters=400))
+
+    mock_dao.best.assert_called_once_with(
+        user_id=1,
+        exercise_type=ExerciseType.deadlift,
+        value_column="duration_seconds",
+        qualifier_column="distance_meters",
+        qualifier=400.0,
+        lowest=True,
+        exclude={},
+    )
+    assert (best_time.value, best_time.exercise_id) == (95, 8)
+
+
+def test_forget_recomputes_or_deletes_held_records(record_service, mock_services_dao):
+    mock_dao = mock_services_dao['record']
+    max_weight = make_record(RecordMetric.max_weight, 100)
+    max_reps = make_record(RecordMetric.max_reps, 5, qualifier=100.0)
+    mock_dao.list_held.return_value = [max_weight, max_reps]
+    mock_dao.best_many.return_value = [(3, 90), None]
+
+    record_service.forget(session_id=4)
+
+    mock_dao.list_held.assert_called_once_with(session_id=4)
+    searches = mock_dao.best_many.call_args.args[0]
+    assert [search["value_column"] for search in searches] == ["weight_kg", "repetitions"]
+    assert searches[1]["qualifier"] == 100.0
+    assert all(search["exclude"] == {"session_id": 4} for search in searches)
+    assert (max_weight.value, max_weight.exercise_id) == (90, 3)
+    mock_dao.delete_all.assert_called_once_with([max_reps])
+
+
+def test_exercises_created_share_one_lookup(record_service, mock_services_dao):
+    mock_dao = mock_services_dao['record']
+    mock_dao.list_by_user.return_value = []
+    mock_dao.create.side_effect = lambda record: record
+
+    record_service.exercises_created(1, iter([
+        make_exercise(id=5, weight_kg=60),
+        make_exercise(id=6, weight_kg=80),
+        make_exercise(id=7, exercise_type=ExerciseType.plank, duration_seconds=30),
+    ]))
+
+    mock_dao.list_by_user.assert_called_once_with(1)
+    created = [call.args[0] for call in mock_dao.create.call_args_list]
+    # The second deadlift improved the record created by the first one
+    assert [(r.exercise_type, r.metric, r.value, r.exercise_id) for r in created] == [
+        (ExerciseType.deadlift, RecordMetric.max_weight, 80, 6),
+        (ExerciseType.plank, RecordMetric.best_time, 30, 7),
+    ]
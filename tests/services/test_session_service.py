@@ -1,7 +1,10 @@
+import json
 import pytest
+from collections import namedtuple
 from unittest.mock import MagicMock
 from datetime import date
-from src.data.models import Session, SessionType
+from src.api.schemas.session import BlockDraftNode, ExerciseDraftNode, SessionOrder
+from src.data.models import Block, BlockType, Exercise, ExerciseType, Session, SessionType
 
 def test_create_session(session_service,mock_services_dao):
     mock_dao = mock_services_dao['session']
@@ -62,11 +65,22 @@ def test_update_session_with_location(session_service,mock_services_dao):
 
     location_service.get_location.assert_called_once_with(2)
     mock_dao.update.assert_called_once_with(mock_session)
+    mock_dao.bump_version.assert_called_once_with(1)
     assert mock_session.name == "Updated WOD"
     assert mock_session.location_id == 2
     assert result == mock_session
 
 
+def test_session_version(session_service, mock_services_dao):
+    mock_dao = mock_services_dao['session']
+    mock_dao.get_version.return_value = 2
+
+    assert session_service.session_version(1) == 2
+    session_service.bump_version(1)
+    mock_dao.get_version.assert_called_once_with(1)
+    mock_dao.bump_version.assert_called_once_with(1)
+
+
 def test_update_session_invalid_location(session_service, mock_services_dao):
     location_service = mock_services_dao['session_location']
     mock_dao = mock_services_dao['session']
@@ -97,14 +111,52 @@ def test_get_sessions_by_date(session_service, mock_services_dao):
     assert result == mock_session
 
 
+SessionRow = namedtuple("SessionRow", Session.__table__.columns.keys())
+
+
+def _history(count):
+    # Core rows, as returned by SessionDAO.list_by_user
+    return [
+        SessionRow(
+            id=10 - index, name="WOD", date=date(2026, 1, 20 - index),
+            session_type=SessionType.wod, user_id=1, location_id=None, notes=None, version=0,
+        )
+        for index in range(count)
+    ]
+
+
 def test_list_sessions_by_user(session_service, mock_services_dao):
     mock_dao = mock_services_dao['session']
-    mock_list = [MagicMock(), MagicMock()]
-    mock_dao.list_by_user.return_value = mock_list
+    mock_dao.list_by_user.return_value = _history(2)
 
-    result = session_service.list_sessions_by_user(user_id=1)
-    mock_dao.list_by_user.assert_called_once_with(1)
-    assert result == mock_list
+    page = session_service.list_sessions_by_user(user_id=1)
+
+    mock_dao.list_by_user.assert_called_once_with(
+        1, limit=51, before=None, date_from=None, date_to=None,
+    )
+    assert [session["id"] for session in page["items"]] == [10, 9]
+    assert page["next_cursor"] is None
+
+
+def test_list_sessions_by_user_next_page(session_service, mock_services_dao):
+    mock_dao = mock_services_dao['session']
+    mock_dao.list_by_user.return_value = _history(3)
+
+    page = session_service.list_sessions_by_user(
+        1, limit=2, date_from=date(2026, 1, 1), date_to=date(2026, 1, 31),
+    )
+
+    assert [session["id"] for session in page["items"]] == [10, 9]
+    assert page["next_cursor"] is not None
+
+    session_service.list_sessions_by_user(1, limit=2, cursor=page["next_cursor"])
+    assert mock_dao.list_by_user.call_args.kwargs["before"] == (date(2026, 1, 19), 9)
+
+
+@pytest.mark.parametrize("cursor", ["%%%", "bm9wZQ", "MjAyNi0xMy0wMXw5"])
+def test_list_sessions_by_user_invalid_cursor(session_service, cursor):
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        session_service.list_sessions_by_user(1, cursor=cursor)
 
 def test_get_sessions_by_location_and_user(session_service, mock_services_dao):
     mock_dao = mock_services_dao['session']
@@ -127,11 +179,12 @@ def test_update_session_not_found(session_service, mock_services_dao):
 
 def test_delete_session_success(session_service, mock_services_dao):
     mock_dao = mock_services_dao['session']
-    mock_session = MagicMock()
+    mock_session = MagicMock(id=1)
     mock_dao.get_by_id.return_value = mock_session
 
     session_service.delete_session(1)
     mock_dao.get_by_id.assert_called_once_with(1)
+    mock_services_dao['session_records'].forget.assert_called_once_with(session_id=1)
     mock_dao.delete.assert_called_once_with(mock_session)
 
 
@@ -141,3 +194,176 @@ def test_delete_session_not_found(session_service, mock_services_dao):
 
     with pytest.raises(ValueError, match="Session not found"):
         session_service.delete_session(99)
+
+
+def test_reorder_session(session_service, mock_services_dao, monkeypatch):
+    reorder = MagicMock()
+    monkeypatch.setattr(session_service.ordering, "reorder_session", reorder)
+    order = SessionOrder(
+        timeline=[{"kind": "block", "id": 1}, {"kind": "exercise", "id": 7}],
+        blocks=[{"block_id": 1, "exercise_ids": [5, 4]}],
+    )
+
+    result = session_service.reorder_session(3, order)
+
+    reorder.assert_called_once_with(3, [("block", 1), ("exercise", 7)], {1: [5, 4]})
+    assert result == reorder.return_value
+
+
+
+def _tree_session():
+    session = Session(
+        id=3, name="WOD", date=date(2026, 1, 1), session_type=SessionType.wod, user_id=1,
+    )
+    block = Block(id=1, block_type=BlockType.amrap, session_id=3, position=1, rank="M")
+    block.exercises = [
+        Exercise(id=5, exercise_type=ExerciseType.pull_up, session_id=3, block_id=1,
+                 position_in_block=1, rank_in_block="B"),
+        Exercise(id=4, exercise_type=ExerciseType.burpee, session_id=3, block_id=1,
+                 position_in_block=0, rank_in_block="C"),
+    ]
+    session.blocks = [block]
+    session.exercises = [
+        Exercise(id=7, exercise_type=ExerciseType.burpee, session_id=3, position=0, rank="Z"),
+    ]
+    return session
+
+
+def test_get_session_tree_dense(session_service, mock_services_dao):
+    mock_services_dao['session'].get_tree.return_value = _tree_session()
+
+    tree = session_service.get_session_tree(3)
+
+    mock_services_dao['session'].get_tree.assert_called_once_with(3)
+    assert [(node.kind, node.id, node.position) for node in tree.timeline] == [
+        ("exercise", 7, 0),
+        ("block", 1, 1),
+    ]
+    assert [(e.id, e.position_in_block) for e in tree.timeline[1].exercises] == [(4, 0), (5, 1)]
+
+
+def test_get_session_tree_fractional(session_service, mock_services_dao, fractional_ordering):
+    mock_services_dao['session'].get_tree.return_value = _tree_session()
+
+    tree = session_service.get_session_tree(3)
+
+    assert [(node.kind, node.id, node.position) for node in tree.timeline] == [
+        ("block", 1, 0),
+        ("exercise", 7, 1),
+    ]
+    assert [(e.id, e.position_in_block) for e in tree.timeline[0].exercises] == [(5, 0), (4, 1)]
+
+
+def test_get_session_tree_not_found(session_service, mock_services_dao):
+    mock_services_dao['session'].get_tree.return_value = None
+
+    assert session_service.get_session_tree(3) is None
+
+
+def test_get_session_tree_json_is_cached_by_version(
+    session_service, mock_services_dao, session_tree_cache
+):
+    mock_dao = mock_services_dao['session']
+    mock_dao.get_tree.return_value = _tree_session()
+
+    body = session_service.get_session_tree_json(3, 0)
+
+    assert json.loads(body)["timeline"][0]["id"] == 7
+    assert session_service.get_session_tree_json(3, 0) == body
+    mock_dao.get_tree.assert_called_once_with(3)
+
+    session_service.get_session_tree_json(3, 1)
+    assert mock_dao.get_tree.call_count == 2
+
+
+def test_get_session_tree_json_not_found(session_service, mock_services_dao, session_tree_cache):
+    mock_services_dao['session'].get_tree.return_value = None
+
+    assert session_service.get_session_tree_json(3, 0) is None
+    assert len(session_tree_cache.backend) == 0
+
+
+
+
+def _full_session_timeline():
+    return [
+        BlockDraftNode(
+            block_type=BlockType.amrap,
+            duration=12,
+            exercises=[
+                {"exercise_type": ExerciseType.pull_up, "repetitions": 5},
+                {"exercise_type": ExerciseType.burpee, "repetitions": 10},
+            ],
+        ),
+        ExerciseDraftNode(exercise_type=ExerciseType.deadlift, weight_kg=100),
+    ]
+
+
+def _create_full_session(session_service, mock_services_dao):
+    mock_dao = mock_services_dao['session']
+    mock_dao.create.side_effect = lambda session: setattr(session, "id", 3) or session
+    mock_services_dao['session_block'].insert_many.return_value = {0: 11}
+    mock_services_dao['session_exercise'].insert_many.return_value = {
+        (11, 0): 21, (11, 1): 22, (None, 1): 23,
+    }
+    return session_service.create_full_session(
+        name="WOD",
+        date=date(2026, 1, 1),
+        session_type=SessionType.wod,
+        user_id=1,
+        timeline=_full_session_timeline(),
+    )
+
+
+def test_create_full_session_inserts_in_batches(session_service, mock_services_dao):
+    tree = _create_full_session(session_service, mock_services_dao)
+
+    mock_services_dao['session'].create.assert_called_once()
+    [block_rows] = mock_services_dao['session_block'].insert_many.call_args.args
+    assert block_rows == [{
+        "block_type": BlockType.amrap, "position": 0, "rank": None,
+        "session_id": 3, "duration": 12, "notes": None,
+    }]
+    [exercise_rows] = mock_services_dao['session_exercise'].insert_many.call_args.args
+    assert [(row["block_id"], row["position"], row["position_in_block"]) for row in exercise_rows] == [
+        (11, None, 0), (11, None, 1), (None, 1, None),
+    ]
+
+    assert tree.id == 3
+    assert [(node.kind, node.id, node.position) for node in tree.timeline] == [
+        ("block", 11, 0), ("exercise", 23, 1),
+    ]
+    block = tree.timeline[0]
+    assert [(e.id, e.position_in_block, e.repetitions) for e in block.exercises] == [
+        (21, 0, 5), (22, 1, 10),
+    ]
+    # Records are updated with all the new exercises at once
+    user_id, exercises = mock_services_dao['session_records'].exercises_created.call_args.args
+    assert user_id == 1
+    assert sorted(e.id for e in exercises) == [21, 22, 23]
+
+
+def test_create_full_session_fractional_sets_ranks(
+    session_service, mock_services_dao, fractional_ordering
+):
+    _create_full_session(session_service, mock_services_dao)
+
+    [block_rows] = mock_services_dao['session_block'].insert_many.call_args.args
+    [exercise_rows] = mock_services_dao['session_exercise'].insert_many.call_args.args
+    assert block_rows[0]["rank"] < exercise_rows[2]["rank"]
+    assert exercise_rows[0]["rank_in_block"] < exercise_rows[1]["rank_in_block"]
+
+
+def test_create_full_session_invalid_location(session_service, mock_services_dao):
+    mock_services_dao['session_location'].get_location.return_value = None
+
+    with pytest.raises(ValueError, match="Location with id 9 not found"):
+        session_service.create_full_session(
+            name="WOD",
+            date=date(2026, 1, 1),
+            session_type=SessionType.wod,
+            user_id=1,
+            location_id=9,
+            timeline=[],
+        )
+    mock_services_dao['session_block'].insert_many.assert_not_called()
@@ -54,3 +54,10 @@ def test_get_user_not_found(user_service, mock_services_dao):
 
     mock_dao.get_by_id.assert_called_once_with(99)
     assert result is None
+
+
+def test_list_records(user_service, mock_services_dao):
+    mock_services_dao['user_records'].list_records.return_value = ["r1"]
+
+    assert user_service.list_records(1) == ["r1"]
+    mock_services_dao['user_records'].list_records.assert_called_once_with(1)